@@ -3,7 +3,12 @@ import type {
   SessionInfo,
   PrefectureDataResponse,
   RiskAtTimeResponse,
-  MeshDetailResponse
+  MeshOrderResponse,
+  MeshDetailResponse,
+  RainfallAdjustmentRequest,
+  SessionRainfallAdjustmentResponse,
+  RainfallScenario,
+  RainfallScenariosResponse
 } from '../types/api';
 
 // API Base URL
@@ -52,6 +57,27 @@ class SessionAPIClient {
     return response.data;
   }
 
+  /**
+   * リスクベクトルのメッシュ順取得（セッションごとに一度）
+   */
+  async getMeshOrder(sessionId: string): Promise<MeshOrderResponse> {
+    const response = await axios.get<MeshOrderResponse>(
+      `${this.apiBaseUrl}/session/${sessionId}/mesh-order`
+    );
+    return response.data;
+  }
+
+  /**
+   * 指定時刻のリスクベクトル取得（mesh-order 順の uint8 バイナリ）
+   */
+  async getRiskVector(sessionId: string, ft: number): Promise<Uint8Array> {
+    const response = await axios.get<ArrayBuffer>(
+      `${this.apiBaseUrl}/session/${sessionId}/risk-at-time`,
+      { params: { ft, format: 'binary' }, responseType: 'arraybuffer' }
+    );
+    return new Uint8Array(response.data);
+  }
+
   /**
    * メッシュ詳細データ取得
    */
@@ -62,6 +88,34 @@ class SessionAPIClient {
     return response.data;
   }
 
+  /**
+   * セッションの計算結果に対する雨量調整（影響メッシュのみ再計算）
+   */
+  async adjustRainfall(
+    sessionId: string,
+    request: Pick<RainfallAdjustmentRequest, 'area_adjustments' | 'subdivision_adjustments'>
+  ): Promise<SessionRainfallAdjustmentResponse> {
+    const response = await axios.post<SessionRainfallAdjustmentResponse>(
+      `${this.apiBaseUrl}/session/${sessionId}/rainfall-adjustment`,
+      request
+    );
+    return response.data;
+  }
+
+  /**
+   * 複数の雨量調整シナリオを一括評価（市町村・二次細分の危険度のみ）
+   */
+  async evaluateRainfallScenarios(
+    sessionId: string,
+    scenarios: RainfallScenario[]
+  ): Promise<RainfallScenariosResponse> {
+    const response = await axios.post<RainfallScenariosResponse>(
+      `${this.apiBaseUrl}/session/${sessionId}/rainfall-scenarios`,
+      { scenarios }
+    );
+    return response.data;
+  }
+
   /**
    * セッション削除
    */
@@ -149,6 +149,45 @@ export interface RainfallAdjustmentRequest {
 
 // セッションベースAPI用の型定義
 
+export interface SessionRainfallAdjustmentResponse {
+  status: string;
+  session_id: string;
+  swi_initial_time: string;
+  guidance_initial_time: string;
+  prefectures: Record<string, Partial<Prefecture>>;  // 影響を受けた市町村・メッシュのみ
+  adjusted: boolean;
+  adjusted_mesh_count: number;
+  elapsed_ms: number;
+}
+
+export interface RainfallScenario {
+  name?: string;
+  scale?: Record<string, number | Record<number, number>>;  // キー → 倍率（全FT or FT別）
+  area_adjustments?: Record<string, Record<number, number>>;
+  subdivision_adjustments?: Record<string, Record<number, number>>;
+}
+
+export interface ScenarioRiskPrefecture {
+  name: string;
+  code: string;
+  areas: { name: string; risk_timeline: RiskTimePoint[] }[];
+  secondary_subdivisions: { name: string; risk_timeline: RiskTimePoint[] }[];
+}
+
+export interface RainfallScenariosResponse {
+  status: string;
+  session_id: string;
+  swi_initial_time: string;
+  guidance_initial_time: string;
+  baseline: { prefectures: Record<string, ScenarioRiskPrefecture> };
+  scenarios: {
+    name: string;
+    adjusted_mesh_count: number;
+    prefectures: Record<string, ScenarioRiskPrefecture>;
+  }[];
+  elapsed_ms: number;
+}
+
 export interface SessionInfo {
   session_id: string;
   created_at: string;               // ISO8601形式
@@ -167,6 +206,7 @@ export interface LightweightCalculationResult {
   guidance_initial_time: string;    // ガイダンス初期時刻（ISO8601）
   available_prefectures: string[];  // 利用可能な府県コード
   available_times: number[];        // 利用可能なFT値
+  shared_result?: boolean;          // 他セッションの計算結果を共有したか
   cache_info?: CacheInfo;           // キャッシュ情報
   used_urls?: {                     // 使用したGRIB2 URL
     swi_url: string;
@@ -189,6 +229,14 @@ export interface RiskAtTimeResponse {
   error?: string;
 }
 
+export interface MeshOrderResponse {
+  status: 'success' | 'error';
+  mesh_count: number;
+  mesh_codes: string[];  // リスクベクトルの並び順
+  risk_fts: number[];    // リスクベクトルが存在するFT
+  error?: string;
+}
+
 export interface MeshDetailResponse {
   status: 'success' | 'error';
   mesh: Mesh;
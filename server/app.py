@@ -20,8 +20,14 @@ from api.routes.test_routes import test_bp, init_test_routes
 from api.routes.performance_routes import performance_bp, init_performance_routes
 from api.routes.cache_routes import cache_bp
 from api.routes.rainfall_routes import rainfall_bp
+from api.routes.instrumentation_routes import instrumentation_bp
 from api.routes.session_routes import create_session_blueprint
+from api.routes.metrics_routes import create_metrics_blueprint
 from api.controllers.session_controller import SessionController
+from api.controllers.metrics_controller import MetricsController
+from services.metrics_service import MetricsService
+from services.rainfall_recompute_service import RainfallRecomputeService
+from src.config.config_service import ConfigService
 
 def create_app(data_dir: str = "data"):
     """Flaskアプリケーション作成ファクトリー"""
@@ -37,16 +43,24 @@ def create_app(data_dir: str = "data"):
     # main_routes.pyで作成されたsession_serviceを使用
     from api.routes.main_routes import session_service
     if session_service:
-        session_controller = SessionController(session_service)
+        recompute_service = RainfallRecomputeService(
+            data_dir,
+            max_scenarios=ConfigService().get("rainfall_adjustment.max_scenarios", 16))
+        session_controller = SessionController(session_service, recompute_service)
         session_bp = create_session_blueprint(session_controller)
         app.register_blueprint(session_bp, url_prefix='/api')
 
+    # メトリクスBlueprint作成と登録（セッション統計も出力）
+    metrics_controller = MetricsController(MetricsService(session_service))
+    app.register_blueprint(create_metrics_blueprint(metrics_controller))
+
     # Blueprint登録
     app.register_blueprint(main_bp)
     app.register_blueprint(test_bp)
     app.register_blueprint(performance_bp)
     app.register_blueprint(cache_bp)
     app.register_blueprint(rainfall_bp)
+    app.register_blueprint(instrumentation_bp)
 
     return app
 
@@ -80,6 +94,8 @@ if __name__ == '__main__':
     logger.info("    GET  /api/test-csv-optimization")
     logger.info("    GET  /api/test-parallel-processing")
     logger.info("    GET  /api/test-optimization-analysis")
+    logger.info("    GET  /api/performance/stages")
+    logger.info("    POST /api/performance/stages/reset")
     logger.info("  キャッシュAPI (cache_bp):")
     logger.info("    GET    /api/cache/list")
     logger.info("    GET    /api/cache/stats")
@@ -93,11 +109,14 @@ if __name__ == '__main__':
     logger.info("  セッション管理API (session_bp):")
     logger.info("    GET    /api/session/<session_id>")
     logger.info("    GET    /api/session/<session_id>/prefecture/<prefecture_code>")
-    logger.info("    GET    /api/session/<session_id>/risk-at-time?ft=<ft>")
+    logger.info("    GET    /api/session/<session_id>/risk-at-time?ft=<ft>[&format=binary|array]")
+    logger.info("    GET    /api/session/<session_id>/mesh-order")
     logger.info("    GET    /api/session/<session_id>/mesh/<mesh_code>")
     logger.info("    DELETE /api/session/<session_id>")
     logger.info("    GET    /api/sessions")
     logger.info("    GET    /api/sessions/stats")
     logger.info("    POST   /api/sessions/cleanup")
+    logger.info("  メトリクスAPI (metrics_bp):")
+    logger.info("    GET    /metrics")
 
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+"""
+計算結果キャッシュ読み書きのベンチマーク（cache.write / cache.read）
+"""
+import pytest
+
+from services.cache_service import CacheService
+
+CACHE_KEY = "swi_20230602000000_guid_20230602000000"
+
+
+@pytest.fixture(scope="module")
+def cache_service(tmp_path_factory) -> CacheService:
+    return CacheService(cache_dir=str(tmp_path_factory.mktemp("bench_cache")))
+
+
+@pytest.mark.benchmark(group="cache")
+def bench_cache_write(run, cache_service, result):
+    # 既存エントリを消してから書き込む（毎回新規作成）
+    run(cache_service.set_cached_result, CACHE_KEY, result,
+        result["initial_time"], result["initial_time"],
+        setup=lambda: cache_service.invalidate_cache(CACHE_KEY))
+    assert cache_service.exists(CACHE_KEY)
+
+
+@pytest.mark.benchmark(group="cache")
+def bench_cache_read(run, cache_service, result):
+    if not cache_service.exists(CACHE_KEY):
+        cache_service.set_cached_result(CACHE_KEY, result,
+                                        result["initial_time"], result["initial_time"])
+    cached = run(cache_service.get_cached_result, CACHE_KEY)
+    assert cached["prefectures"].keys() == result["prefectures"].keys()
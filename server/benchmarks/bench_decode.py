@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+"""
+GRIB2 解析のベンチマーク（decode.swi / decode.guidance）
+"""
+import pytest
+
+
+@pytest.mark.benchmark(group="decode")
+def bench_decode_swi(run, main_service, swi_bytes):
+    base_info, swi_grib2 = run(main_service.grib2_service.unpack_swi_grib2, swi_bytes)
+    assert len(swi_grib2["swi"]) == base_info.grid_num
+
+
+@pytest.mark.benchmark(group="decode")
+def bench_decode_guidance(run, main_service, guidance_bytes):
+    _, guidance_grib2 = run(main_service.grib2_service.unpack_guidance_grib2, guidance_bytes)
+    assert guidance_grib2["data_1h"] and guidance_grib2["data_3h"]
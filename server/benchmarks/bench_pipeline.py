@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+地域データ構築・メッシュ計算・集約・結果作成のベンチマーク
+
+catalog.load / areas.build / calc.mesh / aggregate / serialize / serialize.json
+"""
+import json
+
+import pytest
+
+from services.mesh_catalog import get_mesh_catalog_registry
+
+
+@pytest.mark.benchmark(group="areas")
+def bench_catalog_load(run, main_service):
+    """保存済みカタログを開き直す（プロセス起動直後の1回目に相当）"""
+    main_service.data_service.get_mesh_catalog()
+    catalog = run(main_service.data_service.get_mesh_catalog,
+                  setup=get_mesh_catalog_registry().clear)
+    assert len(catalog) > 0
+
+
+@pytest.mark.benchmark(group="areas")
+def bench_prepare_areas(run, main_service):
+    """カタログ読み込み済みの状態から Prefecture / Area / Mesh を構築"""
+    main_service.data_service.get_mesh_catalog()
+    prefectures = run(main_service.data_service.prepare_areas)
+    assert prefectures
+
+
+@pytest.mark.benchmark(group="calc")
+def bench_calc_mesh(run, calculate, calculated, decoded):
+    # 計算済みメッシュを同じ入力で上書きする（結果は変わらない）
+    run(calculate, calculated, *decoded)
+
+
+@pytest.mark.benchmark(group="calc")
+def bench_aggregate(run, main_service, calculated):
+    aggregates = run(main_service._aggregate, calculated)
+    assert aggregates
+
+
+@pytest.mark.benchmark(group="serialize")
+def bench_serialize(run, main_service, calculated):
+    prefectures = run(main_service._serialize_prefectures, calculated)
+    assert len(prefectures) == len(calculated)
+
+
+@pytest.mark.benchmark(group="serialize")
+def bench_serialize_json(run, result):
+    # jsonify と同じく ASCII エスケープなし
+    text = run(json.dumps, result, ensure_ascii=False)
+    assert text.startswith("{")
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+雨量調整の差分再計算のベンチマーク（recompute / scenarios）
+
+同梱データの計算結果から AdjustmentBase を作り、メッシュ数が最大の市町村1つを
+調整したときの再計算時間を計測する。目標はスライダー操作1回あたり100ms未満
+（RECOMPUTE_TARGET_SECONDS、計測の最小値で判定）。
+"""
+import pytest
+
+from services.rainfall_recompute_service import RainfallRecomputeService, decode_initial_tanks
+from services.session_index import SessionIndex
+
+RECOMPUTE_TARGET_SECONDS = 0.1
+SCENARIO_COUNT = 4
+
+
+@pytest.fixture(scope="module")
+def recompute_service() -> RainfallRecomputeService:
+    return RainfallRecomputeService()
+
+
+@pytest.fixture(scope="module")
+def adjustment_base(recompute_service, result):
+    prefectures = result["prefectures"]
+    initial_tanks = decode_initial_tanks(result.get("initial_tanks"))
+    index = SessionIndex.build(prefectures, initial_tanks)
+    return recompute_service.get_base(
+        "bench", lambda: prefectures, index, lambda lats, lons: index.initial_tanks)
+
+
+@pytest.fixture(scope="module")
+def largest_area(result) -> str:
+    """メッシュ数が最大の市町村キー（"府県名_市町村名"）"""
+    areas = [
+        (len(area["meshes"]), f"{pref['name']}_{area['name']}")
+        for pref in result["prefectures"].values()
+        for area in pref["areas"]
+    ]
+    return max(areas)[1]
+
+
+@pytest.mark.benchmark(group="recompute")
+def bench_recompute_municipality(run, benchmark, recompute_service, adjustment_base, largest_area):
+    adjustments = adjustment_base.scaled_adjustments({largest_area: 1.5})
+    recomputed = run(recompute_service.recompute, adjustment_base, adjustments)
+    assert recomputed["adjusted_mesh_count"] > 0
+    assert benchmark.stats.stats.min < RECOMPUTE_TARGET_SECONDS
+
+
+@pytest.mark.benchmark(group="recompute")
+def bench_evaluate_scenarios(run, recompute_service, adjustment_base, largest_area):
+    scenarios = [
+        adjustment_base.scaled_adjustments({largest_area: 1.0 + 0.25 * (i + 1)})
+        for i in range(SCENARIO_COUNT)
+    ]
+    evaluated = run(recompute_service.evaluate_scenarios, adjustment_base, scenarios)
+    assert len(evaluated["scenarios"]) == SCENARIO_COUNT
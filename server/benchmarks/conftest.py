@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+ベンチマーク共通フィクスチャ
+
+同梱データ（data/*.bin・CSV）で GRIB2 解析〜計算結果作成の各段階を計測する。
+重い段階は前段の結果をセッション単位で使い回す（全府県の計算結果を
+複数持つとメモリに収まらないため、計算・集約は同じ Prefecture を上書きする）。
+
+オプション:
+    --bench-prefectures shiga,nara  計測対象の府県（省略時は data_dir の全府県）
+    --bench-rounds 3                各ベンチマークの計測回数（省略時は設定 benchmark.rounds）
+"""
+import logging
+import os
+import shutil
+import sys
+
+import pytest
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+sys.path.append(os.path.join(project_root, 'src'))
+
+from services.main_service import MainService
+from src.config.config_service import ConfigService
+
+DATA_DIR = os.path.join(project_root, "data")
+SWI_FILE = os.path.join(DATA_DIR, "Z__C_RJTD_20230602000000_SRF_GPV_Ggis1km_Psw_Aper10min_ANAL_grib2.bin")
+GUIDANCE_FILE = os.path.join(DATA_DIR, "guid_msm_grib2_20230602000000_rmax00.bin")
+
+
+def pytest_addoption(parser):
+    parser.addoption("--bench-prefectures", default=None,
+                     help="計測対象の府県コード（カンマ区切り、省略時は全府県）")
+    parser.addoption("--bench-rounds", type=int, default=None,
+                     help="各ベンチマークの計測回数")
+
+
+def pytest_configure(config):
+    # 処理ログは計測の邪魔になるため警告以上のみ
+    logging.getLogger().setLevel(logging.WARNING)
+
+
+@pytest.fixture(scope="session")
+def rounds(request) -> int:
+    return request.config.getoption("--bench-rounds") or \
+        ConfigService().get("benchmark.rounds", 3)
+
+
+@pytest.fixture
+def run(benchmark, rounds):
+    """
+    benchmark.pedantic の省略形（1回＝1ラウンド、ウォームアップなし）
+
+    setup は各ラウンドの前に呼ばれ、計測には含まれない。
+    """
+    def _run(func, *args, setup=None, **kwargs):
+        def _setup():
+            if setup is not None:
+                setup()
+            return args, kwargs
+        return benchmark.pedantic(func, setup=_setup, rounds=rounds, iterations=1)
+    return _run
+
+
+@pytest.fixture(scope="session")
+def data_dir(request, tmp_path_factory) -> str:
+    """計測用データディレクトリ（府県指定時は該当CSVだけをコピー）"""
+    selected = request.config.getoption("--bench-prefectures")
+    if not selected:
+        return DATA_DIR
+
+    subset_dir = tmp_path_factory.mktemp("bench_data")
+    for code in selected.split(","):
+        code = code.strip()
+        dosha = os.path.join(DATA_DIR, f"dosha_{code}.csv")
+        if not os.path.exists(dosha):
+            raise pytest.UsageError(f"dosha CSV が見つかりません: {dosha}")
+        shutil.copy(dosha, subset_dir)
+        dosyakei = os.path.join(DATA_DIR, f"dosyakei_{code}.csv")
+        if os.path.exists(dosyakei):
+            shutil.copy(dosyakei, subset_dir)
+    return str(subset_dir)
+
+
+@pytest.fixture(scope="session")
+def main_service(data_dir) -> MainService:
+    return MainService(data_dir)
+
+
+@pytest.fixture(scope="session")
+def swi_bytes() -> bytes:
+    with open(SWI_FILE, "rb") as f:
+        return f.read()
+
+
+@pytest.fixture(scope="session")
+def guidance_bytes() -> bytes:
+    with open(GUIDANCE_FILE, "rb") as f:
+        return f.read()
+
+
+@pytest.fixture(scope="session")
+def decoded(main_service, swi_bytes, guidance_bytes):
+    """(swi_grib2, guidance_grib2)"""
+    _, swi_grib2 = main_service.grib2_service.unpack_swi_grib2(swi_bytes)
+    _, guidance_grib2 = main_service.grib2_service.unpack_guidance_grib2(guidance_bytes)
+    return swi_grib2, guidance_grib2
+
+
+@pytest.fixture(scope="session")
+def calculate(main_service):
+    """全メッシュの SWI・雨量・危険度計算（MainService._process_data の calc.mesh と同じ）"""
+    def _calculate(prefectures, swi_grib2, guidance_grib2):
+        for prefecture in prefectures:
+            for area in prefecture.areas:
+                for mesh in area.meshes:
+                    main_service.calculation_service.process_mesh_calculations(
+                        mesh, swi_grib2, guidance_grib2)
+    return _calculate
+
+
+@pytest.fixture(scope="session")
+def calculated(main_service, calculate, decoded):
+    """計算・集約済みの Prefecture リスト（ベンチマーク間で共有）"""
+    prefectures = main_service.data_service.prepare_areas()
+    calculate(prefectures, *decoded)
+    main_service._aggregate(prefectures)
+    return prefectures
+
+
+@pytest.fixture(scope="session")
+def result(main_service, calculated) -> dict:
+    """計算結果JSON（キャッシュ・JSON化の計測用）"""
+    from services.rainfall_recompute_service import collect_initial_tanks, encode_initial_tanks
+
+    return {
+        "status": "success",
+        "calculation_time": "2023-06-02T00:00:00",
+        "initial_time": "2023-06-02T00:00:00",
+        "prefectures": main_service._serialize_prefectures(calculated),
+        "initial_tanks": encode_initial_tanks(collect_initial_tanks(calculated)),
+        "rainfall_aggregates": main_service._aggregate(calculated)
+    }
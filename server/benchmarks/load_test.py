@@ -0,0 +1,475 @@
+# -*- coding: utf-8 -*-
+"""
+負荷試験（同梱GRIB2を配信するローカルHTTPサーバー + Flaskアプリ + 同時ユーザー）
+
+1. 同梱の GRIB2（data/*.bin）を ConfigService.build_swi_url / build_guidance_url と
+   同じパスで配信するHTTPサーバーを起動する
+2. GRIB2取得先をそのサーバーに向けた一時設定（SOIL_RAINFALL_CONFIG）で
+   Flaskアプリを別プロセスで起動する（キャッシュ・セッション退避先も一時ディレクトリ）
+3. 初期時刻ごとに1回計算してから（ウォームアップ、集計対象外）、N人の仮想ユーザーが
+   指定した比率で API を呼び出し、ルートごとのスループットと p50 / p95 / p99 を出力する
+
+操作（--mix で比率を指定）:
+    calculate     POST /api/production-soil-rainfall-index-with-urls（新しいセッション作成）
+    session       GET  /api/session/<id>/prefecture/<府県コード>
+    risk_at_time  GET  /api/session/<id>/risk-at-time?ft=<FT>&format=binary
+    adjustment    POST /api/session/<id>/rainfall-adjustment（市町村1件の雨量を変更）
+
+使い方:
+    python benchmarks/load_test.py --users 8 --duration 60
+    python benchmarks/load_test.py --mix calculate=1,risk_at_time=10 --report load.json
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import numpy as np
+import requests
+import yaml
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from src.config.config_service import CONFIG_PATH_ENV, ConfigService
+
+logger = logging.getLogger(__name__)
+
+OPERATIONS = ("calculate", "session", "risk_at_time", "adjustment")
+DEFAULT_MIX = "calculate=1,session=2,risk_at_time=6,adjustment=1"
+
+SWI_PATTERN = re.compile(r"^Z__C_RJTD_(\d{14})_SRF_GPV_Ggis1km_Psw_Aper10min_ANAL_grib2\.bin$")
+GUIDANCE_PATTERN = re.compile(r"^guid_msm_grib2_(\d{14})_rmax\d\d\.bin$")
+
+# 別プロセスで Flask アプリを起動するスクリプト（引数: data_dir host port）
+SERVER_SCRIPT = (
+    "import sys\n"
+    "from werkzeug.serving import run_simple\n"
+    "import app\n"
+    "run_simple(sys.argv[2], int(sys.argv[3]), app.create_app(sys.argv[1]), threaded=True)\n"
+)
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """"calculate=1,risk_at_time=6" → {操作: 比率}（比率0の操作は除く）"""
+    mix = {}
+    for item in text.split(","):
+        if not item.strip():
+            continue
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"不明な操作: {name}（{', '.join(OPERATIONS)}）")
+        mix[name] = float(weight or 1)
+    mix = {name: weight for name, weight in mix.items() if weight > 0}
+    if not mix:
+        raise ValueError("操作の比率がすべて0です")
+    return mix
+
+
+def free_port(host: str = "127.0.0.1") -> int:
+    with socket.socket() as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+# ----------------------------------------------------------------------
+# GRIB2 配信サーバー
+# ----------------------------------------------------------------------
+
+def bundled_initial_times(grib2_dir: str) -> List[datetime]:
+    """SWI・ガイダンスの両方がそろっている初期時刻"""
+    names = os.listdir(grib2_dir)
+    swi = {m.group(1) for m in map(SWI_PATTERN.match, names) if m}
+    guidance = {m.group(1) for m in map(GUIDANCE_PATTERN.match, names) if m}
+    return [datetime.strptime(stamp, "%Y%m%d%H%M%S") for stamp in sorted(swi & guidance)]
+
+
+def grib2_routes(config_service: ConfigService, grib2_dir: str,
+                 initial_times: List[datetime]) -> Dict[str, str]:
+    """{URLパス: ファイル}（ConfigService の URL 構築と同じパス）"""
+    routes = {}
+    for initial_time in initial_times:
+        for url in (config_service.build_swi_url(initial_time),
+                    config_service.build_guidance_url(initial_time)):
+            path = os.path.join(grib2_dir, os.path.basename(urlparse(url).path))
+            if os.path.exists(path):
+                routes[urlparse(url).path] = path
+    return routes
+
+
+class Grib2StandIn:
+    """同梱GRIB2を配信するローカルHTTPサーバー（別スレッド）"""
+
+    def __init__(self, routes: Dict[str, str], delay_seconds: float = 0.0,
+                 host: str = "127.0.0.1", port: int = 0):
+        self.routes = routes
+        self.requests: List[Tuple[str, int]] = []
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = stand_in.routes.get(urlparse(self.path).path)
+                if delay_seconds:
+                    time.sleep(delay_seconds)
+                if path is None:
+                    stand_in.requests.append((self.path, 404))
+                    self.send_error(404)
+                    return
+                with open(path, "rb") as f:
+                    body = f.read()
+                stand_in.requests.append((self.path, 200))
+                self.send_response(200)
+                self.send_header("Content-Type", "application/octet-stream")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug("GRIB2 stand-in: " + format % args)
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "Grib2StandIn":
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# ----------------------------------------------------------------------
+# Flask アプリ
+# ----------------------------------------------------------------------
+
+def write_config(base_config_path: str, work_dir: str, grib2_base_url: str) -> str:
+    """GRIB2取得先・キャッシュ・セッション退避先を差し替えた一時設定ファイル"""
+    with open(base_config_path, encoding="utf-8") as f:
+        config = yaml.safe_load(f) or {}
+    config["proxy"] = {"http": None, "https": None}
+    config.setdefault("grib2", {}).update({"base_url": grib2_base_url, "retry_count": 1})
+    config.setdefault("cache", {})["directory"] = os.path.join(work_dir, "cache")
+    config.setdefault("session", {})["spill_dir"] = os.path.join(work_dir, "sessions")
+
+    path = os.path.join(work_dir, "app_config.yaml")
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(config, f, allow_unicode=True)
+    return path
+
+
+class AppServer:
+    """Flask アプリ（別プロセス、werkzeug のスレッドサーバー）"""
+
+    def __init__(self, config_path: str, data_dir: str, log_path: str,
+                 host: str = "127.0.0.1", port: Optional[int] = None):
+        self.config_path = config_path
+        self.data_dir = data_dir
+        self.log_path = log_path
+        self.host = host
+        self.port = port or free_port(host)
+        self.process: Optional[subprocess.Popen] = None
+        self._log = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self, timeout: float = 120.0) -> "AppServer":
+        env = dict(os.environ, **{CONFIG_PATH_ENV: self.config_path})
+        self._log = open(self.log_path, "w", encoding="utf-8")
+        self.process = subprocess.Popen(
+            [sys.executable, "-c", SERVER_SCRIPT, self.data_dir, self.host, str(self.port)],
+            cwd=project_root, env=env, stdout=self._log, stderr=subprocess.STDOUT)
+
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"アプリが起動できません（ログ: {self.log_path}）")
+            try:
+                if requests.get(f"{self.base_url}/api/health", timeout=2).ok:
+                    return self
+            except requests.RequestException:
+                pass
+            time.sleep(0.5)
+        self.stop()
+        raise RuntimeError(f"アプリの起動待ちがタイムアウトしました（ログ: {self.log_path}）")
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+
+# ----------------------------------------------------------------------
+# 負荷生成
+# ----------------------------------------------------------------------
+
+class Recorder:
+    """ルートごとの応答時間・エラー数（スレッドセーフ）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    def record(self, route: str, seconds: float, ok: bool):
+        with self._lock:
+            self.latencies.setdefault(route, []).append(seconds)
+            if not ok:
+                self.errors[route] = self.errors.get(route, 0) + 1
+
+    def summary(self, elapsed: float) -> Dict[str, Dict[str, float]]:
+        """{ルート: {"requests", "errors", "throughput_rps", "mean_ms", "p50_ms", ...}}"""
+        with self._lock:
+            snapshot = {route: list(values) for route, values in self.latencies.items()}
+            errors = dict(self.errors)
+        all_values = [value for values in snapshot.values() for value in values]
+        if all_values:
+            snapshot["total"] = all_values
+            errors["total"] = sum(errors.values())
+
+        summary = {}
+        for route, values in snapshot.items():
+            seconds = np.array(values)
+            p50, p95, p99 = np.percentile(seconds, [50, 95, 99]) * 1000
+            summary[route] = {
+                "requests": len(values),
+                "errors": errors.get(route, 0),
+                "throughput_rps": round(len(values) / elapsed, 2) if elapsed > 0 else 0.0,
+                "mean_ms": round(float(seconds.mean()) * 1000, 1),
+                "p50_ms": round(float(p50), 1),
+                "p95_ms": round(float(p95), 1),
+                "p99_ms": round(float(p99), 1),
+                "max_ms": round(float(seconds.max()) * 1000, 1)
+            }
+        return summary
+
+
+class VirtualUser:
+    """1人分の操作（自分のセッションに対して呼び出す）"""
+
+    def __init__(self, base_url: str, forecasts: Dict[str, Dict[str, Any]],
+                 recorder: Recorder, rng: random.Random, timeout: float):
+        self.base_url = base_url
+        self.forecasts = forecasts
+        self.recorder = recorder
+        self.rng = rng
+        self.timeout = timeout
+        self.http = requests.Session()
+        self.session: Optional[Dict[str, Any]] = None
+        self.initial_time: Optional[str] = None
+
+    def _call(self, route: str, method: str, path: str, **kwargs) -> Optional[requests.Response]:
+        start = time.perf_counter()
+        try:
+            response = self.http.request(method, self.base_url + path,
+                                         timeout=self.timeout, **kwargs)
+            response.content  # 本文の受信まで含めて計測
+        except requests.RequestException as e:
+            logger.warning(f"{route}: {e}")
+            self.recorder.record(route, time.perf_counter() - start, False)
+            return None
+        self.recorder.record(route, time.perf_counter() - start, response.ok)
+        return response if response.ok else None
+
+    def calculate(self):
+        self.initial_time = self.rng.choice(sorted(self.forecasts))
+        response = self._call("calculate", "POST", "/api/production-soil-rainfall-index-with-urls",
+                              json={"swi_initial": self.initial_time,
+                                    "guidance_initial": self.initial_time})
+        if response is not None:
+            self.session = response.json()
+
+    def session_data(self):
+        code = self.rng.choice(self.session["available_prefectures"])
+        self._call("session", "GET",
+                   f"/api/session/{self.session['session_id']}/prefecture/{code}")
+
+    def risk_at_time(self):
+        ft = self.rng.choice(self.session["available_times"])
+        self._call("risk_at_time", "GET",
+                   f"/api/session/{self.session['session_id']}/risk-at-time",
+                   params={"ft": ft, "format": "binary"})
+
+    def adjustment(self):
+        area_rainfall = self.forecasts[self.initial_time]["area_rainfall"]
+        key = self.rng.choice(sorted(area_rainfall))
+        factor = self.rng.choice((0.5, 1.5, 2.0))
+        adjusted = {str(point["ft"]): round(point["value"] * factor, 1)
+                    for point in area_rainfall[key]}
+        self._call("adjustment", "POST",
+                   f"/api/session/{self.session['session_id']}/rainfall-adjustment",
+                   json={"area_adjustments": {key: adjusted}})
+
+    def run(self, mix: Dict[str, float], stop_at: float):
+        names, weights = list(mix), list(mix.values())
+        while time.time() < stop_at:
+            if self.session is None:
+                self.calculate()
+                if self.session is None:
+                    time.sleep(1.0)
+                continue
+            name = self.rng.choices(names, weights)[0]
+            {"calculate": self.calculate, "session": self.session_data,
+             "risk_at_time": self.risk_at_time, "adjustment": self.adjustment}[name]()
+
+
+def warm_up(base_url: str, initial_times: List[datetime],
+            timeout: float) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, float]]:
+    """
+    初期時刻ごとに1回計算し、雨量調整に使う市町村別雨量を取得（集計対象外）
+
+    Returns:
+        ({初期時刻: /api/rainfall-forecast の応答}, {初期時刻: 初回計算の秒数})
+    """
+    forecasts, seconds = {}, {}
+    for initial_time in initial_times:
+        stamp = initial_time.isoformat()
+        start = time.perf_counter()
+        response = requests.post(f"{base_url}/api/production-soil-rainfall-index-with-urls",
+                                 json={"swi_initial": stamp, "guidance_initial": stamp},
+                                 timeout=timeout)
+        response.raise_for_status()
+        seconds[stamp] = round(time.perf_counter() - start, 2)
+        forecast = requests.get(f"{base_url}/api/rainfall-forecast",
+                                params={"swi_initial": stamp, "guidance_initial": stamp},
+                                timeout=timeout)
+        forecast.raise_for_status()
+        forecasts[stamp] = forecast.json()
+        logger.info(f"ウォームアップ完了: {stamp} ({seconds[stamp]}秒)")
+    return forecasts, seconds
+
+
+def run_load(base_url: str, forecasts: Dict[str, Dict[str, Any]], mix: Dict[str, float],
+             users: int, duration: float, seed: int = 0,
+             timeout: float = 600.0) -> Tuple[Dict[str, Dict[str, float]], float]:
+    """
+    同時ユーザーで負荷をかける
+
+    Returns:
+        (ルート別集計, 経過秒数)
+    """
+    recorder = Recorder()
+    start = time.time()
+    stop_at = start + duration
+    threads = []
+    for index in range(users):
+        user = VirtualUser(base_url, forecasts, recorder, random.Random(seed + index), timeout)
+        thread = threading.Thread(target=user.run, args=(mix, stop_at), daemon=True)
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - start
+    return recorder.summary(elapsed), elapsed
+
+
+def format_summary(summary: Dict[str, Dict[str, float]]) -> str:
+    lines = [f"{'route':<14}{'requests':>9}{'errors':>8}{'req/s':>9}"
+             f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"]
+    for route in sorted(summary, key=lambda r: (r == "total", r)):
+        s = summary[route]
+        lines.append(f"{route:<14}{s['requests']:>9}{s['errors']:>8}{s['throughput_rps']:>9.2f}"
+                     f"{s['p50_ms']:>10.1f}{s['p95_ms']:>10.1f}{s['p99_ms']:>10.1f}"
+                     f"{s['max_ms']:>10.1f}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="負荷試験（ローカルGRIB2配信 + Flaskアプリ）")
+    parser.add_argument("--users", type=int, default=4, help="同時ユーザー数")
+    parser.add_argument("--duration", type=float, default=60.0, help="計測時間（秒）")
+    parser.add_argument("--mix", default=DEFAULT_MIX,
+                        help=f"操作の比率（既定: {DEFAULT_MIX}）")
+    parser.add_argument("--data-dir", default="data", help="アプリのCSVディレクトリ")
+    parser.add_argument("--grib2-dir", default="data", help="配信するGRIB2のディレクトリ")
+    parser.add_argument("--initial-times", nargs="+",
+                        help="使う初期時刻（ISO8601、省略時は同梱GRIB2の最初の1件）")
+    parser.add_argument("--grib2-delay", type=float, default=0.0,
+                        help="GRIB2配信の応答遅延（秒、取得元の遅さを模擬）")
+    parser.add_argument("--timeout", type=float, default=600.0, help="1リクエストのタイムアウト（秒）")
+    parser.add_argument("--seed", type=int, default=0, help="操作選択の乱数シード")
+    parser.add_argument("--report", help="結果をJSONで保存するパス")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    logging.getLogger("urllib3").setLevel(logging.WARNING)
+    mix = parse_mix(args.mix)
+    data_dir = os.path.abspath(args.data_dir)
+    grib2_dir = os.path.abspath(args.grib2_dir)
+
+    available = bundled_initial_times(grib2_dir)
+    if args.initial_times:
+        initial_times = [datetime.fromisoformat(t) for t in args.initial_times]
+    else:
+        initial_times = available[:1]
+    missing = [t.isoformat() for t in initial_times if t not in available]
+    if not initial_times or missing:
+        print(f"GRIB2がありません: {missing or grib2_dir}")
+        return 2
+
+    with tempfile.TemporaryDirectory(prefix="soil_rainfall_load_") as work_dir:
+        stand_in = Grib2StandIn({}, delay_seconds=args.grib2_delay).start()
+        config_path = write_config(ConfigService().config_path, work_dir, stand_in.base_url)
+        stand_in.routes.update(
+            grib2_routes(ConfigService(config_path), grib2_dir, initial_times))
+        app_server = AppServer(config_path, data_dir, os.path.join(work_dir, "server.log"))
+        try:
+            app_server.start()
+            forecasts, warmup_seconds = warm_up(app_server.base_url, initial_times, args.timeout)
+            summary, elapsed = run_load(app_server.base_url, forecasts, mix, args.users,
+                                        args.duration, args.seed, args.timeout)
+            stages = requests.get(f"{app_server.base_url}/api/performance/stages",
+                                  timeout=30).json().get("stages", {})
+        finally:
+            app_server.stop()
+            stand_in.stop()
+
+    print(f"\nusers={args.users} duration={elapsed:.1f}s mix={args.mix}")
+    print(f"warmup (first calculation): {warmup_seconds}")
+    print(format_summary(summary))
+
+    if args.report:
+        report = {
+            "users": args.users,
+            "duration_seconds": round(elapsed, 1),
+            "mix": mix,
+            "initial_times": [t.isoformat() for t in initial_times],
+            "warmup_seconds": warmup_seconds,
+            "routes": summary,
+            "server_stages": stages
+        }
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"report: {args.report}")
+    return 1 if summary.get("total", {}).get("errors") else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
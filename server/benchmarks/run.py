@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+ベンチマークのベースライン保存・比較
+
+    python benchmarks/run.py save [--name NAME]         計測してベースラインとして保存
+    python benchmarks/run.py compare [--baseline ID]    計測して保存済みベースラインと比較
+                                                        （最小値が閾値を超えて遅くなった段階があれば終了コード1）
+    python benchmarks/run.py list                       保存済みベースライン一覧
+
+pytest に渡す追加引数は -- の後に書く（例: -- --bench-prefectures shiga -k decode）。
+保存先・計測回数・閾値は設定 benchmark.*（config/app_config.yaml）。
+ベースラインは pytest-benchmark のマシン情報（OS・Python）ごとに分けて保存される。
+"""
+import argparse
+import os
+import sys
+from typing import List, Optional
+
+import pytest
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from src.config.config_service import ConfigService
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def storage_dir() -> str:
+    """ベースライン保存先（相対パスはプロジェクトルート基準）"""
+    storage = ConfigService().get("benchmark.storage", "cache/benchmarks")
+    return storage if os.path.isabs(storage) else os.path.join(project_root, storage)
+
+
+def pytest_args(command: str, name: Optional[str] = None, baseline: Optional[str] = None,
+                threshold: Optional[int] = None, extra: Optional[List[str]] = None) -> List[str]:
+    """サブコマンドに対応する pytest 引数"""
+    args = [BENCHMARK_DIR, "-p", "no:cacheprovider", f"--benchmark-storage=file://{storage_dir()}"]
+    if command == "save":
+        args.append(f"--benchmark-save={name}" if name else "--benchmark-autosave")
+    elif command == "compare":
+        if threshold is None:
+            threshold = ConfigService().get("benchmark.max_regression_percent", 15)
+        args.append(f"--benchmark-compare={baseline}" if baseline else "--benchmark-compare")
+        args.append(f"--benchmark-compare-fail=min:{threshold}%")
+    return args + (extra or [])
+
+
+def list_baselines() -> List[str]:
+    """保存済みベースライン（マシン情報/ファイル名）"""
+    root = storage_dir()
+    if not os.path.isdir(root):
+        return []
+    return sorted(os.path.join(machine, name)
+                  for machine in os.listdir(root) if os.path.isdir(os.path.join(root, machine))
+                  for name in os.listdir(os.path.join(root, machine)) if name.endswith(".json"))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    extra: List[str] = []
+    if "--" in argv:
+        index = argv.index("--")
+        argv, extra = argv[:index], argv[index + 1:]
+
+    parser = argparse.ArgumentParser(description="ベンチマークのベースライン保存・比較")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    save_parser = subparsers.add_parser("save", help="計測してベースラインとして保存")
+    save_parser.add_argument("--name", help="ベースライン名（省略時は連番＋コミット情報）")
+
+    compare_parser = subparsers.add_parser("compare", help="計測して保存済みベースラインと比較")
+    compare_parser.add_argument("--baseline",
+                                help="比較対象の連番またはファイル名の一部（省略時は最新）")
+    compare_parser.add_argument("--threshold", type=int,
+                                help="許容する最小値の悪化率（整数%%、省略時は設定値）")
+
+    subparsers.add_parser("list", help="保存済みベースライン一覧")
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        for baseline in list_baselines():
+            print(baseline)
+        return 0
+
+    return int(pytest.main(pytest_args(
+        args.command, name=getattr(args, "name", None),
+        baseline=getattr(args, "baseline", None),
+        threshold=getattr(args, "threshold", None), extra=extra)))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -5,7 +5,8 @@
 
 from .data_models import (
     BaseInfo, SwiTimeSeries, GuidanceTimeSeries, Risk,
-    Mesh, Area, SecondarySubdivision, Prefecture, PREFECTURES_MASTER
+    Mesh, Area, SecondarySubdivision, Prefecture, PREFECTURES_MASTER,
+    PREFECTURE_NAMES
 )
 
 __all__ = [
@@ -17,5 +18,6 @@ __all__ = [
     'Area',
     'SecondarySubdivision',
     'Prefecture',
-    'PREFECTURES_MASTER'
+    'PREFECTURES_MASTER',
+    'PREFECTURE_NAMES'
 ]
\ No newline at end of file
@@ -3,10 +3,15 @@
 データモデル定義
 土壌雨量指数計算システムで使用するすべてのデータクラス
 """
+import sys
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime
 
+# 大量に生成するモデル（時系列点・メッシュ・市町村）はインスタンス辞書を持たない
+# __slots__ クラスにする（Python 3.10 未満では通常の dataclass）
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
 
 @dataclass
 class BaseInfo:
@@ -23,28 +28,28 @@ class BaseInfo:
     d_lon: int  # ミリ度
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class SwiTimeSeries:
     """土壌雨量指数時系列データ"""
     ft: int  # 予測時間（時間）
     value: float  # SWI値
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class GuidanceTimeSeries:
     """ガイダンス時系列データ（降水量）"""
     ft: int  # 予測時間（時間）  
     value: float  # 降水量値
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class Risk:
     """リスクレベル情報"""
     ft: int  # 予測時間（時間）
     value: int  # リスクレベル（0-3）
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class Mesh:
     """メッシュデータ"""
     area_name: str
@@ -65,9 +70,10 @@ class Mesh:
     risk_3hour_max: List[Risk]  # 3時間ごとの最大危険度（1時間雨量ベース）
     vba_x: Optional[int] = None  # VBA X座標（GRIB2データアクセス用）
     vba_y: Optional[int] = None  # VBA Y座標（GRIB2データアクセス用）
+    initial_tanks: Optional[Tuple[float, float, float]] = None  # 初期タンク値（第1, 第2, 第3）
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class Area:
     """地域データ（市町村）"""
     name: str
@@ -132,4 +138,57 @@ PREFECTURES_MASTER = {
     'hyogo': '兵庫県',
     'nara': '奈良県',
     'wakayama': '和歌山県'
-}
\ No newline at end of file
+}
+
+
+# 全国の都道府県コード・名称（JIS X 0401 の順）
+# 処理対象の府県は data/ から検出する（services.prefecture_registry）
+PREFECTURE_NAMES = {
+    'hokkaido': '北海道',
+    'aomori': '青森県',
+    'iwate': '岩手県',
+    'miyagi': '宮城県',
+    'akita': '秋田県',
+    'yamagata': '山形県',
+    'fukushima': '福島県',
+    'ibaraki': '茨城県',
+    'tochigi': '栃木県',
+    'gunma': '群馬県',
+    'saitama': '埼玉県',
+    'chiba': '千葉県',
+    'tokyo': '東京都',
+    'kanagawa': '神奈川県',
+    'niigata': '新潟県',
+    'toyama': '富山県',
+    'ishikawa': '石川県',
+    'fukui': '福井県',
+    'yamanashi': '山梨県',
+    'nagano': '長野県',
+    'gifu': '岐阜県',
+    'shizuoka': '静岡県',
+    'aichi': '愛知県',
+    'mie': '三重県',
+    'shiga': '滋賀県',
+    'kyoto': '京都府',
+    'osaka': '大阪府',
+    'hyogo': '兵庫県',
+    'nara': '奈良県',
+    'wakayama': '和歌山県',
+    'tottori': '鳥取県',
+    'shimane': '島根県',
+    'okayama': '岡山県',
+    'hiroshima': '広島県',
+    'yamaguchi': '山口県',
+    'tokushima': '徳島県',
+    'kagawa': '香川県',
+    'ehime': '愛媛県',
+    'kochi': '高知県',
+    'fukuoka': '福岡県',
+    'saga': '佐賀県',
+    'nagasaki': '長崎県',
+    'kumamoto': '熊本県',
+    'oita': '大分県',
+    'miyazaki': '宮崎県',
+    'kagoshima': '鹿児島県',
+    'okinawa': '沖縄県'
+}
@@ -6,18 +6,45 @@
 - キャッシュキー生成（SWI初期時刻 + ガイダンス初期時刻）
 - 自動TTL管理（デフォルト7日）
 - メタデータ管理
+- 容量上限（総バイト数・エントリ数）によるLRU退避
+- 定期ジャニター（期限切れ削除 + 容量上限適用 + 一時ファイル・不要ロックファイル掃除）
+- 一時ファイル + rename によるアトミック書き込み（複数プロセス対応）
+- 雨量集約（市町村・二次細分別雨量時系列）の別ファイル保持（.rainfall.json）
+
+書き込みプロトコル:
+    1. キーごとのロックファイル（.locks/<key>.lock）を排他ロック
+    2. データ・メタデータを一時ファイル（*.tmp）に書き込み
+    3. メタデータ → 雨量集約 → データの順に os.replace で公開
+       （データファイルの出現がコミットポイント）
+
+読み込みはロックを取らず、公開済みの完成ファイルのみを参照する。
 """
 
 import gzip
 import json
 import logging
+import secrets
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Set, Iterator
 import os
 
+from .instrumentation import timed
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
 logger = logging.getLogger(__name__)
 
+# 一時ファイルを残骸とみなすまでの秒数（書き込み中プロセス異常終了時）
+STALE_TEMP_SECONDS = 3600
+
 
 class CacheService:
     """
@@ -26,20 +53,45 @@ class CacheService:
     GRIB2解析結果をgzip圧縮して保存・取得
     """
 
-    def __init__(self, cache_dir: str = "cache", default_ttl_days: int = 7):
+    def __init__(
+        self,
+        cache_dir: str = "cache",
+        default_ttl_days: int = 7,
+        max_total_mb: Optional[float] = None,
+        max_entries: Optional[int] = None
+    ):
         """
         初期化
 
         Args:
             cache_dir: キャッシュディレクトリパス
             default_ttl_days: デフォルトTTL（日数）
+            max_total_mb: キャッシュ総容量の上限（MB、Noneで無制限）
+            max_entries: キャッシュエントリ数の上限（Noneで無制限）
         """
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(exist_ok=True)
         self.default_ttl_days = default_ttl_days
+        self.max_total_mb = max_total_mb
+        self.max_entries = max_entries
+
+        # 書き込み中のキー（退避対象から除外）
+        self._inflight: Set[str] = set()
+        self._inflight_lock = threading.Lock()
+        self.evicted_count = 0
+        # get_cached_result のヒット・ミス数（期限切れ・読み込み失敗はミス）
+        self.hit_count = 0
+        self.miss_count = 0
+        # 統計カウンター（リクエストスレッド・ジャニターから更新）の保護
+        self._stats_lock = threading.Lock()
+
+        # 定期ジャニター
+        self._janitor_thread: Optional[threading.Thread] = None
+        self._janitor_stop = threading.Event()
 
         logger.info(f"CacheService初期化: dir={self.cache_dir}, "
-                    f"TTL={default_ttl_days}日")
+                    f"TTL={default_ttl_days}日, "
+                    f"上限={max_total_mb}MB/{max_entries}件")
 
     @staticmethod
     def generate_cache_key(swi_initial: str, guidance_initial: str) -> str:
@@ -71,6 +123,85 @@ class CacheService:
         """メタデータファイルパス取得（.meta.json）"""
         return self.cache_dir / f"{cache_key}.meta.json"
 
+    def _get_rainfall_path(self, cache_key: str) -> Path:
+        """雨量集約ファイルパス取得（.rainfall.json）"""
+        return self.cache_dir / f"{cache_key}.rainfall.json"
+
+    def _get_temp_path(self, final_path: Path) -> Path:
+        """一時ファイルパス取得（同一ディレクトリ内、プロセス・試行ごとに一意）"""
+        token = secrets.token_hex(4)
+        return final_path.with_name(
+            f".{final_path.name}.{os.getpid()}.{token}.tmp")
+
+    def _get_lock_path(self, cache_key: str) -> Path:
+        """ロックファイルパス取得（.locks/<key>.lock）"""
+        return self.cache_dir / ".locks" / f"{cache_key}.lock"
+
+    @staticmethod
+    def _lock_file(lock_file, blocking: bool) -> bool:
+        """ロックファイルを排他ロック（取得できればTrue）"""
+        try:
+            if fcntl is not None:
+                flags = fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB)
+                fcntl.flock(lock_file.fileno(), flags)
+            else:
+                mode = msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), mode, 1)
+            return True
+        except OSError:
+            return False
+
+    @staticmethod
+    def _unlock_file(lock_file):
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+    @staticmethod
+    def _is_current_lock(lock_file, lock_path: Path) -> bool:
+        """ロックしたファイルがまだ lock_path にあるか（ジャニターが削除していないか）"""
+        try:
+            return os.path.samestat(os.fstat(lock_file.fileno()), os.stat(lock_path))
+        except FileNotFoundError:
+            return False
+
+    @contextmanager
+    def _key_lock(self, cache_key: str,
+                  blocking: bool = True) -> Iterator[bool]:
+        """
+        キー単位のプロセス間排他ロック
+
+        ロック待ちの間にジャニターがロックファイルを削除した場合は、
+        削除済みのファイルではなく新しいロックファイルを取り直す。
+
+        Args:
+            cache_key: キャッシュキー
+            blocking: Falseの場合、取得できなければ即座にFalseを返す
+
+        Yields:
+            ロック取得成功: True
+        """
+        lock_path = self._get_lock_path(cache_key)
+        lock_path.parent.mkdir(exist_ok=True)
+
+        while True:
+            lock_file = open(lock_path, 'a+b')
+            acquired = self._lock_file(lock_file, blocking)
+            if not acquired or self._is_current_lock(lock_file, lock_path):
+                break
+            self._unlock_file(lock_file)
+            lock_file.close()
+
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                self._unlock_file(lock_file)
+            lock_file.close()
+
     def exists(self, cache_key: str) -> bool:
         """
         キャッシュ存在確認
@@ -83,6 +214,7 @@ class CacheService:
         """
         return self._get_cache_path(cache_key).exists()
 
+    @timed("cache.read")
     def get_cached_result(self, cache_key: str) -> Optional[dict]:
         """
         キャッシュから結果取得
@@ -93,16 +225,27 @@ class CacheService:
         Returns:
             キャッシュされたデータ、存在しない場合None
         """
+        result = self._read_cached_result(cache_key)
+        if result is None:
+            with self._stats_lock:
+                self.miss_count += 1
+        else:
+            with self._stats_lock:
+                self.hit_count += 1
+        return result
+
+    def _read_cached_result(self, cache_key: str) -> Optional[dict]:
+        """キャッシュファイル読み込み（get_cached_result 本体）"""
         cache_path = self._get_cache_path(cache_key)
 
         if not cache_path.exists():
             logger.info(f"キャッシュ未存在: {cache_key}")
             return None
 
-        # TTLチェック
+        # TTLチェック（削除は書き込み中でなければ行う。読み込み側は待機しない）
         if not self._is_cache_valid(cache_key):
             logger.info(f"キャッシュ期限切れ: {cache_key}")
-            self.invalidate_cache(cache_key)
+            self.invalidate_cache(cache_key, blocking=False)
             return None
 
         try:
@@ -115,15 +258,23 @@ class CacheService:
             elapsed = (datetime.now() - start_time).total_seconds()
             file_size_mb = cache_path.stat().st_size / (1024 * 1024)
 
+            self._touch(cache_key)
+
             logger.info(f"キャッシュ読み込み完了: {cache_key} "
                        f"({file_size_mb:.1f}MB, {elapsed:.2f}秒)")
 
             return result
 
+        except FileNotFoundError:
+            # 他プロセスにより読み込み直前に削除された
+            logger.info(f"キャッシュ未存在（削除済み）: {cache_key}")
+            return None
+
         except Exception as e:
             logger.error(f"キャッシュ読み込みエラー: {cache_key} - {e}")
             return None
 
+    @timed("cache.write")
     def set_cached_result(
         self,
         cache_key: str,
@@ -134,6 +285,11 @@ class CacheService:
         """
         計算結果をキャッシュに保存
 
+        一時ファイルに書き込んでから os.replace で公開するため、
+        並行する読み込み側が書きかけのファイルを見ることはない。
+        同一キーへの書き込みはプロセス間ロックで直列化し、
+        ロック取得時点で有効なキャッシュが既にあれば書き込みを省略する。
+
         Args:
             cache_key: キャッシュキー
             result: 保存するデータ
@@ -141,31 +297,129 @@ class CacheService:
             guidance_initial: ガイダンス初期時刻
         """
         cache_path = self._get_cache_path(cache_key)
+        meta_path = self._get_meta_path(cache_key)
+        rainfall_path = self._get_rainfall_path(cache_key)
+        tmp_cache_path = self._get_temp_path(cache_path)
+        tmp_meta_path = self._get_temp_path(meta_path)
+        tmp_rainfall_path = self._get_temp_path(rainfall_path)
+
+        with self._inflight_lock:
+            self._inflight.add(cache_key)
 
         try:
-            logger.info(f"キャッシュ保存開始: {cache_key}")
-            start_time = datetime.now()
+            with self._key_lock(cache_key):
+                if cache_path.exists() and self._is_cache_valid(cache_key):
+                    logger.info(f"キャッシュ保存スキップ（他プロセスで保存済み）: "
+                                f"{cache_key}")
+                    return
 
-            # データ保存（gzip圧縮、レベル6=バランス良い）
-            with gzip.open(cache_path, 'wt', encoding='utf-8',
-                          compresslevel=6) as f:
-                json.dump(result, f, ensure_ascii=False)
+                logger.info(f"キャッシュ保存開始: {cache_key}")
+                start_time = datetime.now()
 
-            elapsed = (datetime.now() - start_time).total_seconds()
-            file_size_mb = cache_path.stat().st_size / (1024 * 1024)
+                # データ保存（gzip圧縮、レベル6=バランス良い）
+                with gzip.open(tmp_cache_path, 'wt', encoding='utf-8',
+                              compresslevel=6) as f:
+                    json.dump(result, f, ensure_ascii=False)
 
-            # メタデータ保存
-            self._save_metadata(cache_key, result, swi_initial,
-                               guidance_initial, file_size_mb)
+                elapsed = (datetime.now() - start_time).total_seconds()
+                file_size_mb = tmp_cache_path.stat().st_size / (1024 * 1024)
 
-            logger.info(f"キャッシュ保存完了: {cache_key} "
-                       f"({file_size_mb:.1f}MB, {elapsed:.2f}秒)")
+                # メタデータ保存 → データ公開（データ出現時にはメタデータが必ず存在）
+                self._save_metadata(cache_key, result, swi_initial,
+                                   guidance_initial, file_size_mb,
+                                   tmp_meta_path)
+                os.replace(tmp_meta_path, meta_path)
+
+                # 雨量集約は結果全体を読み込まずに返せるよう別ファイルにも保存
+                if result.get("rainfall_aggregates") is not None:
+                    with open(tmp_rainfall_path, 'w', encoding='utf-8') as f:
+                        json.dump(result["rainfall_aggregates"], f,
+                                  ensure_ascii=False)
+                    os.replace(tmp_rainfall_path, rainfall_path)
+
+                os.replace(tmp_cache_path, cache_path)
+
+                logger.info(f"キャッシュ保存完了: {cache_key} "
+                           f"({file_size_mb:.1f}MB, {elapsed:.2f}秒)")
 
         except Exception as e:
             logger.error(f"キャッシュ保存エラー: {cache_key} - {e}")
-            # エラー時は中途半端なファイルを削除
-            if cache_path.exists():
-                cache_path.unlink()
+            # エラー時は一時ファイルを削除（公開済みファイルには触れない）
+            for tmp_path in (tmp_cache_path, tmp_meta_path, tmp_rainfall_path):
+                if tmp_path.exists():
+                    tmp_path.unlink()
+
+        finally:
+            with self._inflight_lock:
+                self._inflight.discard(cache_key)
+
+        # 容量上限を適用（保存直後のキーは退避しない）
+        self.enforce_limits(protect={cache_key})
+
+    def get_rainfall_aggregates(self, cache_key: str) -> Optional[dict]:
+        """
+        雨量集約（市町村・二次細分別雨量時系列）取得
+
+        キャッシュ本体（gzip JSON）は読み込まない。
+
+        Args:
+            cache_key: キャッシュキー
+
+        Returns:
+            {"area_rainfall": {...}, "subdivision_rainfall": {...}}、
+            キャッシュ・集約ファイルが存在しない場合None
+        """
+        rainfall_path = self._get_rainfall_path(cache_key)
+
+        if not rainfall_path.exists() or not self.exists(cache_key):
+            return None
+
+        if not self._is_cache_valid(cache_key):
+            return None
+
+        try:
+            with open(rainfall_path, 'r', encoding='utf-8') as f:
+                aggregates = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.error(f"雨量集約読み込みエラー: {cache_key} - {e}")
+            return None
+
+        self._touch(cache_key)
+        return aggregates
+
+    def set_rainfall_aggregates(self, cache_key: str, aggregates: dict) -> bool:
+        """
+        既存キャッシュに雨量集約を追加保存（集約を持たない既存キャッシュ用）
+
+        Args:
+            cache_key: キャッシュキー
+            aggregates: {"area_rainfall": {...}, "subdivision_rainfall": {...}}
+
+        Returns:
+            保存した場合True（キャッシュ本体が存在しない場合は保存しない）
+        """
+        rainfall_path = self._get_rainfall_path(cache_key)
+        tmp_rainfall_path = self._get_temp_path(rainfall_path)
+
+        try:
+            with self._key_lock(cache_key):
+                if not self.exists(cache_key):
+                    return False
+
+                with open(tmp_rainfall_path, 'w', encoding='utf-8') as f:
+                    json.dump(aggregates, f, ensure_ascii=False)
+                os.replace(tmp_rainfall_path, rainfall_path)
+
+            logger.info(f"雨量集約保存完了: {cache_key}")
+            return True
+
+        except Exception as e:
+            logger.error(f"雨量集約保存エラー: {cache_key} - {e}")
+            if tmp_rainfall_path.exists():
+                tmp_rainfall_path.unlink()
+            return False
 
     def _save_metadata(
         self,
@@ -173,10 +427,12 @@ class CacheService:
         result: dict,
         swi_initial: str,
         guidance_initial: str,
-        file_size_mb: float
+        file_size_mb: float,
+        meta_path: Optional[Path] = None
     ):
-        """メタデータ保存"""
-        meta_path = self._get_meta_path(cache_key)
+        """メタデータ保存（meta_path 指定時はそのパスへ書き込む）"""
+        if meta_path is None:
+            meta_path = self._get_meta_path(cache_key)
 
         # メッシュ数をカウント
         mesh_count = 0
@@ -201,6 +457,25 @@ class CacheService:
         with open(meta_path, 'w', encoding='utf-8') as f:
             json.dump(metadata, f, ensure_ascii=False, indent=2)
 
+    def _touch(self, cache_key: str):
+        """
+        最終アクセス時刻を更新
+
+        メタデータファイルのmtimeを最終アクセス時刻として扱う
+        （内容を書き換えないためプロセス間で競合しない）
+        """
+        try:
+            os.utime(self._get_meta_path(cache_key))
+        except OSError:
+            pass
+
+    def _get_last_accessed(self, cache_key: str) -> float:
+        """最終アクセス時刻（UNIX時刻）取得"""
+        try:
+            return self._get_meta_path(cache_key).stat().st_mtime
+        except OSError:
+            return 0.0
+
     def get_metadata(self, cache_key: str) -> Optional[Dict]:
         """
         メタデータ取得
@@ -243,22 +518,44 @@ class CacheService:
 
         return datetime.now() < expiry_date
 
-    def invalidate_cache(self, cache_key: str):
+    def invalidate_cache(self, cache_key: str, blocking: bool = True) -> bool:
         """
         キャッシュ無効化（削除）
 
+        データ → 雨量集約 → メタデータの順に削除する（書き込みと逆順）
+
         Args:
             cache_key: キャッシュキー
+            blocking: Falseの場合、他プロセスが書き込み中なら削除しない
+
+        Returns:
+            削除処理を実行した場合True
         """
         cache_path = self._get_cache_path(cache_key)
         meta_path = self._get_meta_path(cache_key)
 
-        if cache_path.exists():
-            cache_path.unlink()
-            logger.info(f"キャッシュ削除: {cache_key}")
+        with self._key_lock(cache_key, blocking=blocking) as acquired:
+            if not acquired:
+                logger.info(f"キャッシュ削除スキップ（書き込み中）: {cache_key}")
+                return False
 
-        if meta_path.exists():
-            meta_path.unlink()
+            try:
+                cache_path.unlink()
+                logger.info(f"キャッシュ削除: {cache_key}")
+            except FileNotFoundError:
+                pass
+
+            try:
+                self._get_rainfall_path(cache_key).unlink()
+            except FileNotFoundError:
+                pass
+
+            try:
+                meta_path.unlink()
+            except FileNotFoundError:
+                pass
+
+        return True
 
     def list_caches(self) -> List[Dict]:
         """
@@ -273,7 +570,9 @@ class CacheService:
             try:
                 with open(meta_path, 'r', encoding='utf-8') as f:
                     metadata = json.load(f)
-                    caches.append(metadata)
+                metadata['last_accessed'] = datetime.fromtimestamp(
+                    meta_path.stat().st_mtime).isoformat()
+                caches.append(metadata)
             except Exception as e:
                 logger.error(f"メタデータ読み込みエラー: {meta_path} - {e}")
 
@@ -309,6 +608,204 @@ class CacheService:
 
         return deleted_count
 
+    def _list_entries(self) -> List[Dict]:
+        """
+        退避判定用のエントリ一覧取得（実ファイルサイズ・最終アクセス時刻）
+
+        Returns:
+            [{"cache_key", "size_bytes", "last_accessed"}, ...]
+        """
+        entries = []
+
+        for cache_path in self.cache_dir.glob("*.json.gz"):
+            cache_key = cache_path.name[:-len(".json.gz")]
+            try:
+                size_bytes = cache_path.stat().st_size
+            except OSError:
+                continue
+
+            entries.append({
+                "cache_key": cache_key,
+                "size_bytes": size_bytes,
+                "last_accessed": self._get_last_accessed(cache_key)
+            })
+
+        return entries
+
+    def enforce_limits(self, protect: Optional[Set[str]] = None) -> int:
+        """
+        容量上限の適用（LRU退避）
+
+        総バイト数・エントリ数のいずれかが上限を超えている間、
+        最終アクセスが最も古いキャッシュから削除する。
+        書き込み中のキーと protect で指定したキーは削除しない。
+
+        Args:
+            protect: 削除対象から除外するキャッシュキー
+
+        Returns:
+            削除したキャッシュ数
+        """
+        if self.max_total_mb is None and self.max_entries is None:
+            return 0
+
+        entries = self._list_entries()
+        total_bytes = sum(e["size_bytes"] for e in entries)
+        max_bytes = (self.max_total_mb * 1024 * 1024
+                     if self.max_total_mb is not None else None)
+
+        def over_limit() -> bool:
+            if max_bytes is not None and total_bytes > max_bytes:
+                return True
+            if self.max_entries is not None and len(entries) > self.max_entries:
+                return True
+            return False
+
+        if not over_limit():
+            return 0
+
+        with self._inflight_lock:
+            excluded = set(self._inflight)
+        if protect:
+            excluded |= protect
+
+        candidates = sorted(
+            (e for e in entries if e["cache_key"] not in excluded),
+            key=lambda e: e["last_accessed"]
+        )
+
+        evicted = 0
+        for entry in candidates:
+            if not over_limit():
+                break
+
+            # 他プロセスが書き込み中のキーは退避しない
+            if not self.invalidate_cache(entry["cache_key"], blocking=False):
+                continue
+
+            entries.remove(entry)
+            total_bytes -= entry["size_bytes"]
+            evicted += 1
+
+        if evicted > 0:
+            with self._stats_lock:
+                self.evicted_count += evicted
+            logger.info(f"容量上限によるキャッシュ退避: {evicted}件 "
+                        f"(残り{len(entries)}件, "
+                        f"{total_bytes / (1024 * 1024):.1f}MB)")
+
+        return evicted
+
+    def cleanup_stale_temp_files(
+        self, max_age_seconds: float = STALE_TEMP_SECONDS
+    ) -> int:
+        """
+        書き込み途中で異常終了したプロセスの一時ファイルを削除
+
+        Args:
+            max_age_seconds: この秒数より古い一時ファイルを削除
+
+        Returns:
+            削除した一時ファイル数
+        """
+        deleted_count = 0
+        threshold = time.time() - max_age_seconds
+
+        for tmp_path in self.cache_dir.glob(".*.tmp"):
+            try:
+                if tmp_path.stat().st_mtime < threshold:
+                    tmp_path.unlink()
+                    deleted_count += 1
+            except OSError:
+                continue
+
+        if deleted_count > 0:
+            logger.info(f"一時ファイル削除: {deleted_count}件")
+
+        return deleted_count
+
+    def cleanup_orphan_lock_files(self) -> int:
+        """
+        データ・メタデータ・雨量集約のいずれもないキーのロックファイルを削除
+
+        ロックを非ブロッキングで取得できたものだけを、ロックを保持したまま削除する
+        （書き込み中のキーは削除しない）。
+
+        Returns:
+            削除したロックファイル数
+        """
+        deleted_count = 0
+
+        for lock_path in self.cache_dir.glob(".locks/*.lock"):
+            cache_key = lock_path.name[:-len(".lock")]
+            with self._key_lock(cache_key, blocking=False) as acquired:
+                if not acquired:
+                    continue
+                if any(path.exists() for path in (
+                        self._get_cache_path(cache_key),
+                        self._get_meta_path(cache_key),
+                        self._get_rainfall_path(cache_key))):
+                    continue
+                try:
+                    lock_path.unlink()
+                    deleted_count += 1
+                except OSError:
+                    # Windows では開いているファイルを削除できない
+                    continue
+
+        if deleted_count > 0:
+            logger.info(f"ロックファイル削除: {deleted_count}件")
+
+        return deleted_count
+
+    def run_janitor_once(self) -> Dict[str, int]:
+        """
+        ジャニター処理を1回実行
+        （期限切れ削除 + 容量上限適用 + 一時ファイル・ロックファイル掃除）
+
+        Returns:
+            {"expired": 期限切れ削除数, "evicted": 容量退避数,
+             "stale_temp": 一時ファイル削除数, "orphan_locks": ロックファイル削除数}
+        """
+        expired = self.cleanup_expired_caches()
+        evicted = self.enforce_limits()
+        stale_temp = self.cleanup_stale_temp_files()
+        orphan_locks = self.cleanup_orphan_lock_files()
+        return {"expired": expired, "evicted": evicted,
+                "stale_temp": stale_temp, "orphan_locks": orphan_locks}
+
+    def start_janitor(self, interval_seconds: float):
+        """
+        定期ジャニタースレッド起動（デーモン）
+
+        Args:
+            interval_seconds: 実行間隔（秒）
+        """
+        if self._janitor_thread and self._janitor_thread.is_alive():
+            return
+
+        self._janitor_stop.clear()
+
+        def _loop():
+            while not self._janitor_stop.wait(interval_seconds):
+                try:
+                    self.run_janitor_once()
+                except Exception as e:
+                    logger.error(f"キャッシュジャニターエラー: {e}")
+
+        self._janitor_thread = threading.Thread(
+            target=_loop, name="cache-janitor", daemon=True)
+        self._janitor_thread.start()
+
+        logger.info(f"キャッシュジャニター起動: 間隔={interval_seconds}秒")
+
+    def stop_janitor(self):
+        """定期ジャニタースレッド停止"""
+        self._janitor_stop.set()
+        if self._janitor_thread:
+            self._janitor_thread.join(timeout=5)
+            self._janitor_thread = None
+
     def get_cache_stats(self) -> Dict:
         """
         キャッシュ統計情報取得
@@ -322,13 +819,23 @@ class CacheService:
             cache.get('file_size_mb', 0) for cache in caches)
         total_meshes = sum(
             cache.get('mesh_count', 0) for cache in caches)
+        with self._stats_lock:
+            hit_count, miss_count = self.hit_count, self.miss_count
+            evicted_count = self.evicted_count
+        lookups = hit_count + miss_count
 
         return {
             "cache_count": len(caches),
             "total_size_mb": round(total_size_mb, 2),
             "total_meshes": total_meshes,
             "cache_dir": str(self.cache_dir),
-            "ttl_days": self.default_ttl_days
+            "ttl_days": self.default_ttl_days,
+            "max_total_mb": self.max_total_mb,
+            "max_entries": self.max_entries,
+            "evicted_count": evicted_count,
+            "hit_count": hit_count,
+            "miss_count": miss_count,
+            "hit_ratio": round(hit_count / lookups, 4) if lookups else None
         }
 
 
@@ -346,6 +853,19 @@ def get_cache_service() -> CacheService:
     global _cache_service_instance
 
     if _cache_service_instance is None:
-        _cache_service_instance = CacheService()
+        from src.config.config_service import ConfigService
+        config_service = ConfigService()
+
+        _cache_service_instance = CacheService(
+            cache_dir=config_service.get("cache.directory", "cache"),
+            default_ttl_days=config_service.get("cache.ttl_days", 7),
+            max_total_mb=config_service.get("cache.max_total_mb"),
+            max_entries=config_service.get("cache.max_entries")
+        )
+
+        if config_service.get("cache.auto_cleanup", False):
+            interval_hours = config_service.get(
+                "cache.cleanup_interval_hours", 24)
+            _cache_service_instance.start_janitor(interval_hours * 3600)
 
     return _cache_service_instance
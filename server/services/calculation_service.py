@@ -9,6 +9,8 @@ from typing import List, Dict, Any, Tuple
 import logging
 from datetime import datetime, timedelta
 
+import numpy as np
+
 from models import (
     BaseInfo, SwiTimeSeries, GuidanceTimeSeries, Risk,
     Mesh, Area, Prefecture, SecondarySubdivision
@@ -38,6 +40,18 @@ class CalculationService:
         # VBA: get_data_num = (y - 1) * base_info.x_num + x
         return (y - 1) * base_info.x_num + x
 
+    @staticmethod
+    def get_data_num_array(lats: np.ndarray, lons: np.ndarray, base_info: Any) -> np.ndarray:
+        """
+        get_data_num のベクトル版（複数メッシュを一括変換）
+        VBA 1-based戻り値をそのまま返す
+        """
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        y = np.trunc((base_info.s_lat / 1000000 - lats) / (base_info.d_lat / 1000000)).astype(np.int64) + 1
+        x = np.trunc((lons - base_info.s_lon / 1000000) / (base_info.d_lon / 1000000)).astype(np.int64) + 1
+        return (y - 1) * base_info.x_num + x
+
     def get_data_num_from_vba_coordinates(self, vba_x: int, vba_y: int, base_info: Any) -> int:
         """
         VBA座標の処理は通常の緯度経度変換経由で行う
@@ -523,6 +537,10 @@ class CalculationService:
                 initial_second_tunk = swi_grib2['second_tunk'][python_swi_index] / 10
                 initial_third_tunk = initial_swi - initial_first_tunk - initial_second_tunk
 
+                # 雨量調整時の再計算用に保持
+                mesh.initial_tanks = (
+                    initial_first_tunk, initial_second_tunk, initial_third_tunk)
+
                 # 1時間ごとのSWI計算
                 mesh.swi_hourly = self.calc_swi_hourly(
                     initial_swi,
@@ -560,16 +578,22 @@ class CalculationService:
             再計算されたメッシュ
         """
         try:
-            # 既存のSWI初期値を使用（最初のSWI値から逆算）
+            # 既存のSWI初期値を使用
             if mesh.swi and len(mesh.swi) > 0:
                 initial_swi = mesh.swi[0].value
 
-                # タンク値の推定（簡易版：均等分割）
-                # より正確にはSWIデータから取得すべきだが、
-                # 調整後の再計算では元の初期値を保持していると仮定
-                initial_first_tunk = initial_swi * 0.4
-                initial_second_tunk = initial_swi * 0.3
-                initial_third_tunk = initial_swi * 0.3
+                if mesh.initial_tanks is not None:
+                    # GRIB2から取得した初期タンク値（process_mesh_calculations で保持）
+                    initial_first_tunk, initial_second_tunk, initial_third_tunk = \
+                        mesh.initial_tanks
+                else:
+                    # 初期タンク値がない場合の推定（簡易版：4:3:3 に分割）
+                    logger.warning(
+                        f"Initial tanks not available for mesh {mesh.code}, "
+                        f"estimating from SWI")
+                    initial_first_tunk = initial_swi * 0.4
+                    initial_second_tunk = initial_swi * 0.3
+                    initial_third_tunk = initial_swi * 0.3
 
                 # 1時間ごとのSWI再計算
                 mesh.swi_hourly = self.calc_swi_hourly(
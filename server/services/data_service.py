@@ -10,7 +10,13 @@ import os
 import time
 from collections import defaultdict, OrderedDict
 
-from models import Prefecture, Area, Mesh, SecondarySubdivision, PREFECTURES_MASTER
+from models import Prefecture, Area, Mesh, SecondarySubdivision
+from .mesh_catalog import (
+    CATALOG_FILENAME, MeshCatalog, MeshCatalogChanged, build_source_manifest,
+    catalog_source_names, get_mesh_catalog_registry, prefecture_arrays_from_columns
+)
+from .instrumentation import span
+from .prefecture_registry import discover_prefectures
 
 
 logger = logging.getLogger(__name__)
@@ -19,11 +25,14 @@ logger = logging.getLogger(__name__)
 class DataService:
     """データ処理サービス"""
     
-    def __init__(self, data_dir: str = "data"):
+    def __init__(self, data_dir: str = "data", catalog_path: Optional[str] = None):
         self.data_dir = data_dir
-        self.cache = {}
-        self.cache_timestamp = None
-        self.cache_ttl = 300  # 5分キャッシュ
+        # コンパイル済みメッシュカタログ（元CSVのハッシュ付き、変更時は自動再作成）
+        self.catalog_path = catalog_path or os.path.join(data_dir, CATALOG_FILENAME)
+
+    def get_prefectures(self) -> Dict[str, str]:
+        """処理対象府県 {府県コード: 府県名}（data_dir のマニフェストまたは dosha CSV から検出）"""
+        return discover_prefectures(self.data_dir)
     
     def meshcode_to_coordinate(self, code: str) -> Tuple[float, float]:
         """メッシュコードから緯度経度を計算（単一メッシュ用）"""
@@ -43,27 +52,59 @@ class DataService:
             pass
         return 35.0, 135.0  # デフォルト座標
 
+    @staticmethod
+    def parse_meshcodes(mesh_codes) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        メッシュコード列を一括でグリッドインデックス・緯度経度に変換
+
+        コード列を8文字の固定長配列として数字を取り出し、
+        y = AA*80 + C*10 + E, x = BB*80 + D*10 + F を整数演算で求める。
+        8文字未満・数字以外を含むコードは (x, y) = (0, 0)、
+        (lat, lon) = (35.0, 135.0)（単一メッシュ版と同じ既定値）。
+
+        Args:
+            mesh_codes: メッシュコードのシーケンス（文字列・整数）
+
+        Returns:
+            (x, y, lat, lon) の配列
+        """
+        codes = np.asarray(mesh_codes).astype(str)
+        n = len(codes)
+        # 先頭8文字のコードポイント [n, 8]（8文字未満は 0 埋め）
+        chars = np.ascontiguousarray(codes.astype('<U8')).view(np.uint32).reshape(n, 8)
+        digits = chars.astype(np.int64) - ord('0')
+        valid = ((digits >= 0) & (digits <= 9)).all(axis=1)
+        digits[~valid] = 0
+
+        y = (digits[:, 0] * 10 + digits[:, 1]) * 80 + digits[:, 4] * 10 + digits[:, 6]
+        x = (digits[:, 2] * 10 + digits[:, 3]) * 80 + digits[:, 5] * 10 + digits[:, 7]
+        lat = np.where(valid, (y + 0.5) * 30 / 3600, 35.0)
+        lon = np.where(valid, (x + 0.5) * 45 / 3600 + 100, 135.0)
+        return x, y, lat, lon
+
+    @staticmethod
+    def index_to_meshcode(x, y) -> np.ndarray:
+        """
+        グリッドインデックス (x, y) からメッシュコード（8桁文字列）への逆変換
+
+        Args:
+            x: グリッドX（スカラーまたは配列）
+            y: グリッドY（スカラーまたは配列）
+
+        Returns:
+            メッシュコード文字列の配列
+        """
+        x = np.asarray(x, dtype=np.int64)
+        y = np.asarray(y, dtype=np.int64)
+        code = ((y // 80) * 1000000 + (x // 80) * 10000 +
+                (y % 80 // 10) * 1000 + (x % 80 // 10) * 100 +
+                (y % 10) * 10 + x % 10)
+        return np.char.zfill(code.astype(str), 8)
+
     def meshcode_to_coordinate_vectorized(self, mesh_codes: List[str]) -> List[Tuple[float, float]]:
         """メッシュコードから緯度経度を計算（ベクトル化版）"""
-        coords = []
-        for code in mesh_codes:
-            try:
-                if len(str(code)) >= 8:
-                    code_str = str(code)
-                    y = (int(code_str[:2]) * 80 +
-                         int(code_str[4]) * 10 +
-                         int(code_str[6]))
-                    x = (int(code_str[2:4]) * 80 +
-                         int(code_str[5]) * 10 +
-                         int(code_str[7]))
-                    lat = (y + 0.5) * 30 / 3600
-                    lon = (x + 0.5) * 45 / 3600 + 100
-                    coords.append((lat, lon))
-                else:
-                    coords.append((35.0, 135.0))
-            except Exception:
-                coords.append((35.0, 135.0))
-        return coords
+        _, _, lat, lon = self.parse_meshcodes(mesh_codes)
+        return list(zip(lat.tolist(), lon.tolist()))
 
     def meshcode_to_index(self, code: str) -> Tuple[int, int]:
         """メッシュコードからインデックスを計算（単一メッシュ用）"""
@@ -83,23 +124,8 @@ class DataService:
 
     def meshcode_to_index_vectorized(self, mesh_codes: List[str]) -> List[Tuple[int, int]]:
         """メッシュコードからインデックスを計算（ベクトル化版）"""
-        indices = []
-        for code in mesh_codes:
-            try:
-                if len(str(code)) >= 8:
-                    code_str = str(code)
-                    y = (int(code_str[:2]) * 80 +
-                         int(code_str[4]) * 10 +
-                         int(code_str[6]))
-                    x = (int(code_str[2:4]) * 80 +
-                         int(code_str[5]) * 10 +
-                         int(code_str[7]))
-                    indices.append((x, y))
-                else:
-                    indices.append((0, 0))
-            except Exception:
-                indices.append((0, 0))
-        return indices
+        x, y, _, _ = self.parse_meshcodes(mesh_codes)
+        return list(zip(x.tolist(), y.tolist()))
     
     def parse_boundary_value(self, value) -> int:
         """境界値をパース"""
@@ -162,224 +188,319 @@ class DataService:
 
         return dosha_data, dosyakei_data, vba_swi_data
     
+    @staticmethod
+    def parse_int_column(values: pd.Series, default: int,
+                         integer_text_only: bool = False) -> np.ndarray:
+        """
+        境界値列を整数配列に一括変換（pd.to_numeric による型付きクリーニング）
+
+        欠損・数値に変換できない値（"|"、空文字など）は default、
+        小数は0方向に切り捨てる（int(float(...)) と同じ）。
+
+        Args:
+            values: CSVの列
+            default: 変換できない値の代替値
+            integer_text_only: 文字列値は整数表記のみ受け付ける（int(str) と同じ）
+
+        Returns:
+            int64 配列
+        """
+        if pd.api.types.is_numeric_dtype(values):
+            numeric = pd.to_numeric(values, errors='coerce')
+        else:
+            text = values.astype(str).str.strip()
+            numeric = pd.to_numeric(text, errors='coerce')
+            if integer_text_only:
+                numeric = numeric.where(text.str.fullmatch(r'[+-]?\d+'))
+
+        array = numeric.to_numpy(dtype=np.float64, na_value=np.nan)
+        finite = np.isfinite(array)
+        result = np.full(len(array), default, dtype=np.int64)
+        result[finite] = np.trunc(array[finite]).astype(np.int64)
+        return result
+
+    def compile_prefecture_columns(
+        self,
+        dosha_data: pd.DataFrame,
+        dosyakei_data: Optional[pd.DataFrame],
+        vba_swi_data: Optional[pd.DataFrame]
+    ) -> Dict[str, list]:
+        """
+        1府県分のCSVからメッシュ属性列を作成（CSV出現順）
+
+        Returns:
+            {"code", "subdivision", "area", "lat", "lon", "x", "y",
+             "advisary_bound", "warning_bound", "dosyakei_bound", "vba_x", "vba_y"}
+        """
+        # 第1列: 二次細分名、第2列: 市町村名、第3列: メッシュコード、第4・5列: 注意報・警報基準
+        meshes = pd.DataFrame({
+            "subdivision": dosha_data.iloc[:, 0].astype(str).str.strip(),
+            "area": dosha_data.iloc[:, 1].astype(str).str.strip(),
+            "code": dosha_data.iloc[:, 2].astype(str),
+            "advisary_bound": self.parse_int_column(dosha_data.iloc[:, 3], 9999),
+            "warning_bound": self.parse_int_column(dosha_data.iloc[:, 4], 9999)
+        })
+
+        # 座標・インデックスを一括計算（コードの解析は1回）
+        x, y, lat, lon = self.parse_meshcodes(meshes["code"].to_numpy())
+
+        # 土砂災害基準（LEVEL3_00、欠損・999以上は999）をメッシュコードで結合
+        if dosyakei_data is not None:
+            dosyakei = pd.Series(
+                np.minimum(self.parse_int_column(dosyakei_data['LEVEL3_00'], 999), 999),
+                index=dosyakei_data['GRIDNO'].astype(str))
+            # 同一GRIDNOは後の行を優先
+            dosyakei = dosyakei[~dosyakei.index.duplicated(keep='last')]
+            meshes["dosyakei_bound"] = dosyakei.reindex(meshes["code"]).fillna(999) \
+                .astype(np.int64).to_numpy()
+        else:
+            meshes["dosyakei_bound"] = 999
+
+        # VBA X,Y座標を (市町村, 注意報, 警報, 土砂) で結合
+        vba_x = [None] * len(meshes)
+        vba_y = [None] * len(meshes)
+        if vba_swi_data is not None:
+            try:
+                keys = ["area", "advisary_bound", "warning_bound", "dosyakei_bound"]
+                vba = pd.DataFrame({
+                    "area": vba_swi_data.iloc[:, 0].astype(str).str.strip(),
+                    "vba_x": pd.to_numeric(vba_swi_data.iloc[:, 1], errors='coerce')
+                        .fillna(0).astype(np.int64),
+                    "vba_y": pd.to_numeric(vba_swi_data.iloc[:, 2], errors='coerce')
+                        .fillna(0).astype(np.int64),
+                    "advisary_bound": self.parse_int_column(
+                        vba_swi_data.iloc[:, 3], 9999, integer_text_only=True),
+                    "warning_bound": self.parse_int_column(
+                        vba_swi_data.iloc[:, 4], 9999, integer_text_only=True),
+                    "dosyakei_bound": self.parse_int_column(
+                        vba_swi_data.iloc[:, 5], 9999, integer_text_only=True)
+                }).drop_duplicates(subset=keys, keep='last')
+
+                joined = meshes[keys].merge(vba, on=keys, how='left', sort=False)
+                found = joined["vba_x"].notna().to_numpy()
+                vba_x = [int(v) if ok else None
+                         for v, ok in zip(joined["vba_x"].tolist(), found)]
+                vba_y = [int(v) if ok else None
+                         for v, ok in zip(joined["vba_y"].tolist(), found)]
+            except Exception as e:
+                logger.warning(f"VBA座標ルックアップテーブル作成エラー: {e}")
+
+        return {
+            "code": meshes["code"].tolist(),
+            "subdivision": meshes["subdivision"].tolist(),
+            "area": meshes["area"].tolist(),
+            "lat": lat.tolist(),
+            "lon": lon.tolist(),
+            "x": x.tolist(),
+            "y": y.tolist(),
+            "advisary_bound": meshes["advisary_bound"].tolist(),
+            "warning_bound": meshes["warning_bound"].tolist(),
+            "dosyakei_bound": meshes["dosyakei_bound"].tolist(),
+            "vba_x": vba_x,
+            "vba_y": vba_y
+        }
+
+    def compile_prefecture_catalog(self, pref_code: str) -> Optional[Tuple[Dict[str, Any], Dict[str, np.ndarray]]]:
+        """
+        1府県分のCSVをカタログ形式にコンパイル
+
+        Returns:
+            (元CSVマニフェスト, 配列)、dosha CSV がない場合None
+        """
+        source_names = catalog_source_names(self.data_dir, [pref_code])
+        sources = build_source_manifest(self.data_dir, source_names)
+
+        dosha_data, dosyakei_data, vba_swi_data = self.load_csv_data(pref_code)
+        if dosha_data is None:
+            return None
+        columns = self.compile_prefecture_columns(dosha_data, dosyakei_data, vba_swi_data)
+        return sources, prefecture_arrays_from_columns(columns)
+
+    def load_mesh_catalog(self, force_rebuild: bool = False,
+                          prefecture_codes: Optional[List[str]] = None) -> MeshCatalog:
+        """
+        メッシュカタログ取得
+
+        保存済みカタログを開き、指定府県（省略時は全府県）のうち元CSVと
+        一致しない府県だけを再コンパイルして保存する。それ以外の府県の配列は
+        必要になるまで読み込まない。
+        """
+        prefectures = self.get_prefectures()
+        if prefecture_codes is None:
+            prefecture_codes = list(prefectures.keys())
+
+        catalog = None if force_rebuild else MeshCatalog.load(self.catalog_path)
+        if catalog is None:
+            catalog = MeshCatalog({})
+
+        stale = [code for code in prefecture_codes
+                 if force_rebuild or not catalog.is_current(self.data_dir, code)]
+        if not stale:
+            return catalog
+
+        logger.info(f"CSVファイルからメッシュカタログを作成中: {', '.join(stale)}")
+        start_time = time.time()
+        updates = {code: self.compile_prefecture_catalog(code) for code in stale}
+        catalog = catalog.updated(updates, list(prefectures.keys()))
+        logger.info(f"メッシュカタログ作成完了: {len(catalog)}メッシュ "
+                    f"({time.time() - start_time:.2f}秒)")
+
+        try:
+            catalog.save(self.catalog_path)
+            logger.info(f"メッシュカタログ保存: {self.catalog_path}")
+        except OSError as e:
+            logger.warning(f"メッシュカタログ保存エラー: {self.catalog_path} - {e}")
+        return catalog
+
+    def build_prefecture(self, pref_code: str, pref_name: str,
+                         columns: Dict[str, list]) -> Prefecture:
+        """メッシュ属性列から Prefecture（市町村・二次細分・メッシュ）を構築"""
+        # メッシュオブジェクト一括作成（最適化: zip使用で効率化）
+        # OrderedDictを使用してCSV出現順を保持
+        meshes = []
+        area_dict = OrderedDict()
+        subdivision_dict = OrderedDict()  # 二次細分用
+
+        # zip()を使った効率的なイテレーション
+        for (code, subdivision_name, area_name, lat, lon, x, y,
+             adv, warn, dosa, vba_x, vba_y) in zip(
+                columns["code"], columns["subdivision"], columns["area"],
+                columns["lat"], columns["lon"], columns["x"], columns["y"],
+                columns["advisary_bound"], columns["warning_bound"],
+                columns["dosyakei_bound"], columns["vba_x"], columns["vba_y"]):
+            mesh = Mesh(
+                area_name=area_name,
+                code=code,
+                lat=lat,
+                lon=lon,
+                x=x,
+                y=y,
+                advisary_bound=adv,
+                warning_bound=warn,
+                dosyakei_bound=dosa,
+                swi=[],
+                swi_hourly=[],
+                rain_1hour=[],
+                rain_1hour_max=[],
+                rain_3hour=[],
+                risk_hourly=[],
+                risk_3hour_max=[],
+                vba_x=vba_x,
+                vba_y=vba_y
+            )
+
+            meshes.append(mesh)
+
+            # エリア別に分類（CSV出現順を保持）
+            if area_name not in area_dict:
+                area = Area(
+                    name=area_name,
+                    meshes=[],
+                    secondary_subdivision_name=subdivision_name
+                )
+                area_dict[area_name] = area
+
+            area_dict[area_name].meshes.append(mesh)
+
+        # 二次細分構造を構築（CSV出現順を保持）
+        for area in area_dict.values():
+            subdiv_name = area.secondary_subdivision_name
+            if subdiv_name not in subdivision_dict:
+                subdivision = SecondarySubdivision(name=subdiv_name)
+                subdivision_dict[subdiv_name] = subdivision
+
+            subdivision_dict[subdiv_name].areas.append(area)
+
+        # 座標範囲を高速計算
+        area_min_x = min(columns["x"]) if meshes else 0
+        area_max_y = max(columns["y"]) if meshes else 0
+
+        # Prefecture dataclass instance creation
+        prefecture = Prefecture(
+            name=pref_name,
+            code=pref_code,
+            areas=list(area_dict.values()),
+            area_min_x=area_min_x,
+            area_max_y=area_max_y,
+            secondary_subdivisions=list(subdivision_dict.values())
+        )
+
+        logger.debug(f"Prepared {pref_code}: {len(prefecture.secondary_subdivisions)} subdivisions, "
+                   f"{len(prefecture.areas)} areas, {len(meshes)} meshes")
+        return prefecture
+
+    def get_mesh_catalog(self, prefecture_codes: Optional[List[str]] = None) -> MeshCatalog:
+        """
+        プロセス内で共有するメッシュカタログ取得（読み取り専用）
+
+        元CSV・カタログファイルが変更されていれば開き直し、指定府県
+        （省略時は全府県）のカタログが古ければその府県だけ再コンパイルする。
+        """
+        if prefecture_codes is None:
+            prefecture_codes = list(self.get_prefectures().keys())
+
+        registry = get_mesh_catalog_registry()
+        catalog = registry.get(
+            self.data_dir, self.catalog_path,
+            lambda: self.load_mesh_catalog(prefecture_codes=[]))
+        if catalog.verify(self.data_dir, prefecture_codes):
+            return catalog
+
+        return registry.update(
+            self.data_dir, self.catalog_path,
+            lambda: self.load_mesh_catalog(prefecture_codes=prefecture_codes))
+
+    def get_prefecture(self, pref_code: str) -> Optional[Prefecture]:
+        """
+        1府県分の地域データ構築（カタログはこの府県の分だけ読み込む）
+
+        呼び出しごとに新しい Prefecture / Area / Mesh を構築して返す。
+
+        Returns:
+            Prefecture、府県のメッシュデータがない場合None
+        """
+        prefectures = self.get_prefectures()
+        if pref_code not in prefectures:
+            return None
+
+        for attempt in range(2):
+            catalog = self.get_mesh_catalog([pref_code])
+            if pref_code not in catalog:
+                return None
+            try:
+                columns = catalog.prefecture_columns(pref_code)
+                break
+            except MeshCatalogChanged:
+                # 他プロセスがカタログを書き換えた: 開き直して再試行
+                if attempt:
+                    raise
+                get_mesh_catalog_registry().clear()
+
+        return self.build_prefecture(pref_code, prefectures[pref_code], columns)
+
     def prepare_areas(self) -> List[Prefecture]:
-        """地域データ構築（最適化版）"""
-        # キャッシュチェック
-        current_time = time.time()
-        if (self.cache_timestamp and 
-            current_time - self.cache_timestamp < self.cache_ttl and 
-            'prefectures' in self.cache):
-            logger.info("キャッシュからデータを取得")
-            return self.cache['prefectures']
-        
-        logger.info("CSVファイルからデータを構築中...")
+        """
+        地域データ構築（全府県、get_prefecture の一括版）
+
+        呼び出しごとに新しい Prefecture / Area / Mesh を構築して返す。
+        戻り値は呼び出し側の計算結果コンテナとして自由に変更してよい
+        （共有カタログには影響しない）。
+        """
         start_time = time.time()
-        
-        # 全てのCSVデータを事前読み込み
-        csv_loading_start = time.time()
-        all_dosha_data = {}
-        all_dosyakei_data = {}
-        all_vba_swi_data = {}
-
-        for pref_code in PREFECTURES_MASTER.keys():
-            dosha_data, dosyakei_data, vba_swi_data = self.load_csv_data(pref_code)
-            if dosha_data is not None:
-                all_dosha_data[pref_code] = dosha_data
-            if dosyakei_data is not None:
-                all_dosyakei_data[pref_code] = dosyakei_data
-            if vba_swi_data is not None:
-                all_vba_swi_data[pref_code] = vba_swi_data
-        
-        csv_loading_time = time.time() - csv_loading_start
-        logger.info(f"CSV読み込み時間: {csv_loading_time:.2f}秒")
-        
-        # メッシュ処理
-        mesh_processing_start = time.time()
+        # 古い府県はここでまとめて再コンパイルする（府県ごとの書き換えを避ける）
+        with span("catalog.load"):
+            catalog = self.get_mesh_catalog()
+
         prefectures = []
-        
-        for pref_code, pref_name in PREFECTURES_MASTER.items():
-            if pref_code not in all_dosha_data:
-                logger.warning(f"Skipping {pref_code}: no dosha data")
-                continue
-            
-            dosha_data = all_dosha_data[pref_code]
-            dosyakei_data = all_dosyakei_data.get(pref_code)
-            vba_swi_data = all_vba_swi_data.get(pref_code)
-            
-            # pandas vectorized operations を使用
-            # 第1列: 二次細分名、第2列: 市町村名、第3列: メッシュコード
-            subdivision_names = dosha_data.iloc[:, 0].astype(str).str.strip().values
-            area_names = dosha_data.iloc[:, 1].astype(str).str.strip().values
-            mesh_codes = dosha_data.iloc[:, 2].astype(str).values
-            advisary_bounds = dosha_data.iloc[:, 3].apply(self.parse_boundary_value).values
-            warning_bounds = dosha_data.iloc[:, 4].apply(self.parse_boundary_value).values
-            
-            # 座標計算をベクトル化（最適化: 一括処理）
-            coords = self.meshcode_to_coordinate_vectorized(mesh_codes.tolist())
-            indices = self.meshcode_to_index_vectorized(mesh_codes.tolist())
-            
-            # dosyakei境界値を一括取得（最適化: O(n²)→O(n)）
-            if dosyakei_data is not None:
-                # ディクショナリルックアップテーブル作成（pandasベクトル演算）
-                dosyakei_data_filtered = dosyakei_data[['GRIDNO', 'LEVEL3_00']].copy()
-                dosyakei_data_filtered['GRIDNO'] = dosyakei_data_filtered['GRIDNO'].astype(str)
-                dosyakei_data_filtered['LEVEL3_00_processed'] = dosyakei_data_filtered['LEVEL3_00'].apply(
-                    lambda x: 999 if (pd.isna(x) or x >= 999) else int(x)
-                )
-                dosyakei_lookup = dict(zip(
-                    dosyakei_data_filtered['GRIDNO'],
-                    dosyakei_data_filtered['LEVEL3_00_processed']
-                ))
-
-                # O(1)ルックアップで一括取得
-                dosyakei_bounds = [dosyakei_lookup.get(str(code), 999) for code in mesh_codes]
-            else:
-                dosyakei_bounds = [999] * len(mesh_codes)
-
-            # VBA X,Y座標のルックアップテーブル作成（最適化: iterrows()→ベクトル演算）
-            vba_coordinates_lookup = {}
-            if vba_swi_data is not None:
-                try:
-                    # 列をベクトル化して処理
-                    area_names_vba = vba_swi_data.iloc[:, 0].astype(str).str.strip()
-                    vba_x_values = pd.to_numeric(vba_swi_data.iloc[:, 1], errors='coerce').fillna(0).astype(int)
-                    vba_y_values = pd.to_numeric(vba_swi_data.iloc[:, 2], errors='coerce').fillna(0).astype(int)
-
-                    # 境界値を処理
-                    def parse_vba_bound(val):
-                        if pd.isna(val) or str(val).strip() == '':
-                            return 9999
-                        try:
-                            return int(val)
-                        except:
-                            return 9999
-
-                    advisary_vba = vba_swi_data.iloc[:, 3].apply(parse_vba_bound)
-                    warning_vba = vba_swi_data.iloc[:, 4].apply(parse_vba_bound)
-                    dosyakei_vba = vba_swi_data.iloc[:, 5].apply(parse_vba_bound)
-
-                    # ディクショナリ構築
-                    for i in range(len(vba_swi_data)):
-                        key = f"{area_names_vba.iloc[i]}_{advisary_vba.iloc[i]}_{warning_vba.iloc[i]}_{dosyakei_vba.iloc[i]}"
-                        vba_coordinates_lookup[key] = {
-                            'vba_x': vba_x_values.iloc[i],
-                            'vba_y': vba_y_values.iloc[i]
-                        }
-                except Exception as e:
-                    logger.warning(f"VBA座標ルックアップテーブル作成エラー: {e}")
-            
-            # メッシュオブジェクト一括作成（最適化: zip使用で効率化）
-            # OrderedDictを使用してCSV出現順を保持
-            meshes = []
-            area_dict = OrderedDict()
-            subdivision_dict = OrderedDict()  # 二次細分用
-
-            # zip()を使った効率的なイテレーション
-            for code, subdivision_name, area_name, coord, idx, adv, warn, dosa in zip(
-                mesh_codes, subdivision_names, area_names, coords, indices,
-                advisary_bounds, warning_bounds, dosyakei_bounds
-            ):
-                try:
-                    lat, lon = coord
-                    x, y = idx
-
-                    # VBA X,Y座標をルックアップ
-                    vba_x = None
-                    vba_y = None
-                    lookup_key = f"{area_name}_{int(adv)}_{int(warn)}_{dosa}"
-                    if lookup_key in vba_coordinates_lookup:
-                        vba_coords = vba_coordinates_lookup[lookup_key]
-                        vba_x = vba_coords['vba_x']
-                        vba_y = vba_coords['vba_y']
-
-                    mesh = Mesh(
-                        area_name=area_name,
-                        code=code,
-                        lat=lat,
-                        lon=lon,
-                        x=x,
-                        y=y,
-                        advisary_bound=int(adv),
-                        warning_bound=int(warn),
-                        dosyakei_bound=dosa,
-                        swi=[],
-                        swi_hourly=[],
-                        rain_1hour=[],
-                        rain_1hour_max=[],
-                        rain_3hour=[],
-                        risk_hourly=[],
-                        risk_3hour_max=[],
-                        vba_x=vba_x,
-                        vba_y=vba_y
-                    )
-
-                    meshes.append(mesh)
-
-                    # エリア別に分類（CSV出現順を保持）
-                    if area_name not in area_dict:
-                        area = Area(
-                            name=area_name,
-                            meshes=[],
-                            secondary_subdivision_name=subdivision_name
-                        )
-                        area_dict[area_name] = area
-
-                    area_dict[area_name].meshes.append(mesh)
-
-                except Exception as e:
-                    logger.warning(f"Error creating mesh: {e}")
+        with span("areas.build"):
+            for pref_code in self.get_prefectures().keys():
+                prefecture = self.get_prefecture(pref_code)
+                if prefecture is None:
+                    logger.warning(f"Skipping {pref_code}: no dosha data")
                     continue
+                prefectures.append(prefecture)
 
-            # 二次細分構造を構築（CSV出現順を保持）
-            for area in area_dict.values():
-                subdiv_name = area.secondary_subdivision_name
-                if subdiv_name not in subdivision_dict:
-                    subdivision = SecondarySubdivision(name=subdiv_name)
-                    subdivision_dict[subdiv_name] = subdivision
+        logger.info(f"地域データ構築完了: {len(catalog)}メッシュ "
+                    f"(総時間 {time.time() - start_time:.3f}秒)")
 
-                subdivision_dict[subdiv_name].areas.append(area)
-            
-            # 座標範囲を高速計算
-            area_min_x = 0
-            area_max_y = 0
-            if meshes:
-                all_x = [mesh.x for mesh in meshes]
-                all_y = [mesh.y for mesh in meshes]
-                area_min_x = min(all_x)
-                area_max_y = max(all_y)
-            
-            # Prefecture dataclass instance creation
-            prefecture = Prefecture(
-                name=pref_name,
-                code=pref_code,
-                areas=list(area_dict.values()),
-                area_min_x=area_min_x,
-                area_max_y=area_max_y,
-                secondary_subdivisions=list(subdivision_dict.values())
-            )
-            
-            prefectures.append(prefecture)
-            logger.info(f"Prepared {pref_code}: {len(prefecture.secondary_subdivisions)} subdivisions, "
-                       f"{len(prefecture.areas)} areas, {len(meshes)} meshes")
-        
-        mesh_processing_time = time.time() - mesh_processing_start
-        total_time = time.time() - start_time
-        
-        total_meshes = sum(
-            len(area.meshes) 
-            for pref in prefectures 
-            for area in pref.areas
-        )
-        
-        logger.info(f"データ構築完了:")
-        logger.info(f"  CSV読み込み時間: {csv_loading_time:.2f}秒")
-        logger.info(f"  メッシュ処理時間: {mesh_processing_time:.2f}秒")
-        logger.info(f"  総時間: {total_time:.2f}秒")
-        logger.info(f"  総メッシュ数: {total_meshes}")
-        logger.info(f"  処理速度: {total_meshes/total_time:.0f} meshes/second")
-        
-        # キャッシュに保存
-        self.cache['prefectures'] = prefectures
-        self.cache_timestamp = current_time
-        
-        return prefectures
\ No newline at end of file
+        return prefectures
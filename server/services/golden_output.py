@@ -0,0 +1,316 @@
+# -*- coding: utf-8 -*-
+"""
+計算結果のゴールデン出力（フィンガープリント）による等価性検証
+
+最適化した計算経路（GRIB2 解析・タンクモデル・集約など）が参照実装
+（MainService.main_process_from_files、VBA と一致確認済み）と完全に同じ結果を
+出すかを、同梱データに対して1コマンドで確認する。
+
+フィンガープリントは計算結果JSON（API応答と同じ形式）から作る。
+    府県/市町村ごとに、メッシュの静的属性・各時系列（SWI・雨量・危険度）の
+    (メッシュコード, FT, 値) 列を float64 のまま BLAKE2b でハッシュする。
+    府県・二次細分の時系列、初期タンク値、雨量集約も同様にハッシュする。
+浮動小数点の値は丸めずに比較するため、1ビットの違いも不一致になる。
+
+エンジン:
+    (data_dir, swi_file, guidance_file) を受け取り計算結果辞書を返す関数を
+    "モジュール:関数" で指定する。省略時は参照実装（reference_engine）。
+
+使い方:
+    python -m services.golden_output record                     参照実装で記録
+    python -m services.golden_output check --engine pkg.mod:fn   エンジンの結果を検証
+    python -m services.golden_output check --result cache/xxx.json.gz
+                                                                保存済み結果（キャッシュ・API応答）を検証
+"""
+import argparse
+import gzip
+import hashlib
+import importlib
+import json
+import logging
+import os
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .mesh_catalog import _file_sha256, build_source_manifest, catalog_source_names
+
+logger = logging.getLogger(__name__)
+
+# 形式を変えたら上げる（古いゴールデンは再記録が必要）
+GOLDEN_VERSION = 1
+DEFAULT_GOLDEN_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "tests", "golden", "bundled_data.json")
+DEFAULT_SWI_FILENAME = "Z__C_RJTD_20230602000000_SRF_GPV_Ggis1km_Psw_Aper10min_ANAL_grib2.bin"
+DEFAULT_GUIDANCE_FILENAME = "guid_msm_grib2_20230602000000_rmax00.bin"
+
+# メッシュの時系列（計算結果JSONのキー）
+MESH_SERIES = (
+    "swi_timeline", "swi_hourly_timeline",
+    "rain_1hour_timeline", "rain_1hour_max_timeline", "rain_timeline",
+    "risk_hourly_timeline", "risk_3hour_max_timeline",
+)
+# メッシュの静的属性（"mesh" としてまとめてハッシュ）
+MESH_ATTRIBUTES = ("lat", "lon", "x", "y", "advisary_bound", "warning_bound", "dosyakei_bound")
+PREFECTURE_SERIES = (
+    "prefecture_rain_1hour_max_timeline", "prefecture_rain_3hour_timeline",
+    "prefecture_risk_timeline",
+)
+SUBDIVISION_SERIES = ("rain_1hour_max_timeline", "rain_3hour_timeline", "risk_timeline")
+
+Engine = Callable[[str, str, str], Dict[str, Any]]
+
+
+def _hasher():
+    return hashlib.blake2b(digest_size=16)
+
+
+def _update_series(hasher, points: List[Dict[str, Any]]):
+    """時系列 [{"ft", "value"}] をハッシュに追加（長さ・FT・値）"""
+    hasher.update(np.int64(len(points)).tobytes())
+    hasher.update(np.array([p["ft"] for p in points], dtype=np.int64).tobytes())
+    hasher.update(np.array([p["value"] for p in points], dtype=np.float64).tobytes())
+
+
+def _update_text(hasher, text: str):
+    data = str(text).encode("utf-8")
+    hasher.update(np.int64(len(data)).tobytes())
+    hasher.update(data)
+
+
+def _canonical_digest(value: Any) -> str:
+    """JSON化できる値のハッシュ（キー順に依存しない）"""
+    text = json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _area_digests(area: Dict[str, Any]) -> Dict[str, str]:
+    """市町村1件分 {"mesh" / 時系列名 / "risk_timeline": ハッシュ}"""
+    hashers = {name: _hasher() for name in ("mesh",) + MESH_SERIES}
+    for mesh in area.get("meshes", []):
+        code = mesh["code"]
+        for hasher in hashers.values():
+            _update_text(hasher, code)
+        hashers["mesh"].update(
+            np.array([mesh[name] for name in MESH_ATTRIBUTES], dtype=np.float64).tobytes())
+        for name in MESH_SERIES:
+            _update_series(hashers[name], mesh.get(name, []))
+
+    digests = {name: hasher.hexdigest() for name, hasher in hashers.items()}
+    risk = _hasher()
+    _update_text(risk, area.get("secondary_subdivision_name", ""))
+    _update_series(risk, area.get("risk_timeline", []))
+    digests["risk_timeline"] = risk.hexdigest()
+    return digests
+
+
+def _prefecture_digests(pref_data: Dict[str, Any]) -> Dict[str, str]:
+    """府県1件分 {府県の時系列名 / "secondary_subdivisions" / "area_order": ハッシュ}"""
+    digests = {}
+    for name in PREFECTURE_SERIES:
+        hasher = _hasher()
+        _update_series(hasher, pref_data.get(name, []))
+        digests[name] = hasher.hexdigest()
+
+    subdivisions = _hasher()
+    for subdivision in pref_data.get("secondary_subdivisions", []):
+        _update_text(subdivisions, subdivision["name"])
+        for area_name in subdivision.get("area_names", []):
+            _update_text(subdivisions, area_name)
+        for name in SUBDIVISION_SERIES:
+            _update_series(subdivisions, subdivision.get(name, []))
+    digests["secondary_subdivisions"] = subdivisions.hexdigest()
+
+    # 市町村の並び順（メッシュ順はセッションのリスクベクトルの行順になる）
+    order = _hasher()
+    for area in pref_data.get("areas", []):
+        _update_text(order, area["name"])
+    digests["area_order"] = order.hexdigest()
+    return digests
+
+
+def fingerprint(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    計算結果JSONのフィンガープリント
+
+    Args:
+        result: 計算結果（"prefectures"、あれば "initial_tanks" / "rainfall_aggregates"）
+
+    Returns:
+        {"mesh_count", "digest", "entries": {"<府県>" / "<府県>/<市町村>" / 結果全体の項目名:
+                                              {項目名: ハッシュ}}}
+    """
+    entries: Dict[str, Dict[str, str]] = {}
+    mesh_count = 0
+    for pref_code, pref_data in result.get("prefectures", {}).items():
+        entries[pref_code] = _prefecture_digests(pref_data)
+        for area in pref_data.get("areas", []):
+            entries[f"{pref_code}/{area['name']}"] = _area_digests(area)
+            mesh_count += len(area.get("meshes", []))
+
+    for name in ("initial_tanks", "rainfall_aggregates"):
+        if name in result:
+            entries[name] = {"value": _canonical_digest(result[name])}
+
+    return {
+        "mesh_count": mesh_count,
+        "digest": _canonical_digest(entries),
+        "entries": entries
+    }
+
+
+def input_manifest(data_dir: str, swi_file: str, guidance_file: str) -> Dict[str, Any]:
+    """計算の入力（GRIB2・CSV）の SHA-256"""
+    return {
+        "swi_file": os.path.basename(swi_file),
+        "swi_sha256": _file_sha256(swi_file),
+        "guidance_file": os.path.basename(guidance_file),
+        "guidance_sha256": _file_sha256(guidance_file),
+        "csv": {name: source["sha256"] for name, source in build_source_manifest(
+            data_dir, catalog_source_names(data_dir)).items()}
+    }
+
+
+def compare(golden: Dict[str, Any], actual: Dict[str, Any]) -> List[str]:
+    """
+    フィンガープリントの比較
+
+    Returns:
+        不一致の説明（一致すれば空）
+    """
+    if golden.get("digest") == actual.get("digest"):
+        return []
+
+    mismatches = []
+    if golden.get("mesh_count") != actual.get("mesh_count"):
+        mismatches.append(f"メッシュ数: {golden.get('mesh_count')} != {actual.get('mesh_count')}")
+
+    golden_entries = golden.get("entries", {})
+    actual_entries = actual.get("entries", {})
+    for key in sorted(golden_entries.keys() - actual_entries.keys()):
+        mismatches.append(f"{key}: 結果にない")
+    for key in sorted(actual_entries.keys() - golden_entries.keys()):
+        mismatches.append(f"{key}: ゴールデンにない")
+
+    for key in sorted(golden_entries.keys() & actual_entries.keys()):
+        expected, digests = golden_entries[key], actual_entries[key]
+        differing = [name for name in expected if digests.get(name) != expected[name]]
+        differing += [name for name in digests if name not in expected]
+        if differing:
+            mismatches.append(f"{key}: {', '.join(differing)}")
+    return mismatches
+
+
+def reference_engine(data_dir: str, swi_file: str, guidance_file: str) -> Dict[str, Any]:
+    """参照実装（MainService のファイルベース処理）"""
+    from .main_service import MainService
+
+    return MainService(data_dir).main_process_from_files(swi_file, guidance_file)
+
+
+def load_engine(path: Optional[str]) -> Engine:
+    """"モジュール:関数" からエンジンを取得（None なら参照実装）"""
+    if not path:
+        return reference_engine
+    module_name, _, attribute = path.partition(":")
+    if not attribute:
+        raise ValueError(f"エンジンは モジュール:関数 の形式で指定してください: {path}")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def load_result(path: str) -> Dict[str, Any]:
+    """保存済みの計算結果（.json / キャッシュの .json.gz）"""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def record(data_dir: str, swi_file: str, guidance_file: str,
+           engine: Optional[Engine] = None) -> Dict[str, Any]:
+    """参照実装（または指定エンジン）でゴールデンを作成"""
+    result = (engine or reference_engine)(data_dir, swi_file, guidance_file)
+    return {
+        "version": GOLDEN_VERSION,
+        "inputs": input_manifest(data_dir, swi_file, guidance_file),
+        **fingerprint(result)
+    }
+
+
+def check(golden: Dict[str, Any], data_dir: str, swi_file: str, guidance_file: str,
+          engine: Optional[Engine] = None) -> List[str]:
+    """
+    エンジンの計算結果をゴールデンと比較
+
+    Returns:
+        不一致の説明（一致すれば空）
+
+    Raises:
+        ValueError: ゴールデンの形式・入力データが異なる（再記録が必要）
+    """
+    if golden.get("version") != GOLDEN_VERSION:
+        raise ValueError(f"ゴールデンの形式が異なります: {golden.get('version')}（再記録が必要）")
+    inputs = input_manifest(data_dir, swi_file, guidance_file)
+    if golden.get("inputs") != inputs:
+        raise ValueError("ゴールデン記録時と入力データ（GRIB2・CSV）が異なります（再記録が必要）")
+
+    result = (engine or reference_engine)(data_dir, swi_file, guidance_file)
+    return compare(golden, fingerprint(result))
+
+
+def _report(mismatches: Iterable[str], limit: int = 50) -> int:
+    mismatches = list(mismatches)
+    if not mismatches:
+        print("OK: ゴールデン出力と一致")
+        return 0
+    print(f"NG: {len(mismatches)}件の不一致")
+    for mismatch in mismatches[:limit]:
+        print(f"  {mismatch}")
+    if len(mismatches) > limit:
+        print(f"  ...（他 {len(mismatches) - limit}件）")
+    return 1
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="計算結果のゴールデン出力の記録・検証")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    for command, help_text in (("record", "参照実装の結果をゴールデンとして記録"),
+                               ("check", "エンジンまたは保存済み結果をゴールデンと比較")):
+        sub = subparsers.add_parser(command, help=help_text)
+        sub.add_argument("--golden", default=DEFAULT_GOLDEN_PATH, help="ゴールデンファイル")
+        sub.add_argument("--data-dir", default="data", help="CSV・GRIB2 のあるディレクトリ")
+        sub.add_argument("--swi-file", help="SWI GRIB2 ファイル（省略時は同梱データ）")
+        sub.add_argument("--guidance-file", help="ガイダンス GRIB2 ファイル（省略時は同梱データ）")
+        sub.add_argument("--engine", help="計算エンジン モジュール:関数（省略時は参照実装）")
+    subparsers.choices["check"].add_argument(
+        "--result", help="計算せずに保存済みの結果（.json / .json.gz）を比較する")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    swi_file = args.swi_file or os.path.join(args.data_dir, DEFAULT_SWI_FILENAME)
+    guidance_file = args.guidance_file or os.path.join(args.data_dir, DEFAULT_GUIDANCE_FILENAME)
+
+    if args.command == "record":
+        golden = record(args.data_dir, swi_file, guidance_file, load_engine(args.engine))
+        os.makedirs(os.path.dirname(os.path.abspath(args.golden)), exist_ok=True)
+        with open(args.golden, "w", encoding="utf-8") as f:
+            json.dump(golden, f, ensure_ascii=False, indent=1, sort_keys=True)
+            f.write("\n")
+        print(f"{args.golden}: {golden['mesh_count']} meshes, digest {golden['digest']}")
+        return 0
+
+    with open(args.golden, encoding="utf-8") as f:
+        golden = json.load(f)
+    if args.result:
+        return _report(compare(golden, fingerprint(load_result(args.result))))
+    try:
+        return _report(check(golden, args.data_dir, swi_file, guidance_file,
+                             load_engine(args.engine)))
+    except ValueError as e:
+        print(f"エラー: {e}")
+        return 2
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
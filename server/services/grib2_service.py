@@ -11,6 +11,7 @@ import sys
 from datetime import datetime, timedelta
 
 from models import BaseInfo, SwiTimeSeries, GuidanceTimeSeries
+from .instrumentation import get_counters, timed
 
 # 設定サービスのインポート（パス追加）
 sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
@@ -364,6 +365,7 @@ class Grib2Service:
             logger.error(f"SWI GRIB2ファイル読み込みエラー: {e}")
             raise
     
+    @timed("decode.swi")
     def unpack_swi_grib2(self, data: bytes) -> Tuple[BaseInfo, Dict[str, Any]]:
         """土壌雨量指数データ解析（VBA line-by-line完全対応）"""
         try:
@@ -416,7 +418,11 @@ class Grib2Service:
                 'first_tunk': first_tunk or [],
                 'second_tunk': second_tunk or []
             }
-            
+
+            decoded_fields = sum(1 for values in (swi_data, first_tunk, second_tunk) if values)
+            get_counters().increment("decode_grid_points",
+                                     base_info.grid_num * decoded_fields, kind="swi")
+
             return base_info, result
             
         except Exception as e:
@@ -485,6 +491,7 @@ class Grib2Service:
             logger.error(f"Guidance GRIB2ファイル読み込みエラー: {e}")
             raise
     
+    @timed("decode.guidance")
     def unpack_guidance_grib2(self, data: bytes) -> Tuple[BaseInfo, Dict[str, Any]]:
         """降水量予測データ解析（1時間雨量・3時間雨量の両方取得）"""
         try:
@@ -552,6 +559,10 @@ class Grib2Service:
             }
 
             logger.info(f"Guidance解析完了: 1時間雨量={len(guidance_data_1h)}件, 3時間雨量={len(guidance_data_3h)}件")
+            get_counters().increment(
+                "decode_grid_points",
+                base_info.grid_num * (len(guidance_data_1h) + len(guidance_data_3h)),
+                kind="guidance")
 
             return base_info, result
 
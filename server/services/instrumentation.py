@@ -0,0 +1,385 @@
+# -*- coding: utf-8 -*-
+"""
+処理段階ごとの計測（スパン）とプロファイリング
+
+パイプラインの各段階を span("decode.swi") のようなコンテキストマネージャー
+（メソッドには @timed("cache.write")）で囲むと、経過時間を
+
+- 実行中リクエストのトレース（contextvars、Server-Timing ヘッダー・debug フィールド用）
+- プロセス全体の段階別統計（直近 STATS_WINDOW 件の p50 / p95 / p99、
+  起動からの累積ヒストグラム）
+
+に記録する。トレースがない場所（CLI・バックグラウンド処理）では統計だけに記録する。
+
+段階名:
+    download.swi / download.guidance  GRIB2 ダウンロード
+    decode.swi / decode.guidance      GRIB2 解析
+    catalog.load / areas.build        メッシュカタログ取得・Prefecture 構築
+    calc.mesh                         メッシュごとの SWI・雨量・危険度計算
+    aggregate                         市町村・二次細分・府県の集約
+    serialize                         計算結果の辞書化・JSON 化
+    cache.read / cache.write          計算結果キャッシュの読み書き
+
+プロファイリング:
+    環境変数 SOIL_RAINFALL_PROFILE=cprofile / tracemalloc（カンマ区切りで併用可）を
+    設定すると、?profile=1 付きのリクエスト1件ごとに cProfile / tracemalloc を取り付け、
+    結果を SOIL_RAINFALL_PROFILE_DIR（既定 cache/profiles）に保存する。
+"""
+import bisect
+import cProfile
+import contextvars
+import functools
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, Hashable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# 段階ごとに保持する直近の計測数（パーセンタイル計算用）
+STATS_WINDOW = 1024
+# 累積ヒストグラムのバケット上限（秒）
+HISTOGRAM_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                     10.0, 30.0, 60.0, 120.0, 300.0)
+
+PROFILE_ENV = "SOIL_RAINFALL_PROFILE"
+PROFILE_DIR_ENV = "SOIL_RAINFALL_PROFILE_DIR"
+DEFAULT_PROFILE_DIR = os.path.join("cache", "profiles")
+PROFILE_MODES = ("cprofile", "tracemalloc")
+
+
+class Trace:
+    """1リクエスト分の段階別経過時間（同じ段階は合計する）"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages: Dict[str, Dict[str, float]] = {}
+
+    def add(self, name: str, seconds: float):
+        stage = self.stages.get(name)
+        if stage is None:
+            self.stages[name] = {"ms": seconds * 1000, "count": 1}
+        else:
+            stage["ms"] += seconds * 1000
+            stage["count"] += 1
+
+    @property
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self.start) * 1000
+
+    def as_dict(self) -> Dict[str, Any]:
+        """debug フィールド用"""
+        return {
+            "total_ms": round(self.total_ms, 1),
+            "stages": {name: {"ms": round(stage["ms"], 1), "count": stage["count"]}
+                       for name, stage in self.stages.items()}
+        }
+
+    def server_timing(self) -> str:
+        """Server-Timing ヘッダー値（例: decode.swi;dur=812.3, total;dur=950.0）"""
+        entries = [f"{name};dur={stage['ms']:.1f}" for name, stage in self.stages.items()]
+        entries.append(f"total;dur={self.total_ms:.1f}")
+        return ", ".join(entries)
+
+
+class Histogram:
+    """起動からの累積ヒストグラム（バケット上限以下の件数、Prometheus の le と同じ）"""
+
+    def __init__(self, buckets: Tuple[float, ...] = HISTOGRAM_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 末尾は +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        """[(バケット上限, 累積件数)]（最後は (inf, 総件数)）"""
+        result = []
+        total = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+class StageStats:
+    """
+    プロセス全体の段階別統計（スレッドセーフ）
+
+    キーは段階名のほか、(メソッド, ルート, ステータス) のようなタプルでもよい。
+    """
+
+    def __init__(self, window: int = STATS_WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples: Dict[Hashable, Deque[float]] = {}
+        self._histograms: Dict[Hashable, Histogram] = {}
+
+    def record(self, name: Hashable, seconds: float):
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.window)
+                self._histograms[name] = Histogram()
+            samples.append(seconds)
+            self._histograms[name].observe(seconds)
+
+    def summary(self) -> Dict[Hashable, Dict[str, float]]:
+        """
+        段階別の集計
+
+        Returns:
+            {段階名: {"count", "total_seconds", "mean_ms", "p50_ms", "p95_ms", "p99_ms",
+                      "max_ms"}}（パーセンタイル・最大は直近 window 件）
+        """
+        with self._lock:
+            snapshot = {name: (np.array(samples), self._histograms[name].count,
+                               self._histograms[name].sum)
+                        for name, samples in self._samples.items()}
+
+        summary = {}
+        for name, (samples, count, total) in sorted(snapshot.items()):
+            p50, p95, p99 = np.percentile(samples, [50, 95, 99]) * 1000
+            summary[name] = {
+                "count": count,
+                "total_seconds": round(total, 3),
+                "mean_ms": round(total / count * 1000, 2),
+                "p50_ms": round(float(p50), 2),
+                "p95_ms": round(float(p95), 2),
+                "p99_ms": round(float(p99), 2),
+                "max_ms": round(float(samples.max()) * 1000, 2)
+            }
+        return summary
+
+    def histograms(self) -> Dict[Hashable, Dict[str, Any]]:
+        """
+        累積ヒストグラムのスナップショット
+
+        Returns:
+            {キー: {"buckets": [(上限, 累積件数)], "sum", "count"}}
+        """
+        with self._lock:
+            return {name: {"buckets": histogram.cumulative(), "sum": histogram.sum,
+                           "count": histogram.count}
+                    for name, histogram in sorted(self._histograms.items())}
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._histograms.clear()
+
+
+class Counters:
+    """ラベル付きの累積カウンター（スレッドセーフ）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+
+    def increment(self, name: str, value: float = 1, **labels: str):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def values(self, name: str) -> Dict[Tuple[Tuple[str, str], ...], float]:
+        """{ラベル: 値}"""
+        with self._lock:
+            return {labels: value for (key, labels), value in self._values.items()
+                    if key == name}
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("trace", default=None)
+_stage_stats = StageStats()
+_request_stats = StageStats()
+_counters = Counters()
+
+
+def get_stage_stats() -> StageStats:
+    """プロセス全体の StageStats 取得"""
+    return _stage_stats
+
+
+def get_request_stats() -> StageStats:
+    """リクエスト処理時間の統計（キー: (メソッド, ルート, ステータス)）"""
+    return _request_stats
+
+
+def get_counters() -> Counters:
+    """プロセス全体のカウンター取得（GRIB2 解析格子点数など）"""
+    return _counters
+
+
+def current_rss_bytes() -> Optional[int]:
+    """プロセスの常駐メモリ（バイト）、取得できない環境ではNone"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """プロセスのピーク常駐メモリ（バイト）、取得できない環境ではNone"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux は KB、macOS はバイト
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def start_trace() -> Trace:
+    """現在のコンテキスト（リクエスト）のトレース開始"""
+    trace = Trace()
+    _current_trace.set(trace)
+    return trace
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+def end_trace() -> Optional[Trace]:
+    """現在のトレースを終了して返す"""
+    trace = _current_trace.get()
+    _current_trace.set(None)
+    return trace
+
+
+class Span:
+    """計測結果（with 文の終了後に seconds が入る）"""
+    __slots__ = ("name", "seconds")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.seconds = 0.0
+
+
+@contextmanager
+def span(name: str) -> Iterator[Span]:
+    """段階の経過時間を計測してトレース・統計に記録"""
+    result = Span(name)
+    start = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result.seconds = time.perf_counter() - start
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add(name, result.seconds)
+        _stage_stats.record(name, result.seconds)
+
+
+def timed(name: str) -> Callable:
+    """メソッド全体を span(name) で計測するデコレーター"""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def profile_modes() -> List[str]:
+    """環境変数で有効にしたプロファイラー（未設定なら空）"""
+    value = os.environ.get(PROFILE_ENV, "")
+    return [mode for mode in (m.strip().lower() for m in value.split(","))
+            if mode in PROFILE_MODES]
+
+
+class RequestProfiler:
+    """
+    1リクエストに cProfile / tracemalloc を取り付ける
+
+    同時に計測できるのは1リクエストのみ（他のリクエストは計測しない）。
+    """
+
+    _busy = threading.Lock()
+
+    def __init__(self, modes: List[str], output_dir: Optional[str] = None):
+        self.modes = modes
+        self.output_dir = output_dir or os.environ.get(PROFILE_DIR_ENV, DEFAULT_PROFILE_DIR)
+        self.profiler: Optional[cProfile.Profile] = None
+        self.started_tracemalloc = False
+        self.active = False
+
+    def start(self) -> bool:
+        """計測開始（他のリクエストを計測中ならFalse）"""
+        if not self.modes or not self._busy.acquire(blocking=False):
+            return False
+        self.active = True
+        if "tracemalloc" in self.modes and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracemalloc = True
+        if "cprofile" in self.modes:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        return True
+
+    def stop(self, label: str) -> List[str]:
+        """
+        計測終了・結果保存
+
+        Args:
+            label: ファイル名に使うラベル（エンドポイント名など）
+
+        Returns:
+            保存したファイルのパス
+        """
+        if not self.active:
+            return []
+        paths = []
+        try:
+            if self.profiler is not None:
+                self.profiler.disable()
+            os.makedirs(self.output_dir, exist_ok=True)
+            base = os.path.join(
+                self.output_dir,
+                f"{datetime.now():%Y%m%d_%H%M%S_%f}_{re.sub(r'[^A-Za-z0-9_.-]', '_', label)}")
+
+            if self.profiler is not None:
+                path = f"{base}.prof"
+                self.profiler.dump_stats(path)
+                paths.append(path)
+
+            if tracemalloc.is_tracing() and "tracemalloc" in self.modes:
+                snapshot = tracemalloc.take_snapshot()
+                current, peak = tracemalloc.get_traced_memory()
+                path = f"{base}.tracemalloc.txt"
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(f"current={current / 1024 / 1024:.1f}MB "
+                            f"peak={peak / 1024 / 1024:.1f}MB\n")
+                    for stat in snapshot.statistics('lineno')[:50]:
+                        f.write(f"{stat}\n")
+                paths.append(path)
+            logger.info(f"プロファイル保存: {', '.join(paths)}")
+        except OSError as e:
+            logger.warning(f"プロファイル保存エラー: {e}")
+        finally:
+            if self.started_tracemalloc:
+                tracemalloc.stop()
+            self.active = False
+            self._busy.release()
+        return paths
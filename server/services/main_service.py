@@ -12,6 +12,9 @@ from .grib2_service import Grib2Service
 from .data_service import DataService
 from .calculation_service import CalculationService
 from .cache_service import get_cache_service
+from .instrumentation import span
+from .rainfall_adjustment_service import RainfallAdjustmentService
+from .rainfall_recompute_service import collect_initial_tanks, encode_initial_tanks
 from src.config.config_service import ConfigService
 
 
@@ -25,6 +28,7 @@ class MainService:
         self.grib2_service = Grib2Service()
         self.data_service = DataService(data_dir)
         self.calculation_service = CalculationService()
+        self.rainfall_service = RainfallAdjustmentService()
         self.cache_service = get_cache_service()
         self.config_service = ConfigService()
     
@@ -55,39 +59,24 @@ class MainService:
             
             # メッシュ計算処理
             logger.info("メッシュ計算処理開始")
-            calc_start = time.time()
-
-            total_meshes = 0
-            for prefecture in prefectures:
-                for area in prefecture.areas:
-                    # 個別メッシュごとに計算を実行
-                    for i, mesh in enumerate(area.meshes):
-                        area.meshes[i] = self.calculation_service.process_mesh_calculations(
-                            mesh, swi_grib2, guidance_grib2
-                        )
-                    total_meshes += len(area.meshes)
-
-            calc_time = time.time() - calc_start
-            logger.info(f"メッシュ計算完了: {calc_time:.2f}秒 ({total_meshes}メッシュ)")
+            with span("calc.mesh") as calc_span:
+                total_meshes = 0
+                for prefecture in prefectures:
+                    for area in prefecture.areas:
+                        # 個別メッシュごとに計算を実行
+                        for i, mesh in enumerate(area.meshes):
+                            area.meshes[i] = self.calculation_service.process_mesh_calculations(
+                                mesh, swi_grib2, guidance_grib2
+                            )
+                        total_meshes += len(area.meshes)
+
+            logger.info(f"メッシュ計算完了: {calc_span.seconds:.2f}秒 ({total_meshes}メッシュ)")
 
             # リスクタイムライン計算
             logger.info("リスクタイムライン計算開始")
-            risk_start = time.time()
-
-            for prefecture in prefectures:
-                # エリアごとのリスクタイムライン計算
-                for area in prefecture.areas:
-                    area.risk_timeline = self.calculation_service.calc_risk_timeline(area.meshes)
-
-                # 二次細分ごとの集約計算
-                for subdivision in prefecture.secondary_subdivisions:
-                    self.calculation_service.calc_secondary_subdivision_aggregates(subdivision)
-
-                # 府県全体の集約計算
-                self.calculation_service.calc_prefecture_aggregates(prefecture)
-
-            risk_time = time.time() - risk_start
-            logger.info(f"リスクタイムライン・集約計算完了: {risk_time:.2f}秒")
+            with span("aggregate") as risk_span:
+                rainfall_aggregates = self._aggregate(prefectures)
+            logger.info(f"リスクタイムライン・集約計算完了: {risk_span.seconds:.2f}秒")
             
             # 結果構築
             total_time = time.time() - start_time
@@ -100,103 +89,14 @@ class MainService:
                 "prefectures": {}
             }
             
-            # データ構造を辞書形式に変換
-            for prefecture in prefectures:
-                pref_data = {
-                    "name": prefecture.name,
-                    "code": prefecture.code,
-                    "areas": [],
-                    "secondary_subdivisions": [],
-                    "prefecture_rain_1hour_max_timeline": [
-                        {"ft": r.ft, "value": float(r.value)}
-                        for r in prefecture.prefecture_rain_1hour_max_timeline
-                    ],
-                    "prefecture_rain_3hour_timeline": [
-                        {"ft": r.ft, "value": float(r.value)}
-                        for r in prefecture.prefecture_rain_3hour_timeline
-                    ],
-                    "prefecture_risk_timeline": [
-                        {"ft": r.ft, "value": r.value}
-                        for r in prefecture.prefecture_risk_timeline
-                    ]
-                }
+            with span("serialize"):
+                result["prefectures"] = self._serialize_prefectures(prefectures)
 
-                # 二次細分データ
-                for subdivision in prefecture.secondary_subdivisions:
-                    subdiv_data = {
-                        "name": subdivision.name,
-                        "area_names": [area.name for area in subdivision.areas],
-                        "rain_1hour_max_timeline": [
-                            {"ft": r.ft, "value": float(r.value)}
-                            for r in subdivision.rain_1hour_max_timeline
-                        ],
-                        "rain_3hour_timeline": [
-                            {"ft": r.ft, "value": float(r.value)}
-                            for r in subdivision.rain_3hour_timeline
-                        ],
-                        "risk_timeline": [
-                            {"ft": r.ft, "value": r.value}
-                            for r in subdivision.risk_timeline
-                        ]
-                    }
-                    pref_data["secondary_subdivisions"].append(subdiv_data)
-
-                # エリア（市町村）データ
-                for area in prefecture.areas:
-                    area_data = {
-                        "name": area.name,
-                        "secondary_subdivision_name": area.secondary_subdivision_name,
-                        "meshes": [],
-                        "risk_timeline": [
-                            {"ft": risk.ft, "value": risk.value}
-                            for risk in area.risk_timeline
-                        ]
-                    }
+                # 雨量調整の再計算用に初期タンク値を保持（float32、SessionIndex の行順）
+                result["initial_tanks"] = encode_initial_tanks(
+                    collect_initial_tanks(prefectures))
 
-                    for mesh in area.meshes:
-                        mesh_data = {
-                            "code": mesh.code,
-                            "lat": float(mesh.lat),
-                            "lon": float(mesh.lon),
-                            "x": int(mesh.x),
-                            "y": int(mesh.y),
-                            "advisary_bound": int(mesh.advisary_bound),
-                            "warning_bound": int(mesh.warning_bound),
-                            "dosyakei_bound": int(mesh.dosyakei_bound),
-                            "swi_timeline": [
-                                {"ft": s.ft, "value": float(s.value)}
-                                for s in mesh.swi
-                            ],
-                            "swi_hourly_timeline": [
-                                {"ft": s.ft, "value": float(s.value)}
-                                for s in mesh.swi_hourly
-                            ],
-                            "rain_1hour_timeline": [
-                                {"ft": r.ft, "value": float(r.value)}
-                                for r in mesh.rain_1hour
-                            ],
-                            "rain_1hour_max_timeline": [
-                                {"ft": r.ft, "value": float(r.value)}
-                                for r in mesh.rain_1hour_max
-                            ],
-                            "rain_timeline": [
-                                {"ft": r.ft, "value": float(r.value)}
-                                for r in mesh.rain_3hour
-                            ],
-                            "risk_hourly_timeline": [
-                                {"ft": r.ft, "value": r.value}
-                                for r in mesh.risk_hourly
-                            ],
-                            "risk_3hour_max_timeline": [
-                                {"ft": r.ft, "value": r.value}
-                                for r in mesh.risk_3hour_max
-                            ]
-                        }
-                        area_data["meshes"].append(mesh_data)
-
-                    pref_data["areas"].append(area_data)
-
-                result["prefectures"][prefecture.code] = pref_data
+            result["rainfall_aggregates"] = rainfall_aggregates
             
             logger.info(f"総処理時間: {total_time:.2f}秒")
             logger.info(f"処理速度: {total_meshes/total_time:.0f} meshes/second")
@@ -218,11 +118,13 @@ class MainService:
             logger.info(f"Guidance URL: {guidance_url}")
 
             # GRIB2データダウンロード・解析
-            swi_data_bytes = self.grib2_service.download_file(swi_url)
+            with span("download.swi"):
+                swi_data_bytes = self.grib2_service.download_file(swi_url)
             if not swi_data_bytes:
                 raise Exception(f"SWIファイルダウンロード失敗: {swi_url}")
 
-            guidance_data_bytes = self.grib2_service.download_file(guidance_url)
+            with span("download.guidance"):
+                guidance_data_bytes = self.grib2_service.download_file(guidance_url)
             if not guidance_data_bytes:
                 raise Exception(f"ガイダンスファイルダウンロード失敗: {guidance_url}")
 
@@ -259,11 +161,13 @@ class MainService:
             logger.info(f"Guidance URL: {guidance_url}")
 
             # GRIB2データダウンロード・解析
-            swi_data_bytes = self.grib2_service.download_file(swi_url)
+            with span("download.swi"):
+                swi_data_bytes = self.grib2_service.download_file(swi_url)
             if not swi_data_bytes:
                 raise Exception(f"SWIファイルダウンロード失敗: {swi_url}")
 
-            guidance_data_bytes = self.grib2_service.download_file(guidance_url)
+            with span("download.guidance"):
+                guidance_data_bytes = self.grib2_service.download_file(guidance_url)
             if not guidance_data_bytes:
                 raise Exception(f"ガイダンスファイルダウンロード失敗: {guidance_url}")
 
@@ -384,27 +288,17 @@ class MainService:
             prefectures = self.data_service.prepare_areas()
             
             # メッシュ計算処理
-            total_meshes = 0
-            for prefecture in prefectures:
-                for area in prefecture.areas:
-                    for mesh in area.meshes:
-                        self.calculation_service.process_mesh_calculations(
-                            mesh, swi_grib2, guidance_grib2
-                        )
-                        total_meshes += 1
+            with span("calc.mesh"):
+                for prefecture in prefectures:
+                    for area in prefecture.areas:
+                        for mesh in area.meshes:
+                            self.calculation_service.process_mesh_calculations(
+                                mesh, swi_grib2, guidance_grib2
+                            )
             
             # リスクタイムライン・集約計算
-            for prefecture in prefectures:
-                # エリアごとのリスクタイムライン計算
-                for area in prefecture.areas:
-                    area.risk_timeline = self.calculation_service.calc_risk_timeline(area.meshes)
-
-                # 二次細分ごとの集約計算
-                for subdivision in prefecture.secondary_subdivisions:
-                    self.calculation_service.calc_secondary_subdivision_aggregates(subdivision)
-
-                # 府県全体の集約計算
-                self.calculation_service.calc_prefecture_aggregates(prefecture)
+            with span("aggregate"):
+                rainfall_aggregates = self._aggregate(prefectures)
             
             # 結果構築
             result = {
@@ -413,106 +307,140 @@ class MainService:
                 "prefectures": {}
             }
             
-            # データ変換は main_process_from_files と同じロジック
-            for prefecture in prefectures:
-                pref_data = {
-                    "name": prefecture.name,
-                    "code": prefecture.code,
-                    "areas": [],
-                    "secondary_subdivisions": [],
-                    "prefecture_rain_1hour_max_timeline": [
+            with span("serialize"):
+                result["prefectures"] = self._serialize_prefectures(prefectures)
+
+                # 雨量調整の再計算用に初期タンク値を保持（float32、SessionIndex の行順）
+                result["initial_tanks"] = encode_initial_tanks(
+                    collect_initial_tanks(prefectures))
+
+            result["rainfall_aggregates"] = rainfall_aggregates
+            
+            return result
+            
+        except Exception as e:
+            logger.error(f"データ処理エラー: {e}")
+            raise
+
+    def _aggregate(self, prefectures: List[Prefecture]) -> Dict[str, Any]:
+        """
+        リスクタイムライン・二次細分・府県全体の集約計算
+
+        Returns:
+            雨量調整モーダル用の市町村・二次細分別雨量時系列（予測実行ごとに1回）
+        """
+        for prefecture in prefectures:
+            # エリアごとのリスクタイムライン計算
+            for area in prefecture.areas:
+                area.risk_timeline = self.calculation_service.calc_risk_timeline(area.meshes)
+
+            # 二次細分ごとの集約計算
+            for subdivision in prefecture.secondary_subdivisions:
+                self.calculation_service.calc_secondary_subdivision_aggregates(subdivision)
+
+            # 府県全体の集約計算
+            self.calculation_service.calc_prefecture_aggregates(prefecture)
+
+        return self.rainfall_service.calc_group_rainfall(prefectures)
+
+    def _serialize_prefectures(self, prefectures: List[Prefecture]) -> Dict[str, Any]:
+        """Prefecture リストを計算結果JSONの prefectures 形式に変換"""
+        result_prefectures = {}
+        for prefecture in prefectures:
+            pref_data = {
+                "name": prefecture.name,
+                "code": prefecture.code,
+                "areas": [],
+                "secondary_subdivisions": [],
+                "prefecture_rain_1hour_max_timeline": [
+                    {"ft": r.ft, "value": float(r.value)}
+                    for r in prefecture.prefecture_rain_1hour_max_timeline
+                ],
+                "prefecture_rain_3hour_timeline": [
+                    {"ft": r.ft, "value": float(r.value)}
+                    for r in prefecture.prefecture_rain_3hour_timeline
+                ],
+                "prefecture_risk_timeline": [
+                    {"ft": r.ft, "value": r.value}
+                    for r in prefecture.prefecture_risk_timeline
+                ]
+            }
+
+            # 二次細分データ
+            for subdivision in prefecture.secondary_subdivisions:
+                subdiv_data = {
+                    "name": subdivision.name,
+                    "area_names": [area.name for area in subdivision.areas],
+                    "rain_1hour_max_timeline": [
                         {"ft": r.ft, "value": float(r.value)}
-                        for r in prefecture.prefecture_rain_1hour_max_timeline
+                        for r in subdivision.rain_1hour_max_timeline
                     ],
-                    "prefecture_rain_3hour_timeline": [
+                    "rain_3hour_timeline": [
                         {"ft": r.ft, "value": float(r.value)}
-                        for r in prefecture.prefecture_rain_3hour_timeline
+                        for r in subdivision.rain_3hour_timeline
                     ],
-                    "prefecture_risk_timeline": [
+                    "risk_timeline": [
                         {"ft": r.ft, "value": r.value}
-                        for r in prefecture.prefecture_risk_timeline
+                        for r in subdivision.risk_timeline
+                    ]
+                }
+                pref_data["secondary_subdivisions"].append(subdiv_data)
+
+            # エリア（市町村）データ
+            for area in prefecture.areas:
+                area_data = {
+                    "name": area.name,
+                    "secondary_subdivision_name": area.secondary_subdivision_name,
+                    "meshes": [],
+                    "risk_timeline": [
+                        {"ft": risk.ft, "value": risk.value}
+                        for risk in area.risk_timeline
                     ]
                 }
 
-                # 二次細分データ
-                for subdivision in prefecture.secondary_subdivisions:
-                    subdiv_data = {
-                        "name": subdivision.name,
-                        "area_names": [area.name for area in subdivision.areas],
+                for mesh in area.meshes:
+                    mesh_data = {
+                        "code": mesh.code,
+                        "lat": float(mesh.lat),
+                        "lon": float(mesh.lon),
+                        "x": int(mesh.x),
+                        "y": int(mesh.y),
+                        "advisary_bound": int(mesh.advisary_bound),
+                        "warning_bound": int(mesh.warning_bound),
+                        "dosyakei_bound": int(mesh.dosyakei_bound),
+                        "swi_timeline": [
+                            {"ft": s.ft, "value": float(s.value)}
+                            for s in mesh.swi
+                        ],
+                        "swi_hourly_timeline": [
+                            {"ft": s.ft, "value": float(s.value)}
+                            for s in mesh.swi_hourly
+                        ],
+                        "rain_1hour_timeline": [
+                            {"ft": r.ft, "value": float(r.value)}
+                            for r in mesh.rain_1hour
+                        ],
                         "rain_1hour_max_timeline": [
                             {"ft": r.ft, "value": float(r.value)}
-                            for r in subdivision.rain_1hour_max_timeline
+                            for r in mesh.rain_1hour_max
                         ],
-                        "rain_3hour_timeline": [
+                        "rain_timeline": [
                             {"ft": r.ft, "value": float(r.value)}
-                            for r in subdivision.rain_3hour_timeline
+                            for r in mesh.rain_3hour
                         ],
-                        "risk_timeline": [
+                        "risk_hourly_timeline": [
                             {"ft": r.ft, "value": r.value}
-                            for r in subdivision.risk_timeline
-                        ]
-                    }
-                    pref_data["secondary_subdivisions"].append(subdiv_data)
-
-                # エリア（市町村）データ
-                for area in prefecture.areas:
-                    area_data = {
-                        "name": area.name,
-                        "secondary_subdivision_name": area.secondary_subdivision_name,
-                        "meshes": [],
-                        "risk_timeline": [
-                            {"ft": risk.ft, "value": risk.value}
-                            for risk in area.risk_timeline
+                            for r in mesh.risk_hourly
+                        ],
+                        "risk_3hour_max_timeline": [
+                            {"ft": r.ft, "value": r.value}
+                            for r in mesh.risk_3hour_max
                         ]
                     }
+                    area_data["meshes"].append(mesh_data)
 
-                    for mesh in area.meshes:
-                        mesh_data = {
-                            "code": mesh.code,
-                            "lat": float(mesh.lat),
-                            "lon": float(mesh.lon),
-                            "x": int(mesh.x),
-                            "y": int(mesh.y),
-                            "advisary_bound": int(mesh.advisary_bound),
-                            "warning_bound": int(mesh.warning_bound),
-                            "dosyakei_bound": int(mesh.dosyakei_bound),
-                            "swi_timeline": [
-                                {"ft": s.ft, "value": float(s.value)}
-                                for s in mesh.swi
-                            ],
-                            "swi_hourly_timeline": [
-                                {"ft": s.ft, "value": float(s.value)}
-                                for s in mesh.swi_hourly
-                            ],
-                            "rain_1hour_timeline": [
-                                {"ft": r.ft, "value": float(r.value)}
-                                for r in mesh.rain_1hour
-                            ],
-                            "rain_1hour_max_timeline": [
-                                {"ft": r.ft, "value": float(r.value)}
-                                for r in mesh.rain_1hour_max
-                            ],
-                            "rain_timeline": [
-                                {"ft": r.ft, "value": float(r.value)}
-                                for r in mesh.rain_3hour
-                            ],
-                            "risk_hourly_timeline": [
-                                {"ft": r.ft, "value": r.value}
-                                for r in mesh.risk_hourly
-                            ],
-                            "risk_3hour_max_timeline": [
-                                {"ft": r.ft, "value": r.value}
-                                for r in mesh.risk_3hour_max
-                            ]
-                        }
-                        area_data["meshes"].append(mesh_data)
-
-                    pref_data["areas"].append(area_data)
-
-                result["prefectures"][prefecture.code] = pref_data
-            
-            return result
-            
-        except Exception as e:
-            logger.error(f"データ処理エラー: {e}")
-            raise
\ No newline at end of file
+                pref_data["areas"].append(area_data)
+
+            result_prefectures[prefecture.code] = pref_data
+
+        return result_prefectures
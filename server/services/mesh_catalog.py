@@ -0,0 +1,466 @@
+# -*- coding: utf-8 -*-
+"""
+コンパイル済みメッシュカタログ
+
+dosha_*.csv / dosyakei_*.csv / *_swi.csv から作る静的なメッシュ属性
+（二次細分・市町村・座標・基準値・VBA座標）を、府県ごとの列配列として
+1つの npz ファイルに保存する（メンバー名 "<府県コード>/<列名>"）。
+
+ヘッダーには形式バージョンと府県ごとの元CSVマニフェスト（サイズ・mtime・SHA-256）を
+含める。府県の列は最初に必要になったときに読み込み、元CSVが追加・削除・変更された
+府県だけを DataService が再コンパイルしてファイルを書き換える。
+
+カタログはプロセス内で1つだけ保持し（MeshCatalogRegistry）、全サービスで共有する。
+配列・列は読み取り専用で、計算ごとの可変な Prefecture / Mesh は
+DataService.get_prefecture / prepare_areas がカタログから新しく構築する。
+
+ビルド:
+    python -m services.mesh_catalog [--data-dir data] [--force]
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import secrets
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .prefecture_registry import discover_prefectures
+
+logger = logging.getLogger(__name__)
+
+# 形式を変えたら上げる（古い形式のファイルは再コンパイルされる）
+CATALOG_VERSION = 2
+CATALOG_FILENAME = "mesh_catalog.npz"
+
+# 数値列（列名, dtype）
+NUMERIC_COLUMNS = (
+    ("lat", np.float64),
+    ("lon", np.float64),
+    ("x", np.int32),
+    ("y", np.int32),
+    ("advisary_bound", np.int32),
+    ("warning_bound", np.int32),
+    ("dosyakei_bound", np.int32),
+)
+
+# 府県ごとに保存する配列
+ARRAY_NAMES = ("code", "names", "subdivision", "area", "vba_x", "vba_y", "has_vba") + \
+    tuple(name for name, _ in NUMERIC_COLUMNS)
+
+
+class MeshCatalogChanged(RuntimeError):
+    """読み込み途中でカタログファイルが別の内容に置き換えられた"""
+
+
+def catalog_source_names(data_dir: str,
+                         prefecture_codes: Optional[Sequence[str]] = None) -> List[str]:
+    """カタログの元になるCSVファイル名（存在するもののみ）"""
+    if prefecture_codes is None:
+        prefecture_codes = list(discover_prefectures(data_dir).keys())
+    names = []
+    for code in prefecture_codes:
+        for name in (f"dosha_{code}.csv", f"dosyakei_{code}.csv", f"{code}_swi.csv"):
+            if os.path.exists(os.path.join(data_dir, name)):
+                names.append(name)
+    return names
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_source_manifest(data_dir: str, names: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+    """元CSVのマニフェスト {ファイル名: {"size", "mtime_ns", "sha256"}}"""
+    manifest = {}
+    for name in names:
+        path = os.path.join(data_dir, name)
+        stat = os.stat(path)
+        manifest[name] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": _file_sha256(path)
+        }
+    return manifest
+
+
+def sources_match(data_dir: str, sources: Dict[str, Dict[str, Any]],
+                  names: Sequence[str]) -> bool:
+    """
+    マニフェストが元CSVと一致するか
+
+    サイズ・mtime が一致するファイルはハッシュ計算を省略し、
+    mtime のみ変わったファイルは SHA-256 で比較する。
+    """
+    if set(names) != set(sources):
+        return False
+    for name in names:
+        recorded = sources[name]
+        path = os.path.join(data_dir, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        if stat.st_size != recorded["size"]:
+            return False
+        if stat.st_mtime_ns == recorded["mtime_ns"]:
+            continue
+        if _file_sha256(path) != recorded["sha256"]:
+            return False
+    return True
+
+
+def prefecture_arrays_from_columns(columns: Dict[str, Sequence]) -> Dict[str, np.ndarray]:
+    """
+    府県の列（DataService.compile_prefecture_columns の出力）を保存用配列に変換
+
+    二次細分名・市町村名は names 表へのインデックス、
+    vba_x / vba_y の None は has_vba=False として保持する。
+    """
+    name_index: Dict[str, int] = {}
+
+    def intern(name: str) -> int:
+        return name_index.setdefault(name, len(name_index))
+
+    subdivisions = [intern(name) for name in columns["subdivision"]]
+    areas = [intern(name) for name in columns["area"]]
+    has_vba = np.array([x is not None and y is not None
+                        for x, y in zip(columns["vba_x"], columns["vba_y"])], dtype=bool)
+
+    arrays = {
+        "code": np.array(list(columns["code"]), dtype=str),
+        "names": np.array(list(name_index), dtype=str),
+        "subdivision": np.array(subdivisions, dtype=np.int32),
+        "area": np.array(areas, dtype=np.int32),
+        "vba_x": np.array([x if ok else 0 for x, ok in zip(columns["vba_x"], has_vba)],
+                          dtype=np.int32),
+        "vba_y": np.array([y if ok else 0 for y, ok in zip(columns["vba_y"], has_vba)],
+                          dtype=np.int32),
+        "has_vba": has_vba
+    }
+    for name, dtype in NUMERIC_COLUMNS:
+        arrays[name] = np.array(list(columns[name]), dtype=dtype)
+    return arrays
+
+
+class MeshCatalog:
+    """
+    府県ごとのメッシュ属性列（CSV出現順、府県単位で遅延読み込み）
+
+    prefectures は {府県コード: {"sources": マニフェスト, "count": メッシュ数}}。
+    ファイルから開いたカタログはヘッダーのみ読み込み、府県の配列は
+    prefecture_arrays / prefecture_columns の初回呼び出し時に読み込む。
+    """
+
+    def __init__(self, prefectures: Dict[str, Dict[str, Any]],
+                 arrays: Optional[Dict[str, Dict[str, np.ndarray]]] = None,
+                 path: Optional[str] = None, build_id: Optional[str] = None):
+        self.prefectures = prefectures
+        self.path = path
+        self.build_id = build_id
+        self._arrays: Dict[str, Dict[str, np.ndarray]] = {}
+        self._columns: Dict[str, Dict[str, tuple]] = {}
+        self._verified: set = set()
+        self._lock = threading.Lock()
+        for code, prefecture_arrays in (arrays or {}).items():
+            self._arrays[code] = self._freeze(prefecture_arrays)
+
+    @staticmethod
+    def _freeze(arrays: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        # 共有カタログは読み取り専用
+        for array in arrays.values():
+            array.flags.writeable = False
+        return arrays
+
+    @property
+    def prefecture_codes(self) -> List[str]:
+        return list(self.prefectures)
+
+    def __contains__(self, prefecture_code: str) -> bool:
+        return prefecture_code in self.prefectures
+
+    def __len__(self) -> int:
+        return sum(entry["count"] for entry in self.prefectures.values())
+
+    def prefecture_arrays(self, prefecture_code: str) -> Dict[str, np.ndarray]:
+        """
+        府県の配列（読み取り専用）を取得（初回のみファイルから読み込む）
+
+        Raises:
+            MeshCatalogChanged: ファイルが別の内容に置き換えられていた場合
+        """
+        arrays = self._arrays.get(prefecture_code)
+        if arrays is not None:
+            return arrays
+
+        with self._lock:
+            arrays = self._arrays.get(prefecture_code)
+            if arrays is None:
+                arrays = self._freeze(self._read_prefecture(prefecture_code))
+                self._arrays[prefecture_code] = arrays
+        return arrays
+
+    def _read_prefecture(self, prefecture_code: str) -> Dict[str, np.ndarray]:
+        if self.path is None or prefecture_code not in self.prefectures:
+            raise KeyError(prefecture_code)
+
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                header = json.loads(str(data["header"]))
+                if header.get("build_id") != self.build_id:
+                    # 同じ元CSVから作られた府県であれば内容は同一
+                    entry = header.get("prefectures", {}).get(prefecture_code)
+                    if entry is None or \
+                            entry["sources"] != self.prefectures[prefecture_code]["sources"]:
+                        raise MeshCatalogChanged(self.path)
+                return {name: data[f"{prefecture_code}/{name}"] for name in ARRAY_NAMES}
+        except FileNotFoundError:
+            raise MeshCatalogChanged(self.path)
+
+    def prefecture_columns(self, prefecture_code: str) -> Dict[str, tuple]:
+        """
+        府県の列を Python 値のタプルで取得（Mesh 構築用、初回のみ変換）
+
+        Returns:
+            {"code", "subdivision", "area", "lat", ..., "vba_x", "vba_y"}
+            （vba_x / vba_y は VBA座標がない行で None）
+        """
+        columns = self._columns.get(prefecture_code)
+        if columns is not None:
+            return columns
+
+        arrays = self.prefecture_arrays(prefecture_code)
+        names = arrays["names"].tolist()
+        columns = {
+            "code": tuple(arrays["code"].tolist()),
+            "subdivision": tuple(names[k] for k in arrays["subdivision"].tolist()),
+            "area": tuple(names[k] for k in arrays["area"].tolist())
+        }
+        for name, _ in NUMERIC_COLUMNS:
+            columns[name] = tuple(arrays[name].tolist())
+
+        has_vba = arrays["has_vba"].tolist()
+        for name in ("vba_x", "vba_y"):
+            columns[name] = tuple(value if ok else None for value, ok in
+                                  zip(arrays[name].tolist(), has_vba))
+
+        with self._lock:
+            return self._columns.setdefault(prefecture_code, columns)
+
+    def column(self, name: str) -> np.ndarray:
+        """全府県の列を連結した配列（府県順）"""
+        return np.concatenate([self.prefecture_arrays(code)[name]
+                               for code in self.prefectures])
+
+    def is_current(self, data_dir: str, prefecture_code: str) -> bool:
+        """府県の元CSVとカタログが一致するか（dosha CSV がなくカタログにもない府県は一致）"""
+        names = catalog_source_names(data_dir, [prefecture_code])
+        entry = self.prefectures.get(prefecture_code)
+        if entry is None:
+            return f"dosha_{prefecture_code}.csv" not in names
+        return sources_match(data_dir, entry["sources"], names)
+
+    def verify(self, data_dir: str, prefecture_codes: Sequence[str]) -> bool:
+        """
+        指定府県がすべて元CSVと一致するか
+
+        一致を確認した府県は記録し、同じカタログでは再確認しない
+        （元CSVの変更は MeshCatalogRegistry がファイル状態で検出して別のカタログになる）。
+        """
+        for code in prefecture_codes:
+            if code in self._verified:
+                continue
+            if not self.is_current(data_dir, code):
+                return False
+            self._verified.add(code)
+        return True
+
+    def updated(self, updates: Dict[str, Optional[Tuple[Dict[str, Any], Dict[str, np.ndarray]]]],
+                order: Sequence[str]) -> "MeshCatalog":
+        """
+        府県を差し替えた新しいカタログ（保存用に全府県の配列を読み込む）
+
+        Args:
+            updates: {府県コード: (マニフェスト, 配列)}、None は削除
+            order: 府県の並び順
+        """
+        prefectures = {}
+        arrays = {}
+        for code in order:
+            if code in updates:
+                if updates[code] is None:
+                    continue
+                sources, prefecture_arrays = updates[code]
+            elif code in self.prefectures:
+                sources = self.prefectures[code]["sources"]
+                prefecture_arrays = self.prefecture_arrays(code)
+            else:
+                continue
+            prefectures[code] = {"sources": sources, "count": len(prefecture_arrays["code"])}
+            arrays[code] = prefecture_arrays
+        return MeshCatalog(prefectures, arrays, build_id=secrets.token_hex(8))
+
+    def save(self, path: str):
+        """npz（非圧縮）として保存（一時ファイル + os.replace）"""
+        if self.build_id is None:
+            self.build_id = secrets.token_hex(8)
+        header = {
+            "version": CATALOG_VERSION,
+            "build_id": self.build_id,
+            "prefectures": self.prefectures
+        }
+        members = {
+            f"{code}/{name}": array
+            for code in self.prefectures
+            for name, array in self.prefecture_arrays(code).items()
+        }
+        directory = os.path.dirname(os.path.abspath(path))
+        tmp_path = os.path.join(
+            directory,
+            f".{os.path.basename(path)}.{os.getpid()}.{secrets.token_hex(4)}.tmp")
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, header=np.array(json.dumps(header, ensure_ascii=False)),
+                         **members)
+            os.replace(tmp_path, path)
+            self.path = path
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["MeshCatalog"]:
+        """
+        npz のヘッダーのみ読み込み（府県の配列は必要になったときに読む）
+
+        Returns:
+            カタログ、ファイルがない・形式バージョンが異なる・壊れている場合None
+        """
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                header = json.loads(str(data["header"]))
+            if header.get("version") != CATALOG_VERSION:
+                logger.info(f"メッシュカタログの形式が古いため再作成: {path}")
+                return None
+            return cls(header["prefectures"], path=path, build_id=header["build_id"])
+        except Exception as e:
+            logger.warning(f"メッシュカタログ読み込みエラー: {path} - {e}")
+            return None
+
+
+def source_signature(data_dir: str, catalog_path: str,
+                     names: Sequence[str]) -> Tuple:
+    """元CSVとカタログファイルの (名前, サイズ, mtime) の組（変更検出用）"""
+    signature = []
+    for path in [os.path.join(data_dir, name) for name in names] + [catalog_path]:
+        try:
+            stat = os.stat(path)
+            signature.append((path, stat.st_size, stat.st_mtime_ns))
+        except OSError:
+            signature.append((path, None, None))
+    return tuple(signature)
+
+
+class MeshCatalogRegistry:
+    """
+    プロセス内で共有するメッシュカタログの登録簿（スレッドセーフ）
+
+    カタログファイルごとに1つのカタログを保持し、元CSV・カタログファイルの
+    サイズ・mtime が変わった場合のみ開き直す（TTLによる期限切れはない）。
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[Tuple, MeshCatalog]] = {}
+        self._lock = threading.Lock()
+        self.load_count = 0
+
+    def get(self, data_dir: str, catalog_path: str,
+            loader: Callable[[], MeshCatalog]) -> MeshCatalog:
+        """
+        共有カタログ取得
+
+        Args:
+            data_dir: 元CSVのディレクトリ
+            catalog_path: カタログファイルパス
+            loader: 読み込み関数（ファイル状態が変わったときに呼ぶ）
+        """
+        key = os.path.abspath(catalog_path)
+        names = catalog_source_names(data_dir)
+        signature = source_signature(data_dir, catalog_path, names)
+
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+
+        return self.update(data_dir, catalog_path, loader, current_signature=signature)
+
+    def update(self, data_dir: str, catalog_path: str,
+               loader: Callable[[], MeshCatalog],
+               current_signature: Optional[Tuple] = None) -> MeshCatalog:
+        """
+        loader の結果で登録を置き換える（府県の再コンパイル後など）
+
+        current_signature を指定した場合、ロック待ちの間に他スレッドが
+        同じファイル状態で登録し直していればそれを返す。
+        """
+        key = os.path.abspath(catalog_path)
+        names = catalog_source_names(data_dir)
+
+        with self._lock:
+            if current_signature is not None:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] == current_signature:
+                    return entry[1]
+
+            catalog = loader()
+            # 読み込み中の変更は次回検出されるよう、読み込み後のファイル状態で記録する
+            signature = source_signature(data_dir, catalog_path, names)
+            self._entries[key] = (signature, catalog)
+            self.load_count += 1
+            logger.info(f"共有メッシュカタログ更新: {key} "
+                        f"({len(catalog.prefectures)}府県, {len(catalog)}メッシュ)")
+            return catalog
+
+    def clear(self):
+        """登録済みカタログを破棄（次回取得時に読み込み直す）"""
+        with self._lock:
+            self._entries.clear()
+
+
+_registry_instance = MeshCatalogRegistry()
+
+
+def get_mesh_catalog_registry() -> MeshCatalogRegistry:
+    """MeshCatalogRegistry シングルトン取得"""
+    return _registry_instance
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """カタログのビルド（CSV更新後のデプロイ手順などで使用）"""
+    from .data_service import DataService
+
+    parser = argparse.ArgumentParser(description="メッシュカタログのコンパイル")
+    parser.add_argument("--data-dir", default="data", help="CSVのあるディレクトリ")
+    parser.add_argument("--force", action="store_true",
+                        help="元CSVが変わっていなくても再コンパイルする")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    data_service = DataService(args.data_dir)
+    catalog = data_service.load_mesh_catalog(force_rebuild=args.force)
+    print(f"{data_service.catalog_path}: {len(catalog.prefecture_codes)} prefectures, "
+          f"{len(catalog)} meshes")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
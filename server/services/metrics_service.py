@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+Prometheus テキスト形式（exposition format 0.0.4）のメトリクス出力
+
+instrumentation のリクエスト・段階別ヒストグラムとカウンター、CacheService と
+SessionService の統計、プロセスのメモリ使用量を1つのテキストにまとめる。
+prometheus_client には依存しない。
+"""
+import logging
+import math
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .cache_service import CacheService, get_cache_service
+from .instrumentation import (
+    current_rss_bytes, get_counters, get_request_stats, get_stage_stats, peak_rss_bytes
+)
+
+logger = logging.getLogger(__name__)
+
+METRIC_PREFIX = "soil_rainfall_"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# GRIB2 解析段階名（スループット計算用）
+DECODE_STAGES = {"swi": "decode.swi", "guidance": "decode.guidance"}
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return "NaN"
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _labels(labels: Iterable[Tuple[str, Any]]) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in labels]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class MetricsService:
+    """メトリクス出力サービス"""
+
+    def __init__(self, session_service=None, cache_service: Optional[CacheService] = None):
+        """
+        Args:
+            session_service: SessionService / SqliteSessionService（None ならセッション統計を省略）
+            cache_service: CacheService（省略時はシングルトン）
+        """
+        self.session_service = session_service
+        self.cache_service = cache_service
+
+    def render(self) -> str:
+        """全メトリクスを Prometheus テキスト形式で出力"""
+        lines: List[str] = []
+        self._render_requests(lines)
+        self._render_stages(lines)
+        self._render_decode(lines)
+        self._render_cache(lines)
+        self._render_sessions(lines)
+        self._render_process(lines)
+        return "\n".join(lines) + "\n"
+
+    # ------------------------------------------------------------------
+    # 出力ヘルパー
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _header(lines: List[str], name: str, metric_type: str, help_text: str):
+        lines.append(f"# HELP {METRIC_PREFIX}{name} {help_text}")
+        lines.append(f"# TYPE {METRIC_PREFIX}{name} {metric_type}")
+
+    @staticmethod
+    def _sample(lines: List[str], name: str, value: float,
+                labels: Iterable[Tuple[str, Any]] = ()):
+        lines.append(f"{METRIC_PREFIX}{name}{_labels(labels)} {_format_value(value)}")
+
+    def _gauge(self, lines: List[str], name: str, help_text: str, value: Optional[float],
+               metric_type: str = "gauge"):
+        """値がNoneなら出力しない"""
+        if value is None:
+            return
+        self._header(lines, name, metric_type, help_text)
+        self._sample(lines, name, value)
+
+    def _histograms(self, lines: List[str], name: str, help_text: str,
+                    histograms: Dict[Tuple[Tuple[str, Any], ...], Dict[str, Any]]):
+        self._header(lines, name, "histogram", help_text)
+        for labels, histogram in histograms.items():
+            for bound, count in histogram["buckets"]:
+                self._sample(lines, f"{name}_bucket", count,
+                             labels + (("le", _format_value(float(bound))),))
+            self._sample(lines, f"{name}_sum", histogram["sum"], labels)
+            self._sample(lines, f"{name}_count", histogram["count"], labels)
+
+    # ------------------------------------------------------------------
+    # メトリクス群
+    # ------------------------------------------------------------------
+
+    def _render_requests(self, lines: List[str]):
+        histograms = {
+            (("method", method), ("route", route), ("status", status)): histogram
+            for (method, route, status), histogram in get_request_stats().histograms().items()
+        }
+        self._histograms(lines, "http_request_duration_seconds",
+                         "HTTP request latency by route", histograms)
+
+    def _render_stages(self, lines: List[str]):
+        histograms = {(("stage", stage),): histogram
+                      for stage, histogram in get_stage_stats().histograms().items()}
+        self._histograms(lines, "stage_duration_seconds",
+                         "Pipeline stage duration", histograms)
+
+    def _render_decode(self, lines: List[str]):
+        points = {dict(labels).get("kind"): value
+                  for labels, value in get_counters().values("decode_grid_points").items()}
+        if not points:
+            return
+        self._header(lines, "decode_grid_points_total", "counter",
+                     "GRIB2 grid points decoded")
+        for kind, value in sorted(points.items()):
+            self._sample(lines, "decode_grid_points_total", value, (("kind", kind),))
+
+        # スループット = 解析格子点数 / 解析段階の累積時間
+        stage_seconds = {stage: histogram["sum"]
+                         for stage, histogram in get_stage_stats().histograms().items()}
+        self._header(lines, "decode_grid_points_per_second", "gauge",
+                     "GRIB2 decode throughput since start")
+        for kind, value in sorted(points.items()):
+            seconds = stage_seconds.get(DECODE_STAGES.get(kind))
+            if seconds:
+                self._sample(lines, "decode_grid_points_per_second",
+                             round(value / seconds, 1), (("kind", kind),))
+
+    def _render_cache(self, lines: List[str]):
+        cache_service = self.cache_service or get_cache_service()
+        try:
+            stats = cache_service.get_cache_stats()
+        except Exception as e:
+            logger.warning(f"キャッシュ統計取得エラー: {e}")
+            return
+        self._gauge(lines, "cache_hits_total", "Result cache hits",
+                    stats["hit_count"], "counter")
+        self._gauge(lines, "cache_misses_total", "Result cache misses (absent, expired or unreadable)",
+                    stats["miss_count"], "counter")
+        self._gauge(lines, "cache_hit_ratio", "Result cache hit ratio since start",
+                    stats["hit_ratio"])
+        self._gauge(lines, "cache_evictions_total", "Result cache entries evicted by size limits",
+                    stats["evicted_count"], "counter")
+        self._gauge(lines, "cache_entries", "Result cache entries on disk",
+                    stats["cache_count"])
+        self._gauge(lines, "cache_size_bytes", "Result cache size on disk",
+                    int(stats["total_size_mb"] * 1024 * 1024))
+
+    def _render_sessions(self, lines: List[str]):
+        if self.session_service is None:
+            return
+        try:
+            stats = self.session_service.get_stats()
+        except Exception as e:
+            logger.warning(f"セッション統計取得エラー: {e}")
+            return
+        self._gauge(lines, "sessions", "Active sessions", stats.get("total_sessions"))
+        self._gauge(lines, "session_shared_results", "Calculation results shared by sessions",
+                    stats.get("shared_results"))
+        self._gauge(lines, "session_resident_results", "Shared results held in memory",
+                    stats.get("resident_results"))
+        self._gauge(lines, "session_spilled_results", "Shared results spilled to disk",
+                    stats.get("spilled_results"))
+        self._gauge(lines, "session_resident_bytes", "Estimated bytes of resident session results",
+                    stats.get("resident_bytes"))
+        self._gauge(lines, "session_spilled_bytes", "Size on disk of spilled session result files",
+                    stats.get("spilled_bytes"))
+        self._gauge(lines, "session_reloads_total", "Spilled results reloaded from disk",
+                    stats.get("reload_count"), "counter")
+
+    def _render_process(self, lines: List[str]):
+        self._gauge(lines, "process_resident_memory_bytes", "Resident memory size",
+                    current_rss_bytes())
+        self._gauge(lines, "process_peak_resident_memory_bytes", "Peak resident memory size",
+                    peak_rss_bytes())
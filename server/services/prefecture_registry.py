@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+処理対象府県の検出
+
+データディレクトリの府県一覧を、マニフェスト（prefectures.yaml）があればそこから、
+なければ dosha_<府県コード>.csv の存在から決める。並び順はマニフェストの記載順、
+またはJISの都道府県順（PREFECTURE_NAMES にないコードは末尾にコード順）。
+
+マニフェスト形式:
+    prefectures:
+      - code: shiga
+        name: 滋賀県
+      - code: kyoto        # name 省略時は PREFECTURE_NAMES（なければコード）
+"""
+import logging
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import yaml
+
+from models import PREFECTURE_NAMES
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILENAME = "prefectures.yaml"
+DOSHA_PREFIX = "dosha_"
+DOSHA_SUFFIX = ".csv"
+
+# データディレクトリ -> (シグネチャ, 検出結果)
+_discovery_cache: Dict[str, Tuple[Tuple, Dict[str, str]]] = {}
+_discovery_lock = threading.Lock()
+
+
+def prefecture_name(code: str) -> str:
+    """府県コードの表示名（不明なコードはコードそのもの）"""
+    return PREFECTURE_NAMES.get(code, code)
+
+
+def load_prefecture_manifest(data_dir: str) -> Optional[Dict[str, str]]:
+    """
+    マニフェスト読み込み
+
+    Returns:
+        {府県コード: 府県名}（記載順）、マニフェストがない・読めない場合None
+    """
+    path = os.path.join(data_dir, MANIFEST_FILENAME)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = yaml.safe_load(f) or {}
+        prefectures = {}
+        for entry in manifest.get("prefectures") or []:
+            if isinstance(entry, str):
+                entry = {"code": entry}
+            code = str(entry["code"]).strip()
+            prefectures[code] = str(entry.get("name") or prefecture_name(code))
+        return prefectures
+    except Exception as e:
+        logger.error(f"府県マニフェスト読み込みエラー: {path} - {e}")
+        return None
+
+
+def scan_prefecture_codes(data_dir: str) -> Dict[str, str]:
+    """dosha_<府県コード>.csv から府県を検出（JISの都道府県順）"""
+    try:
+        names = os.listdir(data_dir)
+    except OSError:
+        return {}
+
+    codes = [name[len(DOSHA_PREFIX):-len(DOSHA_SUFFIX)] for name in names
+             if name.startswith(DOSHA_PREFIX) and name.endswith(DOSHA_SUFFIX)
+             and len(name) > len(DOSHA_PREFIX) + len(DOSHA_SUFFIX)]
+    order = {code: i for i, code in enumerate(PREFECTURE_NAMES)}
+    codes.sort(key=lambda code: (order.get(code, len(order)), code))
+    return {code: prefecture_name(code) for code in codes}
+
+
+def _directory_signature(data_dir: str) -> Tuple:
+    """ディレクトリとマニフェストの mtime（ファイルの追加・削除・マニフェスト変更で変わる）"""
+    signature = []
+    for path in (data_dir, os.path.join(data_dir, MANIFEST_FILENAME)):
+        try:
+            stat = os.stat(path)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+
+def discover_prefectures(data_dir: str) -> Dict[str, str]:
+    """
+    処理対象府県の検出
+
+    ディレクトリ・マニフェストが変わらない間は前回の結果を返す。
+
+    Returns:
+        {府県コード: 府県名}（処理順）
+    """
+    key = os.path.abspath(data_dir)
+    signature = _directory_signature(data_dir)
+    with _discovery_lock:
+        cached = _discovery_cache.get(key)
+        if cached is not None and cached[0] == signature:
+            return dict(cached[1])
+
+    prefectures = load_prefecture_manifest(data_dir)
+    if prefectures is None:
+        prefectures = scan_prefecture_codes(data_dir)
+
+    with _discovery_lock:
+        _discovery_cache[key] = (signature, prefectures)
+    return dict(prefectures)
@@ -3,15 +3,104 @@
 雨量調整サービス
 ユーザーが入力した雨量調整値に基づいてガイダンスデータを調整
 """
-from typing import Dict, List, Any, Tuple
+from itertools import chain
+from typing import Dict, List, Any, Tuple, Optional
 import logging
-import copy
+
+import numpy as np
 
 from models import Prefecture, Area, Mesh, GuidanceTimeSeries
+from .calculation_service import CalculationService
 
 logger = logging.getLogger(__name__)
 
 
+class MeshRatioMatrix:
+    """
+    メッシュごとの調整比率（[mesh, ft] 配列）
+
+    ratios は調整なしのセルが 1.0。行はメッシュコードの初出順。
+    """
+
+    def __init__(self, mesh_codes: List[str], fts: List[int], ratios: np.ndarray):
+        self.mesh_codes = mesh_codes
+        self.fts = fts
+        self.ratios = ratios
+        self.mesh_index: Dict[str, int] = {code: row for row, code in enumerate(mesh_codes)}
+        self.ft_index: Dict[int, int] = {ft: col for col, ft in enumerate(fts)}
+        # 1.0 以外の比率を持つメッシュ行
+        self.adjusted_rows = np.flatnonzero((ratios != 1.0).any(axis=1))
+
+    def __len__(self) -> int:
+        return len(self.mesh_codes)
+
+    def __contains__(self, mesh_code: str) -> bool:
+        return mesh_code in self.mesh_index
+
+    def get(self, mesh_code: str) -> Dict[int, float]:
+        """メッシュの {ft: 比率}（従来の辞書形式、デバッグ用）"""
+        row = self.mesh_index.get(mesh_code)
+        if row is None:
+            return {}
+        return dict(zip(self.fts, self.ratios[row].tolist()))
+
+
+def adjustment_ratio(original_max: np.ndarray, target: np.ndarray) -> np.ndarray:
+    """
+    グループの調整比率（調整後雨量 / 元の最大雨量）
+
+    /api/rainfall-adjustment とセッションの差分再計算で共通の定義。
+    調整後雨量の指定がないセル（NaN）は NaN、元が0のセルは1（調整なし）。
+    元の値と完全に一致すれば比率は1になり、丸めた値などはそのまま比率に反映する。
+
+    Args:
+        original_max: 元の最大雨量（任意の形状）
+        target: 調整後雨量（original_max と同じ形状、指定なしは NaN）
+    """
+    positive = original_max > 0
+    return np.where(
+        positive,
+        target / np.where(positive, original_max, 1.0),
+        np.where(np.isnan(target), np.nan, 1.0))
+
+
+def group_rainfall_timeseries(
+    groups: Dict[str, List[int]],
+    rain: np.ndarray,
+    fts: List[int]
+) -> Dict[str, List[Dict[str, int]]]:
+    """
+    グループ（メッシュ行の集合）ごとの FT 別最大雨量時系列
+
+    行をグループ順に連結し np.maximum.reduceat で一括リダクションする。
+    メッシュを持たないグループ・負値は 0、値は整数に丸める（round と同じ偶数丸め）。
+
+    Args:
+        groups: {グループキー: [メッシュ行, ...]}
+        rain: [mesh, ft] 雨量配列
+        fts: rain の列に対応するFT
+
+    Returns:
+        {グループキー: [{"ft": ft, "value": 最大値}, ...]}
+    """
+    keys = list(groups)
+    sizes = np.array([len(groups[key]) for key in keys], dtype=np.intp)
+    maxima = np.zeros((len(keys), len(fts)), dtype=np.float64)
+
+    non_empty = np.flatnonzero(sizes)
+    if len(non_empty) and len(fts):
+        rows = np.fromiter(chain.from_iterable(groups[keys[g]] for g in non_empty),
+                           dtype=np.intp, count=int(sizes.sum()))
+        offsets = np.concatenate(([0], np.cumsum(sizes[non_empty])[:-1]))
+        maxima[non_empty] = np.maximum.reduceat(rain[rows], offsets, axis=0)
+
+    values = np.rint(np.maximum(maxima, 0.0)).astype(np.int64).tolist()
+    return {
+        key: [{"ft": ft, "value": value} for ft, value in zip(fts, row)]
+        for key, row in zip(keys, values)
+    }
+
+
 class RainfallAdjustmentService:
     """雨量調整サービス"""
 
@@ -41,36 +130,8 @@ class RainfallAdjustmentService:
             }
         """
         logger.info("市町村別雨量時系列の抽出開始")
-        area_rainfall = {}
-
-        # FT値の範囲を取得
-        ft_list = []
-        if 'data_3h' in guidance_grib2 and len(guidance_grib2['data_3h']) > 0:
-            ft_list = [item['ft'] for item in guidance_grib2['data_3h']]
-
-        for prefecture in prefectures:
-            for area in prefecture.areas:
-                # 市町村の一意キー
-                area_key = f"{prefecture.name}_{area.name}"
-
-                # 各FTごとの最大雨量を収集
-                ft_max_values = {ft: 0.0 for ft in ft_list}
-
-                for mesh in area.meshes:
-                    # メッシュの3時間雨量を取得
-                    for rain_point in mesh.rain_3hour:
-                        if rain_point.ft in ft_max_values:
-                            ft_max_values[rain_point.ft] = max(
-                                ft_max_values[rain_point.ft],
-                                rain_point.value
-                            )
-
-                # 時系列データに変換（整数値に丸める）
-                area_rainfall[area_key] = [
-                    {"ft": ft, "value": round(ft_max_values[ft])}
-                    for ft in sorted(ft_list)
-                ]
-
+        area_rainfall = self.calc_group_rainfall(
+            prefectures, self._guidance_fts(guidance_grib2))["area_rainfall"]
         logger.info(f"市町村別雨量時系列抽出完了: {len(area_rainfall)}市町村")
         return area_rainfall
 
@@ -100,43 +161,109 @@ class RainfallAdjustmentService:
             }
         """
         logger.info("二次細分別雨量時系列の抽出開始")
-        subdivision_rainfall = {}
+        subdivision_rainfall = self.calc_group_rainfall(
+            prefectures, self._guidance_fts(guidance_grib2))["subdivision_rainfall"]
+        logger.info(f"二次細分別雨量時系列抽出完了: {len(subdivision_rainfall)}二次細分")
+        return subdivision_rainfall
+
+    @staticmethod
+    def _guidance_fts(guidance_grib2: Dict[str, Any]) -> List[int]:
+        """ガイダンスの3時間雨量FT（昇順）"""
+        return sorted(item['ft'] for item in guidance_grib2.get('data_3h') or [])
 
-        # FT値の範囲を取得
-        ft_list = []
-        if 'data_3h' in guidance_grib2 and len(guidance_grib2['data_3h']) > 0:
-            ft_list = [item['ft'] for item in guidance_grib2['data_3h']]
+    def calc_group_rainfall(
+        self,
+        prefectures: List[Prefecture],
+        fts: Optional[List[int]] = None
+    ) -> Dict[str, Dict[str, List[Dict[str, int]]]]:
+        """
+        市町村・二次細分ごとの3時間雨量最大値時系列を一括計算
 
+        全メッシュの3時間雨量を [mesh, ft] 配列にまとめ、グループごとの
+        行範囲に対する最大値リダクションで求める。予測実行ごとに1回計算し、
+        計算結果（キャッシュ）と一緒に保持する。
+
+        Args:
+            prefectures: 計算済みの都道府県データリスト
+            fts: 対象FT（省略時はメッシュの3時間雨量のFT）
+
+        Returns:
+            {"area_rainfall": {...}, "subdivision_rainfall": {...}}
+            （値は extract_area_rainfall_timeseries と同じ形式）
+        """
+        meshes = self._unique_meshes(prefectures)
+        if fts is None:
+            fts = sorted({point.ft for mesh in meshes for point in mesh.rain_3hour})
+        rain = self._rain_matrix(meshes, "rain_3hour", fts)
+        mesh_index = {mesh.code: row for row, mesh in enumerate(meshes)}
+
+        def rows_of(areas: List[Area]) -> List[int]:
+            return [mesh_index[mesh.code] for area in areas for mesh in area.meshes
+                    if mesh.code in mesh_index]
+
+        area_groups = {}
+        subdivision_groups = {}
         for prefecture in prefectures:
-            if not hasattr(prefecture, 'secondary_subdivisions') or not prefecture.secondary_subdivisions:
-                continue
+            for area in prefecture.areas:
+                area_groups[f"{prefecture.name}_{area.name}"] = rows_of([area])
+            for subdivision in prefecture.secondary_subdivisions or []:
+                subdivision_groups[f"{prefecture.name}_{subdivision.name}"] = \
+                    rows_of(subdivision.areas)
+
+        return {
+            "area_rainfall": group_rainfall_timeseries(area_groups, rain, fts),
+            "subdivision_rainfall": group_rainfall_timeseries(subdivision_groups, rain, fts)
+        }
+
+    def calc_group_rainfall_from_result(
+        self,
+        result_prefectures: Dict[str, Any]
+    ) -> Dict[str, Dict[str, List[Dict[str, int]]]]:
+        """
+        計算結果JSON（prefectures 辞書）から calc_group_rainfall と同じ集約を計算
 
-            for subdivision in prefecture.secondary_subdivisions:
-                # 二次細分の一意キー
-                subdiv_key = f"{prefecture.name}_{subdivision.name}"
-
-                # 各FTごとの最大雨量を収集
-                ft_max_values = {ft: 0.0 for ft in ft_list}
-
-                # 二次細分内の全市町村のメッシュから雨量を収集
-                for area in subdivision.areas:
-                    for mesh in area.meshes:
-                        # メッシュの3時間雨量を取得
-                        for rain_point in mesh.rain_3hour:
-                            if rain_point.ft in ft_max_values:
-                                ft_max_values[rain_point.ft] = max(
-                                    ft_max_values[rain_point.ft],
-                                    rain_point.value
-                                )
-
-                # 時系列データに変換（整数値に丸める）
-                subdivision_rainfall[subdiv_key] = [
-                    {"ft": ft, "value": round(ft_max_values[ft])}
-                    for ft in sorted(ft_list)
+        集約を持たない既存キャッシュ用。メッシュの rain_timeline を使用する。
+
+        Args:
+            result_prefectures: 計算結果の "prefectures"
+
+        Returns:
+            {"area_rainfall": {...}, "subdivision_rainfall": {...}}
+        """
+        mesh_index: Dict[str, int] = {}
+        series = []
+        for pref_data in result_prefectures.values():
+            for area_data in pref_data.get("areas", []):
+                for mesh_data in area_data.get("meshes", []):
+                    if mesh_data["code"] not in mesh_index:
+                        mesh_index[mesh_data["code"]] = len(series)
+                        series.append(mesh_data.get("rain_timeline") or [])
+
+        fts = sorted({point["ft"] for points in series for point in points})
+        col = {ft: i for i, ft in enumerate(fts)}
+        rain = np.zeros((len(series), len(fts)), dtype=np.float64)
+        for row, points in enumerate(series):
+            for point in points:
+                rain[row, col[point["ft"]]] = point["value"]
+
+        area_groups = {}
+        subdivision_groups = {}
+        for pref_data in result_prefectures.values():
+            area_rows = {}
+            for area_data in pref_data.get("areas", []):
+                rows = [mesh_index[m["code"]] for m in area_data.get("meshes", [])]
+                area_rows[area_data["name"]] = rows
+                area_groups[f"{pref_data['name']}_{area_data['name']}"] = rows
+            for subdiv_data in pref_data.get("secondary_subdivisions", []):
+                subdivision_groups[f"{pref_data['name']}_{subdiv_data['name']}"] = [
+                    row for name in subdiv_data.get("area_names", [])
+                    for row in area_rows.get(name, [])
                 ]
 
-        logger.info(f"二次細分別雨量時系列抽出完了: {len(subdivision_rainfall)}二次細分")
-        return subdivision_rainfall
+        return {
+            "area_rainfall": group_rainfall_timeseries(area_groups, rain, fts),
+            "subdivision_rainfall": group_rainfall_timeseries(subdivision_groups, rain, fts)
+        }
 
     def adjust_guidance_data_by_area_ratios(
         self,
@@ -153,6 +280,9 @@ class RainfallAdjustmentService:
         3. 各メッシュの雨量に比率を適用
         4. 境界メッシュは複数市町村の最大比率を適用
 
+        元のガイダンスデータは変更しない。調整が必要なFTの値配列だけを
+        新しい配列に置き換え、それ以外は元データと共有する（全体のコピーはしない）。
+
         Args:
             guidance_grib2: 元のガイダンスGRIB2データ
             area_adjustments: {
@@ -162,13 +292,10 @@ class RainfallAdjustmentService:
             prefectures: 都道府県データ（Area-Mesh対応取得用）
 
         Returns:
-            調整後のguidance_grib2（新規コピー）
+            調整後のguidance_grib2
         """
         logger.info("ガイダンスデータの調整開始")
 
-        # 元データのディープコピー
-        adjusted_grib2 = copy.deepcopy(guidance_grib2)
-
         # メッシュごとの調整比率を計算
         mesh_ratios = self._calculate_mesh_ratios(
             area_adjustments,
@@ -177,173 +304,190 @@ class RainfallAdjustmentService:
         )
 
         # ガイダンスデータに比率を適用
-        self._apply_ratios_to_guidance_data(
-            adjusted_grib2,
-            mesh_ratios
+        adjusted_grib2 = self._apply_ratios_to_guidance_data(
+            guidance_grib2,
+            mesh_ratios,
+            prefectures
         )
 
         logger.info("ガイダンスデータの調整完了")
         return adjusted_grib2
 
+    @staticmethod
+    def _unique_meshes(prefectures: List[Prefecture]) -> List[Mesh]:
+        """メッシュコードの初出順のメッシュリスト"""
+        meshes = []
+        seen = set()
+        for prefecture in prefectures:
+            for area in prefecture.areas:
+                for mesh in area.meshes:
+                    if mesh.code not in seen:
+                        seen.add(mesh.code)
+                        meshes.append(mesh)
+        return meshes
+
+    @staticmethod
+    def _rain_matrix(meshes: List[Mesh], attr: str, fts: List[int]) -> np.ndarray:
+        """メッシュの雨量時系列を [mesh, ft] 配列に変換（欠損FTは0）"""
+        col = {ft: i for i, ft in enumerate(fts)}
+        matrix = np.zeros((len(meshes), len(fts)), dtype=np.float64)
+        for row, mesh in enumerate(meshes):
+            series = getattr(mesh, attr, None) or []
+            if [point.ft for point in series] == fts:
+                matrix[row, :] = [point.value for point in series]
+                continue
+            for point in series:
+                if point.ft in col:
+                    matrix[row, col[point.ft]] = point.value
+        return matrix
+
     def _calculate_mesh_ratios(
         self,
         area_adjustments: Dict[str, Dict[int, float]],
         prefectures: List[Prefecture],
         guidance_grib2: Dict[str, Any]
-    ) -> Dict[str, Dict[int, float]]:
+    ) -> MeshRatioMatrix:
         """
         メッシュごとの調整比率を計算
 
         境界メッシュ（複数市町村にまたがる）は最大比率を採用
 
+        市町村・二次細分をグループとして、所属（メッシュ行, グループ）の組から
+        グループごとの元の最大雨量とメッシュごとの最大比率を一括で求める。
+
         Args:
-            area_adjustments: 市町村別の調整後雨量
+            area_adjustments: 市町村別（または二次細分別）の調整後雨量
             prefectures: 都道府県データ
             guidance_grib2: 元のガイダンスデータ
 
         Returns:
-            {
-                "mesh_code": {0: 1.5, 3: 1.2, ...},  # ft: 調整比率
-                ...
-            }
+            MeshRatioMatrix（調整なしのセルは 1.0）
         """
         logger.info("メッシュごとの調整比率計算開始")
 
-        # メッシュコード→市町村リストのマッピング
-        mesh_to_areas: Dict[str, List[Tuple[str, str]]] = {}  # {mesh_code: [(pref_name, area_name), ...]}
-
-        for prefecture in prefectures:
-            for area in prefecture.areas:
-                area_key = f"{prefecture.name}_{area.name}"
-                for mesh in area.meshes:
-                    if mesh.code not in mesh_to_areas:
-                        mesh_to_areas[mesh.code] = []
-                    mesh_to_areas[mesh.code].append((prefecture.name, area.name))
-
-        # 各メッシュの調整比率を計算
-        mesh_ratios: Dict[str, Dict[int, float]] = {}
-
-        for mesh_code, area_list in mesh_to_areas.items():
-            # このメッシュに関係する市町村の調整比率を収集
-            ft_ratios_list: Dict[int, List[float]] = {}
-
-            for pref_name, area_name in area_list:
-                area_key = f"{pref_name}_{area_name}"
-
-                if area_key not in area_adjustments:
-                    continue
-
-                # この市町村の調整データ
-                adjustments = area_adjustments[area_key]
+        meshes = self._unique_meshes(prefectures)
+        row_of = {mesh.code: row for row, mesh in enumerate(meshes)}
+        fts = sorted({point.ft for mesh in meshes for point in mesh.rain_3hour})
+        col = {ft: i for i, ft in enumerate(fts)}
+        rain = self._rain_matrix(meshes, 'rain_3hour', fts)
 
-                # FTごとに比率を計算
-                for ft, adjusted_value in adjustments.items():
-                    ft_int = int(ft)
+        # 調整対象グループ（市町村キー優先、なければ二次細分キー）と所属メッシュ
+        group_keys: List[str] = []
+        pair_rows: List[np.ndarray] = []
+        pair_groups: List[np.ndarray] = []
 
-                    # 元の雨量最大値を取得
-                    original_max = self._get_area_original_max(
-                        pref_name, area_name, ft_int, prefectures
-                    )
+        def add_group(key: str, group_meshes: List[Mesh]):
+            rows = np.array(sorted({row_of[mesh.code] for mesh in group_meshes}), dtype=np.int64)
+            pair_rows.append(rows)
+            pair_groups.append(np.full(len(rows), len(group_keys), dtype=np.int64))
+            group_keys.append(key)
 
-                    if original_max > 0:
-                        ratio = adjusted_value / original_max
-                    else:
-                        # 元が0の場合は比率を1とする（調整なし）
-                        ratio = 1.0
-
-                    if ft_int not in ft_ratios_list:
-                        ft_ratios_list[ft_int] = []
-                    ft_ratios_list[ft_int].append(ratio)
-
-            # 複数市町村にまたがる場合は最大比率を採用
-            mesh_ratios[mesh_code] = {}
-            for ft, ratios in ft_ratios_list.items():
-                mesh_ratios[mesh_code][ft] = max(ratios) if ratios else 1.0
-
-        logger.info(f"メッシュごとの調整比率計算完了: {len(mesh_ratios)}メッシュ")
-        return mesh_ratios
-
-    def _get_area_original_max(
-        self,
-        pref_name: str,
-        area_name: str,
-        ft: int,
-        prefectures: List[Prefecture]
-    ) -> float:
-        """
-        特定市町村の特定FTにおける元の雨量最大値を取得
-
-        Args:
-            pref_name: 都道府県名
-            area_name: 市町村名
-            ft: FT値
-            prefectures: 都道府県データ
-
-        Returns:
-            雨量最大値
-        """
+        area_keys = set()
         for prefecture in prefectures:
-            if prefecture.name != pref_name:
-                continue
             for area in prefecture.areas:
-                if area.name != area_name:
-                    continue
-
-                max_value = 0.0
-                for mesh in area.meshes:
-                    for rain_point in mesh.rain_3hour:
-                        if rain_point.ft == ft:
-                            max_value = max(max_value, rain_point.value)
-
-                return max_value
-
-        return 0.0
+                key = f"{prefecture.name}_{area.name}"
+                area_keys.add(key)
+                if key in area_adjustments:
+                    add_group(key, area.meshes)
+        for prefecture in prefectures:
+            for subdivision in (getattr(prefecture, 'secondary_subdivisions', None) or []):
+                key = f"{prefecture.name}_{subdivision.name}"
+                if key in area_adjustments and key not in area_keys:
+                    add_group(key, [mesh for area in subdivision.areas for mesh in area.meshes])
+
+        ratios = np.full(rain.shape, np.nan)
+        if group_keys:
+            rows = np.concatenate(pair_rows)
+            groups = np.concatenate(pair_groups)
+
+            # グループごとの元の最大雨量 [group, ft]
+            original_max = np.zeros((len(group_keys), len(fts)))
+            np.maximum.at(original_max, groups, rain[rows])
+
+            # グループごとの調整後雨量 [group, ft]（指定なしは NaN）
+            target = np.full((len(group_keys), len(fts)), np.nan)
+            for g, key in enumerate(group_keys):
+                for ft, value in area_adjustments[key].items():
+                    if int(ft) in col:
+                        target[g, col[int(ft)]] = float(value)
+
+            group_ratio = adjustment_ratio(original_max, target)
+
+            # 複数グループにまたがるメッシュは最大比率（NaN は無視）
+            np.fmax.at(ratios, rows, group_ratio[groups])
+
+        mesh_ratios = MeshRatioMatrix(
+            [mesh.code for mesh in meshes], fts, np.nan_to_num(ratios, nan=1.0))
+
+        logger.info(
+            f"メッシュごとの調整比率計算完了: {len(mesh_ratios)}メッシュ"
+            f"（比率変更 {len(mesh_ratios.adjusted_rows)}メッシュ）")
+        return mesh_ratios
 
     def _apply_ratios_to_guidance_data(
         self,
-        adjusted_grib2: Dict[str, Any],
-        mesh_ratios: Dict[str, Dict[int, float]]
-    ) -> None:
+        guidance_grib2: Dict[str, Any],
+        mesh_ratios: MeshRatioMatrix,
+        prefectures: List[Prefecture]
+    ) -> Dict[str, Any]:
         """
-        ガイダンスデータに調整比率を適用（インプレース更新）
+        ガイダンスデータに調整比率を適用
+
+        メッシュ位置を格子番号に一括変換し、調整のあるFTの値配列だけを
+        コピーして比率を掛ける。
 
         Args:
-            adjusted_grib2: 調整対象のガイダンスデータ
+            guidance_grib2: 元のガイダンスデータ（変更しない）
             mesh_ratios: メッシュごとの調整比率
+            prefectures: 都道府県データ（メッシュ位置取得用）
+
+        Returns:
+            調整後のガイダンスデータ
         """
         logger.info("ガイダンスデータへの比率適用開始")
 
-        # data_3h（3時間雨量）を調整
-        if 'data_3h' in adjusted_grib2:
-            for time_data in adjusted_grib2['data_3h']:
-                ft = time_data['ft']
-                values = time_data['value']
-
-                # 各メッシュの値を調整
-                for mesh_code, ratios in mesh_ratios.items():
-                    if ft in ratios:
-                        ratio = ratios[ft]
-                        # メッシュコードからインデックスを取得
-                        # ここではvalues配列のインデックスを直接使用
-                        # 実際のインデックス変換はメッシュコードから計算が必要
-                        # 一旦、全メッシュに比率を適用（簡略化）
-                        pass
-
-        # より正確な実装: メッシュコード→インデックス変換が必要
-        # しかし、現状ではmesh_ratiosのキーがメッシュコードなので、
-        # prefecturesからメッシュを再取得して調整する方が確実
+        adjusted_grib2 = dict(guidance_grib2)
+        rows = mesh_ratios.adjusted_rows
+        if not len(rows):
+            return adjusted_grib2
+
+        meshes = self._unique_meshes(prefectures)
+        lats = np.array([meshes[row].lat for row in rows])
+        lons = np.array([meshes[row].lon for row in rows])
+        grid_index = CalculationService.get_data_num_array(
+            lats, lons, guidance_grib2['base_info']) - 1
+        ratios = mesh_ratios.ratios[rows]
+
+        # 3時間雨量（data / data_3h）と最大1時間雨量（data_1h）を調整
+        for key in ('data', 'data_3h', 'data_1h'):
+            if key not in guidance_grib2:
+                continue
+            items = []
+            for item in guidance_grib2[key]:
+                col = mesh_ratios.ft_index.get(item['ft'])
+                if col is None or np.all(ratios[:, col] == 1.0):
+                    items.append(item)
+                    continue
+                values = np.array(item['value'], dtype=np.float64)
+                valid = grid_index < len(values)
+                values[grid_index[valid]] *= ratios[valid, col]
+                items.append({**item, 'value': values})
+            adjusted_grib2[key] = items
 
         logger.info("ガイダンスデータへの比率適用完了")
+        return adjusted_grib2
 
     def adjust_mesh_rainfall_by_ratios(
         self,
         prefectures: List[Prefecture],
-        mesh_ratios: Dict[str, Dict[int, float]]
+        mesh_ratios: MeshRatioMatrix
     ) -> None:
         """
         メッシュの雨量データを比率で調整（インプレース更新）
 
-        この関数はprefecturesのメッシュデータを直接調整する
+        この関数はprefecturesのメッシュデータを直接調整する。
+        雨量は [mesh, ft] 配列への一括乗算で求め、比率の変わったメッシュの
+        時系列だけを新しいリストに置き換える。
 
         Args:
             prefectures: 都道府県データ（調整対象）
@@ -351,38 +495,46 @@ class RainfallAdjustmentService:
         """
         logger.info("メッシュ雨量データの調整開始")
 
-        total_adjusted = 0
-
+        # 比率が変わったメッシュ（境界メッシュは各エリアの Mesh を更新）
+        adjusted_codes = {mesh_ratios.mesh_codes[row] for row in mesh_ratios.adjusted_rows.tolist()}
+        targets: List[Mesh] = []
+        seen = set()
         for prefecture in prefectures:
             for area in prefecture.areas:
                 for mesh in area.meshes:
-                    if mesh.code in mesh_ratios:
-                        ratios = mesh_ratios[mesh.code]
-
-                        # rain_3hour（3時間雨量）を調整
-                        for rain_point in mesh.rain_3hour:
-                            if rain_point.ft in ratios:
-                                ratio = ratios[rain_point.ft]
-                                rain_point.value *= ratio
-                                total_adjusted += 1
-
-                        # rain_1hour（1時間雨量）も調整
-                        if hasattr(mesh, 'rain_1hour') and mesh.rain_1hour:
-                            for rain_point in mesh.rain_1hour:
-                                # 1時間雨量は対応する3時間期間の比率を使用
-                                # FTを3時間単位に変換
-                                ft_3h = (rain_point.ft // 3) * 3
-                                if ft_3h in ratios:
-                                    ratio = ratios[ft_3h]
-                                    rain_point.value *= ratio
-                                    total_adjusted += 1
-
-                        # rain_1hour_max（最大1時間雨量）も調整
-                        if hasattr(mesh, 'rain_1hour_max') and mesh.rain_1hour_max:
-                            for rain_point in mesh.rain_1hour_max:
-                                if rain_point.ft in ratios:
-                                    ratio = ratios[rain_point.ft]
-                                    rain_point.value *= ratio
-                                    total_adjusted += 1
-
-        logger.info(f"メッシュ雨量データの調整完了: {total_adjusted}件調整")
+                    if mesh.code in adjusted_codes and id(mesh) not in seen:
+                        seen.add(id(mesh))
+                        targets.append(mesh)
+
+        if not targets:
+            logger.info("メッシュ雨量データの調整完了: 0件調整")
+            return
+
+        fts = mesh_ratios.fts
+        ratios = mesh_ratios.ratios[[mesh_ratios.mesh_index[mesh.code] for mesh in targets]]
+        # 1時間雨量は、その時刻を含む3時間期間（ft-2, ft-1, ft）の比率を使用
+        hourly_fts = [ft + offset for ft in fts for offset in (-2, -1, 0)]
+        hourly_ratios = np.repeat(ratios, 3, axis=1)
+
+        rain_3h = self._rain_matrix(targets, 'rain_3hour', fts) * ratios
+        rain_1h_max = self._rain_matrix(targets, 'rain_1hour_max', fts) * ratios
+        rain_1h = self._rain_matrix(targets, 'rain_1hour', hourly_fts) * hourly_ratios
+
+        col = mesh_ratios.ft_index
+        hourly_col = {ft: i for i, ft in enumerate(hourly_fts)}
+
+        def rebuild(series, values, index):
+            return [
+                GuidanceTimeSeries(ft=point.ft, value=values[index[point.ft]])
+                if point.ft in index else point
+                for point in series
+            ]
+
+        for i, mesh in enumerate(targets):
+            mesh.rain_3hour = rebuild(mesh.rain_3hour, rain_3h[i].tolist(), col)
+            if mesh.rain_1hour_max:
+                mesh.rain_1hour_max = rebuild(mesh.rain_1hour_max, rain_1h_max[i].tolist(), col)
+            if mesh.rain_1hour:
+                mesh.rain_1hour = rebuild(mesh.rain_1hour, rain_1h[i].tolist(), hourly_col)
+
+        logger.info(f"メッシュ雨量データの調整完了: {len(targets)}メッシュ調整")
@@ -0,0 +1,656 @@
+# -*- coding: utf-8 -*-
+"""
+雨量調整の差分再計算サービス
+
+セッション（計算結果）ごとに、調整前の雨量・SWI・基準値と初期タンク値を
+[mesh, ft] 配列として一度だけ保持し（AdjustmentBase）、雨量調整のたびに
+比率が変わったメッシュだけをタンクモデルで再積分する。
+GRIB2の再取得・再解析や prepare_areas は行わない。
+
+市町村・二次細分キーは従来どおり "府県名_市町村名" / "府県名_二次細分名"。
+境界メッシュ（複数の市町村に属する）は各市町村の比率の最大値を採用する。
+"""
+from typing import Dict, List, Any, Optional, Tuple, Callable
+from collections import OrderedDict
+from datetime import datetime
+from threading import Lock
+import base64
+import logging
+import os
+import time
+
+import numpy as np
+
+from models import Prefecture
+from .calculation_service import CalculationService
+from .instrumentation import span
+from .rainfall_adjustment_service import adjustment_ratio
+from .session_index import SessionIndex
+
+logger = logging.getLogger(__name__)
+
+# テストデータ（2023-06-02 00:00）のSWIファイル
+TEST_SWI_FILENAME = "Z__C_RJTD_20230602000000_SRF_GPV_Ggis1km_Psw_Aper10min_ANAL_grib2.bin"
+
+
+def _value_matrix(meshes: List[Dict[str, Any]], key: str) -> Tuple[np.ndarray, List[int]]:
+    """メッシュ辞書の時系列を [mesh, ft] の float64 配列に変換（欠損FTは0）"""
+    fts = sorted({point['ft'] for mesh in meshes for point in mesh.get(key, [])})
+    col = {ft: i for i, ft in enumerate(fts)}
+
+    matrix = np.zeros((len(meshes), len(fts)), dtype=np.float64)
+    for row, mesh in enumerate(meshes):
+        timeline = mesh.get(key, [])
+        if len(timeline) == len(fts):
+            matrix[row, :] = [point['value'] for point in timeline]
+            continue
+        for point in timeline:
+            matrix[row, col[point['ft']]] = point['value']
+
+    return matrix, fts
+
+
+def classify_risk(swi: np.ndarray, bounds: np.ndarray) -> np.ndarray:
+    """
+    SWI配列のリスクレベル判定（CalculationService.calc_hourly_risk と同じ基準）
+
+    Args:
+        swi: shape=(mesh, ft)
+        bounds: shape=(mesh, 3) [注意報, 警報, 土砂災害]
+
+    Returns:
+        shape=(mesh, ft) の uint8（0, 2, 3, 4）
+    """
+    level = np.zeros(swi.shape, dtype=np.uint8)
+    level[swi >= bounds[:, 0:1]] = 2
+    level[swi >= bounds[:, 1:2]] = 3
+    level[swi >= bounds[:, 2:3]] = 4
+    return level
+
+
+def integrate_tanks(
+    tanks: np.ndarray,
+    rain: np.ndarray,
+    dt: float
+) -> np.ndarray:
+    """
+    タンクモデルを全メッシュ同時に時間積分（CalculationService.calc_tunk_model と同じ式）
+
+    先頭の次元は任意（シナリオ軸などを追加してもよい）。
+
+    Args:
+        tanks: 初期タンク値 shape=(..., mesh, 3)
+        rain: 各ステップの雨量 shape=(..., mesh, step)
+        dt: ステップ幅（時間）
+
+    Returns:
+        各ステップ後のSWI shape=(..., mesh, step)
+    """
+    c = CalculationService
+    shape = rain.shape[:-1]
+    s1 = np.broadcast_to(tanks[..., 0], shape).copy()
+    s2 = np.broadcast_to(tanks[..., 1], shape).copy()
+    s3 = np.broadcast_to(tanks[..., 2], shape).copy()
+    swi = np.empty(rain.shape, dtype=np.float64)
+
+    for step in range(rain.shape[-1]):
+        q1 = np.where(s1 > c.l1, c.a1 * (s1 - c.l1), 0.0)
+        q1 = np.where(s1 > c.l2, q1 + c.a2 * (s1 - c.l2), q1)
+        q2 = np.where(s2 > c.l3, c.a3 * (s2 - c.l3), 0.0)
+        q3 = np.where(s3 > c.l4, c.a4 * (s3 - c.l4), 0.0)
+
+        s1_new = (1 - c.b1 * dt) * s1 - q1 * dt + rain[..., step]
+        s2_new = (1 - c.b2 * dt) * s2 - q2 * dt + c.b1 * s1 * dt
+        s3_new = (1 - c.b3 * dt) * s3 - q3 * dt + c.b2 * s2 * dt
+
+        s1 = np.maximum(s1_new, 0.0)
+        s2 = np.maximum(s2_new, 0.0)
+        s3 = np.maximum(s3_new, 0.0)
+        swi[..., step] = s1 + s2 + s3
+
+    return swi
+
+
+def initial_tanks_from_swi_grib2(
+    swi_grib2: Dict[str, Any],
+    lats: np.ndarray,
+    lons: np.ndarray
+) -> np.ndarray:
+    """
+    SWI GRIB2 からメッシュごとの初期タンク値を取得
+
+    Args:
+        swi_grib2: Grib2Service.unpack_swi_grib2 の戻り値
+        lats: メッシュ緯度
+        lons: メッシュ経度
+
+    Returns:
+        shape=(mesh, 3) [第1タンク, 第2タンク, 第3タンク]
+    """
+    index = CalculationService.get_data_num_array(lats, lons, swi_grib2['base_info']) - 1
+
+    swi = np.asarray(swi_grib2['swi'])[index] / 10
+    first = np.asarray(swi_grib2['first_tunk'])[index] / 10
+    second = np.asarray(swi_grib2['second_tunk'])[index] / 10
+    return np.stack([first, second, swi - first - second], axis=1)
+
+
+def collect_initial_tanks(prefectures: List[Prefecture]) -> np.ndarray:
+    """
+    計算済みの Mesh から初期タンク値を集める
+
+    行順は SessionIndex.build と同じ（府県・エリア・メッシュ順、同一コードは
+    最初の出現のみ）。初期タンク値がないメッシュは0。
+
+    Returns:
+        shape=(mesh, 3) の float32
+    """
+    rows = []
+    seen = set()
+    for prefecture in prefectures:
+        for area in prefecture.areas:
+            for mesh in area.meshes:
+                if mesh.code in seen:
+                    continue
+                seen.add(mesh.code)
+                rows.append(mesh.initial_tanks or (0.0, 0.0, 0.0))
+    return np.array(rows, dtype=np.float32).reshape(-1, 3)
+
+
+def encode_initial_tanks(tanks: np.ndarray) -> Dict[str, Any]:
+    """初期タンク値を計算結果（JSON）に格納できる形式に変換"""
+    tanks = np.ascontiguousarray(tanks, dtype='<f4')
+    return {
+        "dtype": "float32",
+        "shape": list(tanks.shape),
+        "data": base64.b64encode(tanks.tobytes()).decode('ascii')
+    }
+
+
+def decode_initial_tanks(data: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+    """encode_initial_tanks の逆変換（古い計算結果で未格納なら None）"""
+    if not data:
+        return None
+    return np.frombuffer(
+        base64.b64decode(data["data"]), dtype='<f4').reshape(data["shape"])
+
+
+class AdjustmentBase:
+    """
+    調整前の計算結果の列指向表現（構築後は読み取り専用）
+
+    計算結果の辞書（メッシュ・市町村）への参照は持たず、再計算と応答の作成に
+    必要な列（メッシュの座標・基準値、雨量・SWI、市町村・二次細分の名前と行）
+    だけを配列で保持する。セッションの計算結果が退避・解放されても
+    このベースがメモリ上に残ることはない。
+    """
+
+    def __init__(
+        self,
+        prefectures: Dict[str, Dict[str, Any]],
+        index: SessionIndex,
+        tanks_loader: Callable[[np.ndarray, np.ndarray], np.ndarray]
+    ):
+        """
+        Args:
+            prefectures: result["prefectures"]（構築中のみ参照）
+            index: 同じ計算結果の SessionIndex（行順を共有）
+            tanks_loader: (lats, lons) → 初期タンク値 shape=(mesh, 3)、index の行順
+                （float32 で保持されたものは float64 に戻して積分する）
+        """
+        meshes = [
+            prefectures[p]['areas'][a]['meshes'][m]
+            for p, a, m in index.mesh_locations
+        ]
+        self.mesh_codes = index.mesh_codes
+        self.lats = np.array([mesh['lat'] for mesh in meshes], dtype=np.float64)
+        self.lons = np.array([mesh['lon'] for mesh in meshes], dtype=np.float64)
+        self.initial_tanks = np.asarray(tanks_loader(self.lats, self.lons), dtype=np.float64)
+
+        # 基準値は元の型のまま（応答にそのまま出す）
+        self.bounds = np.array(
+            [[mesh['advisary_bound'], mesh['warning_bound'], mesh['dosyakei_bound']]
+             for mesh in meshes]).reshape(-1, 3)
+        self.rain_3h, self.fts_3h = _value_matrix(meshes, 'rain_timeline')
+        self.rain_1h_max, _ = _value_matrix(meshes, 'rain_1hour_max_timeline')
+        swi_3h, self.swi_fts = _value_matrix(meshes, 'swi_timeline')
+        self.initial_swi = swi_3h[:, 0].copy()
+        self.level_3h = classify_risk(swi_3h, self.bounds)
+        del meshes, swi_3h
+
+        # 市町村・二次細分 → メッシュ行、(府県コード, 府県名, 市町村名・二次細分名)
+        self.group_rows: Dict[str, np.ndarray] = {}
+        self.group_names: Dict[str, Tuple[str, str, str]] = {}
+        self.area_keys: List[str] = []
+        self.subdivision_keys: List[str] = []
+        self.subdivision_areas: Dict[str, List[str]] = {}
+
+        for pref_code, pref_data in prefectures.items():
+            pref_name = pref_data.get('name', pref_code)
+            area_rows: Dict[str, np.ndarray] = {}
+            for area in pref_data.get('areas', []):
+                key = f"{pref_name}_{area['name']}"
+                rows = np.array(sorted({
+                    index.mesh_index[mesh['code']] for mesh in area.get('meshes', [])
+                }), dtype=np.int64)
+                area_rows[area['name']] = rows
+                self.group_rows[key] = rows
+                self.group_names[key] = (pref_code, pref_name, area['name'])
+                self.area_keys.append(key)
+
+            for subdivision in pref_data.get('secondary_subdivisions', []):
+                key = f"{pref_name}_{subdivision['name']}"
+                if key in self.group_rows:
+                    # 市町村名と同名の二次細分は市町村を優先
+                    continue
+                names = [n for n in subdivision.get('area_names', []) if n in area_rows]
+                rows = [area_rows[n] for n in names]
+                self.group_rows[key] = (
+                    np.unique(np.concatenate(rows)) if rows
+                    else np.zeros(0, dtype=np.int64))
+                self.group_names[key] = (pref_code, pref_name, subdivision['name'])
+                self.subdivision_keys.append(key)
+                self.subdivision_areas[key] = [f"{pref_name}_{n}" for n in names]
+
+        # グループごとの元の雨量最大値 [group, ft]
+        self.group_rain_max: Dict[str, np.ndarray] = {
+            key: (self.rain_3h[rows].max(axis=0) if rows.size
+                  else np.zeros(len(self.fts_3h)))
+            for key, rows in self.group_rows.items()
+        }
+
+        # メッシュ行 → 所属市町村
+        self.row_areas: List[List[str]] = [[] for _ in self.mesh_codes]
+        for key in self.area_keys:
+            for row in self.group_rows[key].tolist():
+                self.row_areas[row].append(key)
+
+    @property
+    def nbytes(self) -> int:
+        """配列の合計バイト数（メッシュコード・名前などの Python オブジェクトは含まない）"""
+        arrays = [self.lats, self.lons, self.initial_tanks, self.bounds, self.rain_3h,
+                  self.rain_1h_max, self.initial_swi, self.level_3h]
+        arrays += list(self.group_rows.values()) + list(self.group_rain_max.values())
+        return sum(array.nbytes for array in arrays)
+
+    def ratio_matrix(
+        self,
+        adjustments: Dict[str, Dict[int, float]]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        調整後雨量から [mesh, ft] の比率行列を作成（境界メッシュは最大比率）
+
+        比率は /api/rainfall-adjustment と同じ adjustment_ratio で求める
+        （元の最大値と完全に一致するFTのみ調整なし）。
+
+        Args:
+            adjustments: {"府県名_市町村名" or "府県名_二次細分名": {ft: 調整後雨量}}
+
+        Returns:
+            (比率が1以外のメッシュ行, その行の比率 shape=(n, ft))
+        """
+        col = {ft: i for i, ft in enumerate(self.fts_3h)}
+        ratio = np.full(self.rain_3h.shape, np.nan)
+
+        for key, values in adjustments.items():
+            rows = self.group_rows.get(key)
+            if rows is None or not rows.size:
+                continue
+
+            original = self.group_rain_max[key]
+            target = np.full(len(self.fts_3h), np.nan)
+            for ft, value in values.items():
+                if int(ft) in col:
+                    target[col[int(ft)]] = float(value)
+
+            group_ratio = adjustment_ratio(original, target)
+            if np.all(np.isnan(group_ratio)):
+                continue
+
+            ratio[rows] = np.fmax(ratio[rows], group_ratio[np.newaxis, :])
+
+        adjusted = ~np.isnan(ratio) & (ratio != 1.0)
+        rows = np.flatnonzero(adjusted.any(axis=1))
+        return rows, np.nan_to_num(ratio[rows], nan=1.0)
+
+    def scaled_adjustments(
+        self,
+        scale: Dict[str, Any]
+    ) -> Dict[str, Dict[int, float]]:
+        """
+        倍率指定を調整後雨量に変換
+
+        Args:
+            scale: {"府県名_二次細分名": 1.2} または {"府県名_市町村名": {ft: 倍率}}
+
+        Returns:
+            ratio_matrix に渡せる {キー: {ft: 調整後雨量}}
+        """
+        adjustments = {}
+        for key, factor in scale.items():
+            original = self.group_rain_max.get(key)
+            if original is None:
+                continue
+            if isinstance(factor, dict):
+                factors = {int(ft): float(f) for ft, f in factor.items()}
+            else:
+                factors = {ft: float(factor) for ft in self.fts_3h}
+            adjustments[key] = {
+                ft: original[i] * factors[ft]
+                for i, ft in enumerate(self.fts_3h) if ft in factors
+            }
+        return adjustments
+
+    def area_risk(self, key: str) -> np.ndarray:
+        """調整前の市町村・二次細分の危険度（SWI 3時間値ベース）"""
+        rows = self.group_rows[key]
+        if not rows.size:
+            return np.zeros(len(self.swi_fts), dtype=np.uint8)
+        return self.level_3h[rows].max(axis=0)
+
+
+class RainfallRecomputeService:
+    """雨量調整の差分再計算サービス"""
+
+    def __init__(self, data_dir: str = "data", max_bases: int = 4, max_scenarios: int = 16):
+        """
+        Args:
+            data_dir: テストデータのディレクトリ
+            max_bases: 保持する AdjustmentBase の数（計算結果ごと、LRU）
+            max_scenarios: evaluate_scenarios で一度に評価できるシナリオ数
+        """
+        self.data_dir = data_dir
+        self.max_bases = max_bases
+        self.max_scenarios = max_scenarios
+        self._bases: 'OrderedDict[str, AdjustmentBase]' = OrderedDict()
+        self._lock = Lock()
+        self._build_locks: Dict[str, Lock] = {}
+
+    def get_base(
+        self,
+        result_key: str,
+        prefectures_loader: Callable[[], Dict[str, Dict[str, Any]]],
+        index: SessionIndex,
+        tanks_loader: Callable[[np.ndarray, np.ndarray], np.ndarray]
+    ) -> AdjustmentBase:
+        """
+        計算結果ごとの AdjustmentBase を取得（初回のみ構築）
+
+        計算結果（退避済みなら読み戻しが必要）は構築時にのみ読み込む。
+
+        Args:
+            result_key: 共有キー（キャッシュキー）
+            prefectures_loader: () → result["prefectures"]（構築時のみ呼ぶ）
+            index: SessionIndex
+            tanks_loader: (lats, lons) → 初期タンク値 shape=(mesh, 3)
+        """
+        with self._lock:
+            base = self._bases.get(result_key)
+            if base is not None:
+                self._bases.move_to_end(result_key)
+                return base
+            build_lock = self._build_locks.setdefault(result_key, Lock())
+
+        with build_lock:
+            with self._lock:
+                base = self._bases.get(result_key)
+            if base is None:
+                start = time.time()
+                base = AdjustmentBase(prefectures_loader(), index, tanks_loader)
+                logger.info(
+                    f"雨量調整ベース構築: {result_key}, {index.mesh_count}メッシュ, "
+                    f"{base.nbytes / 1024 / 1024:.1f}MB, {time.time() - start:.2f}秒")
+
+            with self._lock:
+                self._bases[result_key] = base
+                self._bases.move_to_end(result_key)
+                while len(self._bases) > self.max_bases:
+                    evicted_key, _ = self._bases.popitem(last=False)
+                    self._build_locks.pop(evicted_key, None)
+
+        return base
+
+    def load_initial_tanks_from_grib2(
+        self,
+        swi_initial: datetime,
+        lats: np.ndarray,
+        lons: np.ndarray
+    ) -> np.ndarray:
+        """
+        SWI GRIB2 を取得・解析して初期タンク値を得る（計算結果ごとに1回）
+
+        初期タンク値を持たない古い計算結果用のフォールバック。
+        2023-06-02 00:00 はローカルのテストデータを使用する。
+        """
+        from .grib2_service import Grib2Service
+        grib2_service = Grib2Service()
+
+        if (swi_initial.year, swi_initial.month, swi_initial.day, swi_initial.hour) == (2023, 6, 2, 0):
+            swi_path = os.path.join(self.data_dir, TEST_SWI_FILENAME)
+            with open(swi_path, 'rb') as f:
+                swi_bytes = f.read()
+        else:
+            from src.config.config_service import ConfigService
+            swi_url = ConfigService().build_swi_url(swi_initial)
+            with span("download.swi"):
+                swi_bytes = grib2_service.download_file(swi_url)
+            if not swi_bytes:
+                raise Exception(f"SWIファイルダウンロード失敗: {swi_url}")
+
+        _, swi_grib2 = grib2_service.unpack_swi_grib2(swi_bytes)
+        return initial_tanks_from_swi_grib2(swi_grib2, lats, lons)
+
+    def recompute(
+        self,
+        base: AdjustmentBase,
+        adjustments: Dict[str, Dict[int, float]]
+    ) -> Dict[str, Any]:
+        """
+        調整後雨量で、比率が変わったメッシュのSWI・危険度のみ再計算
+
+        Args:
+            base: AdjustmentBase
+            adjustments: {"府県名_市町村名" or "府県名_二次細分名": {ft: 調整後雨量}}
+
+        Returns:
+            {"prefectures": {...}, "adjusted_mesh_count": n}
+            prefectures は従来の /api/rainfall-adjustment と同じ形式で、
+            影響を受けた市町村・メッシュのみを含む（1時間値の時系列は
+            3時間最大危険度の算出にのみ使い、応答には含めない）
+        """
+        rows, ratio = base.ratio_matrix(adjustments)
+
+        rain_3h = base.rain_3h[rows] * ratio
+        rain_1h_max = base.rain_1h_max[rows] * ratio
+        bounds = base.bounds[rows]
+        tanks = base.initial_tanks[rows]
+
+        # 1時間雨量の推定（3時間の中央に最大1時間雨量、残りを前後に等分）
+        half = np.maximum(rain_3h - rain_1h_max, 0.0) / 2.0
+        rain_1h = np.stack([half, rain_1h_max, half], axis=2).reshape(len(rows), 3 * len(base.fts_3h))
+        fts_1h = [ft + offset for ft in base.fts_3h for offset in (-2, -1, 0)]
+
+        initial_swi = base.initial_swi[rows][:, np.newaxis]
+        swi_hourly = np.hstack([initial_swi, integrate_tanks(tanks, rain_1h, 1.0)])
+        swi_3h = np.hstack([initial_swi, integrate_tanks(tanks, rain_3h, 3.0)])
+        fts_hourly = [0] + fts_1h
+
+        risk_hourly = classify_risk(swi_hourly, bounds)
+        starts = np.arange(0, risk_hourly.shape[1], 3)
+        risk_3h_max = np.maximum.reduceat(risk_hourly, starts, axis=1)
+        fts_3h_max = [fts_hourly[min(s + 2, len(fts_hourly) - 1)] for s in starts]
+
+        # 市町村・二次細分の危険度（SWI 3時間値ベース、従来の calc_risk_timeline と同じ）
+        level_3h = base.level_3h.copy()
+        level_3h[rows] = classify_risk(swi_3h, bounds)
+        touched_areas = sorted({key for row in rows.tolist() for key in base.row_areas[row]})
+        area_risk = {
+            key: level_3h[base.group_rows[key]].max(axis=0)
+            for key in touched_areas
+        }
+
+        mesh_rows = {row: i for i, row in enumerate(rows.tolist())}
+        result_prefectures: Dict[str, Dict[str, Any]] = {}
+
+        def timeline(fts, values):
+            return [{"ft": ft, "value": value} for ft, value in zip(fts, values)]
+
+        for key in touched_areas:
+            pref_code, pref_name, area_name = base.group_names[key]
+            pref = result_prefectures.setdefault(pref_code, {
+                "name": pref_name,
+                "code": pref_code,
+                "areas": [],
+                "secondary_subdivisions": []
+            })
+
+            area_meshes = []
+            for row in base.group_rows[key].tolist():
+                i = mesh_rows.get(row)
+                if i is None:
+                    continue
+                advisary, warning, dosyakei = base.bounds[row].tolist()
+                area_meshes.append({
+                    "code": base.mesh_codes[row],
+                    "lat": float(base.lats[row]),
+                    "lon": float(base.lons[row]),
+                    "advisary_bound": advisary,
+                    "warning_bound": warning,
+                    "dosyakei_bound": dosyakei,
+                    "swi_timeline": timeline(base.swi_fts, swi_3h[i].tolist()),
+                    "rain_timeline": timeline(base.fts_3h, rain_3h[i].tolist()),
+                    "risk_3hour_max_timeline": timeline(fts_3h_max, risk_3h_max[i].tolist())
+                })
+
+            pref["areas"].append({
+                "name": area_name,
+                "meshes": area_meshes,
+                "risk_timeline": timeline(base.swi_fts, area_risk[key].tolist())
+            })
+
+        touched = set(touched_areas)
+        for key in base.subdivision_keys:
+            area_keys = base.subdivision_areas[key]
+            if not touched.intersection(area_keys):
+                continue
+            pref_code, _, subdivision_name = base.group_names[key]
+            risk = np.max([
+                area_risk[a] if a in area_risk
+                else base.level_3h[base.group_rows[a]].max(axis=0)
+                for a in area_keys if base.group_rows[a].size
+            ], axis=0)
+            result_prefectures[pref_code]["secondary_subdivisions"].append({
+                "name": subdivision_name,
+                "risk_timeline": timeline(base.swi_fts, risk.tolist())
+            })
+
+        return {
+            "prefectures": result_prefectures,
+            "adjusted_mesh_count": int(len(rows))
+        }
+
+    def evaluate_scenarios(
+        self,
+        base: AdjustmentBase,
+        scenarios: List[Dict[str, Dict[int, float]]]
+    ) -> Dict[str, Any]:
+        """
+        複数の雨量調整シナリオを一括評価（市町村・二次細分の危険度のみ）
+
+        いずれかのシナリオで比率が変わったメッシュの和集合について、
+        [scenario, mesh, ft] の配列で3時間ステップのタンクモデルを一度に積分する。
+
+        Args:
+            base: AdjustmentBase
+            scenarios: シナリオごとの {キー: {ft: 調整後雨量}}
+
+        Returns:
+            {
+                "baseline": {"prefectures": {...}},
+                "scenarios": [{"prefectures": {...}, "adjusted_mesh_count": n}, ...]
+            }
+            prefectures には、いずれかのシナリオで影響を受けた市町村・二次細分の
+            risk_timeline のみを含む（全シナリオで同じ市町村・二次細分）
+        """
+        ratios = [base.ratio_matrix(adjustments) for adjustments in scenarios]
+        union = np.unique(np.concatenate(
+            [rows for rows, _ in ratios] + [np.zeros(0, dtype=np.int64)]))
+
+        ratio = np.ones((len(scenarios), len(union), len(base.fts_3h)))
+        for s, (rows, scenario_ratio) in enumerate(ratios):
+            ratio[s, np.searchsorted(union, rows)] = scenario_ratio
+
+        rain = base.rain_3h[union][np.newaxis, :, :] * ratio
+        initial_swi = np.broadcast_to(
+            base.initial_swi[union][np.newaxis, :, np.newaxis], (len(scenarios), len(union), 1))
+        swi = np.concatenate(
+            [initial_swi, integrate_tanks(base.initial_tanks[union], rain, 3.0)], axis=2)
+        level = classify_risk(swi, base.bounds[union])
+
+        # 市町村ごと: 再計算したメッシュのシナリオ別危険度と、それ以外のメッシュの危険度の最大
+        touched_areas = sorted({key for row in union.tolist() for key in base.row_areas[row]})
+        area_risks: Dict[str, np.ndarray] = {}
+        for key in touched_areas:
+            rows = base.group_rows[key]
+            in_union = np.isin(rows, union)
+            other = rows[~in_union]
+            risk = level[:, np.searchsorted(union, rows[in_union])].max(axis=1)
+            if other.size:
+                risk = np.maximum(risk, base.level_3h[other].max(axis=0))
+            area_risks[key] = risk
+
+        touched = set(touched_areas)
+        subdivision_risks: Dict[str, np.ndarray] = {}
+        for key in base.subdivision_keys:
+            area_keys = [a for a in base.subdivision_areas[key] if base.group_rows[a].size]
+            if not touched.intersection(area_keys):
+                continue
+            subdivision_risks[key] = np.max([
+                area_risks[a] if a in area_risks
+                else np.broadcast_to(base.area_risk(a), (len(scenarios), len(base.swi_fts)))
+                for a in area_keys
+            ], axis=0)
+
+        def risk_prefectures(area_value, subdivision_value):
+            prefectures: Dict[str, Dict[str, Any]] = {}
+            for key in touched_areas:
+                pref_code, pref_name, area_name = base.group_names[key]
+                pref = prefectures.setdefault(pref_code, {
+                    "name": pref_name,
+                    "code": pref_code,
+                    "areas": [],
+                    "secondary_subdivisions": []
+                })
+                pref["areas"].append({
+                    "name": area_name,
+                    "risk_timeline": [
+                        {"ft": ft, "value": value}
+                        for ft, value in zip(base.swi_fts, area_value(key).tolist())
+                    ]
+                })
+            for key in subdivision_risks:
+                pref_code, _, subdivision_name = base.group_names[key]
+                pref = prefectures[pref_code]
+                pref["secondary_subdivisions"].append({
+                    "name": subdivision_name,
+                    "risk_timeline": [
+                        {"ft": ft, "value": value}
+                        for ft, value in zip(base.swi_fts, subdivision_value(key).tolist())
+                    ]
+                })
+            return prefectures
+
+        return {
+            "baseline": {
+                "prefectures": risk_prefectures(base.area_risk, base.area_risk)
+            },
+            "scenarios": [
+                {
+                    "prefectures": risk_prefectures(
+                        lambda key: area_risks[key][s],
+                        lambda key: subdivision_risks[key][s]),
+                    "adjusted_mesh_count": int(len(rows))
+                }
+                for s, (rows, _) in enumerate(ratios)
+            ]
+        }
@@ -0,0 +1,296 @@
+# -*- coding: utf-8 -*-
+"""
+セッション用メッシュインデックス
+
+セッション作成時に一度だけ計算結果（result["prefectures"] の辞書構造）を走査し、
+- メッシュコード → 行番号
+- 行番号 → メッシュ辞書の所在（府県コード, エリア番号, メッシュ番号）
+- [mesh, ft] のリスク配列と ft → 列番号
+を構築する。メッシュ詳細は O(1)、指定時刻のリスク取得は出力サイズに比例した
+コストで参照できる。
+
+さらにFTごとのリスクベクトル（uint8、mesh_codes 順）をバイト列として事前計算し、
+ETag とともに保持する。タイムスライダー操作時はこのバイト列を返すだけでよい。
+"""
+from typing import Dict, List, Optional, Any, Tuple
+import hashlib
+import logging
+import os
+import sys
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class SessionIndex:
+    """セッション単位の列指向インデックス（構築後は読み取り専用）"""
+
+    def __init__(
+        self,
+        mesh_codes: List[str],
+        mesh_locations: List[Tuple[str, int, int]],
+        risk_3hour_max: np.ndarray,
+        risk_3hour_max_fts: List[int],
+        risk_hourly: np.ndarray,
+        risk_hourly_fts: List[int],
+        initial_tanks: Optional[np.ndarray] = None
+    ):
+        """
+        Args:
+            mesh_codes: メッシュコード（行順）
+            mesh_locations: 各行の (府県コード, エリア番号, メッシュ番号)
+            risk_3hour_max: 3時間最大リスク配列 shape=(mesh, ft), uint8
+            risk_3hour_max_fts: risk_3hour_max の列に対応するFT
+            risk_hourly: 1時間リスク配列 shape=(mesh, ft), uint8
+            risk_hourly_fts: risk_hourly の列に対応するFT
+            initial_tanks: 初期タンク値 shape=(mesh, 3), float32（雨量調整の再計算用）
+        """
+        self.mesh_codes = mesh_codes
+        self.mesh_locations = mesh_locations
+        self.mesh_index: Dict[str, int] = {
+            code: row for row, code in enumerate(mesh_codes)
+        }
+        self.risk_3hour_max = risk_3hour_max
+        self.risk_3hour_max_fts = risk_3hour_max_fts
+        self.risk_3hour_max_col: Dict[int, int] = {
+            ft: col for col, ft in enumerate(risk_3hour_max_fts)
+        }
+        self.risk_hourly = risk_hourly
+        self.risk_hourly_fts = risk_hourly_fts
+        self.risk_hourly_col: Dict[int, int] = {
+            ft: col for col, ft in enumerate(risk_hourly_fts)
+        }
+        self.initial_tanks = initial_tanks
+
+        # FTごとのリスクベクトル（事前計算、読み取り専用）
+        self.risk_snapshots: Dict[int, Tuple[bytes, str]] = {}
+        for ft, col in self.risk_3hour_max_col.items():
+            data = np.ascontiguousarray(risk_3hour_max[:, col]).tobytes()
+            self.risk_snapshots[ft] = (data, self._etag(data))
+        empty = bytes(len(mesh_codes))
+        self._empty_snapshot = (empty, self._etag(empty))
+        self.mesh_order_etag = self._etag(
+            "\n".join(mesh_codes).encode('utf-8'))
+
+    @staticmethod
+    def _etag(data: bytes) -> str:
+        """内容ハッシュによるETag値"""
+        return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+    @property
+    def mesh_count(self) -> int:
+        return len(self.mesh_codes)
+
+    @property
+    def nbytes(self) -> int:
+        """インデックス自体の概算メモリ使用量"""
+        arrays = self.risk_3hour_max.nbytes + self.risk_hourly.nbytes
+        if self.initial_tanks is not None:
+            arrays += self.initial_tanks.nbytes
+        snapshots = sum(len(data) for data, _ in self.risk_snapshots.values())
+        # メッシュコード文字列・辞書・所在タプル（1メッシュあたり概算）
+        per_mesh = sys.getsizeof(self.mesh_codes[0]) + 200 if self.mesh_codes else 0
+        return arrays + snapshots + per_mesh * self.mesh_count
+
+    @staticmethod
+    def _timeline_matrix(
+        meshes: List[Dict[str, Any]],
+        key: str
+    ) -> Tuple[np.ndarray, List[int]]:
+        """
+        メッシュ辞書リストの時系列（[{"ft", "value"}, ...]）を [mesh, ft] 配列に変換
+
+        メッシュごとにFTが欠けている場合は0で埋める
+        """
+        fts = sorted({
+            point['ft'] for mesh in meshes for point in mesh.get(key, [])
+        })
+        col = {ft: i for i, ft in enumerate(fts)}
+
+        matrix = np.zeros((len(meshes), len(fts)), dtype=np.uint8)
+        for row, mesh in enumerate(meshes):
+            timeline = mesh.get(key, [])
+            if [point['ft'] for point in timeline] == fts:
+                # 大半のメッシュは全FTを持つので行単位で代入
+                matrix[row, :] = [point['value'] for point in timeline]
+                continue
+            for point in timeline:
+                matrix[row, col[point['ft']]] = point['value']
+
+        return matrix, fts
+
+    @classmethod
+    def build(
+        cls,
+        prefectures: Dict[str, Dict[str, Any]],
+        initial_tanks: Optional[np.ndarray] = None
+    ) -> 'SessionIndex':
+        """
+        計算結果の府県辞書からインデックスを構築
+
+        同一メッシュコードが複数の府県・エリアに現れる場合は最初の出現を採用する
+        （従来の線形探索と同じ結果）
+
+        Args:
+            prefectures: result["prefectures"]（府県コード → 府県辞書）
+            initial_tanks: 初期タンク値 shape=(mesh, 3)（同じ行順、省略可）
+
+        Returns:
+            SessionIndex
+        """
+        mesh_codes: List[str] = []
+        mesh_locations: List[Tuple[str, int, int]] = []
+        meshes: List[Dict[str, Any]] = []
+        seen = set()
+
+        for pref_code, pref_data in prefectures.items():
+            for area_idx, area in enumerate(pref_data.get('areas', [])):
+                for mesh_idx, mesh in enumerate(area.get('meshes', [])):
+                    code = mesh['code']
+                    if code in seen:
+                        continue
+                    seen.add(code)
+                    mesh_codes.append(code)
+                    mesh_locations.append((pref_code, area_idx, mesh_idx))
+                    meshes.append(mesh)
+
+        risk_3hour_max, risk_3hour_max_fts = cls._timeline_matrix(
+            meshes, 'risk_3hour_max_timeline')
+        risk_hourly, risk_hourly_fts = cls._timeline_matrix(
+            meshes, 'risk_hourly_timeline')
+
+        if initial_tanks is not None and len(initial_tanks) != len(mesh_codes):
+            logger.warning(
+                f"Initial tanks ignored: {len(initial_tanks)} rows "
+                f"for {len(mesh_codes)} meshes")
+            initial_tanks = None
+
+        logger.info(
+            f"SessionIndex built: {len(mesh_codes)} meshes, "
+            f"{len(risk_3hour_max_fts)} 3h-FTs, {len(risk_hourly_fts)} 1h-FTs"
+        )
+
+        return cls(
+            mesh_codes, mesh_locations,
+            risk_3hour_max, risk_3hour_max_fts,
+            risk_hourly, risk_hourly_fts,
+            None if initial_tanks is None
+            else np.asarray(initial_tanks, dtype=np.float32)
+        )
+
+    def save(self, path: str):
+        """
+        インデックスを .npz に保存（他プロセスが計算結果本体を読まずに
+        リスク参照できるようにするため）
+
+        Args:
+            path: 保存先パス
+        """
+        pref_codes = sorted({loc[0] for loc in self.mesh_locations})
+        pref_id = {code: i for i, code in enumerate(pref_codes)}
+        locations = np.array(
+            [(pref_id[p], a, m) for p, a, m in self.mesh_locations],
+            dtype=np.int32).reshape(-1, 3)
+        optional = {}
+        if self.initial_tanks is not None:
+            optional['initial_tanks'] = self.initial_tanks
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f,
+                mesh_codes=np.array(self.mesh_codes, dtype=str),
+                pref_codes=np.array(pref_codes, dtype=str),
+                locations=locations,
+                risk_3hour_max=self.risk_3hour_max,
+                risk_3hour_max_fts=np.array(self.risk_3hour_max_fts, dtype=np.int32),
+                risk_hourly=self.risk_hourly,
+                risk_hourly_fts=np.array(self.risk_hourly_fts, dtype=np.int32),
+                **optional
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'SessionIndex':
+        """
+        save() で保存したインデックスを読み込む
+
+        Args:
+            path: インデックスファイルパス
+
+        Returns:
+            SessionIndex
+        """
+        with np.load(path, allow_pickle=False) as data:
+            pref_codes = data['pref_codes'].tolist()
+            mesh_locations = [
+                (pref_codes[p], a, m) for p, a, m in data['locations'].tolist()
+            ]
+            return cls(
+                data['mesh_codes'].tolist(), mesh_locations,
+                data['risk_3hour_max'], data['risk_3hour_max_fts'].tolist(),
+                data['risk_hourly'], data['risk_hourly_fts'].tolist(),
+                data['initial_tanks'] if 'initial_tanks' in data.files else None
+            )
+
+    def get_mesh(
+        self,
+        prefectures: Dict[str, Dict[str, Any]],
+        mesh_code: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        メッシュ辞書を取得（O(1)）
+
+        Args:
+            prefectures: インデックス構築元の府県辞書
+            mesh_code: メッシュコード
+
+        Returns:
+            メッシュ辞書、または None
+        """
+        row = self.mesh_index.get(mesh_code)
+        if row is None:
+            return None
+
+        pref_code, area_idx, mesh_idx = self.mesh_locations[row]
+        return prefectures[pref_code]['areas'][area_idx]['meshes'][mesh_idx]
+
+    def get_risk_column(self, ft: int) -> np.ndarray:
+        """
+        指定FTの3時間最大リスク（メッシュ順、該当FTなしは全0）
+
+        Args:
+            ft: 予測時間
+
+        Returns:
+            shape=(mesh,) の uint8 配列
+        """
+        col = self.risk_3hour_max_col.get(ft)
+        if col is None:
+            return np.zeros(self.mesh_count, dtype=np.uint8)
+        return self.risk_3hour_max[:, col]
+
+    def get_risk_snapshot(self, ft: int) -> Tuple[bytes, str]:
+        """
+        指定FTの事前計算済みリスクベクトル
+
+        Args:
+            ft: 予測時間
+
+        Returns:
+            (mesh_codes 順の uint8 バイト列, ETag値)
+        """
+        return self.risk_snapshots.get(ft, self._empty_snapshot)
+
+    def get_risk_at_time(self, ft: int) -> Dict[str, int]:
+        """
+        指定FTの全メッシュリスク値（メッシュコード → リスク）
+
+        Args:
+            ft: 予測時間
+
+        Returns:
+            {mesh_code: risk_value}
+        """
+        return dict(zip(self.mesh_codes, self.get_risk_column(ft).tolist()))
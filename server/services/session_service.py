@@ -4,88 +4,272 @@
 セッション管理サービス
 
 計算結果をサーバー側で保持し、クライアントへの段階的データ配信を実現
+
+同じ予測（SWI・ガイダンス初期時刻 = キャッシュキー）を開いたセッションは
+1つの計算結果を参照カウント付きで共有する。計算結果（府県辞書・メッシュ
+インデックス）は読み取り専用として扱い、セッションごとに保持するのは
+利用者単位の状態（降雨補正など）のみ。最後のセッションが削除されると
+共有結果も解放される。
+
+常駐メモリ量に上限（max_resident_mb）を設定した場合、上限を超えると
+最終アクセスが古い共有結果をディスクへ退避し、次のアクセス時に読み戻す。
+メッシュインデックス（リスク配列）は常駐させたままにするため、
+タイムスライダー（risk-at-time）やメッシュ順の取得では読み戻しは発生しない。
 """
 
+import os
 import secrets
 import logging
-from typing import Dict, Optional, Any
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Any, Tuple, List
 from datetime import datetime, timedelta
 from threading import Lock
-from models import Prefecture
+
+import numpy as np
+
+from .session_index import SessionIndex
+from .session_snapshot import estimate_result_bytes, save_snapshot, load_snapshot
 
 logger = logging.getLogger(__name__)
 
 
 class SessionService:
     """
-    セッション管理サービス（インメモリ版）
+    セッション管理サービス（インメモリ版 + 共有結果 + ディスク退避）
 
     計算結果をセッションとして保存し、session_idで参照可能にする
     """
 
-    def __init__(self, ttl_hours: int = 1):
+    def __init__(
+        self,
+        ttl_hours: int = 1,
+        max_resident_mb: Optional[float] = None,
+        spill_dir: str = "cache/sessions"
+    ):
         """
         Args:
             ttl_hours: セッションの有効期限（時間）
+            max_resident_mb: 計算結果の常駐メモリ上限（MB、None で無制限）
+            spill_dir: 計算結果の退避先ディレクトリ
         """
         self.sessions: Dict[str, Dict[str, Any]] = {}
+        # 共有計算結果（挿入順 = LRU順、先頭が最も古い）
+        self.results: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
         self.lock = Lock()
         self.ttl_hours = ttl_hours
-        logger.info(f"SessionService initialized with TTL={ttl_hours}h")
+        self.max_resident_bytes = (
+            int(max_resident_mb * 1024 * 1024)
+            if max_resident_mb is not None else None
+        )
+        self.spill_dir = spill_dir
+        self.spill_count = 0
+        self.reload_count = 0
+        self.reclaimed_bytes = 0
+        self._janitor_thread: Optional[threading.Thread] = None
+        self._janitor_stop = threading.Event()
+        logger.info(
+            f"SessionService initialized with TTL={ttl_hours}h, "
+            f"max_resident_mb={max_resident_mb}, spill_dir={spill_dir}"
+        )
 
-    def create_session(
+    def _add_session_locked(
         self,
-        prefectures: Dict[str, Prefecture],
+        result_key: str,
         swi_initial_time: str,
         guidance_initial_time: str,
         calculation_time: str
+    ) -> Tuple[str, datetime]:
+        """共有結果を参照するセッションを登録（self.lock 保持中に呼ぶ）"""
+        session_id = secrets.token_urlsafe(16)
+        now = datetime.now()
+        expires_at = now + timedelta(hours=self.ttl_hours)
+
+        shared = self.results[result_key]
+        shared['refcount'] += 1
+        shared['last_accessed'] = now
+        self.results.move_to_end(result_key)
+
+        self.sessions[session_id] = {
+            'result_key': result_key,
+            'state': {},
+            'swi_initial_time': swi_initial_time,
+            'guidance_initial_time': guidance_initial_time,
+            'calculation_time': calculation_time,
+            'created_at': now,
+            'expires_at': expires_at,
+            'last_accessed': now
+        }
+        return session_id, expires_at
+
+    def create_session(
+        self,
+        prefectures: Dict[str, Dict[str, Any]],
+        swi_initial_time: str,
+        guidance_initial_time: str,
+        calculation_time: str,
+        result_key: Optional[str] = None,
+        initial_tanks: Optional[np.ndarray] = None
     ) -> str:
         """
         新しいセッションを作成
 
+        result_key（キャッシュキー）が指定され、同じキーの共有結果が既にあれば
+        それを参照する（渡された prefectures は保持しない）。
+
         Args:
-            prefectures: 計算結果（全府県データ）
+            prefectures: 計算結果（result["prefectures"]、府県コード → 府県辞書）
             swi_initial_time: SWI初期時刻
             guidance_initial_time: ガイダンス初期時刻
             calculation_time: 計算時刻
+            result_key: 共有キー（None の場合はこのセッション専用の結果）
+            initial_tanks: 初期タンク値 shape=(mesh, 3)（SessionIndex と同じ行順）
 
         Returns:
             session_id: セッションID
         """
-        session_id = secrets.token_urlsafe(16)
-
-        now = datetime.now()
-        expires_at = now + timedelta(hours=self.ttl_hours)
+        if result_key is not None:
+            session_id = self.create_session_for_result(
+                result_key, swi_initial_time, guidance_initial_time,
+                calculation_time)
+            if session_id is not None:
+                return session_id
+        else:
+            result_key = f"session_{secrets.token_urlsafe(16)}"
+
+        # メッシュインデックス・リスク配列を構築（ロック外で一度だけ）
+        index = SessionIndex.build(prefectures, initial_tanks)
+        result_bytes = estimate_result_bytes(prefectures)
 
         with self.lock:
-            self.sessions[session_id] = {
-                'prefectures': prefectures,
-                'swi_initial_time': swi_initial_time,
-                'guidance_initial_time': guidance_initial_time,
-                'calculation_time': calculation_time,
-                'created_at': now,
-                'expires_at': expires_at,
-                'last_accessed': now
-            }
+            if result_key not in self.results:
+                self.results[result_key] = {
+                    'prefectures': prefectures,
+                    'index': index,
+                    'prefecture_codes': list(prefectures.keys()),
+                    'result_bytes': result_bytes,
+                    'refcount': 0,
+                    'spill_path': None,
+                    'spill_bytes': 0,
+                    'spilling': False,
+                    'load_lock': Lock(),
+                    'created_at': datetime.now(),
+                    'last_accessed': datetime.now()
+                }
+            # 構築中に同じキーが登録された場合はそちらを共有する
+            session_id, expires_at = self._add_session_locked(
+                result_key, swi_initial_time, guidance_initial_time,
+                calculation_time)
 
         logger.info(
             f"Session created: {session_id}, "
             f"expires at {expires_at.isoformat()}, "
-            f"prefectures: {list(prefectures.keys())}"
+            f"prefectures: {list(prefectures.keys())}, "
+            f"estimated size: {result_bytes / 1024 / 1024:.1f}MB"
         )
 
+        self.enforce_memory_budget(protect={result_key})
+
         return session_id
 
-    def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+    def create_session_for_result(
+        self,
+        result_key: str,
+        swi_initial_time: str,
+        guidance_initial_time: str,
+        calculation_time: str
+    ) -> Optional[str]:
         """
-        セッションデータを取得
+        既存の共有結果を参照するセッションを作成（計算・読み込みは行わない）
 
         Args:
-            session_id: セッションID
+            result_key: 共有キー（キャッシュキー）
+            swi_initial_time: SWI初期時刻
+            guidance_initial_time: ガイダンス初期時刻
+            calculation_time: 計算時刻
 
         Returns:
-            セッションデータ、または None（存在しない/期限切れ）
+            session_id、または共有結果がない場合 None
         """
+        with self.lock:
+            if result_key not in self.results:
+                return None
+            session_id, expires_at = self._add_session_locked(
+                result_key, swi_initial_time, guidance_initial_time,
+                calculation_time)
+            refcount = self.results[result_key]['refcount']
+
+        logger.info(
+            f"Session created: {session_id}, "
+            f"expires at {expires_at.isoformat()}, "
+            f"shared result: {result_key} ({refcount} sessions)"
+        )
+        return session_id
+
+    def _release_locked(self, session: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        セッションの共有結果参照を解放（self.lock 保持中に呼ぶ）
+
+        参照がなくなった共有結果は表から外して返すだけにとどめ、
+        メモリ・退避ファイルの解放は呼び出し側がロック外で _free_results で行う
+
+        Returns:
+            参照がなくなった共有結果、または None
+        """
+        result_key = session['result_key']
+        shared = self.results.get(result_key)
+        if shared is None:
+            return None
+
+        shared['refcount'] -= 1
+        if shared['refcount'] > 0:
+            return None
+
+        del self.results[result_key]
+        logger.info(f"Shared result released: {result_key}")
+        return shared
+
+    def _free_results(self, released: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        表から外した共有結果を解放（ロック外で呼ぶ）
+
+        Returns:
+            {"memory_bytes", "disk_bytes"} 解放した概算メモリ量と退避ファイルサイズ
+        """
+        memory_bytes = 0
+        disk_bytes = 0
+        while released:
+            shared = released.pop()
+            memory_bytes += shared['index'].nbytes
+            if shared['prefectures'] is not None:
+                memory_bytes += shared['result_bytes']
+            spill_path = shared['spill_path']
+            if spill_path:
+                try:
+                    disk_bytes += os.path.getsize(spill_path)
+                except OSError:
+                    pass
+                self._remove_spill_file(spill_path)
+        # ここで最後の参照が落ちて計算結果が解放される
+        # （処理中のリクエストが参照を保持していれば、その完了後に解放）
+        shared = None
+
+        if memory_bytes:
+            with self.lock:
+                self.reclaimed_bytes += memory_bytes
+
+        return {"memory_bytes": memory_bytes, "disk_bytes": disk_bytes}
+
+    def _get_entry(
+        self,
+        session_id: str
+    ) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """
+        セッションと共有結果のメタデータを取得（計算結果の読み戻しは行わない）
+
+        期限切れなら削除し、最終アクセス時刻とLRU順を更新する
+        """
+        released = []
         with self.lock:
             session = self.sessions.get(session_id)
 
@@ -97,18 +281,254 @@ class SessionService:
             if datetime.now() > session['expires_at']:
                 logger.warning(f"Session expired: {session_id}")
                 del self.sessions[session_id]
+                shared = self._release_locked(session)
+                if shared is not None:
+                    released.append(shared)
+                entry = None
+            else:
+                # 最終アクセス時刻・LRU順を更新
+                now = datetime.now()
+                shared = self.results[session['result_key']]
+                session['last_accessed'] = now
+                shared['last_accessed'] = now
+                self.results.move_to_end(session['result_key'])
+                entry = (session, shared)
+
+        if released:
+            self._free_results(released)
+
+        return entry
+
+    def get_session(
+        self,
+        session_id: str,
+        include_result: bool = True
+    ) -> Optional[Dict[str, Any]]:
+        """
+        セッションデータを取得
+
+        計算結果がディスクへ退避されている場合は読み戻す
+
+        Args:
+            session_id: セッションID
+            include_result: False なら計算結果（prefectures）を読み戻さず None にする
+                （インデックスとメタデータのみ必要な場合）
+
+        Returns:
+            セッションデータ（共有結果の prefectures / index を含む）、
+            または None（存在しない/期限切れ）
+        """
+        if not include_result:
+            entry = self._get_entry(session_id)
+            if entry is None:
                 return None
+            session, shared = entry
+            return {**session, 'prefectures': None, 'index': shared['index']}
 
-            # 最終アクセス時刻更新
-            session['last_accessed'] = datetime.now()
+        resident = self._get_resident(session_id)
+        if resident is None:
+            return None
 
-            return session
+        session, shared, prefectures = resident
+        return {
+            **session,
+            'prefectures': prefectures,
+            'index': shared['index']
+        }
+
+    def _get_resident(
+        self,
+        session_id: str
+    ) -> Optional[Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Dict[str, Any]]]]:
+        """
+        セッション・共有結果と常駐済みの計算結果を取得
+
+        計算結果への参照を呼び出し側で保持するため、直後に別スレッドが
+        退避しても参照中のデータは有効なまま
+        """
+        entry = self._get_entry(session_id)
+        if entry is None:
+            return None
+
+        session, shared = entry
+        prefectures = shared['prefectures']
+        if prefectures is None:
+            prefectures = self._reload(session['result_key'], shared)
+            self.enforce_memory_budget(protect={session['result_key']})
+
+        return session, shared, prefectures
+
+    def has_session(self, session_id: str) -> bool:
+        """セッションが有効か（計算結果の読み戻しは行わない）"""
+        return self._get_entry(session_id) is not None
+
+    def _reload(
+        self,
+        result_key: str,
+        shared: Dict[str, Any]
+    ) -> Dict[str, Dict[str, Any]]:
+        """退避済みの計算結果を読み戻す（同一結果の同時読み戻しは1回に集約）"""
+        with shared['load_lock']:
+            prefectures = shared['prefectures']
+            if prefectures is not None:
+                return prefectures
+
+            start = datetime.now()
+            prefectures = load_snapshot(shared['spill_path'])
+
+            with self.lock:
+                shared['prefectures'] = prefectures
+                shared['last_accessed'] = datetime.now()
+                self.reload_count += 1
+
+            elapsed = (datetime.now() - start).total_seconds()
+            logger.info(f"Session result reloaded from disk: {result_key} ({elapsed:.2f}s)")
+
+        return prefectures
+
+    def _resident_bytes_locked(self) -> int:
+        """常駐中の計算結果サイズ合計（self.lock 保持中に呼ぶ）"""
+        return sum(
+            shared['result_bytes'] + shared['index'].nbytes
+            if shared['prefectures'] is not None
+            else shared['index'].nbytes
+            for shared in self.results.values()
+        )
+
+    def enforce_memory_budget(self, protect: Optional[set] = None) -> int:
+        """
+        常駐メモリ上限を超えている間、最終アクセスが古い共有結果から
+        計算結果をディスクへ退避する
+
+        スナップショットの書き込みはロック外で行い、書き込み中にアクセスされた
+        結果は退避しない（計算結果は不変なので退避ファイルは再利用する）。
+
+        Args:
+            protect: 退避しない共有キー（作成・読み戻し直後のもの）
+
+        Returns:
+            退避した共有結果の数
+        """
+        if self.max_resident_bytes is None:
+            return 0
+
+        protect = set(protect or ())
+        spilled = 0
+
+        while True:
+            with self.lock:
+                excess = self._resident_bytes_locked() - self.max_resident_bytes
+                if excess <= 0:
+                    break
+
+                victim_key = None
+                for result_key, shared in self.results.items():
+                    if (result_key not in protect
+                            and shared['prefectures'] is not None
+                            and not shared['spilling']):
+                        victim_key = result_key
+                        break
+                if victim_key is None:
+                    break
+
+                victim = self.results[victim_key]
+                victim['spilling'] = True
+                prefectures = victim['prefectures']
+                accessed = victim['last_accessed']
+                spill_path = victim['spill_path']
+
+            size = None
+            try:
+                if spill_path is None:
+                    os.makedirs(self.spill_dir, exist_ok=True)
+                    spill_path = os.path.join(self.spill_dir, f"{victim_key}.npz")
+                    size = save_snapshot(spill_path, prefectures)
+                    logger.info(
+                        f"Session result spilled to disk: {victim_key} "
+                        f"({size / 1024 / 1024:.1f}MB)"
+                    )
+            except Exception as e:
+                logger.error(f"Session spill error: {victim_key}: {e}")
+                with self.lock:
+                    victim['spilling'] = False
+                break
+
+            remove_path = None
+            with self.lock:
+                victim['spilling'] = False
+                if self.results.get(victim_key) is not victim:
+                    # 書き込み中に全セッションが削除された
+                    remove_path = spill_path
+                else:
+                    victim['spill_path'] = spill_path
+                    if size is not None:
+                        victim['spill_bytes'] = size
+                    if victim['last_accessed'] == accessed:
+                        victim['prefectures'] = None
+                        self.spill_count += 1
+                        spilled += 1
+                    else:
+                        # 書き込み中にアクセスされたので常駐のまま残す
+                        protect.add(victim_key)
+
+            if remove_path:
+                self._remove_spill_file(remove_path)
+
+        return spilled
+
+    @staticmethod
+    def _remove_spill_file(spill_path: Optional[str]):
+        """退避ファイルを削除"""
+        if not spill_path:
+            return
+        try:
+            os.remove(spill_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Failed to remove session spill file {spill_path}: {e}")
+
+    def get_session_state(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        セッション固有の状態（降雨補正など）を取得
+
+        Args:
+            session_id: セッションID
+
+        Returns:
+            状態辞書のコピー、またはセッション不在時 None
+        """
+        entry = self._get_entry(session_id)
+        if entry is None:
+            return None
+
+        with self.lock:
+            return dict(entry[0]['state'])
+
+    def update_session_state(self, session_id: str, **values) -> bool:
+        """
+        セッション固有の状態を更新（共有結果には影響しない）
+
+        Args:
+            session_id: セッションID
+            **values: 設定する状態
+
+        Returns:
+            更新成功: True、セッション不在: False
+        """
+        entry = self._get_entry(session_id)
+        if entry is None:
+            return False
+
+        with self.lock:
+            entry[0]['state'].update(values)
+        return True
 
     def get_prefecture(
         self,
         session_id: str,
         prefecture_code: str
-    ) -> Optional[Prefecture]:
+    ) -> Optional[Dict[str, Any]]:
         """
         セッションから特定の府県データを取得
 
@@ -119,13 +539,134 @@ class SessionService:
         Returns:
             府県データ、または None
         """
-        session = self.get_session(session_id)
-        if session is None:
+        resident = self._get_resident(session_id)
+        if resident is None:
             return None
 
-        prefectures = session['prefectures']
+        _, _, prefectures = resident
         return prefectures.get(prefecture_code)
 
+    def get_mesh(
+        self,
+        session_id: str,
+        mesh_code: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        セッションから特定のメッシュデータを取得（インデックス参照）
+
+        Args:
+            session_id: セッションID
+            mesh_code: メッシュコード
+
+        Returns:
+            メッシュデータ、または None
+        """
+        resident = self._get_resident(session_id)
+        if resident is None:
+            return None
+
+        _, shared, prefectures = resident
+        return shared['index'].get_mesh(prefectures, mesh_code)
+
+    def get_risk_at_time(
+        self,
+        session_id: str,
+        ft: int
+    ) -> Optional[Dict[str, int]]:
+        """
+        指定時刻の全メッシュリスク値を取得（リスク配列の列参照）
+
+        Args:
+            session_id: セッションID
+            ft: 予測時間
+
+        Returns:
+            {mesh_code: risk_value}、またはセッション不在時 None
+        """
+        entry = self._get_entry(session_id)
+        if entry is None:
+            return None
+
+        return entry[1]['index'].get_risk_at_time(ft)
+
+    def get_mesh_order(
+        self,
+        session_id: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        リスクベクトルのメッシュ順を取得（クライアントはセッションごとに一度取得）
+
+        Args:
+            session_id: セッションID
+
+        Returns:
+            {"mesh_codes", "risk_fts", "etag"}、またはセッション不在時 None
+        """
+        entry = self._get_entry(session_id)
+        if entry is None:
+            return None
+
+        index = entry[1]['index']
+        return {
+            'mesh_codes': index.mesh_codes,
+            'risk_fts': index.risk_3hour_max_fts,
+            'etag': index.mesh_order_etag
+        }
+
+    def get_available_times(self, session_id: str) -> Optional[List[int]]:
+        """
+        リスク時系列に含まれるFT一覧（3時間最大・1時間の和集合）
+
+        Args:
+            session_id: セッションID
+
+        Returns:
+            昇順のFTリスト、またはセッション不在時 None
+        """
+        entry = self._get_entry(session_id)
+        if entry is None:
+            return None
+
+        index = entry[1]['index']
+        return sorted(set(index.risk_3hour_max_fts) | set(index.risk_hourly_fts))
+
+    def get_prefecture_codes(self, session_id: str) -> Optional[List[str]]:
+        """
+        セッションの府県コード一覧（計算結果の読み戻しは行わない）
+
+        Args:
+            session_id: セッションID
+
+        Returns:
+            府県コードのリスト、またはセッション不在時 None
+        """
+        entry = self._get_entry(session_id)
+        if entry is None:
+            return None
+
+        return list(entry[1]['prefecture_codes'])
+
+    def get_risk_snapshot(
+        self,
+        session_id: str,
+        ft: int
+    ) -> Optional[Tuple[bytes, str]]:
+        """
+        指定時刻の事前計算済みリスクベクトルを取得
+
+        Args:
+            session_id: セッションID
+            ft: 予測時間
+
+        Returns:
+            (メッシュ順の uint8 バイト列, ETag値)、またはセッション不在時 None
+        """
+        entry = self._get_entry(session_id)
+        if entry is None:
+            return None
+
+        return entry[1]['index'].get_risk_snapshot(ft)
+
     def delete_session(self, session_id: str) -> bool:
         """
         セッションを削除
@@ -137,11 +678,15 @@ class SessionService:
             削除成功: True、セッション不在: False
         """
         with self.lock:
-            if session_id in self.sessions:
-                del self.sessions[session_id]
-                logger.info(f"Session deleted: {session_id}")
-                return True
-            return False
+            session = self.sessions.pop(session_id, None)
+            if session is None:
+                return False
+            shared = self._release_locked(session)
+
+        if shared is not None:
+            self._free_results([shared])
+        logger.info(f"Session deleted: {session_id}")
+        return True
 
     def cleanup_expired_sessions(self) -> int:
         """
@@ -150,36 +695,90 @@ class SessionService:
         Returns:
             削除されたセッション数
         """
+        return self.run_janitor_once()['expired']
+
+    def run_janitor_once(self) -> Dict[str, int]:
+        """
+        期限切れセッションを削除し、参照がなくなった共有結果を解放
+
+        ロック内では表から外すだけにとどめ、計算結果の解放（大きな辞書の
+        破棄）と退避ファイルの削除はロック外で行うため、リクエスト処理を
+        待たせない。
+
+        Returns:
+            {"expired", "released_results", "reclaimed_bytes", "reclaimed_disk_bytes"}
+        """
         now = datetime.now()
-        expired_ids = []
+        released: List[Dict[str, Any]] = []
 
         with self.lock:
-            for session_id, session in self.sessions.items():
-                if now > session['expires_at']:
-                    expired_ids.append(session_id)
+            expired_ids = [
+                session_id for session_id, session in self.sessions.items()
+                if now > session['expires_at']
+            ]
 
             for session_id in expired_ids:
-                del self.sessions[session_id]
+                shared = self._release_locked(self.sessions.pop(session_id))
+                if shared is not None:
+                    released.append(shared)
+
+        released_count = len(released)
+        freed = self._free_results(released)
 
         if expired_ids:
-            logger.info(f"Cleaned up {len(expired_ids)} expired sessions")
+            logger.info(
+                f"Cleaned up {len(expired_ids)} expired sessions, "
+                f"released {released_count} results "
+                f"({freed['memory_bytes'] / 1024 / 1024:.1f}MB memory, "
+                f"{freed['disk_bytes'] / 1024 / 1024:.1f}MB disk)"
+            )
 
-        return len(expired_ids)
+        return {
+            'expired': len(expired_ids),
+            'released_results': released_count,
+            'reclaimed_bytes': freed['memory_bytes'],
+            'reclaimed_disk_bytes': freed['disk_bytes']
+        }
 
-    def get_session_info(self, session_id: str) -> Optional[Dict[str, Any]]:
+    def start_janitor(self, interval_seconds: float):
         """
-        セッション情報を取得（デバッグ用）
+        定期ジャニタースレッド起動（デーモン）
 
         Args:
-            session_id: セッションID
-
-        Returns:
-            セッション情報（メタデータのみ）
+            interval_seconds: 実行間隔（秒）
         """
-        session = self.get_session(session_id)
-        if session is None:
-            return None
+        if self._janitor_thread and self._janitor_thread.is_alive():
+            return
+
+        self._janitor_stop.clear()
+
+        def _loop():
+            while not self._janitor_stop.wait(interval_seconds):
+                try:
+                    self.run_janitor_once()
+                except Exception as e:
+                    logger.error(f"Session janitor error: {e}")
+
+        self._janitor_thread = threading.Thread(
+            target=_loop, name="session-janitor", daemon=True)
+        self._janitor_thread.start()
 
+        logger.info(f"Session janitor started: interval={interval_seconds}s")
+
+    def stop_janitor(self):
+        """定期ジャニタースレッド停止"""
+        self._janitor_stop.set()
+        if self._janitor_thread:
+            self._janitor_thread.join(timeout=5)
+            self._janitor_thread = None
+
+    def _session_info_locked(
+        self,
+        session_id: str,
+        session: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """セッションのメタデータを辞書化（self.lock 保持中に呼ぶ）"""
+        shared = self.results[session['result_key']]
         return {
             'session_id': session_id,
             'created_at': session['created_at'].isoformat(),
@@ -187,10 +786,34 @@ class SessionService:
             'last_accessed': session['last_accessed'].isoformat(),
             'swi_initial_time': session['swi_initial_time'],
             'guidance_initial_time': session['guidance_initial_time'],
-            'prefecture_count': len(session['prefectures']),
-            'prefecture_codes': list(session['prefectures'].keys())
+            'prefecture_count': len(shared['prefecture_codes']),
+            'prefecture_codes': list(shared['prefecture_codes']),
+            'mesh_count': shared['index'].mesh_count,
+            'result_key': session['result_key'],
+            'shared_sessions': shared['refcount'],
+            'resident': shared['prefectures'] is not None,
+            'estimated_bytes': shared['result_bytes']
         }
 
+    def get_session_info(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        セッション情報を取得（デバッグ用）
+
+        Args:
+            session_id: セッションID
+
+        Returns:
+            セッション情報（メタデータのみ）
+        """
+        entry = self._get_entry(session_id)
+        if entry is None:
+            return None
+
+        with self.lock:
+            if session_id not in self.sessions:
+                return None
+            return self._session_info_locked(session_id, entry[0])
+
     def list_sessions(self) -> list:
         """
         全セッション一覧を取得（デバッグ用）
@@ -200,8 +823,8 @@ class SessionService:
         """
         with self.lock:
             return [
-                self.get_session_info(session_id)
-                for session_id in self.sessions.keys()
+                self._session_info_locked(session_id, session)
+                for session_id, session in self.sessions.items()
             ]
 
     def get_stats(self) -> Dict[str, Any]:
@@ -213,21 +836,42 @@ class SessionService:
         """
         with self.lock:
             total = len(self.sessions)
+            resident = sum(
+                1 for shared in self.results.values()
+                if shared['prefectures'] is not None
+            )
+            memory_stats = {
+                'shared_results': len(self.results),
+                'resident_results': resident,
+                'spilled_results': len(self.results) - resident,
+                'resident_bytes': self._resident_bytes_locked(),
+                # 退避ファイルのディスク上のサイズ
+                'spilled_bytes': sum(
+                    shared['spill_bytes'] for shared in self.results.values()
+                    if shared['prefectures'] is None),
+                'max_resident_bytes': self.max_resident_bytes,
+                'spill_count': self.spill_count,
+                'reload_count': self.reload_count,
+                'reclaimed_bytes': self.reclaimed_bytes,
+                'janitor_running': bool(
+                    self._janitor_thread and self._janitor_thread.is_alive())
+            }
 
             if total == 0:
                 return {
                     'total_sessions': 0,
                     'oldest_session': None,
-                    'newest_session': None
+                    'newest_session': None,
+                    **memory_stats
                 }
 
             sorted_sessions = sorted(
-                self.sessions.items(),
-                key=lambda x: x[1]['created_at']
+                self.sessions.values(),
+                key=lambda s: s['created_at']
             )
 
-            oldest = sorted_sessions[0][1]
-            newest = sorted_sessions[-1][1]
+            oldest = sorted_sessions[0]
+            newest = sorted_sessions[-1]
 
             return {
                 'total_sessions': total,
@@ -238,5 +882,45 @@ class SessionService:
                 'newest_session': {
                     'created_at': newest['created_at'].isoformat(),
                     'expires_at': newest['expires_at'].isoformat()
-                }
+                },
+                **memory_stats
             }
+
+
+def create_session_service(config_service) -> Any:
+    """
+    設定に応じたセッションサービスを作成
+
+    session.backend:
+        memory: プロセス内（開発用、単一プロセス）
+        sqlite: SQLite + スナップショットファイル（複数ワーカープロセスで共有）
+
+    Args:
+        config_service: ConfigService
+
+    Returns:
+        SessionService または SqliteSessionService
+    """
+    backend = config_service.get("session.backend", "memory")
+    ttl_hours = config_service.get("session.ttl_hours", 1)
+    max_resident_mb = config_service.get("session.max_resident_mb")
+    spill_dir = config_service.get("session.spill_dir", "cache/sessions")
+
+    if backend == "sqlite":
+        from .sqlite_session_service import SqliteSessionService
+        return SqliteSessionService(
+            ttl_hours=ttl_hours,
+            max_resident_mb=max_resident_mb,
+            store_dir=spill_dir,
+            db_path=config_service.get("session.sqlite_path"),
+            touch_interval_seconds=config_service.get("session.touch_interval_seconds", 60)
+        )
+
+    if backend != "memory":
+        raise ValueError(f"Unknown session backend: {backend}")
+
+    return SessionService(
+        ttl_hours=ttl_hours,
+        max_resident_mb=max_resident_mb,
+        spill_dir=spill_dir
+    )
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+セッション計算結果のディスク退避（列指向スナップショット）
+
+result["prefectures"] の辞書構造を以下に分解して1つの .npz に保存する:
+- メッシュのスカラー項目（code, lat, lon, ...）: 項目ごとの1次元配列
+- メッシュの時系列項目（*_timeline）: 項目ごとに ft / value を連結した配列 + オフセット
+  （メッシュごとに長さが異なっても正確に復元できるCSR形式）
+- それ以外（府県・二次細分・エリアの名前や集約タイムライン）: JSON
+
+pickle を使わないため、読み込み時に任意コードが実行されることはない。
+float64 / int64 で保存し、tolist() で Python の float / int に戻すため
+退避前と完全に同一の辞書が復元される。
+"""
+from typing import Dict, Any, List
+import json
+import logging
+import os
+import sys
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 容量見積もりでサンプリングするメッシュ数
+ESTIMATE_SAMPLE_MESHES = 50
+
+
+def _deep_sizeof(obj: Any) -> int:
+    """dict / list / スカラーから成るオブジェクトの概算メモリ使用量"""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_sizeof(v) for v in obj.values())
+    elif isinstance(obj, list):
+        size += sum(_deep_sizeof(v) for v in obj)
+    return size
+
+
+def estimate_result_bytes(prefectures: Dict[str, Dict[str, Any]]) -> int:
+    """
+    計算結果のメモリ使用量を見積もる
+
+    全メッシュを走査すると数秒かかるため、先頭のメッシュをサンプリングして
+    メッシュ数倍し、メッシュ以外の部分は実測する。
+
+    Args:
+        prefectures: result["prefectures"]
+
+    Returns:
+        概算バイト数
+    """
+    meshes: List[Dict[str, Any]] = []
+    mesh_count = 0
+    skeleton_bytes = 0
+
+    for pref_data in prefectures.values():
+        for key, value in pref_data.items():
+            if key != 'areas':
+                skeleton_bytes += _deep_sizeof(value)
+        for area in pref_data.get('areas', []):
+            area_meshes = area.get('meshes', [])
+            mesh_count += len(area_meshes)
+            skeleton_bytes += sys.getsizeof(area_meshes)
+            for key, value in area.items():
+                if key != 'meshes':
+                    skeleton_bytes += _deep_sizeof(value)
+            if len(meshes) < ESTIMATE_SAMPLE_MESHES:
+                meshes.extend(area_meshes[:ESTIMATE_SAMPLE_MESHES - len(meshes)])
+
+    if not meshes:
+        return skeleton_bytes
+
+    per_mesh = sum(_deep_sizeof(mesh) for mesh in meshes) / len(meshes)
+    return int(skeleton_bytes + per_mesh * mesh_count)
+
+
+def _compact_int_array(values: List[int]) -> np.ndarray:
+    """整数リストを値域に収まる最小の整数型配列に変換（FT・リスク値用）"""
+    array = np.array(values, dtype=np.int64)
+    if array.size and -32768 <= array.min() and array.max() <= 32767:
+        return array.astype(np.int16)
+    return array
+
+
+def save_snapshot(path: str, prefectures: Dict[str, Dict[str, Any]]) -> int:
+    """
+    計算結果を列指向スナップショットとして保存
+
+    一時ファイルに書き込んでから rename するため、途中で失敗しても
+    不完全なスナップショットが残ることはない。
+
+    Args:
+        path: 保存先パス（.npz）
+        prefectures: result["prefectures"]
+
+    Returns:
+        保存したファイルサイズ（バイト）
+    """
+    meshes: List[Dict[str, Any]] = []
+    skeleton: Dict[str, Any] = {}
+
+    # 項目順を保つため、areas / meshes はその位置のまま置き換える
+    for pref_code, pref_data in prefectures.items():
+        pref_skeleton = dict(pref_data)
+        area_skeletons = []
+        for area in pref_data.get('areas', []):
+            area_skeleton = dict(area)
+            area_meshes = area.get('meshes', [])
+            area_skeleton['meshes'] = len(area_meshes)
+            area_skeletons.append(area_skeleton)
+            meshes.extend(area_meshes)
+        pref_skeleton['areas'] = area_skeletons
+        skeleton[pref_code] = pref_skeleton
+
+    arrays: Dict[str, np.ndarray] = {}
+    mesh_keys: List[str] = list(meshes[0].keys()) if meshes else []
+    scalar_keys: List[str] = []
+    timeline_keys: List[str] = []
+
+    for key in mesh_keys:
+        if isinstance(meshes[0][key], list):
+            timeline_keys.append(key)
+        else:
+            scalar_keys.append(key)
+
+    for key in scalar_keys:
+        arrays[f"scalar/{key}"] = np.array([mesh[key] for mesh in meshes])
+
+    for key in timeline_keys:
+        lengths = np.fromiter(
+            (len(mesh[key]) for mesh in meshes), dtype=np.int64,
+            count=len(meshes))
+        points = [point for mesh in meshes for point in mesh[key]]
+        values = [point['value'] for point in points]
+        is_int = all(isinstance(v, int) for v in values)
+
+        arrays[f"timeline/{key}/offsets"] = np.concatenate(
+            ([0], np.cumsum(lengths)))
+        arrays[f"timeline/{key}/ft"] = _compact_int_array(
+            [point['ft'] for point in points])
+        arrays[f"timeline/{key}/value"] = (
+            _compact_int_array(values) if is_int
+            else np.array(values, dtype=np.float64))
+
+    layout = {
+        'skeleton': skeleton,
+        'mesh_keys': mesh_keys,
+        'scalar_keys': scalar_keys,
+        'timeline_keys': timeline_keys,
+        'mesh_count': len(meshes)
+    }
+    arrays['layout'] = np.frombuffer(
+        json.dumps(layout, ensure_ascii=False).encode('utf-8'), dtype=np.uint8)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+
+    return os.path.getsize(path)
+
+
+def load_snapshot(path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    列指向スナップショットから計算結果を復元
+
+    Args:
+        path: スナップショットパス（.npz）
+
+    Returns:
+        result["prefectures"] と同一構造の辞書
+    """
+    with np.load(path, allow_pickle=False) as data:
+        layout = json.loads(bytes(data['layout']).decode('utf-8'))
+        mesh_keys = layout['mesh_keys']
+        scalar_keys = layout['scalar_keys']
+        timeline_keys = layout['timeline_keys']
+
+        scalars = {key: data[f"scalar/{key}"].tolist() for key in scalar_keys}
+        timelines = {}
+        for key in timeline_keys:
+            timelines[key] = (
+                data[f"timeline/{key}/offsets"].tolist(),
+                data[f"timeline/{key}/ft"].tolist(),
+                data[f"timeline/{key}/value"].tolist()
+            )
+
+    def build_mesh(i: int) -> Dict[str, Any]:
+        mesh = {}
+        for key in mesh_keys:
+            if key in scalars:
+                mesh[key] = scalars[key][i]
+                continue
+            offsets, fts, values = timelines[key]
+            start, end = offsets[i], offsets[i + 1]
+            mesh[key] = [
+                {"ft": ft, "value": value}
+                for ft, value in zip(fts[start:end], values[start:end])
+            ]
+        return mesh
+
+    prefectures: Dict[str, Dict[str, Any]] = {}
+    mesh_pos = 0
+    for pref_code, pref_skeleton in layout['skeleton'].items():
+        pref_data = dict(pref_skeleton)
+        areas = []
+        for area_skeleton in pref_skeleton.get('areas', []):
+            area = dict(area_skeleton)
+            n = area_skeleton['meshes']
+            area['meshes'] = [build_mesh(i) for i in range(mesh_pos, mesh_pos + n)]
+            mesh_pos += n
+            areas.append(area)
+        if 'areas' in pref_skeleton:
+            pref_data['areas'] = areas
+        prefectures[pref_code] = pref_data
+
+    return prefectures
@@ -0,0 +1,959 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+セッション管理サービス（複数プロセス共有版）
+
+gunicorn 等で複数ワーカープロセスを起動しても、どのワーカーでも同じ
+セッションを扱えるよう、セッション情報をローカルの SQLite（WALモード）に、
+計算結果をスナップショットファイル（.npz）に置く。
+
+- sessions テーブル: セッションID・参照する共有キー・利用者単位の状態（JSON）
+- results テーブル: 共有キーごとの計算結果（参照カウント・ファイルパス等）
+- 計算結果本体: <store_dir>/<共有キー>.<トークン>.npz（session_snapshot 形式）
+- メッシュインデックス: <store_dir>/<共有キー>.<トークン>.index.npz（SessionIndex.save 形式）
+
+各ワーカーは読み込んだインデックス・計算結果をプロセス内にキャッシュし、
+計算結果本体は max_resident_mb を超えると古いものから破棄する（ファイルから
+いつでも読み戻せるため）。インデックスは小さいので常に保持し、
+タイムスライダーの応答に計算結果本体の読み込みは不要。
+
+公開メソッドはインメモリ版 SessionService と同じ。開発時は
+インメモリ版（session.backend: memory）を使う。
+"""
+
+import json
+import os
+import secrets
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Any, Tuple, List
+from datetime import datetime, timedelta
+from threading import Lock
+
+import numpy as np
+
+from .session_index import SessionIndex
+from .session_snapshot import estimate_result_bytes, save_snapshot, load_snapshot
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    result_key TEXT PRIMARY KEY,
+    snapshot_path TEXT NOT NULL,
+    index_path TEXT NOT NULL,
+    prefecture_codes TEXT NOT NULL,
+    mesh_count INTEGER NOT NULL,
+    result_bytes INTEGER NOT NULL,
+    refcount INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_accessed REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    result_key TEXT NOT NULL,
+    state TEXT NOT NULL,
+    swi_initial_time TEXT,
+    guidance_initial_time TEXT,
+    calculation_time TEXT,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    last_accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions (expires_at);
+"""
+
+
+def _iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp).isoformat()
+
+
+class SqliteSessionService:
+    """
+    セッション管理サービス（SQLite + スナップショットファイル、複数プロセス共有）
+
+    計算結果をセッションとして保存し、session_idで参照可能にする
+    """
+
+    def __init__(
+        self,
+        ttl_hours: int = 1,
+        max_resident_mb: Optional[float] = None,
+        store_dir: str = "cache/sessions",
+        db_path: Optional[str] = None,
+        touch_interval_seconds: float = 60.0
+    ):
+        """
+        Args:
+            ttl_hours: セッションの有効期限（時間）
+            max_resident_mb: プロセス内に保持する計算結果の上限（MB、None で無制限）
+            store_dir: 計算結果ファイルの保存先ディレクトリ（全ワーカーで共通）
+            db_path: SQLite ファイルパス（省略時は store_dir/sessions.db）
+            touch_interval_seconds: 最終アクセス時刻を更新する最小間隔（秒）
+        """
+        self.ttl_hours = ttl_hours
+        self.max_resident_bytes = (
+            int(max_resident_mb * 1024 * 1024)
+            if max_resident_mb is not None else None
+        )
+        self.touch_interval_seconds = touch_interval_seconds
+        self.store_dir = store_dir
+        self.db_path = db_path or os.path.join(store_dir, "sessions.db")
+        os.makedirs(store_dir, exist_ok=True)
+
+        # プロセス内キャッシュ（共有キー → {"index", "prefectures", "result_bytes"}）
+        self._local: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self.lock = Lock()
+        self._load_locks: Dict[str, Lock] = {}
+        self._conn_local = threading.local()
+
+        self.reload_count = 0
+        self.reclaimed_bytes = 0
+        self._janitor_thread: Optional[threading.Thread] = None
+        self._janitor_stop = threading.Event()
+
+        self._connect().executescript(_SCHEMA)
+
+        logger.info(
+            f"SqliteSessionService initialized with TTL={ttl_hours}h, "
+            f"max_resident_mb={max_resident_mb}, db={self.db_path}"
+        )
+
+    # ------------------------------------------------------------------
+    # SQLite
+    # ------------------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        """スレッドごとの接続（WALモード、書き込み競合時は待機）"""
+        conn = getattr(self._conn_local, 'conn', None)
+        if conn is None:
+            # トランザクションは _read() / _write() で明示的に開始する
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn_local.conn = conn
+        return conn
+
+    def _read(self):
+        """読み取りトランザクション（BEGIN DEFERRED、書き込みロックは取らない）"""
+        return _Transaction(self._connect(), "BEGIN DEFERRED")
+
+    def _write(self):
+        """書き込みトランザクション（BEGIN IMMEDIATE で即座に書き込みロック取得）"""
+        return _Transaction(self._connect(), "BEGIN IMMEDIATE")
+
+    def _release_in_tx(self, conn: sqlite3.Connection, result_key: str) -> Optional[sqlite3.Row]:
+        """
+        共有結果の参照カウントを減らす（書き込みトランザクション内で呼ぶ）
+
+        Returns:
+            参照がなくなり削除した results 行、または None
+        """
+        conn.execute(
+            "UPDATE results SET refcount = refcount - 1 WHERE result_key = ?",
+            (result_key,))
+        row = conn.execute(
+            "SELECT * FROM results WHERE result_key = ? AND refcount <= 0",
+            (result_key,)).fetchone()
+        if row is not None:
+            conn.execute("DELETE FROM results WHERE result_key = ?", (result_key,))
+            logger.info(f"Shared result released: {result_key}")
+        return row
+
+    def _free_results(self, rows: List[sqlite3.Row]) -> Dict[str, int]:
+        """
+        削除した共有結果のファイルとプロセス内キャッシュを解放（トランザクション外で呼ぶ）
+
+        Returns:
+            {"memory_bytes", "disk_bytes"}
+        """
+        memory_bytes = 0
+        disk_bytes = 0
+        for row in rows:
+            with self.lock:
+                local = self._local.pop(row['result_key'], None)
+                self._load_locks.pop(row['result_key'], None)
+            if local is not None:
+                memory_bytes += local['index'].nbytes
+                if local['prefectures'] is not None:
+                    memory_bytes += local['result_bytes']
+            local = None
+
+            for path in (row['snapshot_path'], row['index_path']):
+                try:
+                    disk_bytes += os.path.getsize(path)
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.warning(f"Failed to remove session file {path}: {e}")
+
+        if memory_bytes:
+            with self.lock:
+                self.reclaimed_bytes += memory_bytes
+
+        return {"memory_bytes": memory_bytes, "disk_bytes": disk_bytes}
+
+    def _result_path(self, result_key: str, token: str, suffix: str) -> str:
+        """
+        計算結果ファイルパス
+
+        解放と同一キーの再作成が別ワーカーで重なっても互いのファイルを
+        消さないよう、作成ごとのトークンをファイル名に含める
+        """
+        return os.path.join(self.store_dir, f"{result_key}.{token}{suffix}")
+
+    # ------------------------------------------------------------------
+    # 作成
+    # ------------------------------------------------------------------
+
+    def _add_session_in_tx(
+        self,
+        conn: sqlite3.Connection,
+        result_key: str,
+        swi_initial_time: str,
+        guidance_initial_time: str,
+        calculation_time: str
+    ) -> Tuple[str, datetime]:
+        """共有結果を参照するセッションを登録（書き込みトランザクション内で呼ぶ）"""
+        session_id = secrets.token_urlsafe(16)
+        now = datetime.now()
+        expires_at = now + timedelta(hours=self.ttl_hours)
+
+        conn.execute(
+            "UPDATE results SET refcount = refcount + 1, last_accessed = ? "
+            "WHERE result_key = ?", (now.timestamp(), result_key))
+        conn.execute(
+            "INSERT INTO sessions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (session_id, result_key, "{}", swi_initial_time,
+             guidance_initial_time, calculation_time, now.timestamp(),
+             expires_at.timestamp(), now.timestamp()))
+        return session_id, expires_at
+
+    def create_session(
+        self,
+        prefectures: Dict[str, Dict[str, Any]],
+        swi_initial_time: str,
+        guidance_initial_time: str,
+        calculation_time: str,
+        result_key: Optional[str] = None,
+        initial_tanks: Optional[np.ndarray] = None
+    ) -> str:
+        """
+        新しいセッションを作成
+
+        result_key（キャッシュキー）が指定され、同じキーの共有結果が既にあれば
+        （他のワーカーが作成したものも含めて）それを参照する。
+
+        Args:
+            prefectures: 計算結果（result["prefectures"]、府県コード → 府県辞書）
+            swi_initial_time: SWI初期時刻
+            guidance_initial_time: ガイダンス初期時刻
+            calculation_time: 計算時刻
+            result_key: 共有キー（None の場合はこのセッション専用の結果）
+            initial_tanks: 初期タンク値 shape=(mesh, 3)（SessionIndex と同じ行順）
+
+        Returns:
+            session_id: セッションID
+        """
+        if result_key is not None:
+            session_id = self.create_session_for_result(
+                result_key, swi_initial_time, guidance_initial_time,
+                calculation_time)
+            if session_id is not None:
+                return session_id
+        else:
+            result_key = f"session_{secrets.token_urlsafe(16)}"
+
+        # インデックス構築・ファイル書き込みはトランザクション外で行う
+        index = SessionIndex.build(prefectures, initial_tanks)
+        result_bytes = estimate_result_bytes(prefectures)
+        token = secrets.token_hex(4)
+        snapshot_path = self._result_path(result_key, token, ".npz")
+        index_path = self._result_path(result_key, token, ".index.npz")
+        save_snapshot(snapshot_path, prefectures)
+        index.save(index_path)
+
+        now = datetime.now().timestamp()
+        with self._write() as conn:
+            # 他のワーカーが同じキーを先に登録していればそちらを共有する
+            inserted = conn.execute(
+                "INSERT OR IGNORE INTO results VALUES (?, ?, ?, ?, ?, ?, 0, ?, ?)",
+                (result_key, snapshot_path, index_path,
+                 json.dumps(list(prefectures.keys())), index.mesh_count,
+                 result_bytes, now, now)).rowcount == 1
+            session_id, expires_at = self._add_session_in_tx(
+                conn, result_key, swi_initial_time, guidance_initial_time,
+                calculation_time)
+
+        if not inserted:
+            for path in (snapshot_path, index_path):
+                os.remove(path)
+
+        with self.lock:
+            if result_key not in self._local:
+                self._local[result_key] = {
+                    'index': index,
+                    'prefectures': prefectures,
+                    'result_bytes': result_bytes
+                }
+
+        logger.info(
+            f"Session created: {session_id}, "
+            f"expires at {expires_at.isoformat()}, "
+            f"prefectures: {list(prefectures.keys())}, "
+            f"estimated size: {result_bytes / 1024 / 1024:.1f}MB"
+        )
+
+        self._enforce_local_budget(protect={result_key})
+
+        return session_id
+
+    def create_session_for_result(
+        self,
+        result_key: str,
+        swi_initial_time: str,
+        guidance_initial_time: str,
+        calculation_time: str
+    ) -> Optional[str]:
+        """
+        既存の共有結果を参照するセッションを作成（計算・読み込みは行わない）
+
+        Args:
+            result_key: 共有キー（キャッシュキー）
+            swi_initial_time: SWI初期時刻
+            guidance_initial_time: ガイダンス初期時刻
+            calculation_time: 計算時刻
+
+        Returns:
+            session_id、または共有結果がない場合 None
+        """
+        with self._write() as conn:
+            row = conn.execute(
+                "SELECT refcount FROM results WHERE result_key = ?",
+                (result_key,)).fetchone()
+            if row is None:
+                return None
+            session_id, expires_at = self._add_session_in_tx(
+                conn, result_key, swi_initial_time, guidance_initial_time,
+                calculation_time)
+
+        logger.info(
+            f"Session created: {session_id}, "
+            f"expires at {expires_at.isoformat()}, "
+            f"shared result: {result_key} ({row['refcount'] + 1} sessions)"
+        )
+        return session_id
+
+    # ------------------------------------------------------------------
+    # 参照
+    # ------------------------------------------------------------------
+
+    def _get_entry(self, session_id: str) -> Optional[Tuple[sqlite3.Row, sqlite3.Row]]:
+        """
+        セッション行と共有結果行を取得
+
+        参照は読み取りトランザクションで行い、書き込みロックは取らない。
+        期限切れの行の削除はジャニター・書き込み系の処理に任せる。
+        最終アクセス時刻は touch_interval_seconds 以上古い場合のみ更新する。
+        """
+        now = datetime.now().timestamp()
+        with self._read() as conn:
+            session = conn.execute(
+                "SELECT * FROM sessions WHERE session_id = ?",
+                (session_id,)).fetchone()
+            shared = None
+            if session is not None:
+                shared = conn.execute(
+                    "SELECT * FROM results WHERE result_key = ?",
+                    (session['result_key'],)).fetchone()
+
+        if session is None or shared is None:
+            logger.warning(f"Session not found: {session_id}")
+            return None
+
+        if now > session['expires_at']:
+            logger.warning(f"Session expired: {session_id}")
+            return None
+
+        if now - session['last_accessed'] >= self.touch_interval_seconds:
+            self._touch(session_id, session['result_key'], now)
+
+        return session, shared
+
+    def _touch(self, session_id: str, result_key: str, now: float):
+        """最終アクセス時刻を更新（他ワーカーが更新済みなら何もしない）"""
+        threshold = now - self.touch_interval_seconds
+        with self._write() as conn:
+            conn.execute(
+                "UPDATE sessions SET last_accessed = ? "
+                "WHERE session_id = ? AND last_accessed <= ?",
+                (now, session_id, threshold))
+            conn.execute(
+                "UPDATE results SET last_accessed = ? "
+                "WHERE result_key = ? AND last_accessed <= ?",
+                (now, result_key, threshold))
+
+    def _get_local(self, shared: sqlite3.Row, need_result: bool) -> Dict[str, Any]:
+        """
+        共有結果のプロセス内キャッシュを取得（なければファイルから読み込む）
+
+        Args:
+            shared: results 行
+            need_result: 計算結果本体も必要か（False ならインデックスのみ）
+        """
+        result_key = shared['result_key']
+        with self.lock:
+            local = self._local.get(result_key)
+            if local is not None:
+                self._local.move_to_end(result_key)
+                if local['prefectures'] is not None or not need_result:
+                    return local
+            load_lock = self._load_locks.setdefault(result_key, Lock())
+
+        with load_lock:
+            with self.lock:
+                local = self._local.get(result_key)
+            if local is None:
+                local = {
+                    'index': SessionIndex.load(shared['index_path']),
+                    'prefectures': None,
+                    'result_bytes': shared['result_bytes']
+                }
+            if need_result and local['prefectures'] is None:
+                start = datetime.now()
+                local['prefectures'] = load_snapshot(shared['snapshot_path'])
+                elapsed = (datetime.now() - start).total_seconds()
+                logger.info(
+                    f"Session result loaded from disk: {result_key} ({elapsed:.2f}s)")
+                with self.lock:
+                    self.reload_count += 1
+            with self.lock:
+                self._local[result_key] = local
+                self._local.move_to_end(result_key)
+
+        if need_result:
+            self._enforce_local_budget(protect={result_key})
+        return local
+
+    def _enforce_local_budget(self, protect: Optional[set] = None) -> int:
+        """
+        プロセス内に保持する計算結果本体を上限以内に収める（古いものから破棄）
+
+        Returns:
+            破棄した計算結果の数
+        """
+        if self.max_resident_bytes is None:
+            return 0
+
+        protect = protect or set()
+        dropped = []
+        with self.lock:
+            resident = sum(
+                local['result_bytes'] + local['index'].nbytes
+                if local['prefectures'] is not None else local['index'].nbytes
+                for local in self._local.values()
+            )
+            for result_key, local in self._local.items():
+                if resident <= self.max_resident_bytes:
+                    break
+                if result_key in protect or local['prefectures'] is None:
+                    continue
+                dropped.append(local['prefectures'])
+                local['prefectures'] = None
+                resident -= local['result_bytes']
+
+        count = len(dropped)
+        # 計算結果の破棄はロック外で
+        dropped.clear()
+        return count
+
+    def get_session(
+        self,
+        session_id: str,
+        include_result: bool = True
+    ) -> Optional[Dict[str, Any]]:
+        """
+        セッションデータを取得
+
+        Args:
+            session_id: セッションID
+            include_result: False なら計算結果（prefectures）を読み込まず None にする
+                （インデックスとメタデータのみ必要な場合）
+
+        Returns:
+            セッションデータ（共有結果の prefectures / index を含む）、
+            または None（存在しない/期限切れ）
+        """
+        entry = self._get_entry(session_id)
+        if entry is None:
+            return None
+
+        session, shared = entry
+        local = self._get_local(shared, need_result=include_result)
+        info = self._session_info(session, shared)
+        info['state'] = json.loads(session['state'])
+        info['prefectures'] = local['prefectures'] if include_result else None
+        info['index'] = local['index']
+        return info
+
+    def has_session(self, session_id: str) -> bool:
+        """セッションが有効か（計算結果の読み込みは行わない）"""
+        return self._get_entry(session_id) is not None
+
+    def get_session_state(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        セッション固有の状態（降雨補正など）を取得
+
+        Args:
+            session_id: セッションID
+
+        Returns:
+            状態辞書、またはセッション不在時 None
+        """
+        entry = self._get_entry(session_id)
+        if entry is None:
+            return None
+        return json.loads(entry[0]['state'])
+
+    def update_session_state(self, session_id: str, **values) -> bool:
+        """
+        セッション固有の状態を更新（共有結果には影響しない）
+
+        Args:
+            session_id: セッションID
+            **values: 設定する状態（JSON化できる値）
+
+        Returns:
+            更新成功: True、セッション不在: False
+        """
+        with self._write() as conn:
+            row = conn.execute(
+                "SELECT state FROM sessions WHERE session_id = ? AND expires_at >= ?",
+                (session_id, datetime.now().timestamp())).fetchone()
+            if row is None:
+                return False
+            state = json.loads(row['state'])
+            state.update(values)
+            conn.execute(
+                "UPDATE sessions SET state = ? WHERE session_id = ?",
+                (json.dumps(state, ensure_ascii=False), session_id))
+        return True
+
+    def get_prefecture(
+        self,
+        session_id: str,
+        prefecture_code: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        セッションから特定の府県データを取得
+
+        Args:
+            session_id: セッションID
+            prefecture_code: 府県コード（例: "shiga"）
+
+        Returns:
+            府県データ、または None
+        """
+        entry = self._get_entry(session_id)
+        if entry is None:
+            return None
+
+        local = self._get_local(entry[1], need_result=True)
+        return local['prefectures'].get(prefecture_code)
+
+    def get_mesh(
+        self,
+        session_id: str,
+        mesh_code: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        セッションから特定のメッシュデータを取得（インデックス参照）
+
+        Args:
+            session_id: セッションID
+            mesh_code: メッシュコード
+
+        Returns:
+            メッシュデータ、または None
+        """
+        entry = self._get_entry(session_id)
+        if entry is None:
+            return None
+
+        local = self._get_local(entry[1], need_result=True)
+        return local['index'].get_mesh(local['prefectures'], mesh_code)
+
+    def _get_index(self, session_id: str) -> Optional[SessionIndex]:
+        entry = self._get_entry(session_id)
+        if entry is None:
+            return None
+        return self._get_local(entry[1], need_result=False)['index']
+
+    def get_risk_at_time(
+        self,
+        session_id: str,
+        ft: int
+    ) -> Optional[Dict[str, int]]:
+        """
+        指定時刻の全メッシュリスク値を取得（リスク配列の列参照）
+
+        Args:
+            session_id: セッションID
+            ft: 予測時間
+
+        Returns:
+            {mesh_code: risk_value}、またはセッション不在時 None
+        """
+        index = self._get_index(session_id)
+        return index.get_risk_at_time(ft) if index is not None else None
+
+    def get_mesh_order(
+        self,
+        session_id: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        リスクベクトルのメッシュ順を取得
+
+        Args:
+            session_id: セッションID
+
+        Returns:
+            {"mesh_codes", "risk_fts", "etag"}、またはセッション不在時 None
+        """
+        index = self._get_index(session_id)
+        if index is None:
+            return None
+
+        return {
+            'mesh_codes': index.mesh_codes,
+            'risk_fts': index.risk_3hour_max_fts,
+            'etag': index.mesh_order_etag
+        }
+
+    def get_available_times(self, session_id: str) -> Optional[List[int]]:
+        """
+        リスク時系列に含まれるFT一覧（3時間最大・1時間の和集合）
+
+        Args:
+            session_id: セッションID
+
+        Returns:
+            昇順のFTリスト、またはセッション不在時 None
+        """
+        index = self._get_index(session_id)
+        if index is None:
+            return None
+        return sorted(set(index.risk_3hour_max_fts) | set(index.risk_hourly_fts))
+
+    def get_prefecture_codes(self, session_id: str) -> Optional[List[str]]:
+        """
+        セッションの府県コード一覧（計算結果の読み込みは行わない）
+
+        Args:
+            session_id: セッションID
+
+        Returns:
+            府県コードのリスト、またはセッション不在時 None
+        """
+        entry = self._get_entry(session_id)
+        if entry is None:
+            return None
+        return json.loads(entry[1]['prefecture_codes'])
+
+    def get_risk_snapshot(
+        self,
+        session_id: str,
+        ft: int
+    ) -> Optional[Tuple[bytes, str]]:
+        """
+        指定時刻の事前計算済みリスクベクトルを取得
+
+        Args:
+            session_id: セッションID
+            ft: 予測時間
+
+        Returns:
+            (メッシュ順の uint8 バイト列, ETag値)、またはセッション不在時 None
+        """
+        index = self._get_index(session_id)
+        return index.get_risk_snapshot(ft) if index is not None else None
+
+    # ------------------------------------------------------------------
+    # 削除・ジャニター
+    # ------------------------------------------------------------------
+
+    def delete_session(self, session_id: str) -> bool:
+        """
+        セッションを削除
+
+        Args:
+            session_id: セッションID
+
+        Returns:
+            削除成功: True、セッション不在: False
+        """
+        with self._write() as conn:
+            session = conn.execute(
+                "SELECT result_key FROM sessions WHERE session_id = ?",
+                (session_id,)).fetchone()
+            if session is None:
+                return False
+            conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            released = self._release_in_tx(conn, session['result_key'])
+
+        if released is not None:
+            self._free_results([released])
+        logger.info(f"Session deleted: {session_id}")
+        return True
+
+    def cleanup_expired_sessions(self) -> int:
+        """
+        期限切れセッションを削除
+
+        Returns:
+            削除されたセッション数
+        """
+        return self.run_janitor_once()['expired']
+
+    def run_janitor_once(self) -> Dict[str, int]:
+        """
+        期限切れセッションを削除し、参照がなくなった共有結果を解放
+
+        トランザクション内では行の削除のみ行い、ファイル削除とプロセス内
+        キャッシュの解放はトランザクション外で行う。他のワーカーが解放した
+        共有結果のプロセス内キャッシュもここで破棄する。
+
+        Returns:
+            {"expired", "released_results", "reclaimed_bytes", "reclaimed_disk_bytes"}
+        """
+        now = datetime.now().timestamp()
+        released: List[sqlite3.Row] = []
+
+        with self._write() as conn:
+            expired = conn.execute(
+                "SELECT session_id, result_key FROM sessions WHERE expires_at < ?",
+                (now,)).fetchall()
+            for session in expired:
+                conn.execute(
+                    "DELETE FROM sessions WHERE session_id = ?",
+                    (session['session_id'],))
+                row = self._release_in_tx(conn, session['result_key'])
+                if row is not None:
+                    released.append(row)
+            live_keys = {
+                row['result_key']
+                for row in conn.execute("SELECT result_key FROM results")
+            }
+
+        freed = self._free_results(released)
+
+        # 他ワーカーが解放した結果のプロセス内キャッシュ
+        with self.lock:
+            stale = [key for key in self._local if key not in live_keys]
+            for key in stale:
+                local = self._local.pop(key)
+                freed['memory_bytes'] += local['index'].nbytes + (
+                    local['result_bytes'] if local['prefectures'] is not None else 0)
+                self._load_locks.pop(key, None)
+            local = None
+            if stale:
+                self.reclaimed_bytes += freed['memory_bytes']
+
+        if expired:
+            logger.info(
+                f"Cleaned up {len(expired)} expired sessions, "
+                f"released {len(released)} results "
+                f"({freed['memory_bytes'] / 1024 / 1024:.1f}MB memory, "
+                f"{freed['disk_bytes'] / 1024 / 1024:.1f}MB disk)"
+            )
+
+        return {
+            'expired': len(expired),
+            'released_results': len(released),
+            'reclaimed_bytes': freed['memory_bytes'],
+            'reclaimed_disk_bytes': freed['disk_bytes']
+        }
+
+    def start_janitor(self, interval_seconds: float):
+        """
+        定期ジャニタースレッド起動（デーモン）
+
+        Args:
+            interval_seconds: 実行間隔（秒）
+        """
+        if self._janitor_thread and self._janitor_thread.is_alive():
+            return
+
+        self._janitor_stop.clear()
+
+        def _loop():
+            while not self._janitor_stop.wait(interval_seconds):
+                try:
+                    self.run_janitor_once()
+                except Exception as e:
+                    logger.error(f"Session janitor error: {e}")
+
+        self._janitor_thread = threading.Thread(
+            target=_loop, name="session-janitor", daemon=True)
+        self._janitor_thread.start()
+
+        logger.info(f"Session janitor started: interval={interval_seconds}s")
+
+    def stop_janitor(self):
+        """定期ジャニタースレッド停止"""
+        self._janitor_stop.set()
+        if self._janitor_thread:
+            self._janitor_thread.join(timeout=5)
+            self._janitor_thread = None
+
+    # ------------------------------------------------------------------
+    # 情報・統計
+    # ------------------------------------------------------------------
+
+    def _session_info(self, session: sqlite3.Row, shared: sqlite3.Row) -> Dict[str, Any]:
+        """セッションのメタデータを辞書化"""
+        prefecture_codes = json.loads(shared['prefecture_codes'])
+        with self.lock:
+            local = self._local.get(shared['result_key'])
+            resident = local is not None and local['prefectures'] is not None
+        return {
+            'session_id': session['session_id'],
+            'created_at': _iso(session['created_at']),
+            'expires_at': _iso(session['expires_at']),
+            'last_accessed': _iso(session['last_accessed']),
+            'swi_initial_time': session['swi_initial_time'],
+            'guidance_initial_time': session['guidance_initial_time'],
+            'prefecture_count': len(prefecture_codes),
+            'prefecture_codes': prefecture_codes,
+            'mesh_count': shared['mesh_count'],
+            'result_key': shared['result_key'],
+            'shared_sessions': shared['refcount'],
+            'resident': resident,
+            'estimated_bytes': shared['result_bytes']
+        }
+
+    def get_session_info(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        セッション情報を取得（デバッグ用）
+
+        Args:
+            session_id: セッションID
+
+        Returns:
+            セッション情報（メタデータのみ）
+        """
+        entry = self._get_entry(session_id)
+        if entry is None:
+            return None
+        return self._session_info(*entry)
+
+    def list_sessions(self) -> list:
+        """
+        全セッション一覧を取得（デバッグ用）
+
+        Returns:
+            セッション情報のリスト
+        """
+        conn = self._connect()
+        results = {
+            row['result_key']: row
+            for row in conn.execute("SELECT * FROM results")
+        }
+        sessions = conn.execute(
+            "SELECT * FROM sessions ORDER BY created_at").fetchall()
+        return [
+            self._session_info(session, results[session['result_key']])
+            for session in sessions
+            if session['result_key'] in results
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        セッション統計情報を取得
+
+        Returns:
+            統計情報
+        """
+        conn = self._connect()
+        total = conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        snapshot_paths = {
+            row['result_key']: row['snapshot_path']
+            for row in conn.execute("SELECT result_key, snapshot_path FROM results")
+        }
+        shared_results = len(snapshot_paths)
+        oldest = conn.execute(
+            "SELECT created_at, expires_at FROM sessions "
+            "ORDER BY created_at LIMIT 1").fetchone()
+        newest = conn.execute(
+            "SELECT created_at, expires_at FROM sessions "
+            "ORDER BY created_at DESC LIMIT 1").fetchone()
+
+        with self.lock:
+            resident = sum(
+                1 for local in self._local.values()
+                if local['prefectures'] is not None)
+            resident_bytes = sum(
+                local['index'].nbytes + (
+                    local['result_bytes'] if local['prefectures'] is not None else 0)
+                for local in self._local.values())
+            # このワーカーのメモリにない結果（ファイルのみ）
+            spilled_paths = [
+                path for key, path in snapshot_paths.items()
+                if self._local.get(key, {}).get('prefectures') is None]
+
+        # スナップショットファイルのディスク上のサイズ
+        spilled_bytes = 0
+        for path in spilled_paths:
+            try:
+                spilled_bytes += os.path.getsize(path)
+            except OSError:
+                continue
+
+        def _period(row):
+            if row is None:
+                return None
+            return {
+                'created_at': _iso(row['created_at']),
+                'expires_at': _iso(row['expires_at'])
+            }
+
+        return {
+            'total_sessions': total,
+            'oldest_session': _period(oldest),
+            'newest_session': _period(newest),
+            'backend': 'sqlite',
+            'db_path': self.db_path,
+            'shared_results': shared_results,
+            'resident_results': resident,
+            'spilled_results': shared_results - resident,
+            'resident_bytes': resident_bytes,
+            'spilled_bytes': spilled_bytes,
+            'max_resident_bytes': self.max_resident_bytes,
+            'reload_count': self.reload_count,
+            'reclaimed_bytes': self.reclaimed_bytes,
+            'janitor_running': bool(
+                self._janitor_thread and self._janitor_thread.is_alive())
+        }
+
+
+class _Transaction:
+    """BEGIN ～ COMMIT/ROLLBACK のコンテキストマネージャー"""
+
+    def __init__(self, conn: sqlite3.Connection, begin: str):
+        self.conn = conn
+        self.begin = begin
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn.execute(self.begin)
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.conn.execute("COMMIT")
+        else:
+            self.conn.execute("ROLLBACK")
+        return False
@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+"""
+全国規模の合成メッシュデータ
+
+既存の府県CSV（dosha_*.csv / dosyakei_*.csv）を雛形に、全47都道府県分の
+dosha / dosyakei CSV と府県マニフェスト（prefectures.yaml）を作成する。
+雛形の府県をグリッド上で重ならない位置へ平行移動して複製し、メッシュコードを
+振り直す（市町村・二次細分名は複製ごとに "_2", "_3" ... を付ける）。
+配置先は GRIB2 の格子に収まる日本付近の範囲（北緯31〜45度、東経129〜145度）。
+
+作成したディレクトリを data_dir としてパイプライン全体を実行し、
+処理時間・ピークメモリを計測して設定の予算（scale_budget）と比較する。
+
+使い方:
+    python -m services.synthetic_data generate --out-dir /tmp/nationwide --scale 15
+    python -m services.synthetic_data measure --data-dir /tmp/nationwide \\
+        --swi-file data/<SWI GRIB2> --guidance-file data/<ガイダンス GRIB2>
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+import yaml
+
+from models import PREFECTURE_NAMES
+from .data_service import DataService
+from .instrumentation import peak_rss_bytes
+from .prefecture_registry import MANIFEST_FILENAME, discover_prefectures
+
+logger = logging.getLogger(__name__)
+
+# 複製の配置範囲（グリッドインデックス、y: 北緯31〜45度、x: 東経129〜145度）
+GRID_Y_RANGE = (3720, 5400)
+GRID_X_RANGE = (2320, 3600)
+# 複製どうしの間隔（メッシュ）
+COPY_MARGIN = 2
+
+DOSHA_HEADER = ["市町村等をまとめた地域", "市町村等", "地域メッシュコード（１km格子対応）",
+                "注意報基準", "警報基準"]
+DOSHA_TITLE = "（合成データ）大雨警報・注意報の土壌雨量指数基準値"
+
+
+def load_template(source_dir: str, code: str) -> Optional[Dict[str, Any]]:
+    """
+    雛形府県のCSV読み込み（値は文字列のまま保持）
+
+    Returns:
+        {"dosha", "dosyakei", "x", "y"}、dosha CSV がない場合None
+    """
+    dosha_file = os.path.join(source_dir, f"dosha_{code}.csv")
+    if not os.path.exists(dosha_file):
+        return None
+    dosha = pd.read_csv(dosha_file, encoding='shift_jis', skiprows=1,
+                        dtype=str, keep_default_na=False).iloc[:, :5]
+    dosha.columns = DOSHA_HEADER
+
+    dosyakei = None
+    dosyakei_file = os.path.join(source_dir, f"dosyakei_{code}.csv")
+    if os.path.exists(dosyakei_file):
+        dosyakei = pd.read_csv(dosyakei_file, encoding='shift_jis',
+                               usecols=["GRIDNO", "LEVEL3_00"],
+                               dtype=str, keep_default_na=False)
+
+    x, y, _, _ = DataService.parse_meshcodes(dosha.iloc[:, 2].to_numpy())
+    return {"dosha": dosha, "dosyakei": dosyakei, "x": x, "y": y}
+
+
+class ShelfPacker:
+    """雛形の外接矩形を配置範囲へ行（棚）単位で左から詰めて並べる"""
+
+    def __init__(self, x_range: Tuple[int, int] = GRID_X_RANGE,
+                 y_range: Tuple[int, int] = GRID_Y_RANGE, margin: int = COPY_MARGIN):
+        self.x_range = x_range
+        self.y_range = y_range
+        self.margin = margin
+        self.x = x_range[0]
+        self.y = y_range[0]
+        self.shelf_height = 0
+
+    def place(self, width: int, height: int) -> Tuple[int, int]:
+        """幅・高さの矩形の配置先（左下の x, y）"""
+        if self.x + width > self.x_range[1]:
+            self.x = self.x_range[0]
+            self.y += self.shelf_height + self.margin
+            self.shelf_height = 0
+        if self.y + height > self.y_range[1] or self.x + width > self.x_range[1]:
+            raise ValueError("合成メッシュが配置範囲に収まりません（scale を小さくしてください）")
+        position = (self.x, self.y)
+        self.x += width + self.margin
+        self.shelf_height = max(self.shelf_height, height)
+        return position
+
+
+def _copy_name(name: str, copy_index: int) -> str:
+    return name if copy_index == 0 else f"{name}_{copy_index + 1}"
+
+
+def synthesize_prefecture(template: Dict[str, Any], mesh_count: int,
+                          packer: ShelfPacker) -> Tuple[pd.DataFrame, Optional[pd.DataFrame]]:
+    """
+    雛形を平行移動・複製して mesh_count メッシュの府県を作成
+
+    Returns:
+        (dosha 行, dosyakei 行)
+    """
+    x, y = template["x"], template["y"]
+    source_codes = template["dosha"].iloc[:, 2].to_numpy(copy=True)
+    width = int(x.max() - x.min()) + 1
+    height = int(y.max() - y.min()) + 1
+    copies = max(1, math.ceil(mesh_count / len(template["dosha"])))
+
+    dosha_parts = []
+    dosyakei_parts = []
+    for copy_index in range(copies):
+        origin_x, origin_y = packer.place(width, height)
+        codes = DataService.index_to_meshcode(x - x.min() + origin_x, y - y.min() + origin_y)
+
+        dosha = template["dosha"].copy()
+        dosha.iloc[:, 0] = [_copy_name(name, copy_index) for name in dosha.iloc[:, 0]]
+        dosha.iloc[:, 1] = [_copy_name(name, copy_index) for name in dosha.iloc[:, 1]]
+        dosha.iloc[:, 2] = codes
+        dosha_parts.append(dosha)
+
+        if template["dosyakei"] is not None:
+            # 元コード → 新コードの対応で土砂災害基準を移す
+            code_map = pd.Series(codes, index=source_codes)
+            code_map = code_map[~code_map.index.duplicated()]
+            dosyakei = template["dosyakei"]
+            dosyakei = dosyakei[dosyakei["GRIDNO"].isin(code_map.index)]
+            dosyakei_parts.append(pd.DataFrame({
+                "GRIDNO": code_map.reindex(dosyakei["GRIDNO"]).to_numpy(),
+                "LEVEL3_00": dosyakei["LEVEL3_00"].to_numpy()
+            }))
+
+    dosha = pd.concat(dosha_parts, ignore_index=True).iloc[:mesh_count]
+    dosyakei = None
+    if dosyakei_parts:
+        dosyakei = pd.concat(dosyakei_parts, ignore_index=True)
+        dosyakei = dosyakei[dosyakei["GRIDNO"].isin(dosha.iloc[:, 2])]
+    return dosha, dosyakei
+
+
+def generate(source_dir: str, out_dir: str, scale: float = 15.0,
+             prefecture_codes: Optional[List[str]] = None) -> Dict[str, int]:
+    """
+    合成データ作成
+
+    雛形（source_dir の府県）の総メッシュ数 × scale を対象府県に均等に割り当て、
+    雛形を順番に使って各府県を作成する。
+
+    Args:
+        source_dir: 雛形CSVのあるディレクトリ
+        out_dir: 出力先
+        scale: 雛形に対するメッシュ数の倍率
+        prefecture_codes: 作成する府県（省略時は全47都道府県）
+
+    Returns:
+        {府県コード: メッシュ数}
+    """
+    templates = {}
+    for code in discover_prefectures(source_dir):
+        template = load_template(source_dir, code)
+        if template is not None:
+            templates[code] = template
+    if not templates:
+        raise ValueError(f"雛形の dosha CSV がありません: {source_dir}")
+
+    if prefecture_codes is None:
+        prefecture_codes = list(PREFECTURE_NAMES.keys())
+    total = int(sum(len(t["dosha"]) for t in templates.values()) * scale)
+    per_prefecture = max(1, total // len(prefecture_codes))
+
+    os.makedirs(out_dir, exist_ok=True)
+    packer = ShelfPacker()
+    template_list = list(templates.values())
+    counts = {}
+    for i, code in enumerate(prefecture_codes):
+        dosha, dosyakei = synthesize_prefecture(
+            template_list[i % len(template_list)], per_prefecture, packer)
+
+        with open(os.path.join(out_dir, f"dosha_{code}.csv"), 'w',
+                  encoding='shift_jis', newline='') as f:
+            f.write(f"{DOSHA_TITLE}\r\n")
+            dosha.to_csv(f, index=False, lineterminator='\r\n')
+        if dosyakei is not None:
+            dosyakei.to_csv(os.path.join(out_dir, f"dosyakei_{code}.csv"), index=False,
+                            encoding='shift_jis', lineterminator='\r\n')
+        counts[code] = len(dosha)
+
+    with open(os.path.join(out_dir, MANIFEST_FILENAME), 'w', encoding='utf-8') as f:
+        yaml.safe_dump({"prefectures": [
+            {"code": code, "name": PREFECTURE_NAMES.get(code, code)} for code in prefecture_codes
+        ]}, f, allow_unicode=True, sort_keys=False)
+
+    logger.info(f"合成データ作成完了: {out_dir} ({len(counts)}府県, "
+                f"{sum(counts.values())}メッシュ)")
+    return counts
+
+
+def peak_rss_mb() -> Optional[float]:
+    """プロセスのピーク常駐メモリ（MB）、取得できない環境ではNone"""
+    peak = peak_rss_bytes()
+    return None if peak is None else peak / 1024 / 1024
+
+
+def measure(data_dir: str, swi_file: str, guidance_file: str) -> Dict[str, Any]:
+    """
+    パイプライン全体（GRIB2解析〜計算結果JSON作成）の処理時間・ピークメモリ計測
+
+    Returns:
+        {"prefectures", "meshes", "seconds", "meshes_per_second", "peak_rss_mb"}
+    """
+    from .main_service import MainService
+
+    main_service = MainService(data_dir)
+    start_time = time.time()
+    result = main_service.main_process_from_files(swi_file, guidance_file)
+    seconds = time.time() - start_time
+
+    if result.get("status") != "success":
+        raise RuntimeError(f"パイプライン実行エラー: {result.get('error')}")
+    meshes = sum(len(area["meshes"])
+                 for prefecture in result["prefectures"].values()
+                 for area in prefecture["areas"])
+    return {
+        "prefectures": len(result["prefectures"]),
+        "meshes": meshes,
+        "seconds": round(seconds, 2),
+        "meshes_per_second": round(meshes / seconds, 1) if seconds > 0 else None,
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+
+def check_budget(report: Dict[str, Any], budget: Dict[str, Any]) -> List[str]:
+    """
+    計測結果と予算（scale_budget）の比較
+
+    Returns:
+        超過した項目の説明（予算内なら空）
+    """
+    violations = []
+    max_seconds = budget.get("max_seconds")
+    if max_seconds is not None and report["seconds"] > max_seconds:
+        violations.append(f"処理時間 {report['seconds']}秒 > 予算 {max_seconds}秒")
+    max_rss = budget.get("max_peak_rss_mb")
+    if (max_rss is not None and report["peak_rss_mb"] is not None
+            and report["peak_rss_mb"] > max_rss):
+        violations.append(f"ピークメモリ {report['peak_rss_mb']:.0f}MB > 予算 {max_rss}MB")
+    return violations
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="全国規模の合成メッシュデータ作成・性能計測")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    generate_parser = subparsers.add_parser("generate", help="合成データ作成")
+    generate_parser.add_argument("--source-dir", default="data", help="雛形CSVのあるディレクトリ")
+    generate_parser.add_argument("--out-dir", required=True, help="出力先ディレクトリ")
+    generate_parser.add_argument("--scale", type=float, default=15.0,
+                                 help="雛形に対するメッシュ数の倍率")
+    generate_parser.add_argument("--prefectures", nargs="+",
+                                 help="作成する府県コード（省略時は全47都道府県）")
+
+    measure_parser = subparsers.add_parser("measure", help="パイプライン全体の性能計測")
+    measure_parser.add_argument("--data-dir", required=True, help="CSVのあるディレクトリ")
+    measure_parser.add_argument("--swi-file", required=True, help="SWI GRIB2 ファイル")
+    measure_parser.add_argument("--guidance-file", required=True, help="ガイダンス GRIB2 ファイル")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "generate":
+        counts = generate(args.source_dir, args.out_dir, args.scale, args.prefectures)
+        print(f"{args.out_dir}: {len(counts)} prefectures, {sum(counts.values())} meshes")
+        return 0
+
+    from src.config.config_service import ConfigService
+
+    report = measure(args.data_dir, args.swi_file, args.guidance_file)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    violations = check_budget(report, ConfigService().get("scale_budget", {}) or {})
+    for violation in violations:
+        print(f"予算超過: {violation}")
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
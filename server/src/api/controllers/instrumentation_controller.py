@@ -0,0 +1,89 @@
+"""
+処理段階計測コントローラ
+
+機能:
+- リクエストごとのトレース開始・終了（Server-Timing ヘッダー、?debug=1 で debug フィールド）
+- SOIL_RAINFALL_PROFILE 設定時、?profile=1 のリクエストに cProfile / tracemalloc を取り付け
+- ルート別のリクエスト処理時間の記録（/metrics 用）
+- プロセス全体の段階別統計（p50 / p95 / p99）取得・リセット
+"""
+
+from flask import g, jsonify, request
+import json
+import logging
+
+from services.instrumentation import (
+    RequestProfiler, end_trace, get_request_stats, get_stage_stats, profile_modes,
+    start_trace
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _flag(name: str) -> bool:
+    return request.args.get(name, '').lower() in ('1', 'true', 'yes')
+
+
+def start_request():
+    """リクエスト開始時: トレース開始・プロファイラー取り付け"""
+    start_trace()
+    g.request_profiler = None
+    if _flag('profile'):
+        modes = profile_modes()
+        if modes:
+            profiler = RequestProfiler(modes)
+            if profiler.start():
+                g.request_profiler = profiler
+            else:
+                logger.info("Profiler busy, skipping profile for this request")
+
+
+def finish_request(response):
+    """リクエスト終了時: 計測結果をヘッダー・debug フィールドに付与"""
+    trace = end_trace()
+    profiler = g.pop('request_profiler', None)
+    if profiler is not None:
+        paths = profiler.stop(request.endpoint or request.path)
+        if paths:
+            response.headers['X-Profile-Output'] = ", ".join(paths)
+
+    if trace is None:
+        return response
+    # 未定義パス（404）はルートを丸めてラベルの増加を防ぐ
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    get_request_stats().record((request.method, route, str(response.status_code)),
+                               trace.total_ms / 1000)
+    response.headers['Server-Timing'] = trace.server_timing()
+
+    if _flag('debug') and response.is_json and not response.direct_passthrough:
+        try:
+            data = response.get_json()
+            if isinstance(data, dict):
+                data["debug"] = {"timings": trace.as_dict()}
+                response.set_data(json.dumps(data, ensure_ascii=False))
+        except Exception as e:
+            logger.warning(f"Failed to attach debug timings: {e}")
+    return response
+
+
+def get_performance_stages():
+    """段階別統計取得（直近の計測のパーセンタイル）"""
+    try:
+        return jsonify({
+            "status": "success",
+            "window": get_stage_stats().window,
+            "stages": get_stage_stats().summary()
+        }), 200
+
+    except Exception as e:
+        logger.error(f"段階別統計取得エラー: {e}")
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
+
+def reset_performance_stages():
+    """段階別統計リセット"""
+    get_stage_stats().reset()
+    return jsonify({"status": "success"}), 200
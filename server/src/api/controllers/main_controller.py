@@ -14,6 +14,8 @@ sys.path.append(project_root)
 
 from services.main_service import MainService
 from services.cache_service import get_cache_service
+from services.instrumentation import span
+from services.rainfall_recompute_service import decode_initial_tanks
 from src.config.config_service import ConfigService
 
 
@@ -132,7 +134,9 @@ class MainController:
             result = self.main_service.main_process_from_urls(initial_time)
             result["status"] = "success"
             
-            return jsonify(result)
+            with span("serialize.json"):
+                response = jsonify(result)
+            return response
             
         except Exception as e:
             logger.error(f"メイン処理エラー: {e}")
@@ -180,7 +184,9 @@ class MainController:
                 "guidance_url": guidance_url
             }
             
-            return jsonify(result)
+            with span("serialize.json"):
+                response = jsonify(result)
+            return response
             
         except Exception as e:
             logger.error(f"本番テスト処理エラー: {e}")
@@ -259,29 +265,43 @@ class MainController:
             if cache_exists:
                 cache_metadata = self.cache_service.get_metadata(cache_key)
 
-            # メイン処理実行（個別URLを使用、use_cache=True でキャッシュ有効）
-            result = self.main_service.main_process_from_separate_urls(
-                swi_url, guidance_url, use_cache=True)
-
-            # セッションサービスが有効な場合、セッション作成して軽量レスポンスを返す
+            # 同じ予測の計算結果を他のセッションが保持していれば共有する
+            # （計算・キャッシュ読み込みを行わない）
+            session_id = None
+            shared_result = False
             if self.session_service:
-                # セッション作成
-                session_id = self.session_service.create_session(
-                    result['prefectures'],
+                session_id = self.session_service.create_session_for_result(
+                    cache_key,
                     swi_initial.isoformat(),
                     guidance_initial.isoformat(),
                     datetime.now().isoformat()
                 )
+                shared_result = session_id is not None
+
+            result = None
+            if session_id is None:
+                # メイン処理実行（個別URLを使用、use_cache=True でキャッシュ有効）
+                result = self.main_service.main_process_from_separate_urls(
+                    swi_url, guidance_url, use_cache=True)
+
+            # セッションサービスが有効な場合、セッション作成して軽量レスポンスを返す
+            if self.session_service:
+                if session_id is None:
+                    # セッション作成（キャッシュキー単位で計算結果を共有）
+                    with span("session.create"):
+                        session_id = self.session_service.create_session(
+                            result['prefectures'],
+                            swi_initial.isoformat(),
+                            guidance_initial.isoformat(),
+                            datetime.now().isoformat(),
+                            result_key=cache_key,
+                            initial_tanks=decode_initial_tanks(
+                                result.get('initial_tanks'))
+                        )
 
-                # 利用可能な時刻を抽出（最初のメッシュから）
-                available_times = []
-                first_pref = next(iter(result['prefectures'].values()))
-                if first_pref['areas'] and first_pref['areas'][0]['meshes']:
-                    first_mesh = first_pref['areas'][0]['meshes'][0]
-                    available_times = sorted(set(
-                        [point['ft'] for point in first_mesh['risk_3hour_max_timeline']] +
-                        [point['ft'] for point in first_mesh['risk_hourly_timeline']]
-                    ))
+                # 利用可能な時刻（リスク時系列のFT）
+                available_times = self.session_service.get_available_times(
+                    session_id) or []
 
                 # 軽量レスポンスを返す
                 return jsonify({
@@ -289,8 +309,10 @@ class MainController:
                     "session_id": session_id,
                     "swi_initial_time": swi_initial.isoformat(),
                     "guidance_initial_time": guidance_initial.isoformat(),
-                    "available_prefectures": list(result['prefectures'].keys()),
+                    "available_prefectures":
+                        self.session_service.get_prefecture_codes(session_id) or [],
                     "available_times": available_times,
+                    "shared_result": shared_result,
                     "cache_info": {
                         "cache_key": cache_key,
                         "cache_hit": cache_exists,
@@ -321,7 +343,9 @@ class MainController:
                 "cache_metadata": cache_metadata
             }
 
-            return jsonify(result)
+            with span("serialize.json"):
+                response = jsonify(result)
+            return response
 
         except Exception as e:
             logger.error(f"本番テスト処理エラー: {e}")
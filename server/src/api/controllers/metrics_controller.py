@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""
+メトリクスAPIコントローラー（Prometheus テキスト形式）
+"""
+from flask import Response
+import logging
+import os
+import sys
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(project_root)
+
+from services.metrics_service import CONTENT_TYPE, MetricsService
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsController:
+    """メトリクスAPIコントローラー"""
+
+    def __init__(self, metrics_service: MetricsService):
+        self.metrics_service = metrics_service
+
+    def get_metrics(self):
+        """
+        メトリクス取得
+
+        GET /metrics
+        """
+        try:
+            return Response(self.metrics_service.render(), status=200, content_type=CONTENT_TYPE)
+
+        except Exception as e:
+            logger.error(f"Metrics rendering error: {e}")
+            return Response(f"# metrics unavailable: {e}\n", status=500,
+                            content_type=CONTENT_TYPE)
@@ -14,6 +14,7 @@ project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(_
 sys.path.append(project_root)
 
 from services.main_service import MainService
+from services.mesh_catalog import get_mesh_catalog_registry
 
 
 logger = logging.getLogger(__name__)
@@ -191,15 +192,15 @@ class PerformanceController:
     def test_csv_optimization(self):
         """CSV最適化効果の比較"""
         try:
-            # データサービスのキャッシュを使用した最適化効果を測定
+            # 共有メッシュカタログを使用した最適化効果を測定
             
-            # 1回目（キャッシュなし）
-            self.main_service.data_service.cache = {}  # キャッシュクリア
+            # 1回目（共有カタログなし: カタログファイル読み込み）
+            get_mesh_catalog_registry().clear()  # 共有カタログ破棄
             start_time = time.time()
             prefectures1 = self.main_service.data_service.prepare_areas()
             duration1 = time.time() - start_time
             
-            # 2回目（キャッシュあり）
+            # 2回目（共有カタログあり）
             start_time = time.time()
             prefectures2 = self.main_service.data_service.prepare_areas()
             duration2 = time.time() - start_time
@@ -18,6 +18,7 @@ from services.grib2_service import Grib2Service
 from services.data_service import DataService
 from services.calculation_service import CalculationService
 from services.cache_service import get_cache_service
+from services.instrumentation import span
 
 
 logger = logging.getLogger(__name__)
@@ -39,6 +40,9 @@ class RainfallController:
         """
         市町村ごとの雨量予想時系列を取得
 
+        同じ初期時刻の計算結果がキャッシュ済みであれば、計算時に保存した
+        集約をそのまま返す。キャッシュがない場合のみGRIB2から計算する。
+
         Query Parameters:
             swi_initial: SWI初期時刻（ISO8601形式）
             guidance_initial: ガイダンス初期時刻（ISO8601形式）
@@ -90,6 +94,17 @@ class RainfallController:
 
             logger.info(f"雨量予想取得: SWI={swi_initial}, ガイダンス={guidance_initial}")
 
+            # 計算結果と一緒に保存された集約があればそのまま返す（再計算しない）
+            aggregates = self._get_cached_rainfall_aggregates(swi_initial, guidance_initial)
+            if aggregates is not None:
+                return jsonify({
+                    "status": "success",
+                    "swi_initial_time": swi_initial.isoformat(),
+                    "guidance_initial_time": guidance_initial.isoformat(),
+                    "area_rainfall": aggregates["area_rainfall"],
+                    "subdivision_rainfall": aggregates["subdivision_rainfall"]
+                })
+
             # テストデータ判定（2023-06-02はテストデータ）
             is_test_data = (
                 swi_initial.year == 2023 and
@@ -133,11 +148,13 @@ class RainfallController:
                 logger.info(f"Guidance URL: {guidance_url}")
 
                 # データダウンロード
-                swi_data_bytes = self.grib2_service.download_file(swi_url)
+                with span("download.swi"):
+                    swi_data_bytes = self.grib2_service.download_file(swi_url)
                 if not swi_data_bytes:
                     raise Exception(f"SWIファイルダウンロード失敗: {swi_url}")
 
-                guidance_data_bytes = self.grib2_service.download_file(guidance_url)
+                with span("download.guidance"):
+                    guidance_data_bytes = self.grib2_service.download_file(guidance_url)
                 if not guidance_data_bytes:
                     raise Exception(f"ガイダンスファイルダウンロード失敗: {guidance_url}")
 
@@ -154,12 +171,13 @@ class RainfallController:
             prefectures = self.data_service.prepare_areas()
 
             # メッシュ計算（雨量データの取得のため）
-            for prefecture in prefectures:
-                for area in prefecture.areas:
-                    for i, mesh in enumerate(area.meshes):
-                        area.meshes[i] = self.calculation_service.process_mesh_calculations(
-                            mesh, swi_grib2, guidance_grib2
-                        )
+            with span("calc.mesh"):
+                for prefecture in prefectures:
+                    for area in prefecture.areas:
+                        for i, mesh in enumerate(area.meshes):
+                            area.meshes[i] = self.calculation_service.process_mesh_calculations(
+                                mesh, swi_grib2, guidance_grib2
+                            )
 
             # 市町村別雨量時系列を抽出
             area_rainfall = self.rainfall_service.extract_area_rainfall_timeseries(
@@ -186,6 +204,39 @@ class RainfallController:
                 "message": str(e)
             }), 500
 
+    def _get_cached_rainfall_aggregates(self, swi_initial: datetime,
+                                        guidance_initial: datetime):
+        """
+        キャッシュ済み計算結果の雨量集約を取得
+
+        集約ファイルがなく計算結果のキャッシュのみ存在する場合（集約導入前の
+        キャッシュ）は、結果JSONから集約を計算して集約ファイルを追加する。
+
+        Returns:
+            {"area_rainfall": {...}, "subdivision_rainfall": {...}}、キャッシュがなければNone
+        """
+        cache_key = self.cache_service.generate_cache_key(
+            swi_initial.isoformat(), guidance_initial.isoformat())
+
+        aggregates = self.cache_service.get_rainfall_aggregates(cache_key)
+        if aggregates is not None:
+            logger.info(f"雨量集約キャッシュヒット: {cache_key}")
+            return aggregates
+
+        if not self.cache_service.exists(cache_key):
+            return None
+
+        cached_result = self.cache_service.get_cached_result(cache_key)
+        if not cached_result or 'prefectures' not in cached_result:
+            return None
+
+        aggregates = cached_result.get('rainfall_aggregates')
+        if aggregates is None:
+            aggregates = self.rainfall_service.calc_group_rainfall_from_result(
+                cached_result['prefectures'])
+        self.cache_service.set_rainfall_aggregates(cache_key, aggregates)
+        return aggregates
+
     def calculate_with_adjusted_rainfall(self):
         """
         調整後雨量でSWI・危険度を再計算
@@ -303,11 +354,13 @@ class RainfallController:
                 logger.info(f"Guidance URL: {guidance_url}")
 
                 # データダウンロード
-                swi_data_bytes = self.grib2_service.download_file(swi_url)
+                with span("download.swi"):
+                    swi_data_bytes = self.grib2_service.download_file(swi_url)
                 if not swi_data_bytes:
                     raise Exception(f"SWIファイルダウンロード失敗: {swi_url}")
 
-                guidance_data_bytes = self.grib2_service.download_file(guidance_url)
+                with span("download.guidance"):
+                    guidance_data_bytes = self.grib2_service.download_file(guidance_url)
                 if not guidance_data_bytes:
                     raise Exception(f"ガイダンスファイルダウンロード失敗: {guidance_url}")
 
@@ -356,14 +409,15 @@ class RainfallController:
 
             # 調整対象メッシュのみ計算（元の雨量データ）
             calculated_count = 0
-            for prefecture in prefectures:
-                for area in prefecture.areas:
-                    for i, mesh in enumerate(area.meshes):
-                        if mesh.code in adjusted_mesh_codes:
-                            area.meshes[i] = self.calculation_service.process_mesh_calculations(
-                                mesh, swi_grib2, guidance_grib2
-                            )
-                            calculated_count += 1
+            with span("calc.mesh"):
+                for prefecture in prefectures:
+                    for area in prefecture.areas:
+                        for i, mesh in enumerate(area.meshes):
+                            if mesh.code in adjusted_mesh_codes:
+                                area.meshes[i] = self.calculation_service.process_mesh_calculations(
+                                    mesh, swi_grib2, guidance_grib2
+                                )
+                                calculated_count += 1
 
             logger.info(f"初期計算完了: {calculated_count}メッシュ")
 
@@ -2,18 +2,21 @@
 """
 セッション管理APIコントローラー
 """
-from flask import jsonify, request
+from flask import jsonify, request, Response
 from datetime import datetime
 from dataclasses import asdict
 import logging
+import math
 import os
 import sys
+import time
 
 # プロジェクトルートをパスに追加
 project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 sys.path.append(project_root)
 
 from services.session_service import SessionService
+from services.rainfall_recompute_service import RainfallRecomputeService
 
 logger = logging.getLogger(__name__)
 
@@ -21,8 +24,13 @@ logger = logging.getLogger(__name__)
 class SessionController:
     """セッション管理APIコントローラー"""
 
-    def __init__(self, session_service: SessionService):
+    def __init__(
+        self,
+        session_service: SessionService,
+        recompute_service: RainfallRecomputeService = None
+    ):
         self.session_service = session_service
+        self.recompute_service = recompute_service or RainfallRecomputeService()
 
     def get_session_info(self, session_id: str):
         """
@@ -73,12 +81,13 @@ class SessionController:
                     "prefecture_code": prefecture_code
                 }), 404
 
-            # Prefectureオブジェクトを辞書に変換
-            prefecture_dict = asdict(prefecture)
+            # セッションは計算結果の辞書を保持（Prefectureオブジェクトの場合のみ変換）
+            if not isinstance(prefecture, dict):
+                prefecture = asdict(prefecture)
 
             return jsonify({
                 "status": "success",
-                "prefecture": prefecture_dict
+                "prefecture": prefecture
             })
 
         except Exception as e:
@@ -93,7 +102,13 @@ class SessionController:
         """
         指定時刻の全メッシュリスク値取得
 
-        GET /api/session/<session_id>/risk-at-time?ft=<ft>
+        GET /api/session/<session_id>/risk-at-time?ft=<ft>[&format=binary|array]
+
+        format:
+            (省略)  {"mesh_risks": {mesh_code: risk}}（従来形式）
+            binary  application/octet-stream、mesh-order 順の uint8 ベクトル
+            array   {"risks": [risk, ...]}、mesh-order 順
+        binary / array は事前計算済みベクトルを返し、ETag による条件付き取得に対応
         """
         try:
             ft = request.args.get('ft', type=int)
@@ -103,30 +118,42 @@ class SessionController:
                     "error": "Parameter 'ft' is required"
                 }), 400
 
-            session = self.session_service.get_session(session_id)
-            if session is None:
+            response_format = request.args.get('format')
+            if response_format in ('binary', 'array'):
+                snapshot = self.session_service.get_risk_snapshot(session_id, ft)
+                if snapshot is None:
+                    return jsonify({
+                        "status": "error",
+                        "error": "Session not found or expired",
+                        "session_id": session_id
+                    }), 404
+
+                data, etag = snapshot
+                if response_format == 'binary':
+                    response = Response(data, mimetype='application/octet-stream')
+                    response.headers['X-Mesh-Count'] = str(len(data))
+                else:
+                    response = jsonify({
+                        "status": "success",
+                        "ft": ft,
+                        "risks": list(data)
+                    })
+                    etag = f"{etag}-a"
+
+                response.headers['X-FT'] = str(ft)
+                response.headers['Cache-Control'] = 'private, no-cache'
+                response.set_etag(etag)
+                return response.make_conditional(request)
+
+            # セッション作成時に構築したリスク配列の列を参照
+            mesh_risks = self.session_service.get_risk_at_time(session_id, ft)
+            if mesh_risks is None:
                 return jsonify({
                     "status": "error",
                     "error": "Session not found or expired",
                     "session_id": session_id
                 }), 404
 
-            # 全府県の全メッシュからリスク値を抽出
-            mesh_risks = {}
-            prefectures = session['prefectures']
-
-            for pref_code, prefecture in prefectures.items():
-                for area in prefecture.areas:
-                    for mesh in area.meshes:
-                        # 指定されたFTのリスク値を取得
-                        risk_value = 0
-                        for risk_point in mesh.risk_3hour_max_timeline:
-                            if risk_point.ft == ft:
-                                risk_value = risk_point.value
-                                break
-
-                        mesh_risks[mesh.code] = risk_value
-
             return jsonify({
                 "status": "success",
                 "ft": ft,
@@ -141,6 +168,39 @@ class SessionController:
                 "timestamp": datetime.now().isoformat()
             }), 500
 
+    def get_mesh_order(self, session_id: str):
+        """
+        リスクベクトルのメッシュ順取得
+
+        GET /api/session/<session_id>/mesh-order
+        """
+        try:
+            mesh_order = self.session_service.get_mesh_order(session_id)
+            if mesh_order is None:
+                return jsonify({
+                    "status": "error",
+                    "error": "Session not found or expired",
+                    "session_id": session_id
+                }), 404
+
+            response = jsonify({
+                "status": "success",
+                "mesh_count": len(mesh_order['mesh_codes']),
+                "mesh_codes": mesh_order['mesh_codes'],
+                "risk_fts": mesh_order['risk_fts']
+            })
+            response.headers['Cache-Control'] = 'private, no-cache'
+            response.set_etag(mesh_order['etag'])
+            return response.make_conditional(request)
+
+        except Exception as e:
+            logger.error(f"Mesh order error: {e}")
+            return jsonify({
+                "status": "error",
+                "error": str(e),
+                "timestamp": datetime.now().isoformat()
+            }), 500
+
     def get_mesh_detail(self, session_id: str, mesh_code: str):
         """
         メッシュ詳細データ取得
@@ -148,28 +208,15 @@ class SessionController:
         GET /api/session/<session_id>/mesh/<mesh_code>
         """
         try:
-            session = self.session_service.get_session(session_id)
-            if session is None:
+            if not self.session_service.has_session(session_id):
                 return jsonify({
                     "status": "error",
                     "error": "Session not found or expired",
                     "session_id": session_id
                 }), 404
 
-            # 全府県からメッシュを検索
-            prefectures = session['prefectures']
-            target_mesh = None
-
-            for pref_code, prefecture in prefectures.items():
-                for area in prefecture.areas:
-                    for mesh in area.meshes:
-                        if mesh.code == mesh_code:
-                            target_mesh = mesh
-                            break
-                    if target_mesh:
-                        break
-                if target_mesh:
-                    break
+            # メッシュコードインデックスで直接参照
+            target_mesh = self.session_service.get_mesh(session_id, mesh_code)
 
             if target_mesh is None:
                 return jsonify({
@@ -178,12 +225,9 @@ class SessionController:
                     "mesh_code": mesh_code
                 }), 404
 
-            # Meshオブジェクトを辞書に変換
-            mesh_dict = asdict(target_mesh)
-
             return jsonify({
                 "status": "success",
-                "mesh": mesh_dict
+                "mesh": target_mesh
             })
 
         except Exception as e:
@@ -194,6 +238,267 @@ class SessionController:
                 "timestamp": datetime.now().isoformat()
             }), 500
 
+    @staticmethod
+    def _parse_number(value, name: str) -> float:
+        """雨量・倍率の値を float に変換（数値以外・非有限値は ValueError）"""
+        if isinstance(value, bool):
+            raise ValueError(f"Invalid number at {name}: {value!r}")
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid number at {name}: {value!r}")
+        if not math.isfinite(number):
+            raise ValueError(f"Invalid number at {name}: {value!r}")
+        return number
+
+    @classmethod
+    def _parse_ft_values(cls, values, name: str) -> dict:
+        """{ft: 値} を {int: float} に変換（不正なFT・値は ValueError）"""
+        if not isinstance(values, dict):
+            raise ValueError(f"{name} must be an object of {{ft: value}}")
+        parsed = {}
+        for ft, value in values.items():
+            try:
+                ft_value = int(ft)
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid FT at {name}: {ft!r}")
+            parsed[ft_value] = cls._parse_number(value, f"{name}.{ft}")
+        return parsed
+
+    @classmethod
+    def _parse_adjustments(cls, data: dict) -> dict:
+        """
+        リクエストの調整後雨量を {キー: {ft: 値}} に変換（二次細分 → 市町村の順に適用）
+
+        Raises:
+            ValueError: 形式・FT・値が不正（メッセージに該当キーを含む）
+        """
+        adjustments = {}
+        for key in ('subdivision_adjustments', 'area_adjustments'):
+            groups = data.get(key) or {}
+            if not isinstance(groups, dict):
+                raise ValueError(f"{key} must be an object")
+            for group_key, values in groups.items():
+                adjustments[group_key] = cls._parse_ft_values(values, f"{key}.{group_key}")
+        return adjustments
+
+    @classmethod
+    def _parse_scale(cls, scale, name: str) -> dict:
+        """
+        シナリオの倍率指定を検証（{キー: 倍率} または {キー: {ft: 倍率}}）
+
+        Raises:
+            ValueError: 形式・FT・値が不正（メッセージに該当キーを含む）
+        """
+        if not isinstance(scale, dict):
+            raise ValueError(f"{name} must be an object")
+        return {
+            key: (cls._parse_ft_values(factor, f"{name}.{key}") if isinstance(factor, dict)
+                  else cls._parse_number(factor, f"{name}.{key}"))
+            for key, factor in scale.items()
+        }
+
+    @classmethod
+    def _parse_scenarios(cls, scenarios: list) -> list:
+        """
+        シナリオ一覧を [(名前, 倍率指定, 調整後雨量)] に変換
+
+        Raises:
+            ValueError: 形式・FT・値が不正（メッセージに該当キーを含む）
+        """
+        parsed = []
+        for i, scenario in enumerate(scenarios):
+            name = f"scenarios[{i}]"
+            if not isinstance(scenario, dict):
+                raise ValueError(f"{name} must be an object")
+            parsed.append((
+                scenario.get('name', f"scenario_{i + 1}"),
+                cls._parse_scale(scenario.get('scale') or {}, f"{name}.scale"),
+                cls._parse_adjustments(scenario)
+            ))
+        return parsed
+
+    def _get_adjustment_base(self, session_id: str, session: dict):
+        """
+        セッションの計算結果に対応する AdjustmentBase（計算結果ごとに1回構築）
+
+        session は get_session(include_result=False) の戻り値。計算結果は
+        ベースの構築が必要な場合にのみ読み込む（退避済みでも読み戻しは1回）。
+        """
+        index = session['index']
+        swi_initial = datetime.fromisoformat(session['swi_initial_time'])
+
+        def load_prefectures():
+            loaded = self.session_service.get_session(session_id)
+            if loaded is None:
+                raise LookupError(f"Session not found or expired: {session_id}")
+            return loaded['prefectures']
+
+        def load_tanks(lats, lons):
+            # 計算結果に初期タンク値があればそれを使う（GRIB2の再解析不要）
+            if index.initial_tanks is not None:
+                return index.initial_tanks
+            return self.recompute_service.load_initial_tanks_from_grib2(
+                swi_initial, lats, lons)
+
+        return self.recompute_service.get_base(
+            session['result_key'], load_prefectures, index, load_tanks)
+
+    def adjust_rainfall(self, session_id: str):
+        """
+        セッションの計算結果に対する雨量調整（差分再計算）
+
+        POST /api/session/<session_id>/rainfall-adjustment
+        {
+            "area_adjustments": {"府県名_市町村名": {"3": 10.0, ...}},
+            "subdivision_adjustments": {"府県名_二次細分名": {"3": 10.0, ...}}
+        }
+
+        GRIB2の再取得・全メッシュ再計算は行わず、比率が変わったメッシュのみ
+        タンクモデルを再計算する。レスポンスは /api/rainfall-adjustment と同じ形式。
+        """
+        try:
+            start = time.time()
+            data = request.get_json(force=True, silent=True) or {}
+
+            try:
+                adjustments = self._parse_adjustments(data)
+            except ValueError as e:
+                return jsonify({
+                    "status": "error",
+                    "error": str(e)
+                }), 400
+            if not adjustments:
+                return jsonify({
+                    "status": "error",
+                    "error": "area_adjustments or subdivision_adjustments is required"
+                }), 400
+
+            session = self.session_service.get_session(session_id, include_result=False)
+            if session is None:
+                return jsonify({
+                    "status": "error",
+                    "error": "Session not found or expired",
+                    "session_id": session_id
+                }), 404
+
+            base = self._get_adjustment_base(session_id, session)
+            result = self.recompute_service.recompute(base, adjustments)
+
+            self.session_service.update_session_state(
+                session_id, rainfall_adjustments=data)
+
+            elapsed_ms = (time.time() - start) * 1000
+            logger.info(
+                f"Rainfall adjustment recomputed: session={session_id}, "
+                f"meshes={result['adjusted_mesh_count']}, {elapsed_ms:.1f}ms")
+
+            return jsonify({
+                "status": "success",
+                "session_id": session_id,
+                "swi_initial_time": session['swi_initial_time'],
+                "guidance_initial_time": session['guidance_initial_time'],
+                "prefectures": result['prefectures'],
+                "adjusted": True,
+                "adjusted_mesh_count": result['adjusted_mesh_count'],
+                "elapsed_ms": round(elapsed_ms, 1)
+            })
+
+        except Exception as e:
+            logger.error(f"Rainfall adjustment error: {e}")
+            return jsonify({
+                "status": "error",
+                "error": str(e),
+                "timestamp": datetime.now().isoformat()
+            }), 500
+
+    def evaluate_rainfall_scenarios(self, session_id: str):
+        """
+        複数の雨量調整シナリオを一括評価
+
+        POST /api/session/<session_id>/rainfall-scenarios
+        {
+            "scenarios": [
+                {"name": "x1.2", "scale": {"府県名_二次細分名": 1.2}},
+                {"name": "手入力", "area_adjustments": {"府県名_市町村名": {"3": 10.0}}}
+            ]
+        }
+
+        全シナリオを配列の1軸として一度に計算し、シナリオごとの
+        市町村・二次細分の危険度時系列を返す（セッション状態は変更しない）。
+        """
+        try:
+            start = time.time()
+            data = request.get_json(force=True, silent=True) or {}
+            scenarios = data.get('scenarios') or []
+
+            if not isinstance(scenarios, list):
+                return jsonify({
+                    "status": "error",
+                    "error": "scenarios must be an array"
+                }), 400
+
+            if not scenarios:
+                return jsonify({
+                    "status": "error",
+                    "error": "scenarios is required"
+                }), 400
+
+            if len(scenarios) > self.recompute_service.max_scenarios:
+                return jsonify({
+                    "status": "error",
+                    "error": f"Too many scenarios (max {self.recompute_service.max_scenarios})"
+                }), 400
+
+            try:
+                parsed_scenarios = self._parse_scenarios(scenarios)
+            except ValueError as e:
+                return jsonify({
+                    "status": "error",
+                    "error": str(e)
+                }), 400
+
+            session = self.session_service.get_session(session_id, include_result=False)
+            if session is None:
+                return jsonify({
+                    "status": "error",
+                    "error": "Session not found or expired",
+                    "session_id": session_id
+                }), 404
+
+            base = self._get_adjustment_base(session_id, session)
+            scenario_adjustments = []
+            for _, scale, adjustments in parsed_scenarios:
+                scenario_adjustments.append({
+                    **base.scaled_adjustments(scale), **adjustments})
+
+            result = self.recompute_service.evaluate_scenarios(base, scenario_adjustments)
+            for (name, _, _), evaluated in zip(parsed_scenarios, result['scenarios']):
+                evaluated['name'] = name
+
+            elapsed_ms = (time.time() - start) * 1000
+            logger.info(
+                f"Rainfall scenarios evaluated: session={session_id}, "
+                f"scenarios={len(scenarios)}, {elapsed_ms:.1f}ms")
+
+            return jsonify({
+                "status": "success",
+                "session_id": session_id,
+                "swi_initial_time": session['swi_initial_time'],
+                "guidance_initial_time": session['guidance_initial_time'],
+                "baseline": result['baseline'],
+                "scenarios": result['scenarios'],
+                "elapsed_ms": round(elapsed_ms, 1)
+            })
+
+        except Exception as e:
+            logger.error(f"Rainfall scenarios error: {e}")
+            return jsonify({
+                "status": "error",
+                "error": str(e),
+                "timestamp": datetime.now().isoformat()
+            }), 500
+
     def delete_session(self, session_id: str):
         """
         セッション削除
@@ -276,12 +581,16 @@ class SessionController:
         POST /api/sessions/cleanup
         """
         try:
-            deleted_count = self.session_service.cleanup_expired_sessions()
+            report = self.session_service.run_janitor_once()
+            deleted_count = report['expired']
 
             return jsonify({
                 "status": "success",
                 "message": f"Cleaned up {deleted_count} expired sessions",
-                "deleted_count": deleted_count
+                "deleted_count": deleted_count,
+                "released_results": report['released_results'],
+                "reclaimed_bytes": report['reclaimed_bytes'],
+                "reclaimed_disk_bytes": report['reclaimed_disk_bytes']
             })
 
         except Exception as e:
@@ -9,6 +9,7 @@ import os
 from datetime import datetime
 
 from services import MainService
+from services.prefecture_registry import discover_prefectures
 
 logger = logging.getLogger(__name__)
 
@@ -74,7 +75,7 @@ class SoilRainfallController:
             
             # CSVファイル確認
             csv_files = []
-            prefectures = ['shiga', 'kyoto', 'osaka', 'hyogo', 'nara', 'wakayama']
+            prefectures = list(discover_prefectures(data_dir).keys())
             
             for pref in prefectures:
                 dosha_file = os.path.join(data_dir, f"dosha_{pref}.csv")
@@ -148,13 +148,8 @@ class TestController:
         try:
             pref_code = request.args.get('pref', 'shiga')
             
-            prefectures = self.main_service.data_service.prepare_areas()
-            target_pref = None
-            
-            for pref in prefectures:
-                if pref.code == pref_code:
-                    target_pref = pref
-                    break
+            # 対象府県のカタログだけを読み込む
+            target_pref = self.main_service.data_service.get_prefecture(pref_code)
             
             if not target_pref:
                 return jsonify({
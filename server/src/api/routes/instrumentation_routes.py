@@ -0,0 +1,26 @@
+"""
+処理段階計測APIルート
+
+全リクエストにトレースを取り付け、応答に Server-Timing ヘッダーを付与する。
+
+エンドポイント:
+- GET  /api/performance/stages - 段階別統計（p50 / p95 / p99）
+- POST /api/performance/stages/reset - 段階別統計リセット
+"""
+
+from flask import Blueprint
+from src.api.controllers import instrumentation_controller
+
+# Blueprint作成
+instrumentation_bp = Blueprint('instrumentation', __name__, url_prefix='/api/performance')
+
+# 全リクエスト共通のフック
+instrumentation_bp.before_app_request(instrumentation_controller.start_request)
+instrumentation_bp.after_app_request(instrumentation_controller.finish_request)
+
+# ルート定義
+instrumentation_bp.route('/stages', methods=['GET'])(
+    instrumentation_controller.get_performance_stages)
+
+instrumentation_bp.route('/stages/reset', methods=['POST'])(
+    instrumentation_controller.reset_performance_stages)
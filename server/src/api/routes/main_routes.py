@@ -4,7 +4,8 @@
 """
 from flask import Blueprint
 from ..controllers.main_controller import MainController
-from services.session_service import SessionService
+from services.session_service import create_session_service
+from src.config.config_service import ConfigService
 
 # Blueprint作成
 main_bp = Blueprint('main', __name__)
@@ -16,8 +17,13 @@ session_service = None
 def init_main_routes(data_dir: str = "data"):
     """メインルートを初期化"""
     global main_controller, session_service
-    # セッションサービスを作成（TTL: 1時間）
-    session_service = SessionService(ttl_hours=1)
+    # セッションサービスを作成（バックエンド・TTL・常駐メモリ上限は設定ファイルから）
+    config_service = ConfigService()
+    session_service = create_session_service(config_service)
+    if config_service.get("session.auto_cleanup", False):
+        interval_minutes = config_service.get(
+            "session.cleanup_interval_minutes", 5)
+        session_service.start_janitor(interval_minutes * 60)
     # メインコントローラーにセッションサービスを渡す
     main_controller = MainController(data_dir, session_service=session_service)
 
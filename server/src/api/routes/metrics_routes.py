@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+"""
+メトリクスAPIルート
+
+エンドポイント:
+- GET /metrics - Prometheus テキスト形式のメトリクス
+"""
+from flask import Blueprint
+
+def create_metrics_blueprint(metrics_controller):
+    """
+    メトリクスAPIのBlueprintを作成
+
+    Args:
+        metrics_controller: MetricsControllerインスタンス
+
+    Returns:
+        Blueprint: メトリクスAPI Blueprint
+    """
+    metrics_bp = Blueprint('metrics_bp', __name__)
+
+    @metrics_bp.route('/metrics', methods=['GET'])
+    def get_metrics():
+        return metrics_controller.get_metrics()
+
+    return metrics_bp
@@ -31,11 +31,26 @@ def create_session_blueprint(session_controller):
     def get_risk_at_time(session_id):
         return session_controller.get_risk_at_time(session_id)
 
+    # リスクベクトルのメッシュ順取得
+    @session_bp.route('/session/<session_id>/mesh-order', methods=['GET'])
+    def get_mesh_order(session_id):
+        return session_controller.get_mesh_order(session_id)
+
     # メッシュ詳細データ取得
     @session_bp.route('/session/<session_id>/mesh/<mesh_code>', methods=['GET'])
     def get_mesh_detail(session_id, mesh_code):
         return session_controller.get_mesh_detail(session_id, mesh_code)
 
+    # 雨量調整（差分再計算）
+    @session_bp.route('/session/<session_id>/rainfall-adjustment', methods=['POST'])
+    def adjust_rainfall(session_id):
+        return session_controller.adjust_rainfall(session_id)
+
+    # 複数の雨量調整シナリオの一括評価
+    @session_bp.route('/session/<session_id>/rainfall-scenarios', methods=['POST'])
+    def evaluate_rainfall_scenarios(session_id):
+        return session_controller.evaluate_rainfall_scenarios(session_id)
+
     # セッション削除
     @session_bp.route('/session/<session_id>', methods=['DELETE'])
     def delete_session(session_id):
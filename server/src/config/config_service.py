@@ -9,12 +9,17 @@ from typing import Dict, Any, Optional
 
 logger = logging.getLogger(__name__)
 
+# 設定ファイルの差し替え（負荷試験など、GRIB2取得先を一時的に変える場合）
+CONFIG_PATH_ENV = "SOIL_RAINFALL_CONFIG"
+
 
 class ConfigService:
     """設定ファイル管理サービス"""
     
     def __init__(self, config_path: Optional[str] = None):
         if config_path is None:
+            config_path = os.environ.get(CONFIG_PATH_ENV)
+        if not config_path:
             # デフォルトの設定ファイルパス
             project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
             config_path = os.path.join(project_root, "config", "app_config.yaml")
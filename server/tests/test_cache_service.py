@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""
+CacheService の容量上限・LRU退避テスト
+"""
+import os
+import sys
+import time
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from services.cache_service import CacheService
+
+
+def _make_result(n_meshes: int = 50) -> dict:
+    return {
+        "prefectures": {
+            "shiga": {
+                "areas": [{
+                    "name": "大津市",
+                    "meshes": [
+                        {"code": f"5235{i:04d}", "value": i}
+                        for i in range(n_meshes)
+                    ]
+                }]
+            }
+        }
+    }
+
+
+def _store(cache_service: CacheService, hour: int) -> str:
+    swi_initial = f"2025-10-16T{hour:02d}:00:00"
+    cache_key = cache_service.generate_cache_key(swi_initial, swi_initial)
+    cache_service.set_cached_result(
+        cache_key, _make_result(), swi_initial, swi_initial)
+    return cache_key
+
+
+def _age(cache_service: CacheService, cache_key: str, seconds_ago: float):
+    """最終アクセス時刻を過去にずらす"""
+    t = time.time() - seconds_ago
+    os.utime(cache_service._get_meta_path(cache_key), (t, t))
+
+
+def test_max_entries_evicts_least_recently_used(tmp_path):
+    cache_service = CacheService(cache_dir=str(tmp_path), max_entries=2)
+
+    key_a = _store(cache_service, 0)
+    _age(cache_service, key_a, 300)
+    key_b = _store(cache_service, 3)
+    _age(cache_service, key_b, 200)
+
+    # A を読み込んで最終アクセスを更新 → B が最古になる
+    assert cache_service.get_cached_result(key_a) is not None
+
+    key_c = _store(cache_service, 6)
+
+    assert cache_service.exists(key_a)
+    assert not cache_service.exists(key_b)
+    assert cache_service.exists(key_c)
+    assert cache_service.get_cache_stats()["evicted_count"] == 1
+
+
+def test_max_total_mb_keeps_just_written_entry(tmp_path):
+    cache_service = CacheService(cache_dir=str(tmp_path), max_total_mb=1e-6)
+
+    key_a = _store(cache_service, 0)
+    key_b = _store(cache_service, 3)
+
+    # 上限未満にできなくても保存直後のキーは残る
+    assert not cache_service.exists(key_a)
+    assert cache_service.exists(key_b)
+
+
+def test_inflight_writes_are_not_evicted(tmp_path):
+    cache_service = CacheService(cache_dir=str(tmp_path))
+    key_a = _store(cache_service, 0)
+    key_b = _store(cache_service, 3)
+    _age(cache_service, key_a, 300)
+
+    cache_service.max_entries = 1
+    cache_service._inflight.add(key_a)
+
+    assert cache_service.enforce_limits() == 1
+    assert cache_service.exists(key_a)
+    assert not cache_service.exists(key_b)
+
+
+def test_janitor_runs_periodically(tmp_path):
+    cache_service = CacheService(cache_dir=str(tmp_path))
+    for hour in (0, 3, 6):
+        _store(cache_service, hour)
+
+    cache_service.max_entries = 1
+    cache_service.start_janitor(interval_seconds=0.05)
+    try:
+        deadline = time.time() + 5
+        while len(cache_service.list_caches()) > 1 and time.time() < deadline:
+            time.sleep(0.05)
+    finally:
+        cache_service.stop_janitor()
+
+    assert len(cache_service.list_caches()) == 1
+
+
+def _concurrent_writer(cache_dir: str, n_meshes: int):
+    cache_service = CacheService(cache_dir=cache_dir)
+    swi_initial = "2025-10-16T12:00:00"
+    cache_key = cache_service.generate_cache_key(swi_initial, swi_initial)
+    for _ in range(5):
+        cache_service.set_cached_result(
+            cache_key, _make_result(n_meshes), swi_initial, swi_initial)
+        cache_service.invalidate_cache(cache_key)
+
+
+def test_concurrent_writers_never_expose_partial_files(tmp_path):
+    import multiprocessing
+
+    n_meshes = 20000
+    ctx = multiprocessing.get_context("spawn")
+    writers = [
+        ctx.Process(target=_concurrent_writer, args=(str(tmp_path), n_meshes))
+        for _ in range(3)
+    ]
+    for p in writers:
+        p.start()
+
+    reader = CacheService(cache_dir=str(tmp_path))
+    cache_key = reader.generate_cache_key(
+        "2025-10-16T12:00:00", "2025-10-16T12:00:00")
+    while any(p.is_alive() for p in writers):
+        # 読み込めた場合は必ず完全なデータ（書きかけのgzipは見えない）
+        result = reader.get_cached_result(cache_key)
+        if result is not None:
+            meshes = result["prefectures"]["shiga"]["areas"][0]["meshes"]
+            assert len(meshes) == n_meshes
+
+    for p in writers:
+        p.join()
+        assert p.exitcode == 0
+
+    # 一時ファイルが残っていないこと
+    assert not list(tmp_path.glob(".*.tmp"))
+
+
+def test_stale_temp_files_are_cleaned(tmp_path):
+    cache_service = CacheService(cache_dir=str(tmp_path))
+    stale = tmp_path / ".swi_x.json.gz.123.abcd.tmp"
+    stale.write_bytes(b"partial")
+    old = time.time() - 7200
+    os.utime(stale, (old, old))
+
+    assert cache_service.cleanup_stale_temp_files() == 1
+    assert not stale.exists()
+
+
+def test_orphan_lock_files_are_cleaned(tmp_path):
+    cache_service = CacheService(cache_dir=str(tmp_path))
+    kept = _store(cache_service, 0)
+    removed = _store(cache_service, 3)
+    busy = _store(cache_service, 6)
+    assert cache_service.invalidate_cache(removed)
+    assert cache_service.invalidate_cache(busy)
+    assert cache_service._get_lock_path(removed).exists()
+
+    # 書き込み中（ロック保持中）のキーは残す
+    with cache_service._key_lock(busy):
+        assert cache_service.run_janitor_once()["orphan_locks"] == 1
+    assert not cache_service._get_lock_path(removed).exists()
+    assert cache_service._get_lock_path(kept).exists()
+    assert cache_service._get_lock_path(busy).exists()
+
+    # ロックファイル削除後も書き込み・読み込みできる
+    assert _store(cache_service, 3) == removed
+    assert cache_service.get_cached_result(removed) is not None
+
+
+def test_key_lock_reacquires_lock_file_removed_while_waiting(tmp_path):
+    import threading
+
+    cache_service = CacheService(cache_dir=str(tmp_path))
+    lock_path = cache_service._get_lock_path("swi_x")
+    waiting = threading.Event()
+    holding = threading.Event()
+    release = threading.Event()
+
+    def waiter():
+        waiting.set()
+        with cache_service._key_lock("swi_x") as acquired:
+            assert acquired
+            holding.set()
+            release.wait(5)
+
+    with cache_service._key_lock("swi_x"):
+        thread = threading.Thread(target=waiter)
+        thread.start()
+        waiting.wait(5)
+        time.sleep(0.2)
+        # ロック保持中にジャニターが削除した状態を再現
+        lock_path.unlink()
+
+    # 待っていた側は新しいロックファイルを取り直すので、他はロックできない
+    assert holding.wait(5)
+    assert lock_path.exists()
+    with cache_service._key_lock("swi_x", blocking=False) as other:
+        assert not other
+    release.set()
+    thread.join()
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+ゴールデン出力による等価性検証（services.golden_output）のテスト
+
+同梱データ全体の検証は python -m services.golden_output check で行う（約30秒）。
+"""
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from services.golden_output import (
+    DEFAULT_GOLDEN_PATH, check, compare, fingerprint, load_engine, record, reference_engine
+)
+
+
+def make_mesh(code: str, offset: float) -> dict:
+    def series(fts, scale):
+        return [{"ft": ft, "value": offset + ft * scale} for ft in fts]
+
+    return {
+        "code": code, "lat": 35.0, "lon": 135.0 + offset, "x": 1, "y": 2,
+        "advisary_bound": 100, "warning_bound": 150, "dosyakei_bound": 999,
+        "swi_timeline": series(range(0, 7, 3), 1.5),
+        "swi_hourly_timeline": series(range(0, 7), 0.5),
+        "rain_1hour_timeline": series(range(1, 7), 0.1),
+        "rain_1hour_max_timeline": series(range(3, 7, 3), 0.2),
+        "rain_timeline": series(range(3, 7, 3), 0.3),
+        "risk_hourly_timeline": [{"ft": ft, "value": ft % 3} for ft in range(0, 7)],
+        "risk_3hour_max_timeline": [{"ft": ft, "value": 2} for ft in range(3, 7, 3)]
+    }
+
+
+def make_result() -> dict:
+    areas = [
+        {"name": "大津市", "secondary_subdivision_name": "南部",
+         "risk_timeline": [{"ft": 0, "value": 1}],
+         "meshes": [make_mesh("52350000", 0.1), make_mesh("52350001", 0.2)]},
+        {"name": "彦根市", "secondary_subdivision_name": "北部",
+         "risk_timeline": [{"ft": 0, "value": 0}],
+         "meshes": [make_mesh("52360000", 0.3)]}
+    ]
+    return {
+        "status": "success",
+        "calculation_time": "2025-01-01T00:00:00",
+        "prefectures": {"shiga": {
+            "name": "滋賀県", "code": "shiga", "areas": areas,
+            "secondary_subdivisions": [
+                {"name": "南部", "area_names": ["大津市"], "rain_1hour_max_timeline": [],
+                 "rain_3hour_timeline": [], "risk_timeline": [{"ft": 0, "value": 1}]}],
+            "prefecture_rain_1hour_max_timeline": [{"ft": 3, "value": 1.0}],
+            "prefecture_rain_3hour_timeline": [{"ft": 3, "value": 2.0}],
+            "prefecture_risk_timeline": [{"ft": 0, "value": 1}]
+        }},
+        "rainfall_aggregates": {"area_rainfall": {"大津市": [{"ft": 3, "value": 2}]}}
+    }
+
+
+def test_fingerprint_is_stable_and_ignores_metadata():
+    golden = fingerprint(make_result())
+    assert golden["mesh_count"] == 3
+    assert set(golden["entries"]) == {"shiga", "shiga/大津市", "shiga/彦根市", "rainfall_aggregates"}
+
+    result = make_result()
+    result["calculation_time"] = "2030-01-01T00:00:00"
+    assert compare(golden, fingerprint(result)) == []
+
+
+def test_single_ulp_difference_is_located_by_area_and_series():
+    golden = fingerprint(make_result())
+
+    result = make_result()
+    point = result["prefectures"]["shiga"]["areas"][0]["meshes"][1]["swi_hourly_timeline"][4]
+    point["value"] = float(np.nextafter(point["value"], np.inf))
+    assert compare(golden, fingerprint(result)) == ["shiga/大津市: swi_hourly_timeline"]
+
+    # メッシュの並び順も結果の一部
+    result = make_result()
+    result["prefectures"]["shiga"]["areas"][0]["meshes"].reverse()
+    mismatches = compare(golden, fingerprint(result))
+    assert len(mismatches) == 1 and mismatches[0].startswith("shiga/大津市: mesh")
+
+    result = make_result()
+    del result["prefectures"]["shiga"]["areas"][1]
+    assert compare(golden, fingerprint(result)) == [
+        "メッシュ数: 3 != 2", "shiga/彦根市: 結果にない", "shiga: area_order"]
+
+
+def test_check_runs_engine_and_rejects_changed_inputs(tmp_path):
+    for name in ("dosha_shiga.csv", "swi.bin", "guidance.bin"):
+        (tmp_path / name).write_bytes(name.encode())
+    files = (str(tmp_path), str(tmp_path / "swi.bin"), str(tmp_path / "guidance.bin"))
+    calls = []
+
+    def engine(data_dir, swi_file, guidance_file):
+        calls.append((data_dir, swi_file, guidance_file))
+        return make_result()
+
+    golden = record(*files, engine=engine)
+    assert golden["inputs"]["csv"].keys() == {"dosha_shiga.csv"}
+    assert check(golden, *files, engine=engine) == []
+    assert calls == [files, files]
+
+    def changed_engine(data_dir, swi_file, guidance_file):
+        result = make_result()
+        result["rainfall_aggregates"]["area_rainfall"]["大津市"][0]["value"] = 3
+        return result
+
+    assert check(golden, *files, engine=changed_engine) == ["rainfall_aggregates: value"]
+
+    (tmp_path / "dosha_shiga.csv").write_bytes(b"changed")
+    with pytest.raises(ValueError):
+        check(golden, *files, engine=engine)
+
+
+def test_load_engine_and_bundled_golden():
+    assert load_engine(None) is reference_engine
+    assert load_engine("services.golden_output:reference_engine") is reference_engine
+    with pytest.raises(ValueError):
+        load_engine("services.golden_output")
+
+    # 同梱データのゴールデン（python -m services.golden_output record で作成）
+    with open(DEFAULT_GOLDEN_PATH, encoding="utf-8") as f:
+        golden = json.load(f)
+    assert golden["mesh_count"] > 0
+    assert {"initial_tanks", "rainfall_aggregates"} <= set(golden["entries"])
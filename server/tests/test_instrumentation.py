@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+処理段階の計測（services.instrumentation / 計測ルート）のテスト
+"""
+import os
+import sys
+
+import pytest
+from flask import Flask, jsonify
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from services.instrumentation import (
+    PROFILE_DIR_ENV, PROFILE_ENV, StageStats, current_trace, end_trace, get_stage_stats,
+    span, start_trace, timed
+)
+from src.api.routes.instrumentation_routes import instrumentation_bp
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.register_blueprint(instrumentation_bp)
+
+    @timed("decode.swi")
+    def decode():
+        return 1
+
+    @app.route('/work')
+    def work():
+        decode()
+        with span("calc.mesh"):
+            pass
+        with span("calc.mesh"):
+            pass
+        return jsonify({"status": "success"})
+
+    get_stage_stats().reset()
+    return app.test_client()
+
+
+def test_spans_accumulate_in_trace_and_stats():
+    stats = get_stage_stats()
+    stats.reset()
+
+    # トレースがなければ統計だけに記録
+    with span("cache.read") as measured:
+        pass
+    assert current_trace() is None
+    assert measured.seconds >= 0
+
+    trace = start_trace()
+    with span("calc.mesh"):
+        with span("aggregate"):
+            pass
+    with span("calc.mesh"):
+        pass
+    assert end_trace() is trace
+    assert current_trace() is None
+
+    assert trace.stages["calc.mesh"]["count"] == 2
+    assert trace.stages["aggregate"]["count"] == 1
+    # 終了順（入れ子の内側が先）、最後に全体
+    entries = [entry.split(";")[0] for entry in trace.server_timing().split(", ")]
+    assert entries == ["aggregate", "calc.mesh", "total"]
+    assert set(trace.as_dict()["stages"]) == {"calc.mesh", "aggregate"}
+
+    summary = stats.summary()
+    assert summary["calc.mesh"]["count"] == 2
+    assert summary["cache.read"]["count"] == 1
+
+
+def test_stage_stats_percentiles_use_recent_window():
+    stats = StageStats(window=100)
+    for ms in range(1, 201):
+        stats.record("calc.mesh", ms / 1000)
+
+    summary = stats.summary()["calc.mesh"]
+    assert summary["count"] == 200
+    # パーセンタイル・最大は直近100件（101〜200ms）、平均は全件
+    assert summary["p50_ms"] == pytest.approx(150.5)
+    assert summary["p99_ms"] == pytest.approx(199.01)
+    assert summary["max_ms"] == pytest.approx(200.0)
+    assert summary["mean_ms"] == pytest.approx(100.5)
+
+
+def test_request_timings_header_debug_field_and_stats(client):
+    response = client.get('/work')
+    assert response.get_json() == {"status": "success"}
+    timing = response.headers['Server-Timing']
+    assert "decode.swi;dur=" in timing and "calc.mesh;dur=" in timing
+
+    data = client.get('/work?debug=1').get_json()
+    assert data["status"] == "success"
+    assert data["debug"]["timings"]["stages"]["calc.mesh"]["count"] == 2
+
+    stages = client.get('/api/performance/stages').get_json()["stages"]
+    assert stages["calc.mesh"]["count"] == 4
+    assert stages["decode.swi"]["count"] == 2
+    assert {"p50_ms", "p95_ms", "p99_ms"} <= set(stages["decode.swi"])
+
+    client.post('/api/performance/stages/reset')
+    assert client.get('/api/performance/stages').get_json()["stages"] == {}
+
+
+def test_profile_flag_attaches_profilers(client, tmp_path, monkeypatch):
+    # 環境変数なしでは ?profile=1 を無視
+    response = client.get('/work?profile=1')
+    assert 'X-Profile-Output' not in response.headers
+
+    monkeypatch.setenv(PROFILE_ENV, "cprofile,tracemalloc")
+    monkeypatch.setenv(PROFILE_DIR_ENV, str(tmp_path))
+    assert 'X-Profile-Output' not in client.get('/work').headers
+
+    response = client.get('/work?profile=1')
+    paths = response.headers['X-Profile-Output'].split(", ")
+    assert [os.path.splitext(p)[1] for p in paths] == [".prof", ".txt"]
+    assert all(os.path.dirname(p) == str(tmp_path) and os.path.exists(p) for p in paths)
+    assert "peak=" in open(paths[1], encoding='utf-8').readline()
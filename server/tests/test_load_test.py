@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+負荷試験ハーネス（benchmarks/load_test.py）のテスト
+
+アプリを起動する負荷試験そのものは python benchmarks/load_test.py で行う。
+"""
+import os
+import sys
+from datetime import datetime
+
+import pytest
+import requests
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from benchmarks.load_test import (
+    Grib2StandIn, Recorder, bundled_initial_times, grib2_routes, parse_mix, write_config
+)
+from src.config.config_service import ConfigService
+
+
+def test_parse_mix():
+    assert parse_mix("calculate=1, risk_at_time=6,adjustment=0") == \
+        {"calculate": 1.0, "risk_at_time": 6.0}
+    assert parse_mix("session") == {"session": 1.0}
+    with pytest.raises(ValueError):
+        parse_mix("download=1")
+    with pytest.raises(ValueError):
+        parse_mix("calculate=0")
+
+
+def test_stand_in_serves_grib2_at_configured_urls(tmp_path):
+    grib2_dir = tmp_path / "grib2"
+    grib2_dir.mkdir()
+    files = {
+        "Z__C_RJTD_20230602000000_SRF_GPV_Ggis1km_Psw_Aper10min_ANAL_grib2.bin": b"swi-00",
+        "guid_msm_grib2_20230602000000_rmax00.bin": b"guidance-00",
+        # ガイダンスがない初期時刻は対象外
+        "Z__C_RJTD_20230602060000_SRF_GPV_Ggis1km_Psw_Aper10min_ANAL_grib2.bin": b"swi-06",
+    }
+    for name, body in files.items():
+        (grib2_dir / name).write_bytes(body)
+
+    initial_times = bundled_initial_times(str(grib2_dir))
+    assert initial_times == [datetime(2023, 6, 2, 0)]
+
+    stand_in = Grib2StandIn({}).start()
+    try:
+        config_path = write_config(ConfigService().config_path, str(tmp_path), stand_in.base_url)
+        config_service = ConfigService(config_path)
+        assert config_service.get_proxy_config() == {"http": None, "https": None}
+        stand_in.routes.update(grib2_routes(config_service, str(grib2_dir), initial_times))
+
+        swi = requests.get(config_service.build_swi_url(initial_times[0]), timeout=5)
+        guidance = requests.get(config_service.build_guidance_url(initial_times[0]), timeout=5)
+        missing = requests.get(config_service.build_swi_url(datetime(2023, 6, 2, 6)), timeout=5)
+    finally:
+        stand_in.stop()
+
+    assert swi.content == b"swi-00"
+    assert guidance.content == b"guidance-00"
+    assert missing.status_code == 404
+
+
+def test_recorder_summary_per_route_and_total():
+    recorder = Recorder()
+    for ms in range(1, 101):
+        recorder.record("risk_at_time", ms / 1000, ok=True)
+    recorder.record("calculate", 2.0, ok=False)
+
+    summary = recorder.summary(elapsed=10.0)
+    assert summary["risk_at_time"]["requests"] == 100
+    assert summary["risk_at_time"]["throughput_rps"] == 10.0
+    assert summary["risk_at_time"]["p50_ms"] == pytest.approx(50.5)
+    assert summary["risk_at_time"]["p99_ms"] == pytest.approx(99.0)
+    assert summary["calculate"]["errors"] == 1
+    assert summary["total"]["requests"] == 101
+    assert summary["total"]["errors"] == 1
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+コンパイル済みメッシュカタログ（MeshCatalog / DataService.load_mesh_catalog）のテスト
+"""
+import os
+import sys
+from dataclasses import asdict
+
+import pytest
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from services.data_service import DataService
+from services.mesh_catalog import MeshCatalog
+
+DOSHA_ROWS = [
+    ("湖南", "大津市", "52354601", "100", "150"),
+    ("湖南", "大津市", "52354602", "|", ""),
+    ("湖南", "草津市", "52354611", "90", "120"),
+    ("湖北", "長浜市", "53360000", "80", "110"),
+]
+
+
+def write_csvs(data_dir, dosyakei_level=130):
+    dosha = "土砂災害警戒判定メッシュ情報\n二次細分,市町村,メッシュ,注意報,警報\n" + "".join(
+        ",".join(row) + "\n" for row in DOSHA_ROWS)
+    dosyakei = (f"GRIDNO,LEVEL3_00\n52354601,{dosyakei_level}\n"
+                f"52354611,1000\n53360000,\n")
+    vba = ("VBA\n市町村,X,Y,注意報,警報,土砂\n"
+           f"大津市,10,20,100,150,{dosyakei_level}\n")
+    (data_dir / "dosha_shiga.csv").write_bytes(dosha.encode("shift_jis"))
+    (data_dir / "dosyakei_shiga.csv").write_bytes(dosyakei.encode("shift_jis"))
+    (data_dir / "shiga_swi.csv").write_bytes(vba.encode("shift_jis"))
+
+
+def prefectures_from_csv(data_service):
+    """カタログを経由しない CSV → Prefecture"""
+    dosha, dosyakei, vba = data_service.load_csv_data("shiga")
+    columns = data_service.compile_prefecture_columns(dosha, dosyakei, vba)
+    return [data_service.build_prefecture("shiga", "滋賀県", columns)]
+
+
+def test_catalog_round_trip_matches_csv(tmp_path):
+    write_csvs(tmp_path)
+    data_service = DataService(str(tmp_path))
+
+    prefectures = data_service.prepare_areas()
+    assert os.path.exists(data_service.catalog_path)
+    assert [asdict(p) for p in prefectures] == \
+        [asdict(p) for p in prefectures_from_csv(data_service)]
+
+    meshes = [m for area in prefectures[0].areas for m in area.meshes]
+    assert [m.code for m in meshes] == [row[2] for row in DOSHA_ROWS]
+    assert [(m.advisary_bound, m.warning_bound, m.dosyakei_bound) for m in meshes] == \
+        [(100, 150, 130), (9999, 9999, 999), (90, 120, 999), (80, 110, 999)]
+    assert (meshes[0].vba_x, meshes[0].vba_y) == (10, 20)
+    assert meshes[1].vba_x is None
+    assert [s.name for s in prefectures[0].secondary_subdivisions] == ["湖南", "湖北"]
+
+    # 2回目以降は CSV を読まずにカタログを読み込む
+    reloaded = DataService(str(tmp_path))
+    reloaded.load_csv_data = None
+    assert [asdict(p) for p in reloaded.prepare_areas()] == [asdict(p) for p in prefectures]
+
+
+def test_catalog_is_rebuilt_when_csv_changes(tmp_path):
+    write_csvs(tmp_path)
+    DataService(str(tmp_path)).load_mesh_catalog()
+
+    # mtime だけの変更はハッシュ一致で再作成しない
+    path = tmp_path / "dosyakei_shiga.csv"
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    catalog = MeshCatalog.load(str(tmp_path / "mesh_catalog.npz"))
+    assert catalog.is_current(str(tmp_path), "shiga")
+
+    # 内容が変われば再作成
+    write_csvs(tmp_path, dosyakei_level=140)
+    data_service = DataService(str(tmp_path))
+    assert not catalog.is_current(str(tmp_path), "shiga")
+    meshes = data_service.prepare_areas()[0].areas[0].meshes
+    assert meshes[0].dosyakei_bound == 140
+    assert (meshes[0].vba_x, meshes[0].vba_y) == (10, 20)
+
+    # CSV の削除（VBA座標なし）も検出する
+    os.remove(tmp_path / "shiga_swi.csv")
+    meshes = DataService(str(tmp_path)).prepare_areas()[0].areas[0].meshes
+    assert meshes[0].vba_x is None
+
+
+def test_old_catalog_version_is_ignored(tmp_path, monkeypatch):
+    write_csvs(tmp_path)
+    DataService(str(tmp_path)).load_mesh_catalog()
+
+    import services.mesh_catalog as mesh_catalog
+    monkeypatch.setattr(mesh_catalog, "CATALOG_VERSION", mesh_catalog.CATALOG_VERSION + 1)
+    assert MeshCatalog.load(str(tmp_path / "mesh_catalog.npz")) is None
+
+
+def test_catalog_is_shared_and_prefectures_are_fresh(tmp_path):
+    from services.mesh_catalog import get_mesh_catalog_registry
+
+    write_csvs(tmp_path)
+    registry = get_mesh_catalog_registry()
+
+    first, second = DataService(str(tmp_path)), DataService(str(tmp_path))
+    catalog = first.get_mesh_catalog()
+    load_count = registry.load_count
+    assert second.get_mesh_catalog() is catalog
+    with pytest.raises(ValueError):
+        catalog.prefecture_arrays("shiga")["warning_bound"][0] = 0
+
+    # 計算ごとに新しい Mesh を返すため、変更しても次の呼び出しに影響しない
+    mesh = first.prepare_areas()[0].areas[0].meshes[0]
+    mesh.warning_bound = 1
+    mesh.rain_3hour.append(None)
+    again = second.prepare_areas()[0].areas[0].meshes[0]
+    assert again is not mesh
+    assert (again.warning_bound, again.rain_3hour) == (150, [])
+    assert registry.load_count == load_count
+
+    # 元CSVが変わると共有カタログを読み込み直す（TTL ではなくファイル状態で判定）
+    write_csvs(tmp_path, dosyakei_level=140)
+    path = tmp_path / "dosyakei_shiga.csv"
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert first.prepare_areas()[0].areas[0].meshes[0].dosyakei_bound == 140
+    assert first.get_mesh_catalog() is not catalog
+
+
+def test_boundary_cleaning_and_vba_join():
+    import pandas as pd
+
+    values = pd.Series(["100", "|", "", " 90 ", "abc", "12.7", None, "-3.5"])
+    assert DataService.parse_int_column(values, 9999).tolist() == \
+        [100, 9999, 9999, 90, 9999, 12, 9999, -3]
+    assert DataService.parse_int_column(values, 9999, integer_text_only=True).tolist() == \
+        [100, 9999, 9999, 90, 9999, 9999, 9999, 9999]
+    assert DataService.parse_int_column(pd.Series([1.9, float("nan")]), 999).tolist() == [1, 999]
+
+    dosha = pd.DataFrame({
+        "s": ["湖南", "湖南", "湖北"], "a": ["大津市", "大津市", "長浜市"],
+        "m": ["52354601", "52354602", "53360000"],
+        "adv": ["100", "100", "|"], "warn": [150, 150, 110]})
+    dosyakei = pd.DataFrame({"GRIDNO": [52354601, 52354602, 52354602],
+                             "LEVEL3_00": [130.0, 120.0, 2000.0]})
+    vba = pd.DataFrame({
+        "a": ["大津市", "大津市", "長浜市"], "x": [1, 2, 3], "y": [4, 5, 6],
+        "adv": ["100", "100", ""], "warn": ["150", "150", "110"], "dosa": ["130", "130", "999"]})
+
+    columns = DataService("data").compile_prefecture_columns(dosha, dosyakei, vba)
+    # 同一GRIDNO・同一キーは後の行を優先
+    assert columns["dosyakei_bound"] == [130, 999, 999]
+    assert columns["advisary_bound"] == [100, 100, 9999]
+    assert list(zip(columns["vba_x"], columns["vba_y"])) == [(2, 5), (None, None), (3, 6)]
+
+
+def test_get_prefecture_compiles_only_requested_prefecture(tmp_path):
+    write_csvs(tmp_path)
+    dosha = (tmp_path / "dosha_shiga.csv").read_bytes()
+    (tmp_path / "dosha_nara.csv").write_bytes(dosha.replace("滋賀".encode("shift_jis"), b""))
+    data_service = DataService(str(tmp_path))
+
+    compiled = []
+    compile_prefecture_catalog = data_service.compile_prefecture_catalog
+
+    def recording(code):
+        compiled.append(code)
+        return compile_prefecture_catalog(code)
+
+    data_service.compile_prefecture_catalog = recording
+
+    prefecture = data_service.get_prefecture("shiga")
+    assert (prefecture.code, prefecture.name) == ("shiga", "滋賀県")
+    assert compiled == ["shiga"]
+    assert data_service.get_prefecture("osaka") is None
+    assert data_service.get_prefecture("unknown") is None
+
+    # 全府県ビューは残りの府県だけをコンパイルし、既存の府県はファイルから読む
+    prefectures = data_service.prepare_areas()
+    assert [p.code for p in prefectures] == ["shiga", "nara"]
+    assert compiled == ["shiga", "nara"]
+    assert [asdict(p) for p in prefectures[:1]] == [asdict(prefecture)]
+
+    catalog = MeshCatalog.load(data_service.catalog_path)
+    assert catalog.prefecture_codes == ["shiga", "nara"]
+    assert catalog._arrays == {}
+    assert len(catalog.prefecture_columns("nara")["code"]) == len(DOSHA_ROWS)
+    assert list(catalog._arrays) == ["nara"]
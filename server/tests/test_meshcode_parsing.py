@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+メッシュコード解析（DataService.parse_meshcodes / index_to_meshcode）のテスト
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pytest
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from services.data_service import DataService
+
+DATA_DIR = os.path.join(project_root, "data")
+data_service = DataService(DATA_DIR)
+
+
+def loop_meshcode_to_index(mesh_codes):
+    """従来の文字列スライスによるループ実装"""
+    indices = []
+    for code in mesh_codes:
+        try:
+            if len(str(code)) >= 8:
+                code_str = str(code)
+                y = int(code_str[:2]) * 80 + int(code_str[4]) * 10 + int(code_str[6])
+                x = int(code_str[2:4]) * 80 + int(code_str[5]) * 10 + int(code_str[7])
+                indices.append((x, y))
+            else:
+                indices.append((0, 0))
+        except Exception:
+            indices.append((0, 0))
+    return indices
+
+
+def kansai_codes():
+    if not os.path.exists(os.path.join(DATA_DIR, "dosha_shiga.csv")):
+        pytest.skip("関西のメッシュCSVがありません")
+    return data_service.get_mesh_catalog().column("code").tolist()
+
+
+def test_parse_matches_loop_including_invalid_codes():
+    codes = ["52354601", "53360000", "5235460", "523546011", "5235460a", "", "nan", 52354601]
+
+    assert data_service.meshcode_to_index_vectorized(codes) == loop_meshcode_to_index(codes)
+    assert data_service.meshcode_to_coordinate_vectorized(codes) == \
+        [data_service.meshcode_to_coordinate(code) for code in codes]
+    assert data_service.meshcode_to_coordinate_vectorized(["x"]) == [(35.0, 135.0)]
+
+
+def test_inverse_round_trip_on_kansai_catalog():
+    codes = kansai_codes()
+    x, y, lat, lon = data_service.parse_meshcodes(codes)
+
+    assert list(zip(x.tolist(), y.tolist())) == loop_meshcode_to_index(codes)
+    assert data_service.index_to_meshcode(x, y).tolist() == codes
+    assert data_service.index_to_meshcode(5, 3) == "00000035"
+    np.testing.assert_array_equal(lat, (y + 0.5) * 30 / 3600)
+    np.testing.assert_array_equal(lon, (x + 0.5) * 45 / 3600 + 100)
+
+
+def test_vectorized_parse_is_faster_than_loop():
+    codes = kansai_codes()
+
+    start = time.perf_counter()
+    loop_meshcode_to_index(codes)
+    [data_service.meshcode_to_coordinate(code) for code in codes]
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    data_service.parse_meshcodes(codes)
+    vectorized_time = time.perf_counter() - start
+
+    print(f"\n{len(codes)} meshes: loop {loop_time * 1000:.1f}ms, "
+          f"vectorized {vectorized_time * 1000:.1f}ms")
+    assert vectorized_time * 3 < loop_time
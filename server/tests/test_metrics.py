@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+Prometheus 形式メトリクス（services.metrics_service / GET /metrics）のテスト
+"""
+import os
+import re
+import sys
+
+import pytest
+from flask import Flask, jsonify
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from services.cache_service import CacheService
+from services.instrumentation import (
+    Histogram, get_counters, get_request_stats, get_stage_stats, span
+)
+from services.metrics_service import MetricsService
+from services.session_service import SessionService
+from src.api.controllers.metrics_controller import MetricsController
+from src.api.routes.instrumentation_routes import instrumentation_bp
+from src.api.routes.metrics_routes import create_metrics_blueprint
+
+SAMPLE_LINE = re.compile(r'^soil_rainfall_[a-z_]+(\{[^}]*\})? (-?[0-9.e+-]+|NaN|\+Inf)$')
+
+
+def parse(text: str) -> dict:
+    """{'名前{ラベル}': 値}（コメント行以外はすべて書式に合うこと）"""
+    samples = {}
+    for line in text.splitlines():
+        if line.startswith("#"):
+            continue
+        assert SAMPLE_LINE.match(line), line
+        name, value = line.rsplit(" ", 1)
+        samples[name] = float(value)
+    return samples
+
+
+@pytest.fixture
+def reset_stats():
+    for stats in (get_stage_stats(), get_request_stats(), get_counters()):
+        stats.reset()
+    yield
+    for stats in (get_stage_stats(), get_request_stats(), get_counters()):
+        stats.reset()
+
+
+def test_histogram_buckets_are_cumulative_and_inclusive():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value)
+
+    assert histogram.cumulative() == [(0.1, 2), (1.0, 3), (float("inf"), 4)]
+    assert histogram.count == 4
+    assert histogram.sum == pytest.approx(2.65)
+
+
+def test_render_stages_decode_cache_and_sessions(tmp_path, reset_stats):
+    cache_service = CacheService(cache_dir=str(tmp_path / "cache"))
+    cache_service.set_cached_result("swi_a_guid_b", {"prefectures": {}},
+                                    "2025-01-01T00:00:00", "2025-01-01T00:00:00")
+    assert cache_service.get_cached_result("swi_a_guid_b") is not None
+    assert cache_service.get_cached_result("swi_x_guid_y") is None
+
+    session_service = SessionService(spill_dir=str(tmp_path / "sessions"))
+    session_service.create_session({}, "2025-01-01T00:00:00", "2025-01-01T00:00:00",
+                                    "2025-01-01T00:00:00")
+
+    get_stage_stats().record("decode.swi", 0.5)
+    get_counters().increment("decode_grid_points", 1000, kind="swi")
+    with span("calc.mesh"):
+        pass
+
+    samples = parse(MetricsService(session_service, cache_service).render())
+
+    assert samples['soil_rainfall_stage_duration_seconds_bucket{stage="decode.swi",le="0.5"}'] == 1
+    assert samples['soil_rainfall_stage_duration_seconds_bucket{stage="decode.swi",le="0.25"}'] == 0
+    assert samples['soil_rainfall_stage_duration_seconds_count{stage="calc.mesh"}'] == 1
+    assert samples['soil_rainfall_decode_grid_points_total{kind="swi"}'] == 1000
+    assert samples['soil_rainfall_decode_grid_points_per_second{kind="swi"}'] == 2000
+    assert samples['soil_rainfall_cache_hits_total'] == 1
+    assert samples['soil_rainfall_cache_misses_total'] == 1
+    assert samples['soil_rainfall_cache_hit_ratio'] == 0.5
+    assert samples['soil_rainfall_cache_entries'] == 1
+    assert samples['soil_rainfall_sessions'] == 1
+    assert samples['soil_rainfall_session_spilled_bytes'] == 0
+    if sys.platform.startswith("linux"):
+        assert samples['soil_rainfall_process_resident_memory_bytes'] > 0
+
+
+def test_cache_hit_and_miss_counts_are_exact_under_concurrency(tmp_path, monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+
+    cache_service = CacheService(cache_dir=str(tmp_path))
+    # 読み込み本体は省略し、カウンター更新の競合だけを試す
+    monkeypatch.setattr(cache_service, "_read_cached_result",
+                        lambda key: {} if key == "hit" else None)
+    keys = ["hit", "miss"] * 5000
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(cache_service.get_cached_result, keys))
+
+    stats = cache_service.get_cache_stats()
+    assert (stats["hit_count"], stats["miss_count"]) == (5000, 5000)
+    assert stats["hit_ratio"] == 0.5
+
+
+def test_metrics_endpoint_reports_request_latency_per_route(tmp_path, reset_stats):
+    app = Flask(__name__)
+    app.register_blueprint(instrumentation_bp)
+    metrics_service = MetricsService(cache_service=CacheService(cache_dir=str(tmp_path)))
+    app.register_blueprint(create_metrics_blueprint(MetricsController(metrics_service)))
+
+    @app.route('/api/session/<session_id>')
+    def session_info(session_id):
+        return jsonify({"status": "success"})
+
+    client = app.test_client()
+    client.get('/api/session/a')
+    client.get('/api/session/b')
+    client.get('/not-found')
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain; version=0.0.4")
+    text = response.get_data(as_text=True)
+    assert "# TYPE soil_rainfall_http_request_duration_seconds histogram" in text
+
+    samples = parse(text)
+    # パスパラメータではなくルート定義ごとに集計
+    assert samples['soil_rainfall_http_request_duration_seconds_count'
+                   '{method="GET",route="/api/session/<session_id>",status="200"}'] == 2
+    assert samples['soil_rainfall_http_request_duration_seconds_count'
+                   '{method="GET",route="unmatched",status="404"}'] == 1
+    # セッションサービスなしではセッション統計を省略
+    assert 'soil_rainfall_sessions' not in samples
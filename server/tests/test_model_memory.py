@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+データモデルのメモリ使用量（メッシュあたりのバイト数）のテスト
+
+計算済みメッシュ（SWI・雨量・危険度の全時系列を持つ）を tracemalloc で計測する。
+数値は pytest -s で表示される。
+"""
+import os
+import sys
+import tracemalloc
+
+import pytest
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from models import Area, GuidanceTimeSeries, Mesh, Risk, SwiTimeSeries
+
+FTS_3H = list(range(3, 79, 3))
+FTS_1H = list(range(1, 79))
+# __slots__ 化前は約 39.7KB/メッシュ
+MAX_BYTES_PER_MESH = 30000
+
+
+def make_mesh(i: int) -> Mesh:
+    """計算後と同じ長さの時系列を持つメッシュ"""
+    return Mesh(
+        area_name="A", code=str(52350000 + i), lat=35.0 + i * 1e-4, lon=135.0, x=i, y=i,
+        advisary_bound=100, warning_bound=150, dosyakei_bound=999,
+        swi=[SwiTimeSeries(ft=ft, value=float(i + ft)) for ft in [0] + FTS_3H],
+        swi_hourly=[SwiTimeSeries(ft=ft, value=float(i + ft)) for ft in [0] + FTS_1H],
+        rain_1hour=[GuidanceTimeSeries(ft=ft, value=float(i + ft)) for ft in FTS_1H],
+        rain_1hour_max=[GuidanceTimeSeries(ft=ft, value=float(i + ft)) for ft in FTS_3H],
+        rain_3hour=[GuidanceTimeSeries(ft=ft, value=float(i + ft)) for ft in FTS_3H],
+        risk_hourly=[Risk(ft=ft, value=0) for ft in [0] + FTS_1H],
+        risk_3hour_max=[Risk(ft=ft, value=0) for ft in FTS_3H])
+
+
+def bytes_per_mesh(mesh_count: int = 2000) -> float:
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        areas = [Area(name=f"a{j}", meshes=[make_mesh(j * 100 + i) for i in range(100)])
+                 for j in range(mesh_count // 100)]
+        used = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    assert len(areas) * 100 == mesh_count
+    return used / mesh_count
+
+
+@pytest.mark.skipif(sys.version_info < (3, 10), reason="dataclass(slots=True) は Python 3.10 以降")
+def test_models_have_no_instance_dict():
+    mesh = make_mesh(0)
+    for obj in (mesh, mesh.swi[0], mesh.rain_3hour[0], mesh.risk_hourly[0],
+                Area(name="A", meshes=[mesh])):
+        assert not hasattr(obj, "__dict__")
+        with pytest.raises(AttributeError):
+            obj.unknown_attribute = 1
+
+
+@pytest.mark.skipif(sys.version_info < (3, 10), reason="dataclass(slots=True) は Python 3.10 以降")
+def test_bytes_per_mesh_within_budget():
+    measured = bytes_per_mesh()
+    print(f"\nメッシュあたりのメモリ: {measured:.0f} bytes")
+    assert measured < MAX_BYTES_PER_MESH
@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+"""
+RainfallAdjustmentService（[mesh, ft] 比率行列による雨量調整）のテスト
+"""
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from models import (
+    BaseInfo, GuidanceTimeSeries, Mesh, Area, Prefecture, SecondarySubdivision
+)
+from services.calculation_service import CalculationService
+from services.rainfall_adjustment_service import RainfallAdjustmentService
+
+FTS = [3, 6, 9]
+calc = CalculationService()
+
+
+def make_mesh(code: str, lat: float, lon: float, rain) -> Mesh:
+    rain_3h = [GuidanceTimeSeries(ft=ft, value=float(v)) for ft, v in zip(FTS, rain)]
+    rain_1h_max = [GuidanceTimeSeries(ft=ft, value=float(v) / 2) for ft, v in zip(FTS, rain)]
+    return Mesh(
+        area_name="", code=code, lat=lat, lon=lon, x=0, y=0,
+        advisary_bound=80, warning_bound=110, dosyakei_bound=140,
+        swi=[], swi_hourly=[], rain_1hour=calc.calc_hourly_rain(rain_3h, rain_1h_max),
+        rain_1hour_max=rain_1h_max, rain_3hour=rain_3h,
+        risk_hourly=[], risk_3hour_max=[])
+
+
+def make_prefectures():
+    """市町村 A, B（境界メッシュ m2 を共有）と C、二次細分「南部」= A + B"""
+    def a_meshes():
+        return [make_mesh("m0", 35.95, 135.05, [10, 0, 4]),
+                make_mesh("m1", 35.85, 135.15, [20, 6, 0]),
+                make_mesh("m2", 35.75, 135.25, [5, 3, 8])]
+
+    area_a = Area(name="A", meshes=a_meshes())
+    area_b = Area(name="B", meshes=[make_mesh("m2", 35.75, 135.25, [5, 3, 8]),
+                                    make_mesh("m3", 35.65, 135.35, [8, 9, 2])])
+    area_c = Area(name="C", meshes=[make_mesh("m4", 35.55, 135.45, [1, 1, 1])])
+    prefecture = Prefecture(
+        name="滋賀県", code="shiga", areas=[area_a, area_b, area_c],
+        area_min_x=0, area_max_y=0,
+        secondary_subdivisions=[SecondarySubdivision(name="南部", areas=[area_a, area_b])])
+    return [prefecture]
+
+
+def reference_ratios(area_adjustments, prefectures):
+    """従来のメッシュ × FT ループによる比率計算（市町村キーのみ）"""
+    ratios = {}
+    for prefecture in prefectures:
+        for area in prefecture.areas:
+            key = f"{prefecture.name}_{area.name}"
+            if key not in area_adjustments:
+                continue
+            for ft, value in area_adjustments[key].items():
+                original = max(
+                    [p.value for m in area.meshes for p in m.rain_3hour if p.ft == ft] + [0.0])
+                ratio = value / original if original > 0 else 1.0
+                for mesh in area.meshes:
+                    mesh_ratios = ratios.setdefault(mesh.code, {})
+                    mesh_ratios[ft] = max(mesh_ratios.get(ft, ratio), ratio)
+    return ratios
+
+
+def test_ratio_matrix_matches_reference():
+    prefectures = make_prefectures()
+    service = RainfallAdjustmentService()
+    adjustments = {
+        "滋賀県_A": {3: 40.0, 6: 3.0, 9: 2.0},
+        "滋賀県_B": {3: 24.0, 6: 9.0}
+    }
+
+    mesh_ratios = service._calculate_mesh_ratios(adjustments, prefectures, {})
+    expected = reference_ratios(adjustments, prefectures)
+
+    assert mesh_ratios.mesh_codes == ["m0", "m1", "m2", "m3", "m4"]
+    for code in mesh_ratios.mesh_codes:
+        row = mesh_ratios.ratios[mesh_ratios.mesh_index[code]]
+        want = [expected.get(code, {}).get(ft, 1.0) for ft in FTS]
+        np.testing.assert_allclose(row, want)
+
+    # 境界メッシュ m2 は A（20→40 = 2.0）と B（8→24 = 3.0）の大きい方
+    assert mesh_ratios.get("m2")[3] == pytest.approx(3.0)
+    assert "m4" not in {mesh_ratios.mesh_codes[r] for r in mesh_ratios.adjusted_rows}
+
+
+def test_subdivision_key_and_mesh_adjustment():
+    prefectures = make_prefectures()
+    service = RainfallAdjustmentService()
+
+    mesh_ratios = service._calculate_mesh_ratios({"滋賀県_南部": {6: 18.0}}, prefectures, {})
+    assert sorted(mesh_ratios.mesh_codes[r] for r in mesh_ratios.adjusted_rows) == \
+        ["m0", "m1", "m2", "m3"]
+
+    service.adjust_mesh_rainfall_by_ratios(prefectures, mesh_ratios)
+
+    area_a, area_b, area_c = prefectures[0].areas
+    m1 = area_a.meshes[1]
+    assert [p.value for p in m1.rain_3hour] == [20.0, 12.0, 0.0]
+    assert [p.value for p in m1.rain_1hour_max] == [10.0, 6.0, 0.0]
+    # 1時間雨量は FT4〜6 の3時間期間に比率2を適用
+    assert [p.value for p in m1.rain_1hour] == [5.0, 10.0, 5.0, 3.0, 6.0, 3.0, 0.0, 0.0, 0.0]
+    # 境界メッシュは A, B それぞれの Mesh が1回ずつ調整される
+    assert area_a.meshes[2].rain_3hour[1].value == 6.0
+    assert area_b.meshes[0].rain_3hour[1].value == 6.0
+    assert [p.value for p in area_c.meshes[0].rain_3hour] == [1.0, 1.0, 1.0]
+
+
+def test_guidance_adjustment_does_not_modify_original():
+    prefectures = make_prefectures()
+    service = RainfallAdjustmentService()
+    base_info = BaseInfo(
+        initial_date=datetime(2023, 6, 2), grid_num=10 * 10, x_num=10, y_num=10,
+        s_lat=36000000, s_lon=135000000, e_lat=35000000, e_lon=136000000,
+        d_lat=100000, d_lon=100000)
+    guidance = {
+        "base_info": base_info,
+        "data": [{"ft": ft, "value": [1.0] * 100} for ft in FTS],
+        "data_3h": [{"ft": ft, "value": [1.0] * 100} for ft in FTS]
+    }
+
+    adjusted = service.adjust_guidance_data_by_area_ratios(
+        guidance, {"滋賀県_C": {9: 3.0}}, prefectures)
+
+    index = calc.get_data_num(35.55, 135.45, base_info) - 1
+    assert adjusted["data_3h"][2]["value"][index] == 3.0
+    assert guidance["data_3h"][2]["value"][index] == 1.0
+    # 調整のないFTは元データを共有
+    assert adjusted["data_3h"][0] is guidance["data_3h"][0]
+    assert adjusted["base_info"] is base_info
+
+
+def reference_group_rainfall(prefectures):
+    """従来の市町村・二次細分ごとのメッシュ × FT ループによる最大雨量"""
+    def series(areas):
+        return [{"ft": ft, "value": round(max(
+            [p.value for a in areas for m in a.meshes for p in m.rain_3hour if p.ft == ft]
+            + [0.0]))} for ft in FTS]
+
+    area_rainfall = {}
+    subdivision_rainfall = {}
+    for prefecture in prefectures:
+        for area in prefecture.areas:
+            area_rainfall[f"{prefecture.name}_{area.name}"] = series([area])
+        for subdivision in prefecture.secondary_subdivisions:
+            subdivision_rainfall[f"{prefecture.name}_{subdivision.name}"] = \
+                series(subdivision.areas)
+    return {"area_rainfall": area_rainfall, "subdivision_rainfall": subdivision_rainfall}
+
+
+def result_prefectures(prefectures):
+    """計算結果JSON形式の prefectures（集約に使うフィールドのみ）"""
+    return {
+        prefecture.code: {
+            "name": prefecture.name,
+            "areas": [{
+                "name": area.name,
+                "meshes": [{
+                    "code": mesh.code,
+                    "rain_timeline": [{"ft": p.ft, "value": p.value} for p in mesh.rain_3hour]
+                } for mesh in area.meshes]
+            } for area in prefecture.areas],
+            "secondary_subdivisions": [{
+                "name": subdivision.name,
+                "area_names": [area.name for area in subdivision.areas]
+            } for subdivision in prefecture.secondary_subdivisions]
+        }
+        for prefecture in prefectures
+    }
+
+
+def test_group_rainfall_matches_reference():
+    prefectures = make_prefectures()
+    prefectures[0].areas.append(Area(name="D", meshes=[]))
+    service = RainfallAdjustmentService()
+    expected = reference_group_rainfall(prefectures)
+
+    assert service.calc_group_rainfall(prefectures) == expected
+    assert service.calc_group_rainfall_from_result(result_prefectures(prefectures)) == expected
+    assert expected["area_rainfall"]["滋賀県_D"] == [{"ft": ft, "value": 0} for ft in FTS]
+    assert [p["value"] for p in expected["subdivision_rainfall"]["滋賀県_南部"]] == [20, 9, 8]
+
+    guidance = {"data_3h": [{"ft": ft} for ft in reversed(FTS)]}
+    assert service.extract_area_rainfall_timeseries(prefectures, guidance) == \
+        expected["area_rainfall"]
+    assert service.extract_subdivision_rainfall_timeseries(prefectures, guidance) == \
+        expected["subdivision_rainfall"]
+
+
+def test_rainfall_forecast_is_served_from_cached_aggregates(tmp_path):
+    from flask import Flask
+    from services.cache_service import CacheService
+    from src.api.controllers.rainfall_controller import RainfallController
+
+    prefectures = make_prefectures()
+    service = RainfallAdjustmentService()
+    cache_service = CacheService(cache_dir=str(tmp_path))
+    swi_initial = "2025-10-16T12:00:00"
+    cache_key = cache_service.generate_cache_key(swi_initial, swi_initial)
+
+    controller = RainfallController()
+    controller.cache_service = cache_service
+    # キャッシュから返せる場合は GRIB2 を取得・解析しない
+    controller.grib2_service = None
+    app = Flask(__name__)
+
+    def get_forecast():
+        with app.test_request_context(
+                f"/api/rainfall-forecast?swi_initial={swi_initial}"
+                f"&guidance_initial={swi_initial}"):
+            response = controller.get_rainfall_forecast()
+        return response.get_json()
+
+    # 集約導入前のキャッシュ: 結果JSONから計算して集約ファイルを追加する
+    cache_service.set_cached_result(
+        cache_key, {"prefectures": result_prefectures(prefectures)},
+        swi_initial, swi_initial)
+    assert cache_service.get_rainfall_aggregates(cache_key) is None
+    data = get_forecast()
+    expected = service.calc_group_rainfall(prefectures)
+    assert data["status"] == "success"
+    assert data["area_rainfall"] == expected["area_rainfall"]
+    assert data["subdivision_rainfall"] == expected["subdivision_rainfall"]
+    assert cache_service.get_rainfall_aggregates(cache_key) == expected
+
+    # 集約付きで保存された結果: 結果本体は読まずに集約ファイルを返す
+    cache_service.invalidate_cache(cache_key)
+    assert not cache_service._get_rainfall_path(cache_key).exists()
+    cache_service.set_cached_result(
+        cache_key, {"prefectures": {}, "rainfall_aggregates": expected},
+        swi_initial, swi_initial)
+    cache_service.get_cached_result = None
+    assert get_forecast()["area_rainfall"] == expected["area_rainfall"]
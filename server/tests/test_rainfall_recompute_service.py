@@ -0,0 +1,550 @@
+# -*- coding: utf-8 -*-
+"""
+RainfallRecomputeService（雨量調整の差分再計算）のテスト
+
+スカラー版 CalculationService で作った計算結果を基準に、
+ベクトル化した再計算が同一の値を返すことを確認する。
+"""
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from models import BaseInfo, GuidanceTimeSeries, SwiTimeSeries, Mesh, Area, Prefecture
+from services.calculation_service import CalculationService
+from services.session_index import SessionIndex
+from services.rainfall_recompute_service import (
+    RainfallRecomputeService, initial_tanks_from_swi_grib2,
+    collect_initial_tanks, encode_initial_tanks, decode_initial_tanks
+)
+
+FTS_3H = list(range(3, 79, 3))
+calc = CalculationService()
+
+
+def scalar_mesh(code: str, tanks, rain_3h, rain_1h_max, bounds) -> dict:
+    """スカラー版 CalculationService でメッシュ辞書を作成（参照実装）"""
+    first, second, third = tanks
+    initial_swi = first + second + third
+    r3 = [GuidanceTimeSeries(ft=ft, value=v) for ft, v in zip(FTS_3H, rain_3h)]
+    r1 = [GuidanceTimeSeries(ft=ft, value=v) for ft, v in zip(FTS_3H, rain_1h_max)]
+
+    rain_1h = calc.calc_hourly_rain(r3, r1)
+    swi_hourly = calc.calc_swi_hourly(initial_swi, first, second, third, rain_1h)
+    risk_hourly = calc.calc_hourly_risk(swi_hourly, *bounds)
+    risk_3h_max = calc.calc_3hour_max_risk_from_hourly(risk_hourly)
+
+    swi_3h = [{"ft": 0, "value": initial_swi}]
+    s = (first, second, third)
+    for point in r3:
+        s = calc.calc_tunk_model(*s, 3, point.value)
+        swi_3h.append({"ft": point.ft, "value": sum(s)})
+
+    def timeline(items):
+        return [{"ft": item.ft, "value": item.value} for item in items]
+
+    return {
+        "code": code, "lat": 35.0, "lon": 135.0,
+        "advisary_bound": bounds[0], "warning_bound": bounds[1],
+        "dosyakei_bound": bounds[2],
+        "swi_timeline": swi_3h,
+        "swi_hourly_timeline": timeline(swi_hourly),
+        "rain_timeline": timeline(r3),
+        "rain_1hour_timeline": timeline(rain_1h),
+        "rain_1hour_max_timeline": timeline(r1),
+        "risk_hourly_timeline": timeline(risk_hourly),
+        "risk_3hour_max_timeline": timeline(risk_3h_max)
+    }
+
+
+def make_result(seed: int = 0):
+    """
+    2市町村（A, B）+ 境界メッシュ1つ + 別の二次細分の市町村Cから成る計算結果
+
+    Returns:
+        (prefectures, {mesh_code: (tanks, rain_3h, rain_1h_max, bounds)})
+    """
+    rng = np.random.default_rng(seed)
+    inputs = {}
+
+    def mesh(code):
+        tanks = (float(rng.uniform(0, 40)), float(rng.uniform(0, 30)), float(rng.uniform(0, 60)))
+        rain_3h = rng.uniform(0, 30, len(FTS_3H)).round(1)
+        rain_1h_max = (rain_3h * rng.uniform(0.3, 1.0, len(FTS_3H))).round(1)
+        bounds = (80, 110, 140)
+        inputs[code] = (tanks, rain_3h.tolist(), rain_1h_max.tolist(), bounds)
+        return scalar_mesh(code, *inputs[code])
+
+    border = mesh("B0")
+    areas = [
+        {"name": "A", "meshes": [mesh("A0"), mesh("A1"), border]},
+        {"name": "B", "meshes": [border, mesh("B1")]},
+        {"name": "C", "meshes": [mesh("C0"), mesh("C1")]}
+    ]
+    prefectures = {
+        "shiga": {
+            "name": "滋賀県", "code": "shiga", "areas": areas,
+            "secondary_subdivisions": [
+                {"name": "南部", "area_names": ["A", "B"]},
+                {"name": "北部", "area_names": ["C"]}
+            ]
+        }
+    }
+    return prefectures, inputs
+
+
+def build_base(service, prefectures, inputs):
+    index = SessionIndex.build(prefectures)
+    tanks = np.array([inputs[code][0] for code in index.mesh_codes])
+    return service.get_base("result", lambda: prefectures, index, lambda lats, lons: tanks)
+
+
+def mesh_by_code(result) -> dict:
+    return {
+        mesh["code"]: mesh
+        for pref in result["prefectures"].values()
+        for area in pref["areas"]
+        for mesh in area["meshes"]
+    }
+
+
+def test_recompute_matches_scalar_model():
+    prefectures, inputs = make_result()
+    service = RainfallRecomputeService()
+    base = build_base(service, prefectures, inputs)
+
+    original_max = base.group_rain_max["滋賀県_C"]
+    result = service.recompute(base, {"滋賀県_C": {3: float(original_max[0]) * 2, 6: 0.0}})
+
+    meshes = mesh_by_code(result)
+    assert sorted(meshes) == ["C0", "C1"]
+    for code, mesh in meshes.items():
+        tanks, rain_3h, rain_1h_max, bounds = inputs[code]
+        ratio = np.ones(len(FTS_3H))
+        ratio[0] = 2.0
+        ratio[1] = 0.0
+        expected = scalar_mesh(
+            code, tanks,
+            (np.array(rain_3h) * ratio).tolist(),
+            (np.array(rain_1h_max) * ratio).tolist(),
+            bounds)
+        for key in ("swi_timeline", "rain_timeline", "risk_3hour_max_timeline"):
+            assert [p["ft"] for p in mesh[key]] == [p["ft"] for p in expected[key]], key
+            np.testing.assert_allclose(
+                [p["value"] for p in mesh[key]],
+                [p["value"] for p in expected[key]], rtol=1e-12, err_msg=key)
+
+    area = result["prefectures"]["shiga"]["areas"][0]
+    expected_risk = [
+        max(calc_level(m, t) for m in area["meshes"])
+        for t in range(len(FTS_3H) + 1)
+    ]
+    assert [p["value"] for p in area["risk_timeline"]] == expected_risk
+    assert [s["name"] for s in result["prefectures"]["shiga"]["secondary_subdivisions"]] == ["北部"]
+
+
+def calc_level(mesh: dict, t: int) -> int:
+    swi = mesh["swi_timeline"][t]["value"]
+    if swi >= mesh["dosyakei_bound"]:
+        return 4
+    if swi >= mesh["warning_bound"]:
+        return 3
+    if swi >= mesh["advisary_bound"]:
+        return 2
+    return 0
+
+
+def test_unchanged_values_and_boundary_mesh():
+    prefectures, inputs = make_result()
+    service = RainfallRecomputeService()
+    base = build_base(service, prefectures, inputs)
+
+    # 元の値のままなら再計算対象なし
+    unchanged = {
+        key: {ft: float(v) for ft, v in zip(FTS_3H, base.group_rain_max[key])}
+        for key in ("滋賀県_A", "滋賀県_B")
+    }
+    assert service.recompute(base, unchanged)["adjusted_mesh_count"] == 0
+
+    # 丸めた値は /api/rainfall-adjustment と同じく調整として扱う
+    original = float(base.group_rain_max["滋賀県_C"][0])
+    rounded = float(np.round(original)) if original != np.round(original) else original + 1.0
+    result = service.recompute(base, {"滋賀県_C": {3: rounded}})
+    assert result["adjusted_mesh_count"] == 2
+    assert mesh_by_code(result)["C0"]["rain_timeline"][0]["value"] == pytest.approx(
+        inputs["C0"][1][0] * rounded / original)
+
+    # 境界メッシュは A, B の比率の大きい方
+    a_max = float(base.group_rain_max["滋賀県_A"][0])
+    b_max = float(base.group_rain_max["滋賀県_B"][0])
+    result = service.recompute(base, {
+        "滋賀県_A": {3: a_max * 1.5},
+        "滋賀県_B": {3: b_max * 3.0}
+    })
+    meshes = mesh_by_code(result)
+    assert sorted(meshes) == ["A0", "A1", "B0", "B1"]
+    assert meshes["B0"]["rain_timeline"][0]["value"] == pytest.approx(inputs["B0"][1][0] * 3.0)
+    assert meshes["A0"]["rain_timeline"][0]["value"] == pytest.approx(inputs["A0"][1][0] * 1.5)
+
+
+def test_subdivision_key_adjusts_member_areas():
+    prefectures, inputs = make_result()
+    service = RainfallRecomputeService()
+    base = build_base(service, prefectures, inputs)
+
+    original = float(base.group_rain_max["滋賀県_南部"][2])
+    result = service.recompute(base, {"滋賀県_南部": {9: original * 0.5}})
+
+    assert sorted(mesh_by_code(result)) == ["A0", "A1", "B0", "B1"]
+    assert [a["name"] for a in result["prefectures"]["shiga"]["areas"]] == ["A", "B"]
+
+
+def test_base_is_built_once_per_result():
+    prefectures, inputs = make_result()
+    service = RainfallRecomputeService()
+    calls = []
+    index = SessionIndex.build(prefectures)
+
+    def loader(lats, lons):
+        calls.append(len(lats))
+        return np.array([inputs[code][0] for code in index.mesh_codes])
+
+    def load_prefectures():
+        calls.append("prefectures")
+        return prefectures
+
+    first = service.get_base("result", load_prefectures, index, loader)
+    second = service.get_base("result", load_prefectures, index, loader)
+    assert first is second
+    assert calls == ["prefectures", index.mesh_count]
+
+
+def test_base_keeps_no_reference_to_result_dicts():
+    prefectures, inputs = make_result()
+    service = RainfallRecomputeService()
+    base = build_base(service, prefectures, inputs)
+    expected = service.recompute(base, {"滋賀県_C": {3: 99.0}})
+
+    def reachable_dicts(value):
+        if isinstance(value, dict):
+            yield value
+            for item in value.values():
+                yield from reachable_dicts(item)
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                yield from reachable_dicts(item)
+
+    # メッシュ・市町村の辞書（計算結果）を保持しない
+    for value in reachable_dicts(vars(base)):
+        assert not {"meshes", "swi_timeline"} & value.keys()
+
+    # 計算結果が解放されても同じ応答を作れる
+    prefectures.clear()
+    assert service.recompute(base, {"滋賀県_C": {3: 99.0}}) == expected
+
+
+def test_initial_tanks_match_get_data_num():
+    base_info = BaseInfo(
+        initial_date=datetime(2023, 6, 2), grid_num=20 * 10, x_num=20, y_num=10,
+        s_lat=36000000, s_lon=135000000, e_lat=35000000, e_lon=137000000,
+        d_lat=100000, d_lon=100000)
+    n = base_info.grid_num
+    swi_grib2 = {
+        "base_info": base_info,
+        "swi": [1000 + i for i in range(n)],
+        "first_tunk": [100 + i % 7 for i in range(n)],
+        "second_tunk": [200 + i % 5 for i in range(n)]
+    }
+    lats = np.array([35.95, 35.51, 35.0501, 35.3333])
+    lons = np.array([135.01, 135.55, 136.95, 136.1234])
+
+    tanks = initial_tanks_from_swi_grib2(swi_grib2, lats, lons)
+
+    for i, (lat, lon) in enumerate(zip(lats, lons)):
+        idx = calc.get_data_num(float(lat), float(lon), base_info) - 1
+        swi = swi_grib2["swi"][idx] / 10
+        first = swi_grib2["first_tunk"][idx] / 10
+        second = swi_grib2["second_tunk"][idx] / 10
+        assert tanks[i].tolist() == [first, second, swi - first - second]
+
+
+def test_recompute_whole_municipality():
+    """市町村1つ分（数百メッシュ）の再計算（所要時間は benchmarks/bench_recompute.py で計測）"""
+    rng = np.random.default_rng(1)
+    meshes = []
+    inputs = {}
+    for i in range(400):
+        code = f"M{i:04d}"
+        tanks = tuple(rng.uniform(0, 40, 3).tolist())
+        rain_3h = rng.uniform(0, 30, len(FTS_3H)).tolist()
+        rain_1h_max = (np.array(rain_3h) * 0.5).tolist()
+        inputs[code] = (tanks, rain_3h, rain_1h_max, (80, 110, 140))
+        meshes.append(scalar_mesh(code, *inputs[code]))
+    prefectures = {"shiga": {"name": "滋賀県", "code": "shiga",
+                             "areas": [{"name": "A", "meshes": meshes}],
+                             "secondary_subdivisions": []}}
+
+    service = RainfallRecomputeService()
+    base = build_base(service, prefectures, inputs)
+    adjustment = {"滋賀県_A": {ft: 50.0 for ft in FTS_3H}}
+
+    result = service.recompute(base, adjustment)
+
+    assert result["adjusted_mesh_count"] == 400
+    assert len(mesh_by_code(result)) == 400
+
+
+def test_session_rainfall_adjustment_endpoint():
+    from flask import Flask
+    sys.path.append(os.path.join(project_root, 'src'))
+    from services.session_service import SessionService
+    from api.controllers.session_controller import SessionController
+    from api.routes.session_routes import create_session_blueprint
+
+    prefectures, inputs = make_result()
+    index = SessionIndex.build(prefectures)
+    session_service = SessionService()
+    session_id = session_service.create_session(
+        prefectures, "2023-06-02T00:00:00", "2023-06-02T00:00:00", 1.0,
+        result_key="result",
+        initial_tanks=np.array([inputs[code][0] for code in index.mesh_codes]))
+
+    # 初期タンク値はセッションのインデックスから取得される（GRIB2 は読まない）
+    service = RainfallRecomputeService()
+    service.load_initial_tanks_from_grib2 = None
+
+    app = Flask(__name__)
+    app.register_blueprint(
+        create_session_blueprint(SessionController(session_service, service)),
+        url_prefix='/api')
+    client = app.test_client()
+
+    target = max(inputs["C0"][1][0], inputs["C1"][1][0]) * 2
+    response = client.post(
+        f"/api/session/{session_id}/rainfall-adjustment",
+        json={"area_adjustments": {"滋賀県_北部": {"3": target}}})
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["adjusted"] is True
+    assert data["adjusted_mesh_count"] == 2
+    assert sorted(mesh_by_code(data)) == ["C0", "C1"]
+    assert session_service.get_session_state(session_id)["rainfall_adjustments"] == {
+        "area_adjustments": {"滋賀県_北部": {"3": target}}}
+
+    assert client.post(
+        f"/api/session/{session_id}/rainfall-adjustment", json={}).status_code == 400
+    # 不正なFT・値は 500 ではなく 400（該当キーを示す）
+    for body, key in (
+        ({"area_adjustments": {"滋賀県_A": {"x": 1.0}}}, "滋賀県_A"),
+        ({"area_adjustments": {"滋賀県_A": {"3": "abc"}}}, "滋賀県_A.3"),
+        ({"area_adjustments": {"滋賀県_A": [1.0]}}, "滋賀県_A"),
+        ({"subdivision_adjustments": "x"}, "subdivision_adjustments"),
+    ):
+        response = client.post(f"/api/session/{session_id}/rainfall-adjustment", json=body)
+        assert response.status_code == 400
+        assert key in response.get_json()["error"]
+    assert client.post(
+        "/api/session/missing/rainfall-adjustment",
+        json={"area_adjustments": {"滋賀県_A": {"3": 1.0}}}).status_code == 404
+
+
+def test_adjustments_do_not_reload_spilled_result(tmp_path):
+    from flask import Flask
+    sys.path.append(os.path.join(project_root, 'src'))
+    from services.session_service import SessionService
+    from services.sqlite_session_service import SqliteSessionService
+    from api.controllers.session_controller import SessionController
+    from api.routes.session_routes import create_session_blueprint
+
+    prefectures, inputs = make_result()
+    index = SessionIndex.build(prefectures)
+    tanks = np.array([inputs[code][0] for code in index.mesh_codes])
+    body = {"area_adjustments": {"滋賀県_C": {"3": 99.0}}}
+    scenarios = {"scenarios": [{"scale": {"滋賀県_A": 2.0}}]}
+
+    spilling = SessionService(max_resident_mb=1e-6, spill_dir=str(tmp_path / "memory"))
+    # 別ワーカー（計算結果を共有ファイルからのみ読める）
+    writer = SqliteSessionService(store_dir=str(tmp_path / "sqlite"))
+    worker = SqliteSessionService(store_dir=str(tmp_path / "sqlite"), max_resident_mb=1e-6)
+
+    cases = (
+        (spilling, spilling, spilling.enforce_memory_budget),
+        (worker, writer, worker._enforce_local_budget),
+    )
+    for session_service, creator, spill in cases:
+        session_id = creator.create_session(
+            make_result()[0], "2023-06-02T00:00:00", "2023-06-02T00:00:00", 1.0,
+            result_key="result", initial_tanks=tanks)
+
+        app = Flask(__name__)
+        app.register_blueprint(create_session_blueprint(
+            SessionController(session_service, RainfallRecomputeService())), url_prefix='/api')
+        client = app.test_client()
+
+        for _ in range(3):
+            # 毎回、計算結果がメモリにない状態から要求する
+            spill()
+            assert client.post(f"/api/session/{session_id}/rainfall-adjustment",
+                               json=body).status_code == 200
+            spill()
+            assert client.post(f"/api/session/{session_id}/rainfall-scenarios",
+                               json=scenarios).status_code == 200
+        # 読み戻しはベース構築時の1回のみ（sqlite ワーカーは初回読み込み）
+        assert session_service.reload_count == 1
+
+
+def make_mesh(code: str, tanks=None) -> Mesh:
+    return Mesh(
+        area_name="A", code=code, lat=35.0, lon=135.0, x=0, y=0,
+        advisary_bound=80, warning_bound=110, dosyakei_bound=140,
+        swi=[], swi_hourly=[], rain_1hour=[], rain_1hour_max=[],
+        rain_3hour=[], risk_hourly=[], risk_3hour_max=[],
+        initial_tanks=tanks)
+
+
+def test_initial_tanks_are_collected_in_index_order():
+    border = make_mesh("B0", (1.5, 2.5, 3.5))
+    prefectures = [Prefecture(name="滋賀県", code="shiga", area_min_x=0, area_max_y=0, areas=[
+        Area(name="A", meshes=[make_mesh("A0", (10.1, 20.2, 30.3)), border]),
+        Area(name="B", meshes=[border, make_mesh("B1")])
+    ])]
+
+    tanks = collect_initial_tanks(prefectures)
+    assert tanks.dtype == np.float32
+    np.testing.assert_array_equal(
+        tanks, np.array([[10.1, 20.2, 30.3], [1.5, 2.5, 3.5], [0, 0, 0]], dtype=np.float32))
+
+    decoded = decode_initial_tanks(encode_initial_tanks(tanks))
+    np.testing.assert_array_equal(decoded, tanks)
+    assert decode_initial_tanks(None) is None
+
+
+def test_index_keeps_initial_tanks_across_save_and_load(tmp_path):
+    prefectures, inputs = make_result()
+    codes = SessionIndex.build(prefectures).mesh_codes
+    tanks = np.array([inputs[code][0] for code in codes])
+
+    index = SessionIndex.build(prefectures, tanks)
+    assert index.initial_tanks.dtype == np.float32
+
+    path = str(tmp_path / "index.npz")
+    index.save(path)
+    np.testing.assert_array_equal(SessionIndex.load(path).initial_tanks, index.initial_tanks)
+
+    SessionIndex.build(prefectures).save(path)
+    assert SessionIndex.load(path).initial_tanks is None
+
+
+def test_recalculate_swi_and_risk_uses_true_initial_tanks():
+    tanks = (30.0, 12.0, 55.0)
+    rain_3h = [float(v) for v in np.linspace(0, 40, len(FTS_3H))]
+    rain_1h_max = [v * 0.6 for v in rain_3h]
+    expected = scalar_mesh("M0", tanks, rain_3h, rain_1h_max, (80, 110, 140))
+
+    mesh = make_mesh("M0", tanks)
+    mesh.swi = [SwiTimeSeries(ft=0, value=sum(tanks))]
+    mesh.rain_3hour = [GuidanceTimeSeries(ft=ft, value=v) for ft, v in zip(FTS_3H, rain_3h)]
+    mesh.rain_1hour_max = [GuidanceTimeSeries(ft=ft, value=v) for ft, v in zip(FTS_3H, rain_1h_max)]
+    mesh.rain_1hour = calc.calc_hourly_rain(mesh.rain_3hour, mesh.rain_1hour_max)
+
+    mesh = calc.recalculate_swi_and_risk(mesh)
+    assert [s.value for s in mesh.swi] == [p["value"] for p in expected["swi_timeline"]]
+    assert [s.value for s in mesh.swi_hourly] == [p["value"] for p in expected["swi_hourly_timeline"]]
+
+
+def test_scenarios_match_individual_recompute():
+    prefectures, inputs = make_result()
+    service = RainfallRecomputeService()
+    base = build_base(service, prefectures, inputs)
+
+    scenarios = [
+        base.scaled_adjustments({"滋賀県_南部": 0.5}),
+        base.scaled_adjustments({"滋賀県_南部": 3.0}),
+        {"滋賀県_C": {3: 200.0, 6: 200.0}},
+        {}
+    ]
+    result = service.evaluate_scenarios(base, scenarios)
+
+    # 全シナリオで同じ市町村・二次細分を返す
+    names = [[a["name"] for a in s["prefectures"]["shiga"]["areas"]] for s in result["scenarios"]]
+    assert names == [["A", "B", "C"]] * 4
+    assert [s["adjusted_mesh_count"] for s in result["scenarios"]] == [4, 4, 2, 0]
+
+    for adjustments, evaluated in zip(scenarios, result["scenarios"]):
+        single = service.recompute(base, adjustments)
+        single_areas = {
+            a["name"]: a["risk_timeline"]
+            for a in single["prefectures"].get("shiga", {}).get("areas", [])
+        }
+        baseline_areas = {
+            a["name"]: a["risk_timeline"]
+            for a in result["baseline"]["prefectures"]["shiga"]["areas"]
+        }
+        for area in evaluated["prefectures"]["shiga"]["areas"]:
+            expected = single_areas.get(area["name"], baseline_areas[area["name"]])
+            assert area["risk_timeline"] == expected
+
+        subdivisions = {
+            s["name"]: [p["value"] for p in s["risk_timeline"]]
+            for s in evaluated["prefectures"]["shiga"]["secondary_subdivisions"]
+        }
+        areas = {
+            a["name"]: [p["value"] for p in a["risk_timeline"]]
+            for a in evaluated["prefectures"]["shiga"]["areas"]
+        }
+        assert subdivisions["南部"] == [max(a, b) for a, b in zip(areas["A"], areas["B"])]
+        assert subdivisions["北部"] == areas["C"]
+
+
+def test_rainfall_scenarios_endpoint():
+    from flask import Flask
+    sys.path.append(os.path.join(project_root, 'src'))
+    from services.session_service import SessionService
+    from api.controllers.session_controller import SessionController
+    from api.routes.session_routes import create_session_blueprint
+
+    prefectures, inputs = make_result()
+    index = SessionIndex.build(prefectures)
+    session_service = SessionService()
+    session_id = session_service.create_session(
+        prefectures, "2023-06-02T00:00:00", "2023-06-02T00:00:00", 1.0,
+        result_key="result",
+        initial_tanks=np.array([inputs[code][0] for code in index.mesh_codes]))
+
+    app = Flask(__name__)
+    app.register_blueprint(
+        create_session_blueprint(SessionController(
+            session_service, RainfallRecomputeService(max_scenarios=2))),
+        url_prefix='/api')
+    client = app.test_client()
+
+    response = client.post(f"/api/session/{session_id}/rainfall-scenarios", json={
+        "scenarios": [
+            {"name": "x1.5", "scale": {"滋賀県_北部": 1.5}},
+            {"area_adjustments": {"滋賀県_A": {"3": 100.0}}}
+        ]
+    })
+    assert response.status_code == 200
+    data = response.get_json()
+    assert [s["name"] for s in data["scenarios"]] == ["x1.5", "scenario_2"]
+    assert [s["adjusted_mesh_count"] for s in data["scenarios"]] == [2, 3]
+    assert session_service.get_session_state(session_id) == {}
+
+    too_many = client.post(f"/api/session/{session_id}/rainfall-scenarios",
+                           json={"scenarios": [{}, {}, {}]})
+    assert too_many.status_code == 400
+
+    for body, key in (
+        ({"scenarios": [{"scale": {"滋賀県_北部": "x"}}]}, "scenarios[0].scale.滋賀県_北部"),
+        ({"scenarios": [{"area_adjustments": {"滋賀県_A": {"3": None}}}]}, "滋賀県_A.3"),
+        ({"scenarios": ["x1.5"]}, "scenarios[0]"),
+    ):
+        response = client.post(f"/api/session/{session_id}/rainfall-scenarios", json=body)
+        assert response.status_code == 400
+        assert key in response.get_json()["error"]
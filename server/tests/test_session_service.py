@@ -0,0 +1,431 @@
+# -*- coding: utf-8 -*-
+"""
+SessionService / SqliteSessionService / セッションAPI のテスト
+"""
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+
+from flask import Flask
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+sys.path.append(os.path.join(project_root, 'src'))
+
+from services.session_service import SessionService
+from services.sqlite_session_service import SqliteSessionService
+from api.controllers.session_controller import SessionController
+from api.routes.session_routes import create_session_blueprint
+
+
+def make_prefectures(n_areas: int = 3, n_meshes: int = 4) -> dict:
+    """result["prefectures"] 形式の小さな計算結果を作成"""
+    prefectures = {}
+    for p, pref_code in enumerate(["shiga", "kyoto"]):
+        areas = []
+        for a in range(n_areas):
+            meshes = []
+            for m in range(n_meshes):
+                seed = p * 100 + a * 10 + m
+                meshes.append({
+                    "code": f"5{p}{a}{m:05d}",
+                    "lat": 35.0,
+                    "lon": 135.0,
+                    "swi_timeline": [
+                        {"ft": ft, "value": float(seed + ft)}
+                        for ft in range(0, 9, 3)
+                    ],
+                    "risk_hourly_timeline": [
+                        {"ft": ft, "value": (seed + ft) % 5}
+                        for ft in range(0, 9)
+                    ],
+                    "risk_3hour_max_timeline": [
+                        {"ft": ft, "value": (seed + ft) % 4}
+                        for ft in (2, 5, 8)
+                    ]
+                })
+            areas.append({"name": f"area{a}", "meshes": meshes})
+        prefectures[pref_code] = {"name": pref_code, "code": pref_code,
+                                  "areas": areas}
+    return prefectures
+
+
+def _linear_risk_at_time(prefectures: dict, ft: int) -> dict:
+    """従来の線形探索による参照実装"""
+    mesh_risks = {}
+    for prefecture in prefectures.values():
+        for area in prefecture["areas"]:
+            for mesh in area["meshes"]:
+                value = 0
+                for point in mesh["risk_3hour_max_timeline"]:
+                    if point["ft"] == ft:
+                        value = point["value"]
+                        break
+                mesh_risks[mesh["code"]] = value
+    return mesh_risks
+
+
+def make_client(session_service: SessionService):
+    app = Flask(__name__)
+    app.register_blueprint(
+        create_session_blueprint(SessionController(session_service)),
+        url_prefix='/api')
+    return app.test_client()
+
+
+def test_risk_at_time_matches_linear_scan():
+    prefectures = make_prefectures()
+    service = SessionService()
+    session_id = service.create_session(
+        prefectures, "2025-10-16T12:00:00", "2025-10-16T06:00:00",
+        "2025-10-16T12:30:00")
+
+    for ft in (2, 5, 8, 3, 100):
+        assert (service.get_risk_at_time(session_id, ft)
+                == _linear_risk_at_time(prefectures, ft))
+
+
+def test_mesh_detail_uses_index():
+    prefectures = make_prefectures()
+    service = SessionService()
+    session_id = service.create_session(
+        prefectures, "2025-10-16T12:00:00", "2025-10-16T06:00:00",
+        "2025-10-16T12:30:00")
+
+    target = prefectures["kyoto"]["areas"][2]["meshes"][3]
+    assert service.get_mesh(session_id, target["code"]) is target
+    assert service.get_mesh(session_id, "00000000") is None
+    assert service.get_mesh("unknown", target["code"]) is None
+
+
+def test_session_endpoints():
+    prefectures = make_prefectures()
+    service = SessionService()
+    session_id = service.create_session(
+        prefectures, "2025-10-16T12:00:00", "2025-10-16T06:00:00",
+        "2025-10-16T12:30:00")
+    client = make_client(service)
+
+    code = prefectures["shiga"]["areas"][0]["meshes"][1]["code"]
+    res = client.get(f"/api/session/{session_id}/mesh/{code}")
+    assert res.status_code == 200
+    assert res.get_json()["mesh"]["code"] == code
+
+    res = client.get(f"/api/session/{session_id}/risk-at-time?ft=5")
+    assert res.status_code == 200
+    assert res.get_json()["mesh_risks"] == _linear_risk_at_time(prefectures, 5)
+
+    res = client.get(f"/api/session/{session_id}/prefecture/kyoto")
+    assert res.status_code == 200
+    assert res.get_json()["prefecture"]["code"] == "kyoto"
+
+    assert client.get("/api/session/unknown/mesh/x").status_code == 404
+
+
+def test_risk_snapshot_binary_and_etag():
+    prefectures = make_prefectures()
+    service = SessionService()
+    session_id = service.create_session(
+        prefectures, "2025-10-16T12:00:00", "2025-10-16T06:00:00",
+        "2025-10-16T12:30:00")
+    client = make_client(service)
+
+    order = client.get(f"/api/session/{session_id}/mesh-order").get_json()
+    assert order["risk_fts"] == [2, 5, 8]
+
+    res = client.get(f"/api/session/{session_id}/risk-at-time?ft=5&format=binary")
+    assert res.status_code == 200
+    assert res.mimetype == "application/octet-stream"
+    expected = _linear_risk_at_time(prefectures, 5)
+    assert list(res.data) == [expected[code] for code in order["mesh_codes"]]
+
+    # 同一ETagでの再取得は304
+    etag = res.headers["ETag"]
+    res = client.get(f"/api/session/{session_id}/risk-at-time?ft=5&format=binary",
+                     headers={"If-None-Match": etag})
+    assert res.status_code == 304
+
+    res = client.get(f"/api/session/{session_id}/risk-at-time?ft=5&format=array")
+    assert res.get_json()["risks"] == [expected[code] for code in order["mesh_codes"]]
+
+    # 該当FTなしは全0
+    res = client.get(f"/api/session/{session_id}/risk-at-time?ft=4&format=binary")
+    assert res.data == bytes(len(order["mesh_codes"]))
+
+
+def test_spill_to_disk_and_reload(tmp_path):
+    service = SessionService(max_resident_mb=1e-6, spill_dir=str(tmp_path))
+    first = make_prefectures()
+    first_id = service.create_session(
+        first, "2025-10-16T12:00:00", "2025-10-16T06:00:00",
+        "2025-10-16T12:30:00")
+    expected_first = make_prefectures()
+
+    # 上限を超えると最終アクセスが古いセッションから退避（作成直後は残る）
+    second_id = service.create_session(
+        make_prefectures(n_areas=2), "2025-10-16T15:00:00",
+        "2025-10-16T09:00:00", "2025-10-16T15:30:00")
+    stats = service.get_stats()
+    assert stats["spilled_results"] == 1
+    assert stats["resident_results"] == 1
+    # 推定サイズではなく退避ファイルのサイズ
+    assert stats["spilled_bytes"] == sum(p.stat().st_size for p in tmp_path.glob("*.npz"))
+    assert stats["spilled_bytes"] > 0
+    assert service.get_session_info(first_id)["resident"] is False
+    assert list(tmp_path.glob("*.npz"))
+
+    # リスク参照はインデックスのみで応答（読み戻しなし）
+    assert (service.get_risk_at_time(first_id, 5)
+            == _linear_risk_at_time(expected_first, 5))
+    assert service.get_session_info(first_id)["resident"] is False
+    assert service.reload_count == 0
+
+    # 府県データ要求で読み戻し、元の辞書と完全に一致
+    assert service.get_prefecture(first_id, "kyoto") == expected_first["kyoto"]
+    assert service.reload_count == 1
+    assert service.get_session_info(second_id)["resident"] is False
+
+    # 削除時に退避ファイルも消える
+    assert service.delete_session(first_id)
+    assert service.delete_session(second_id)
+    assert not list(tmp_path.glob("*.npz"))
+
+
+def test_unbounded_service_never_spills(tmp_path):
+    service = SessionService(spill_dir=str(tmp_path))
+    for hour in range(3):
+        service.create_session(
+            make_prefectures(), f"2025-10-16T{hour:02d}:00:00",
+            "2025-10-16T00:00:00", "2025-10-16T12:30:00")
+
+    stats = service.get_stats()
+    assert stats["resident_results"] == 3
+    assert stats["spilled_results"] == 0
+    assert stats["spilled_bytes"] == 0
+    assert len(service.list_sessions()) == 3
+    assert not list(tmp_path.iterdir())
+
+
+def test_sessions_share_result_by_key():
+    service = SessionService()
+    prefectures = make_prefectures()
+    first_id = service.create_session(
+        prefectures, "2025-10-16T12:00:00", "2025-10-16T06:00:00",
+        "2025-10-16T12:30:00", result_key="swi_a")
+    # 既存の共有結果があれば新しい計算結果は保持しない
+    second_id = service.create_session(
+        make_prefectures(), "2025-10-16T12:00:00", "2025-10-16T06:00:00",
+        "2025-10-16T12:31:00", result_key="swi_a")
+    third_id = service.create_session_for_result(
+        "swi_a", "2025-10-16T12:00:00", "2025-10-16T06:00:00",
+        "2025-10-16T12:32:00")
+
+    assert len({first_id, second_id, third_id}) == 3
+    assert service.get_stats()["shared_results"] == 1
+    assert service.get_prefecture(second_id, "shiga") is prefectures["shiga"]
+    assert service.get_session_info(third_id)["shared_sessions"] == 3
+    assert service.create_session_for_result(
+        "swi_b", "x", "y", "z") is None
+
+    # 利用者単位の状態はセッションごと
+    assert service.update_session_state(first_id, rainfall_adjustment={"a": 1.5})
+    assert service.get_session_state(first_id) == {
+        "rainfall_adjustment": {"a": 1.5}}
+    assert service.get_session_state(second_id) == {}
+
+    # 最後の参照が消えると共有結果も解放
+    assert service.delete_session(first_id)
+    assert service.delete_session(second_id)
+    assert service.get_stats()["shared_results"] == 1
+    assert service.delete_session(third_id)
+    assert service.get_stats()["shared_results"] == 0
+
+
+def _expire(service: SessionService, session_id: str):
+    service.sessions[session_id]["expires_at"] = datetime.now() - timedelta(seconds=1)
+
+
+def test_janitor_expires_sessions_and_reports_reclaimed_bytes(tmp_path):
+    service = SessionService(max_resident_mb=1e-6, spill_dir=str(tmp_path))
+    expired_first_id = service.create_session(
+        make_prefectures(), "2025-10-16T12:00:00", "2025-10-16T06:00:00",
+        "2025-10-16T12:30:00")
+    expired_second_id = service.create_session(
+        make_prefectures(), "2025-10-16T15:00:00", "2025-10-16T09:00:00",
+        "2025-10-16T15:30:00")
+    alive_id = service.create_session(
+        make_prefectures(), "2025-10-16T18:00:00", "2025-10-16T12:00:00",
+        "2025-10-16T18:30:00")
+    # 上限が極小なので最新以外は退避済み
+    assert service.get_stats()["spilled_results"] == 2
+    _expire(service, expired_first_id)
+    _expire(service, expired_second_id)
+
+    report = service.run_janitor_once()
+    assert report["expired"] == 2
+    assert report["released_results"] == 2
+    assert report["reclaimed_bytes"] > 0
+    assert report["reclaimed_disk_bytes"] > 0
+    assert not list(tmp_path.glob("*.npz"))
+    assert service.has_session(alive_id)
+    assert service.get_stats()["reclaimed_bytes"] == report["reclaimed_bytes"]
+
+
+def test_janitor_runs_in_background():
+    service = SessionService()
+    session_id = service.create_session(
+        make_prefectures(), "2025-10-16T12:00:00", "2025-10-16T06:00:00",
+        "2025-10-16T12:30:00")
+    _expire(service, session_id)
+
+    service.start_janitor(interval_seconds=0.05)
+    try:
+        deadline = time.time() + 5
+        while service.sessions and time.time() < deadline:
+            time.sleep(0.05)
+        assert service.get_stats()["janitor_running"]
+    finally:
+        service.stop_janitor()
+
+    assert not service.sessions
+    assert not service.results
+
+
+def _create_session(service, **kwargs) -> str:
+    return service.create_session(
+        make_prefectures(), "2025-10-16T12:00:00", "2025-10-16T06:00:00",
+        "2025-10-16T12:30:00", **kwargs)
+
+
+def test_sessions_are_visible_to_other_workers(tmp_path):
+    worker_a = SqliteSessionService(store_dir=str(tmp_path))
+    worker_b = SqliteSessionService(store_dir=str(tmp_path))
+    expected = make_prefectures()
+
+    session_id = _create_session(worker_a, result_key="swi_a")
+
+    # 別ワーカーはインデックスのみ読み込んでリスク参照
+    assert (worker_b.get_risk_at_time(session_id, 5)
+            == _linear_risk_at_time(expected, 5))
+    info = worker_b.get_session_info(session_id)
+    assert info["resident"] is False
+    snapshot = [p for p in tmp_path.glob("*.npz") if not p.name.endswith(".index.npz")]
+    assert worker_b.get_stats()["spilled_bytes"] == snapshot[0].stat().st_size
+    assert worker_b.get_prefecture(session_id, "kyoto") == expected["kyoto"]
+    assert worker_b.reload_count == 1
+    assert worker_b.get_stats()["spilled_bytes"] == 0
+
+    # 同じキーは他ワーカーの結果を共有
+    shared_id = worker_b.create_session_for_result(
+        "swi_a", "2025-10-16T12:00:00", "2025-10-16T06:00:00",
+        "2025-10-16T12:31:00")
+    assert worker_a.get_session_info(shared_id)["shared_sessions"] == 2
+
+    assert worker_b.update_session_state(session_id, rainfall_adjustment={"a": 2.0})
+    assert worker_a.get_session_state(session_id) == {
+        "rainfall_adjustment": {"a": 2.0}}
+
+    assert worker_b.delete_session(session_id)
+    assert worker_b.delete_session(shared_id)
+    assert not worker_a.has_session(session_id)
+    assert worker_a.get_stats()["shared_results"] == 0
+    assert not list(tmp_path.glob("*.npz"))
+
+
+def test_janitor_expires_sessions_across_workers(tmp_path):
+    worker_a = SqliteSessionService(store_dir=str(tmp_path))
+    worker_b = SqliteSessionService(store_dir=str(tmp_path))
+    session_id = _create_session(worker_a)
+    alive_id = _create_session(worker_a)
+    assert worker_b.get_prefecture(session_id, "shiga") is not None
+
+    past = (datetime.now() - timedelta(seconds=1)).timestamp()
+    worker_a._connect().execute(
+        "UPDATE sessions SET expires_at = ? WHERE session_id = ?",
+        (past, session_id))
+
+    report = worker_a.run_janitor_once()
+    assert report["expired"] == 1
+    assert report["released_results"] == 1
+    assert report["reclaimed_disk_bytes"] > 0
+
+    # 他ワーカーのプロセス内キャッシュも次のジャニターで破棄
+    assert worker_b.run_janitor_once()["reclaimed_bytes"] > 0
+    assert worker_b.get_stats()["resident_results"] == 0
+    assert worker_b.has_session(alive_id)
+    assert len(worker_b.list_sessions()) == 1
+
+
+def test_reads_do_not_take_write_lock(tmp_path):
+    service = SqliteSessionService(store_dir=str(tmp_path), touch_interval_seconds=60)
+    session_id = _create_session(service)
+    expired_id = _create_session(service)
+    conn = service._connect()
+    past = (datetime.now() - timedelta(seconds=1)).timestamp()
+    conn.execute("UPDATE sessions SET expires_at = ? WHERE session_id = ?",
+                 (past, expired_id))
+
+    # 別ワーカーが書き込みロックを保持していても参照できる
+    other = sqlite3.connect(service.db_path, timeout=0, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+    try:
+        assert service.get_available_times(session_id) is not None
+        assert service.get_risk_at_time(session_id, 5) is not None
+        assert service.get_session_info(expired_id) is None
+    finally:
+        other.execute("ROLLBACK")
+        other.close()
+
+    # 期限切れの行はジャニターが削除する
+    assert conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] == 2
+    assert service.run_janitor_once()["expired"] == 1
+
+    # 最終アクセス時刻は間隔を超えて古い場合のみ更新
+    stale = datetime.now().timestamp() - 120
+    conn.execute("UPDATE sessions SET last_accessed = ?", (stale,))
+    assert service.has_session(session_id)
+    touched = conn.execute("SELECT last_accessed FROM sessions").fetchone()[0]
+    assert touched > stale
+    assert service.has_session(session_id)
+    assert conn.execute("SELECT last_accessed FROM sessions").fetchone()[0] == touched
+
+
+def _read_in_child(store_dir: str, session_id: str, queue):
+    service = SqliteSessionService(store_dir=store_dir)
+    queue.put(service.get_risk_at_time(session_id, 5))
+
+
+def test_session_served_by_another_process(tmp_path):
+    import multiprocessing
+
+    service = SqliteSessionService(store_dir=str(tmp_path))
+    session_id = _create_session(service)
+
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    child = ctx.Process(target=_read_in_child,
+                        args=(str(tmp_path), session_id, queue))
+    child.start()
+    result = queue.get(timeout=60)
+    child.join()
+
+    assert child.exitcode == 0
+    assert result == _linear_risk_at_time(make_prefectures(), 5)
+
+
+def test_session_endpoints_with_sqlite_backend(tmp_path):
+    service = SqliteSessionService(store_dir=str(tmp_path))
+    session_id = _create_session(service)
+    client = make_client(SqliteSessionService(store_dir=str(tmp_path)))
+
+    order = client.get(f"/api/session/{session_id}/mesh-order").get_json()
+    res = client.get(f"/api/session/{session_id}/risk-at-time?ft=5&format=binary")
+    expected = _linear_risk_at_time(make_prefectures(), 5)
+    assert list(res.data) == [expected[code] for code in order["mesh_codes"]]
+
+    code = order["mesh_codes"][3]
+    res = client.get(f"/api/session/{session_id}/mesh/{code}")
+    assert res.get_json()["mesh"]["code"] == code
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+処理対象府県の検出（prefecture_registry）と全国規模の合成データ（synthetic_data）のテスト
+"""
+import os
+import sys
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from services.data_service import DataService
+from services.prefecture_registry import MANIFEST_FILENAME, discover_prefectures
+from services.synthetic_data import check_budget, generate
+
+DOSHA_ROWS = [
+    ("湖南", "大津市", "52354601", "100", "150"),
+    ("湖南", "大津市", "52354602", "|", ""),
+    ("湖南", "草津市", "52354611", "90", "120"),
+    ("湖北", "長浜市", "53360000", "80", "110"),
+]
+
+
+def write_dosha(data_dir, code, rows=DOSHA_ROWS):
+    dosha = "土砂災害警戒判定メッシュ情報\n二次細分,市町村,メッシュ,注意報,警報\n" + "".join(
+        ",".join(row) + "\n" for row in rows)
+    (data_dir / f"dosha_{code}.csv").write_bytes(dosha.encode("shift_jis"))
+
+
+def test_discover_prefectures_from_csv_and_manifest(tmp_path):
+    assert discover_prefectures(str(tmp_path / "missing")) == {}
+
+    for code in ("osaka", "shiga", "custom", "hokkaido"):
+        write_dosha(tmp_path, code)
+    (tmp_path / "dosyakei_kyoto.csv").write_text("GRIDNO,LEVEL3_00\n")
+
+    # dosha CSV のある府県を JIS 順、不明なコードは末尾
+    assert list(discover_prefectures(str(tmp_path)).items()) == [
+        ("hokkaido", "北海道"), ("shiga", "滋賀県"), ("osaka", "大阪府"), ("custom", "custom")]
+
+    # マニフェストがあれば記載順・名称を優先
+    (tmp_path / MANIFEST_FILENAME).write_text(
+        "prefectures:\n  - code: osaka\n  - code: custom\n    name: 試験県\n",
+        encoding="utf-8")
+    assert list(discover_prefectures(str(tmp_path)).items()) == [
+        ("osaka", "大阪府"), ("custom", "試験県")]
+
+    data_service = DataService(str(tmp_path))
+    assert [p.code for p in data_service.prepare_areas()] == ["osaka", "custom"]
+    assert data_service.get_prefecture("shiga") is None
+    assert data_service.get_prefecture("custom").name == "試験県"
+
+
+def test_generate_nationwide_data(tmp_path):
+    source_dir = tmp_path / "source"
+    out_dir = tmp_path / "nationwide"
+    source_dir.mkdir()
+    write_dosha(source_dir, "shiga")
+    (source_dir / "dosyakei_shiga.csv").write_text(
+        "GRIDNO,DATETIME,LEVEL3_00\n52354601,x,130\n53360000,x,200\n")
+
+    counts = generate(str(source_dir), str(out_dir), scale=3,
+                      prefecture_codes=["hokkaido", "okinawa", "kyoto"])
+    assert counts == {"hokkaido": 4, "okinawa": 4, "kyoto": 4}
+
+    prefectures = DataService(str(out_dir)).prepare_areas()
+    assert [(p.code, p.name) for p in prefectures] == \
+        [("hokkaido", "北海道"), ("okinawa", "沖縄県"), ("kyoto", "京都府")]
+
+    meshes = [m for p in prefectures for a in p.areas for m in a.meshes]
+    codes = [m.code for m in meshes]
+    assert len(set(codes)) == len(codes) == 12
+    # 雛形の基準値・市町村構成を保持
+    assert [(m.area_name, m.advisary_bound, m.warning_bound, m.dosyakei_bound)
+            for m in meshes[:4]] == [
+        ("大津市", 100, 150, 130), ("大津市", 9999, 9999, 999),
+        ("草津市", 90, 120, 999), ("長浜市", 80, 110, 200)]
+    # 雛形内の相対位置を保って平行移動
+    source = [DataService.parse_meshcodes([row[2] for row in DOSHA_ROWS])[i] for i in (0, 1)]
+    shifted = DataService.parse_meshcodes(codes[4:8])
+    assert list(shifted[0] - shifted[0][0]) == list(source[0] - source[0][0])
+    assert list(shifted[1] - shifted[1][0]) == list(source[1] - source[1][0])
+
+
+def test_generate_copies_template_with_suffixed_names(tmp_path):
+    write_dosha(tmp_path, "shiga")
+    out_dir = tmp_path / "out"
+
+    counts = generate(str(tmp_path), str(out_dir), scale=2.5, prefecture_codes=["nara"])
+    assert counts == {"nara": 10}
+
+    prefecture = DataService(str(out_dir)).get_prefecture("nara")
+    assert [a.name for a in prefecture.areas] == [
+        "大津市", "草津市", "長浜市", "大津市_2", "草津市_2", "長浜市_2", "大津市_3"]
+    assert [s.name for s in prefecture.secondary_subdivisions] == \
+        ["湖南", "湖北", "湖南_2", "湖北_2", "湖南_3"]
+
+
+def test_check_budget():
+    report = {"seconds": 120.0, "peak_rss_mb": 2048.0}
+    assert check_budget(report, {}) == []
+    assert check_budget(report, {"max_seconds": 300, "max_peak_rss_mb": 4096}) == []
+    assert len(check_budget(report, {"max_seconds": 60, "max_peak_rss_mb": 1024})) == 2
+    assert check_budget({"seconds": 1.0, "peak_rss_mb": None}, {"max_peak_rss_mb": 1}) == []